@@ -0,0 +1 @@
+"""Benchmarks of the generation and evaluation of the scripts."""
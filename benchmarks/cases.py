@@ -0,0 +1,603 @@
+"""Benchmarked artefacts.
+
+Every benchmark case is a function decorated with `benchmark`, which returns an `Artefact`: a generator of the locking
+script, whose cost is measured, and optionally a generator of a matching unlocking script, used to measure the
+evaluation time of `unlock + lock`.
+
+The data needed to build valid unlocking scripts (proofs, verifying keys, gradients, ...) is taken from the test
+suite. It is imported lazily, within the setup of each case, so that an unavailable dependency only skips the cases
+that need it.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from random import randrange, seed
+
+from tx_engine import SIGHASH, Script
+
+from src.zkscript.bilinear_pairings.bls12_381.fields import fq12_script
+from src.zkscript.bilinear_pairings.bls12_381.parameters import q
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import q as mnt4_753_q
+from src.zkscript.elliptic_curves.secp256k1.secp256k1 import Secp256k1
+from src.zkscript.fields.fq import Fq
+from src.zkscript.merkle_tree.merkle_tree import MerkleTree
+from src.zkscript.script_types.locking_keys.groth16 import Groth16LockingKey, Groth16LockingKeyWithPrecomputedMsm
+from src.zkscript.script_types.locking_keys.groth16_proj import (
+    Groth16ProjLockingKey,
+    Groth16ProjLockingKeyWithPrecomputedMsm,
+)
+from src.zkscript.script_types.locking_keys.reftx import RefTxLockingKey
+from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.script_types.unlocking_keys.groth16 import Groth16UnlockingKey, Groth16UnlockingKeyWithPrecomputedMsm
+from src.zkscript.script_types.unlocking_keys.groth16_proj import (
+    Groth16ProjBatchUnlockingKey,
+    Groth16ProjUnlockingKey,
+    Groth16ProjUnlockingKeyWithPrecomputedMsm,
+)
+from src.zkscript.script_types.unlocking_keys.merkle_tree import (
+    MerkleTreeBitFlagsUnlockingKey,
+    MerkleTreeTwoAuxUnlockingKey,
+)
+from src.zkscript.script_types.unlocking_keys.pairings import (
+    MultiPairingUnlockingKey,
+    SinglePairingUnlockingKey,
+    TriplePairingUnlockingKey,
+)
+from src.zkscript.script_types.unlocking_keys.reftx import RefTxUnlockingKey
+from src.zkscript.script_types.unlocking_keys.secp256k1 import Secp256k1PointMultiplicationUnlockingKey
+from src.zkscript.util.utility_scripts import nums_to_script
+
+
+@dataclass
+class Artefact:
+    """An artefact to benchmark.
+
+    Attributes:
+        generate (Callable[[], Script]): The function generating the locking script.
+        unlock (Callable[[], Script] | None): The function generating an unlocking script for the locking script, or
+            `None` if the evaluation should not be benchmarked.
+        z (bytes | None): The sighash to evaluate the script with, if the locking script uses OP_CHECKSIG.
+    """
+
+    generate: Callable[[], Script]
+    unlock: Callable[[], Script] | None = None
+    z: bytes | None = None
+
+
+@dataclass
+class BenchmarkCase:
+    """A named benchmark case.
+
+    Attributes:
+        name (str): The name of the case.
+        setup (Callable[[], Artefact]): The function preparing the artefact. It is not part of the measurements.
+    """
+
+    name: str
+    setup: Callable[[], Artefact]
+
+
+CASES: dict[str, BenchmarkCase] = {}
+
+
+def benchmark(name: str) -> Callable[[Callable[[], Artefact]], Callable[[], Artefact]]:
+    """Register the decorated function as the setup of the benchmark case `name`."""
+
+    def register(setup: Callable[[], Artefact]) -> Callable[[], Artefact]:
+        if name in CASES:
+            msg = f"Duplicate benchmark case: {name}"
+            raise ValueError(msg)
+        CASES[name] = BenchmarkCase(name, setup)
+        return setup
+
+    return register
+
+
+# Finite fields
+
+
+def _fq12_artefact(method: str, n_inputs: int) -> Artefact:
+    seed(42)
+    inputs = [randrange(q) for _ in range(n_inputs)]  # noqa: S311
+
+    return Artefact(
+        generate=lambda: getattr(fq12_script, method)(take_modulo=True, check_constant=True, clean_constant=True),
+        unlock=lambda: nums_to_script([q, *inputs]),
+    )
+
+
+@benchmark("fq12_mul_bls12_381")
+def fq12_mul() -> Artefact:
+    """Multiplication in F_q^12."""
+    return _fq12_artefact("mul", 24)
+
+
+@benchmark("fq12_square_bls12_381")
+def fq12_square() -> Artefact:
+    """Squaring in F_q^12."""
+    return _fq12_artefact("square", 12)
+
+
+def _fq_inverse_artefact(modulus: int, is_inverse_supplied: bool, addition_chain: bool = False) -> Artefact:
+    seed(42)
+    x = randrange(1, modulus)  # noqa: S311
+    fq_script = Fq(modulus)
+    modulo_threshold = 200 * 8
+
+    return Artefact(
+        generate=lambda: fq_script.inverse(
+            take_modulo=True,
+            check_constant=True,
+            clean_constant=True,
+            mod_frequency=modulo_threshold // (modulus.bit_length() * 3 + 3),
+            modulo_threshold=modulo_threshold,
+            x_inverse=StackFiniteFieldElement(1, False, 1) if is_inverse_supplied else None,
+            addition_chain=addition_chain,
+        ),
+        unlock=lambda: nums_to_script([modulus, *([pow(x, -1, modulus)] if is_inverse_supplied else []), x]),
+    )
+
+
+for _curve, _modulus in [("bls12_381", q), ("mnt4_753", mnt4_753_q)]:
+    benchmark(f"fq_inverse_{_curve}")(lambda modulus=_modulus: _fq_inverse_artefact(modulus, False))
+    benchmark(f"fq_inverse_supplied_{_curve}")(lambda modulus=_modulus: _fq_inverse_artefact(modulus, True))
+
+for _curve, _modulus in [("bls12_381", q), ("mnt4_753", mnt4_753_q), ("secp256k1", Secp256k1.MODULUS)]:
+    benchmark(f"fq_inverse_chain_{_curve}")(lambda modulus=_modulus: _fq_inverse_artefact(modulus, False, True))
+
+
+# Bilinear pairings
+
+
+def _pairing_config(curve: str):
+    from tests.bilinear_pairings.test_bilinear_pairings import Bls12381, Bn254, Mnt4753  # noqa: PLC0415
+
+    return {"bls12_381": Bls12381, "bn254": Bn254, "mnt4_753": Mnt4753}[curve]
+
+
+def _miller_loop_gradients(config, point_q) -> list[list[list[int]]]:
+    # The gradients of the lines through the Frobenius of `point_q` are empty if the Miller loop has no such lines
+    gradients = [[s.to_list() for s in el] for el in point_q.gradients(config.exp_miller_loop)]
+    return gradients + config.test_script_pairing.frobenius_gradients(point_q.to_list(), gradients)
+
+
+def _single_pairing_artefact(curve: str) -> Artefact:
+    config = _pairing_config(curve)
+    test_data = next(
+        data
+        for data in config.test_data["test_single_pairing"]
+        if not data["point_p"].is_infinity() and not data["point_q"].is_infinity()
+    )
+    gradients = _miller_loop_gradients(config, test_data["point_q"])
+    unlocking_key = SinglePairingUnlockingKey(
+        test_data["point_p"].to_list(), test_data["point_q"].to_list(), gradients, test_data["miller_loop_inverse"]
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script_pairing.single_pairing(
+            modulo_threshold=1, check_constant=True, clean_constant=True
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script_pairing),
+    )
+
+
+def _triple_pairing_artefact(curve: str) -> Artefact:
+    config = _pairing_config(curve)
+    test_data = config.test_data["test_triple_pairing"][0]
+    gradients = [_miller_loop_gradients(config, test_data["point_q"][i]) for i in range(3)]
+    unlocking_key = TriplePairingUnlockingKey(
+        [point.to_list() for point in test_data["point_p"]],
+        [point.to_list() for point in test_data["point_q"]],
+        gradients,
+        test_data["miller_loop_inverse"].to_list(),
+        has_precomputed_gradients=False,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script_pairing.triple_pairing(
+            modulo_threshold=1,
+            check_constant=True,
+            clean_constant=True,
+            is_precomputed_gradients_on_stack=False,
+            precomputed_gradients=gradients[1:],
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script_pairing),
+    )
+
+
+def _multi_pairing_artefact(curve: str) -> Artefact:
+    config = _pairing_config(curve)
+    test_data = config.test_data["test_triple_pairing"][0]
+    # The three pairs of the triple pairing, twice
+    unlocking_key = MultiPairingUnlockingKey(
+        [point.to_list() for point in test_data["point_p"]] * 2,
+        [point.to_list() for point in test_data["point_q"]] * 2,
+        (test_data["miller_loop_inverse"] * test_data["miller_loop_inverse"]).to_list(),
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script_pairing.multi_pairing(
+            n_pairs=6, modulo_threshold=1, check_constant=True, clean_constant=True
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script_pairing),
+    )
+
+
+def _scheduled_pairing_artefact(curve: str) -> Artefact:
+    config = _pairing_config(curve)
+    test_data = config.test_data["test_triple_pairing"][0]
+    gradients = [_miller_loop_gradients(config, test_data["point_q"][i]) for i in range(3)]
+    # The gradients of Q2 and Q3 are hard-coded, as in `triple_pairing_<curve>`
+    schedule = config.test_script_pairing.miller_loop_schedule(n_pairs=3, is_precomputed=[False, True, True])
+    unlocking_key = MultiPairingUnlockingKey(
+        [point.to_list() for point in test_data["point_p"]],
+        [point.to_list() for point in test_data["point_q"]],
+        test_data["miller_loop_inverse"].to_list(),
+        gradients=gradients,
+        affine_steps=list(schedule.affine_steps),
+        has_precomputed_gradients=[False, True, True],
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script_pairing.multi_pairing(
+            n_pairs=3,
+            modulo_threshold=1,
+            check_constant=True,
+            clean_constant=True,
+            affine_steps=list(schedule.affine_steps),
+            precomputed_gradients=[None, gradients[1], gradients[2]],
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script_pairing),
+    )
+
+
+for _curve in ["bls12_381", "mnt4_753"]:
+    benchmark(f"single_pairing_{_curve}")(lambda curve=_curve: _single_pairing_artefact(curve))
+    benchmark(f"triple_pairing_{_curve}")(lambda curve=_curve: _triple_pairing_artefact(curve))
+    benchmark(f"multi_pairing_6_{_curve}")(lambda curve=_curve: _multi_pairing_artefact(curve))
+    benchmark(f"scheduled_pairing_{_curve}")(lambda curve=_curve: _scheduled_pairing_artefact(curve))
+
+# The test data of BN254 has no single pairing
+benchmark("triple_pairing_bn254")(lambda: _triple_pairing_artefact("bn254"))
+benchmark("multi_pairing_6_bn254")(lambda: _multi_pairing_artefact("bn254"))
+benchmark("scheduled_pairing_bn254")(lambda: _scheduled_pairing_artefact("bn254"))
+
+
+# Groth16
+
+
+def _groth16_config(curve: str):
+    from tests.groth16.test_groth16 import Bls12381, Bn254, Mnt4753  # noqa: PLC0415
+
+    return {"bls12_381": Bls12381, "bn254": Bn254, "mnt4_753": Mnt4753}[curve]
+
+
+def _groth16_artefact(curve: str, fixed_lines: bool = False) -> Artefact:
+    config = _groth16_config(curve)
+    prepared_vk, prepared_proof = config.prepared_vk, config.prepared_proofs[0]
+    max_multipliers = config.max_multipliers[0]
+    unlocking_key = Groth16UnlockingKey.from_data(
+        groth16_model=config.test_script,
+        pub=prepared_proof.public_statements,
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        gradients_pairings=[
+            prepared_proof.gradients_b,
+            prepared_proof.gradients_minus_gamma,
+            prepared_proof.gradients_minus_delta,
+        ],
+        gradients_multiplications=prepared_proof.gradients_multiplications,
+        max_multipliers=max_multipliers,
+        gradients_additions=prepared_proof.gradients_additions,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gradient_gamma_abc_zero=prepared_proof.gradient_gamma_abc_zero,
+        has_precomputed_gradients=False,
+    )
+    locking_key = Groth16LockingKey(
+        alpha_beta=config.alpha_beta[0].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=True,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.groth16_verifier(
+            locking_key,
+            modulo_threshold=200 * 8,
+            max_multipliers=max_multipliers,
+            check_constant=True,
+            clean_constant=True,
+            fixed_lines=fixed_lines,
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script, True),
+    )
+
+
+def _groth16_with_precomputed_msm_artefact(curve: str) -> Artefact:
+    config = _groth16_config(curve)
+    prepared_vk, prepared_proof = config.prepared_vk, config.prepared_proofs[0]
+    unlocking_key = Groth16UnlockingKeyWithPrecomputedMsm(
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        gradients_pairings=[
+            prepared_proof.gradients_b,
+            prepared_proof.gradients_minus_gamma,
+            prepared_proof.gradients_minus_delta,
+        ],
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        precomputed_msm=config.sum_gamma_abc[0].to_list(),
+        has_precomputed_gradients=False,
+    )
+    locking_key = Groth16LockingKeyWithPrecomputedMsm(
+        alpha_beta=config.alpha_beta[0].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=True,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.groth16_verifier_with_precomputed_msm(
+            locking_key, modulo_threshold=200 * 8, check_constant=True, clean_constant=True
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script, True),
+    )
+
+
+def _groth16_proj_artefact(curve: str, is_affine_msm_supplied: bool = False) -> Artefact:
+    config = _groth16_config(curve)
+    prepared_vk, prepared_proof = config.prepared_vk, config.prepared_proofs[0]
+    max_multipliers = config.max_multipliers[0]
+    unlocking_key = Groth16ProjUnlockingKey.from_data(
+        groth16_model=config.test_script,
+        pub=prepared_proof.public_statements,
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        max_multipliers=max_multipliers,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gamma_abc=prepared_vk.gamma_abc if is_affine_msm_supplied else None,
+    )
+    locking_key = Groth16ProjLockingKey(
+        alpha_beta=config.alpha_beta[0].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.groth16_verifier_proj(
+            locking_key,
+            modulo_threshold=200 * 8,
+            max_multipliers=max_multipliers,
+            check_constant=True,
+            clean_constant=True,
+            is_affine_msm_supplied=is_affine_msm_supplied,
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script, True),
+    )
+
+
+def _groth16_proj_with_precomputed_msm_artefact(curve: str) -> Artefact:
+    config = _groth16_config(curve)
+    prepared_vk, prepared_proof = config.prepared_vk, config.prepared_proofs[0]
+    unlocking_key = Groth16ProjUnlockingKeyWithPrecomputedMsm(
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        precomputed_msm=config.sum_gamma_abc[0].to_list(),
+    )
+    locking_key = Groth16ProjLockingKeyWithPrecomputedMsm(
+        alpha_beta=config.alpha_beta[0].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.groth16_verifier_proj_with_precomputed_msm(
+            locking_key, modulo_threshold=200 * 8, check_constant=True, clean_constant=True
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script, True),
+    )
+
+
+def _groth16_batch_proj_artefact(curve: str, n_proofs: int) -> Artefact:
+    from tests.groth16.test_groth16 import batch_miller_output_inverse, batch_proofs  # noqa: PLC0415
+
+    config = _groth16_config(curve)
+    prepared_vk = config.prepared_vk
+    pub, A, B, C = batch_proofs(config, n_proofs)
+    points_p = Groth16ProjBatchUnlockingKey.batch_points(config.test_script, pub, A, B, C, prepared_vk.gamma_abc)
+    unlocking_key = Groth16ProjBatchUnlockingKey.from_data(
+        groth16_model=config.test_script,
+        pub=pub,
+        A=A,
+        B=B,
+        C=C,
+        inverse_miller_output=batch_miller_output_inverse(
+            config, points_p, [*B, prepared_vk.minus_delta, prepared_vk.minus_gamma]
+        ),
+        gamma_abc=prepared_vk.gamma_abc,
+    )
+    locking_key = Groth16ProjLockingKey(
+        alpha_beta=config.alpha_beta[1].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.groth16_batch_verifier_proj(
+            locking_key, n_proofs=n_proofs, modulo_threshold=200 * 8, check_constant=True, clean_constant=True
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script),
+    )
+
+
+for _curve in ["bls12_381", "mnt4_753"]:
+    benchmark(f"groth16_{_curve}")(lambda curve=_curve: _groth16_artefact(curve))
+    benchmark(f"groth16_fixed_lines_{_curve}")(lambda curve=_curve: _groth16_artefact(curve, True))
+    benchmark(f"groth16_with_precomputed_msm_{_curve}")(
+        lambda curve=_curve: _groth16_with_precomputed_msm_artefact(curve)
+    )
+    benchmark(f"groth16_proj_{_curve}")(lambda curve=_curve: _groth16_proj_artefact(curve))
+    benchmark(f"groth16_proj_affine_msm_{_curve}")(lambda curve=_curve: _groth16_proj_artefact(curve, True))
+    benchmark(f"groth16_proj_with_precomputed_msm_{_curve}")(
+        lambda curve=_curve: _groth16_proj_with_precomputed_msm_artefact(curve)
+    )
+    for _n_proofs in range(2, 9):
+        benchmark(f"groth16_batch_proj_{_n_proofs}_{_curve}")(
+            lambda curve=_curve, n_proofs=_n_proofs: _groth16_batch_proj_artefact(curve, n_proofs)
+        )
+
+# The test data of BN254 has no gradients of the msm, and no batch of proofs
+benchmark("groth16_with_precomputed_msm_bn254")(lambda: _groth16_with_precomputed_msm_artefact("bn254"))
+benchmark("groth16_proj_bn254")(lambda: _groth16_proj_artefact("bn254"))
+benchmark("groth16_proj_affine_msm_bn254")(lambda: _groth16_proj_artefact("bn254", True))
+benchmark("groth16_proj_with_precomputed_msm_bn254")(lambda: _groth16_proj_with_precomputed_msm_artefact("bn254"))
+
+
+# RefTx
+
+
+def _reftx_artefact(curve: str) -> Artefact:
+    from tests.reftx.test_reftx import Bls12381, Mnt4753  # noqa: PLC0415
+
+    config = {"bls12_381": Bls12381, "mnt4_753": Mnt4753}[curve]
+    prepared_vk, prepared_proof = config.prepared_vk[0], config.prepared_proofs[0]
+    unlocking_key = RefTxUnlockingKey.from_data(
+        groth16_model=config.test_script_groth16,
+        pub=prepared_proof.public_statements,
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        gradients_pairings=[
+            prepared_proof.gradients_b,
+            prepared_proof.gradients_minus_gamma,
+            prepared_proof.gradients_minus_delta,
+        ],
+        gradients_multiplications=prepared_proof.gradients_multiplications,
+        max_multipliers=config.max_multipliers[0],
+        gradients_additions=prepared_proof.gradients_additions,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gradient_precomputed_l_out=prepared_proof.gradient_gamma_abc_zero,
+        has_precomputed_gradients=False,
+        use_proj_coordinates=False,
+    )
+    locking_key = RefTxLockingKey(
+        alpha_beta=config.alpha_beta[0].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        precomputed_l_out=prepared_vk.gamma_abc[0],
+        gamma_abc_without_l_out=prepared_vk.gamma_abc[1:],
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        sighash_flags=SIGHASH.ALL_FORKID,
+        has_precomputed_gradients=True,
+        use_proj_coordinates=False,
+    )
+
+    return Artefact(
+        generate=lambda: config.test_script.locking_script(
+            sighash_flags=SIGHASH.ALL_FORKID,
+            locking_key=locking_key,
+            modulo_threshold=200 * 8,
+            max_multipliers=None,
+            check_constant=True,
+        ),
+        unlock=lambda: unlocking_key.to_unlocking_script(config.test_script_groth16),
+        z=config.sighash,
+    )
+
+
+for _curve in ["bls12_381", "mnt4_753"]:
+    benchmark(f"reftx_{_curve}")(lambda curve=_curve: _reftx_artefact(curve))
+
+
+# secp256k1
+
+
+@benchmark("secp256k1_point_multiplication")
+def secp256k1_point_multiplication() -> Artefact:
+    """Verification of a point multiplication on secp256k1."""
+    from tests.elliptic_curves.sep256k1.test_secp256k1 import (  # noqa: PLC0415
+        Fr_k1,
+        dummy_pre_sig_hash,
+        dummy_sighash,
+        generator,
+        h,
+    )
+
+    b, P = 110, generator.multiply(547)
+    Q = P.multiply(b)
+    d = [Fr_k1(h) * Fr_k1(Q.x.x).invert(), Fr_k1(h) * Fr_k1((Q + generator.multiply(b)).x.x).invert()]
+    s = [Fr_k1(Q.x.x) * Fr_k1(b).invert(), Fr_k1((Q + generator.multiply(b)).x.x) * Fr_k1(b).invert()]
+    D = [generator.multiply(d[0].x), generator.multiply(d[1].x - 1), generator.multiply(b)]
+    gradients = [P.gradient(-D[0]), P.gradient(-D[1]), Q.gradient(D[2])]
+    unlocking_key = Secp256k1PointMultiplicationUnlockingKey(
+        sig_hash_preimage=dummy_pre_sig_hash,
+        h=dummy_sighash,
+        s=[el.to_list()[0] for el in s],
+        gradients=[el.to_list()[0] for el in gradients],
+        d=[el.to_list()[0] for el in d],
+        D=[el.to_list() for el in D],
+        Q=Q.to_list(),
+        b=b,
+        P=P.to_list(),
+    )
+
+    return Artefact(
+        generate=lambda: Secp256k1.verify_point_multiplication(True, True),
+        unlock=unlocking_key.to_unlocking_script,
+        z=dummy_sighash,
+    )
+
+
+# Merkle trees
+
+
+def _merkle_test_data(test_name: str) -> dict:
+    from tests.merkle_tree.test_merkle_trees import MerkleTree  # noqa: PLC0415
+
+    return next(data for data in MerkleTree.test_data[test_name] if data["hash_function"] == "OP_SHA256")
+
+
+@benchmark("merkle_proof_with_bit_flags")
+def merkle_proof_with_bit_flags() -> Artefact:
+    """Verification of a Merkle proof with bit flags, for a tree of depth 3."""
+    test_data = _merkle_test_data("test_merkle_proof_with_bit_flags")
+    merkle_tree = MerkleTree(root=test_data["root"], hash_function=test_data["hash_function"], depth=test_data["depth"])
+    unlocking_key = MerkleTreeBitFlagsUnlockingKey(data=test_data["d"], aux=test_data["aux"], bit=test_data["bit"])
+
+    return Artefact(
+        generate=merkle_tree.locking_merkle_proof_with_bit_flags,
+        unlock=lambda: unlocking_key.to_unlocking_script(merkle_tree=merkle_tree),
+    )
+
+
+@benchmark("merkle_proof_with_two_aux")
+def merkle_proof_with_two_aux() -> Artefact:
+    """Verification of a Merkle proof with two auxiliary lists, for a tree of depth 3."""
+    test_data = _merkle_test_data("test_merkle_proof_with_two_aux")
+    merkle_tree = MerkleTree(root=test_data["root"], hash_function=test_data["hash_function"], depth=test_data["depth"])
+    unlocking_key = MerkleTreeTwoAuxUnlockingKey(
+        data=test_data["d"], aux_left=test_data["aux_left"], aux_right=test_data["aux_right"]
+    )
+
+    return Artefact(
+        generate=merkle_tree.locking_merkle_proof_with_two_aux,
+        unlock=lambda: unlocking_key.to_unlocking_script(merkle_tree=merkle_tree),
+    )
@@ -0,0 +1,180 @@
+"""Run the benchmark suite and compare the results against a baseline.
+
+For every case in `benchmarks.cases`, the runner measures:
+- `generation_time`: the wall-clock time (in seconds) needed to generate the locking script, minimum over the repeats
+- `peak_memory`: the peak memory (in bytes) allocated while generating the locking script, measured with `tracemalloc`
+    in a separate run, as tracing slows down the generation
+- `script_size`: the size (in bytes) of the locking script
+- `evaluation_time`: the wall-clock time (in seconds) of `Context(script=unlock + lock).evaluate()`
+- `evaluation_success`: the result of the evaluation
+- `estimated_evaluation_time`: the time (in seconds) taken to evaluate `unlock + lock` estimated by the default
+    `ExecutionCostModel`, to be compared with `evaluation_time`
+
+Cases whose setup fails with an `ImportError` (e.g., because the package `elliptic_curves` used to build the test data
+is not installed) are reported as skipped.
+
+Example:
+    >>> python -m benchmarks.run --output results.json
+    >>> python -m benchmarks.run --filter groth16 --baseline results.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+
+from tx_engine import Context
+
+from benchmarks.cases import CASES, BenchmarkCase
+from src.zkscript.util.execution_cost import ExecutionCostModel
+
+# Timed metrics, with the absolute increase below which a difference is considered noise
+TIMED_METRICS = {"generation_time": 1e-3, "peak_memory": 2**16, "evaluation_time": 1e-3}
+
+
+def run_case(case: BenchmarkCase, repeat: int, evaluate: bool) -> dict:
+    """Run the benchmark case `case`.
+
+    Args:
+        case (BenchmarkCase): The case to run.
+        repeat (int): The number of times the locking script is generated to measure the generation time.
+        evaluate (bool): Whether to measure and estimate the evaluation time.
+
+    Returns:
+        The measurements of the case, or `{"skipped": reason}` if the setup of the case raised an `ImportError`.
+    """
+    try:
+        artefact = case.setup()
+    except ImportError as error:
+        return {"skipped": str(error)}
+
+    generation_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lock = artefact.generate()
+        generation_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    artefact.generate()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "generation_time": min(generation_times),
+        "peak_memory": peak_memory,
+        "script_size": len(lock.raw_serialize()),
+    }
+
+    if evaluate and artefact.unlock is not None:
+        script = artefact.unlock() + lock
+        context = Context(script=script) if artefact.z is None else Context(script=script, z=artefact.z)
+        start = time.perf_counter()
+        result["evaluation_success"] = context.evaluate()
+        result["evaluation_time"] = time.perf_counter() - start
+        result["estimated_evaluation_time"] = ExecutionCostModel().estimate(script).validation_time
+
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Compare `results` against `baseline`.
+
+    Args:
+        results (dict): The results of the current run, indexed by case name.
+        baseline (dict): The results of the baseline run, indexed by case name.
+        tolerance (float): The relative increase of the timed metrics (see `TIMED_METRICS`) above which a case is
+            reported as a regression. Script sizes are deterministic, so any increase is a regression.
+
+    Returns:
+        The list of regressions, as human-readable strings.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or "skipped" in result or "skipped" in reference:
+            continue
+        if result["script_size"] > reference["script_size"]:
+            regressions.append(f"{name}: script_size {reference['script_size']} -> {result['script_size']}")
+        for metric, noise in TIMED_METRICS.items():
+            if metric not in result or metric not in reference:
+                continue
+            if result[metric] > max(reference[metric] * (1 + tolerance), reference[metric] + noise):
+                regressions.append(f"{name}: {metric} {reference[metric]:.4g} -> {result[metric]:.4g}")
+        if reference.get("evaluation_success") and result.get("evaluation_success") is False:
+            regressions.append(f"{name}: evaluation no longer succeeds")
+    return regressions
+
+
+def format_result(name: str, result: dict, reference: dict | None) -> str:
+    """Format the result of a case as a line of the summary table."""
+    if "skipped" in result:
+        return f"{name:<45} skipped ({result['skipped']})"
+
+    size = f"{result['script_size']:>10}"
+    if reference is not None and "script_size" in reference:
+        size += f" ({result['script_size'] - reference['script_size']:+})"
+    evaluation = (
+        f"{result['evaluation_time']:>8.3f}s {'ok' if result['evaluation_success'] else 'FAILED'} "
+        f"(estimated {result['estimated_evaluation_time']:.3f}s)"
+        if "evaluation_time" in result
+        else "-"
+    )
+    return (
+        f"{name:<45} {size:<22} {result['generation_time']:>8.3f}s "
+        f"{result['peak_memory'] / 2**20:>9.1f}MiB {evaluation}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks selected on the command line, and return the exit code of the process."""
+    parser = argparse.ArgumentParser(description="Benchmark script generation time, script size and evaluation time.")
+    parser.add_argument("--filter", default="", help="Regular expression selecting the cases to run")
+    parser.add_argument("--list", action="store_true", help="List the available cases and exit")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of generations timed per case")
+    parser.add_argument("--no-evaluate", action="store_true", help="Do not measure the evaluation time")
+    parser.add_argument("--output", type=Path, help="Path of the JSON file where the results are written")
+    parser.add_argument("--baseline", type=Path, help="Path of a JSON file of results to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Relative increase of the timed metrics reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    cases = [case for name, case in CASES.items() if re.search(args.filter, name)]
+    if args.list:
+        print("\n".join(case.name for case in cases))  # noqa: T201
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline is not None else {}
+
+    results = {}
+    print(f"{'case':<45} {'script size':<22} {'generation':>9} {'peak memory':>12} evaluation")  # noqa: T201
+    for case in cases:
+        results[case.name] = run_case(case, args.repeat, not args.no_evaluate)
+        print(format_result(case.name, results[case.name], baseline.get(case.name)), flush=True)  # noqa: T201
+
+    if args.output is not None:
+        output = {
+            "metadata": {
+                "date": datetime.now(UTC).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        args.output.write_text(json.dumps(output, indent=2) + "\n")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))  # noqa: T201
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
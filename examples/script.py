@@ -22,6 +22,8 @@ from src.zkscript.groth16.mnt4_753.mnt4_753 import mnt4_753 as mnt4_753_groth
 from src.zkscript.groth16.model.groth16 import Groth16
 from src.zkscript.script_types.locking_keys.groth16 import Groth16LockingKey
 from src.zkscript.script_types.unlocking_keys.groth16 import Groth16UnlockingKey
+from src.zkscript.util.script_cache import ScriptCache
+from src.zkscript.util.script_profiler import script_profiler
 
 verification_flags = 1
 for f in ScriptFlags._member_names_[1:-2]:
@@ -119,7 +121,7 @@ def proof_to_unlock(
     return unlocking_key.to_unlocking_script(groth16_script, True)
 
 
-def vk_to_lock(vk: VerifyingKey, groth16_script: Groth16) -> Script:
+def vk_to_lock(vk: VerifyingKey, groth16_script: Groth16, cache: ScriptCache | None = None) -> Script:
     prepared_vk = vk.prepare_for_zkscript()
 
     locking_key = Groth16LockingKey(
@@ -137,6 +139,7 @@ def vk_to_lock(vk: VerifyingKey, groth16_script: Groth16) -> Script:
         modulo_threshold=200 * 8,
         check_constant=True,
         clean_constant=True,
+        cache=cache,
     )
 
 
@@ -215,6 +218,15 @@ parser.add_argument(
     "--config", type=str, help="JSON configuration file for transaction construction and broadcast", required=False
 )
 parser.add_argument("--regtest", type=bool, help="Test in regtest", default=False, required=False)
+parser.add_argument(
+    "--cache_dir", type=str, help="Directory where generated locking scripts are cached", required=False
+)
+parser.add_argument(
+    "--profile",
+    type=str,
+    help="Path prefix of the size profile of the locking script (written to <profile>.json and <profile>.folded)",
+    required=False,
+)
 
 if __name__ == "__main__":
     # Fetch cli arguments
@@ -236,7 +248,14 @@ if __name__ == "__main__":
     )
 
     # Construct locking and unlocking scripts
-    lock = vk_to_lock(vk, groth16_script)
+    cache = ScriptCache(args.cache_dir) if args.cache_dir is not None else None
+    if args.profile is not None:
+        with script_profiler.active():
+            lock = vk_to_lock(vk, groth16_script, cache)
+        script_profiler.write_json(f"{args.profile}.json")
+        script_profiler.write_folded(f"{args.profile}.folded")
+    else:
+        lock = vk_to_lock(vk, groth16_script, cache)
     unlock = proof_to_unlock(public_inputs[1:], proof, vk, groth16_script)
 
     context = Context(script=unlock + lock)
@@ -4,6 +4,7 @@ This package provides subpackages for constructing Bitcoin scripts that perform
 
 Subpackages:
     - bls12_381: Contains modules for constructing Bitcoin scripts that perform bilinear pairings over BLS12-381.
+    - bn254: Contains modules for constructing Bitcoin scripts that perform bilinear pairings over BN254.
     - mnt4_753: Contains modules for constructing Bitcoin scripts that perform bilinear pairings over MNT4-753.
     - model: Contains modules for constructing Bitcoin scripts that perform bilinear pairings and Miller loop
     computations.
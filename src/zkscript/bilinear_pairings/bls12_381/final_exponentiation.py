@@ -1,5 +1,7 @@
 """Bitcoin scripts that perform the final exponentiation in the pairing for BLS12-381."""
 
+from collections.abc import Callable
+
 from tx_engine import Script
 
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq12_script, fq12cubic_script
@@ -7,6 +9,9 @@ from src.zkscript.bilinear_pairings.bls12_381.parameters import exp_miller_loop
 from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import CyclotomicExponentiation
 from src.zkscript.fields.fq12_2_over_3_over_2 import Fq12
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import move, pick, roll, verify_bottom_constant
 
 
@@ -18,7 +23,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         fq12 (Fq12): Bitcoin script instance to perform arithmetic operations in F_q^12, the quadratic extension of
             F_q^6.
         cyclotomic_inverse (function): Cyclotomic inverse function in F_q^12.
-        square (function): Square function in F_q^12.
+        square (function): Square function in the cyclotomic subgroup of F_q^12.
         mul (function): Multiply function in F_q^12.
         extension_degree (int): Extension degree of the field. Equal to 12.
     """
@@ -33,10 +38,12 @@ class FinalExponentiation(CyclotomicExponentiation):
         self.modulus = fq12.modulus
         self.fq12 = fq12
         self.cyclotomic_inverse = fq12.conjugate
-        self.square = fq12.square
+        self.square = fq12.cyclotomic_square
         self.mul = fq12.mul
         self.extension_degree = 12
 
+    @profile_script
+    @check_stack_effect
     def easy_exponentiation_with_inverse_check(
         self,
         take_modulo: bool,
@@ -124,6 +131,8 @@ class FinalExponentiation(CyclotomicExponentiation):
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def hard_exponentiation(
         self,
         take_modulo: bool,
@@ -131,6 +140,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         positive_modulo: bool = True,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        lazy_modulo: bool = False,
     ) -> Script:
         """Hard part of the final exponentiation.
 
@@ -148,6 +158,8 @@ class FinalExponentiation(CyclotomicExponentiation):
             positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            lazy_modulo (bool): If `True`, the cyclotomic exponentiations place their reductions in the lazy mode
+                (see `CyclotomicExponentiation.cyclotomic_exponentiation`). Defaults to `False`.
 
         Returns:
             Script to perform the hard part of the exponentiation in the pairing for BLS12-381.
@@ -158,169 +170,179 @@ class FinalExponentiation(CyclotomicExponentiation):
         """
         out = verify_bottom_constant(self.modulus) if check_constant else Script()
 
-        # Step 1
-        # After this, the stack is g t0
-        out += pick(position=11, n_elements=12)
-        out += self.fq12.square(
-            take_modulo=True,
-            positive_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            is_constant_reused=False,
+        steps, defaults = self.__hard_exponentiation_steps(
+            take_modulo, modulo_threshold, positive_modulo, clean_constant, lazy_modulo
         )
-
-        # Step 2
-        # After this, the stack is g t0 t1
-        out += pick(position=11, n_elements=12)  # Duplicate t0
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop,
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
-        )  # Compute t1
-
-        # Step 3
-        # After this, the stack is g t0 t1 t2
-        out += pick(position=11, n_elements=12)  # Duplicate t1
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop[1:],
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
-        )  # Compute t2
-
-        # Step 4
-        # After this, the stack is g t0 t1 t2 t3
-        out += pick(position=47, n_elements=12)  # Pick g
-        out += self.fq12.conjugate(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t3
-        # Step 5
-        # After this, the stack is: g t0 t2 t1
-        out += roll(position=35, n_elements=12)  # Roll t1
-        out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t1 * t3
-
-        # Step 6
-        # After this, the stack is g t0 t2 t1
-        out += self.fq12.conjugate(
-            take_modulo=False, check_constant=False, clean_constant=False
-        )  # Compute Conjugate(t1)
-
-        # Step 7
-        # After this, the stack is g t0 t1
-        out += self.fq12.mul(
-            take_modulo=True,
-            positive_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            is_constant_reused=False,
-        )  # Compute t1 * t2
-
-        # Step 8
-        # After this, the stack is g t0 t1 t2
-        out += pick(position=11, n_elements=12)  # Duplicate t1
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop,
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
-        )  # Compute t2
-
-        # Step 9
-        # After this, the stack is g t0 t1 t2 t3
-        out += pick(position=11, n_elements=12)  # Duplicate t2
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop,
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
-        )  # Compute t3
-
-        # Step 10
-        # After this, the stack is g t0 t1 t2 t3 Conjugate(t1)
-        out += pick(position=35, n_elements=12)  # Pick t1
-        out += self.fq12.conjugate(
-            take_modulo=False, check_constant=False, clean_constant=False
-        )  # Compute Conjugate(t1)
-
-        # Step 11
-        # After this, the stack is g t0 t1 t2 t3
-        out += self.fq12.mul(
-            take_modulo=True,
-            positive_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            is_constant_reused=False,
-        )  # Compute t3 * Conjugate(t1)
-
-        # Step 12 - 13
-        # After this, the stack is: g t0 t2 t3 t1
-        out += roll(position=35, n_elements=12)  # Roll t1
-        out += self.fq12.frobenius_odd(
-            n=3, take_modulo=False, check_constant=False, clean_constant=False
-        )  # Compute t1^(q^3)
-
-        # Step 14
-        # After this, the stack is: g t0 t3 t1 t2
-        out += roll(position=35, n_elements=12)  # Roll t2
-        out += self.fq12.frobenius_even(
-            n=2, take_modulo=False, check_constant=False, clean_constant=False
-        )  # Compute t2^(q^2)
-
-        # Step 15
-        # After this, the stack is: g t0 t3 t1
-        out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t1 * t2
-
-        # Step 16
-        # After this, the stack is: g t0 t3 t1 t2
-        out += pick(position=23, n_elements=12)  # Pick t3
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop,
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
-        )  # Compute t3^u
-
-        # Step 17
-        # After this, the stack is: g t3 t1 t2
-        out += roll(position=47, n_elements=12)  # Roll t0
-        out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t2 * t0
-
-        # Step 18
-        # After this, the stack is: t3 t1 t2
-        out += roll(position=47, n_elements=12)  # Roll g
-        out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t2 * g
-
-        # Step 19
-        # After this, the stack is: t3 t1
-        out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t1 * t2
-
-        # Step 20
-        # After this, the stack is: t1 t2
-        out += roll(position=23, n_elements=12)  # Roll t3
-        out += self.fq12.frobenius_odd(
-            n=1, take_modulo=False, check_constant=False, clean_constant=False
-        )  # Compute t3^q
-
-        # Step 21
-        # After this, the stack is: g^[(q^4 - q^2 + 1)/r]
-        out += self.fq12.mul(
-            take_modulo=take_modulo,
-            positive_modulo=positive_modulo,
-            check_constant=False,
-            clean_constant=clean_constant,
-            is_constant_reused=False,
+        modulos = (
+            modulo_planner.plan(
+                steps,
+                modulus_bits=self.modulus.bit_length(),
+                modulo_threshold=modulo_threshold,
+                n_inputs=self.extension_degree,
+                key=("BLS12-381 hard exponentiation", take_modulo, positive_modulo, clean_constant),
+            )
+            if modulo_planner.is_enabled
+            else defaults
         )
+        for step, modulo in zip(steps, modulos, strict=True):
+            out += step.generate(modulo)
 
         return out
 
+    def __hard_exponentiation_steps(
+        self, take_modulo: bool, modulo_threshold: int, positive_modulo: bool, clean_constant: bool, lazy_modulo: bool
+    ) -> tuple[list[ReductionStep], list[tuple[bool]]]:
+        """Split `hard_exponentiation` into steps ending with an operation whose result may be left unreduced.
+
+        The results of the steps feeding a cyclotomic exponentiation are always reduced, as the reductions in the
+        cyclotomic exponentiation assume reduced inputs.
+
+        Returns:
+            The steps, as consumed by `modulo_planner`, and the reductions performed by default.
+        """
+        N_ELEMENTS = self.extension_degree
+
+        def cyclotomic_exponentiation(position: int, exp_e: list[int]) -> Callable[[tuple[bool]], Script]:
+            def generate(modulo: tuple[bool]) -> Script:
+                out = pick(position=position, n_elements=N_ELEMENTS)
+                out += self.cyclotomic_exponentiation(
+                    exp_e=exp_e,
+                    take_modulo=modulo[0],
+                    positive_modulo=False,
+                    modulo_threshold=modulo_threshold,
+                    check_constant=False,
+                    clean_constant=False,
+                    recode=True,
+                    lazy_modulo=lazy_modulo,
+                )
+                return out
+
+            return generate
+
+        def mul(modulo: tuple[bool]) -> Script:
+            if modulo[0]:
+                return self.fq12.mul(
+                    take_modulo=True,
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+            return self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        def step_1(modulo: tuple[bool]) -> Script:
+            # After this, the stack is g t0
+            out = pick(position=11, n_elements=12)
+            out += self.square(
+                take_modulo=modulo[0],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+            )
+            return out
+
+        def steps_4_to_7(modulo: tuple[bool]) -> Script:
+            # Step 4
+            # After this, the stack is g t0 t1 t2 t3
+            out = pick(position=47, n_elements=12)  # Pick g
+            out += self.fq12.conjugate(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t3
+            # Step 5
+            # After this, the stack is: g t0 t2 t1
+            out += roll(position=35, n_elements=12)  # Roll t1
+            out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute t1 * t3
+            # Step 6
+            # After this, the stack is g t0 t2 t1
+            out += self.fq12.conjugate(
+                take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute Conjugate(t1)
+            # Step 7
+            # After this, the stack is g t0 t1
+            out += mul(modulo)  # Compute t1 * t2
+            return out
+
+        def steps_10_to_11(modulo: tuple[bool]) -> Script:
+            # Step 10
+            # After this, the stack is g t0 t1 t2 t3 Conjugate(t1)
+            out = pick(position=35, n_elements=12)  # Pick t1
+            out += self.fq12.conjugate(
+                take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute Conjugate(t1)
+            # Step 11
+            # After this, the stack is g t0 t1 t2 t3
+            out += mul(modulo)  # Compute t3 * Conjugate(t1)
+            return out
+
+        def steps_12_to_15(modulo: tuple[bool]) -> Script:
+            # Step 12 - 13
+            # After this, the stack is: g t0 t2 t3 t1
+            out = roll(position=35, n_elements=12)  # Roll t1
+            out += self.fq12.frobenius_odd(
+                n=3, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute t1^(q^3)
+            # Step 14
+            # After this, the stack is: g t0 t3 t1 t2
+            out += roll(position=35, n_elements=12)  # Roll t2
+            out += self.fq12.frobenius_even(
+                n=2, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute t2^(q^2)
+            # Step 15
+            # After this, the stack is: g t0 t3 t1
+            out += mul(modulo)  # Compute t1 * t2
+            return out
+
+        def step_17(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t3 t1 t2
+            return roll(position=47, n_elements=12) + mul(modulo)  # Roll t0, compute t2 * t0
+
+        def step_18(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: t3 t1 t2
+            return roll(position=47, n_elements=12) + mul(modulo)  # Roll g, compute t2 * g
+
+        def steps_20_to_21(modulo: tuple[bool]) -> Script:
+            # Step 20
+            # After this, the stack is: t1 t2
+            out = roll(position=23, n_elements=12)  # Roll t3
+            out += self.fq12.frobenius_odd(
+                n=1, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute t3^q
+            # Step 21
+            # After this, the stack is: g^[(q^4 - q^2 + 1)/r]
+            out += self.fq12.mul(
+                take_modulo=modulo[0],
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=False,
+            )
+            return out
+
+        fixed, free = ((True,),), ((True,), (False,))
+        # (generator, admissible reductions, reduction by default, number of elements of F_q^12 on the stack after)
+        # The comments give the stack after each step
+        schedule = [
+            (step_1, fixed, True, 2),  # g t0
+            (cyclotomic_exponentiation(11, exp_miller_loop), fixed, True, 3),  # g t0 t1
+            (cyclotomic_exponentiation(11, exp_miller_loop[1:]), free, True, 4),  # g t0 t1 t2
+            (steps_4_to_7, fixed, True, 3),  # g t0 t1
+            (cyclotomic_exponentiation(11, exp_miller_loop), fixed, True, 4),  # g t0 t1 t2
+            (cyclotomic_exponentiation(11, exp_miller_loop), free, True, 5),  # g t0 t1 t2 t3
+            (steps_10_to_11, fixed, True, 5),  # g t0 t1 t2 t3
+            (steps_12_to_15, free, False, 4),  # g t0 t3 t1
+            (cyclotomic_exponentiation(23, exp_miller_loop), free, True, 5),  # g t0 t3 t1 t2
+            (step_17, free, False, 4),  # g t3 t1 t2
+            (step_18, free, False, 3),  # t3 t1 t2
+            (mul, free, False, 2),  # t3 t1
+            (steps_20_to_21, fixed if take_modulo else free, take_modulo, 1),  # g^[(q^4 - q^2 + 1)/r]
+        ]
+
+        steps = []
+        for i, (generate, options, _, n_elements) in enumerate(schedule):
+            key = ("BLS12-381 hard exponentiation", i, modulo_threshold, modulo_planner.objective)
+            if i == len(schedule) - 1:
+                key += (positive_modulo, clean_constant)
+            steps.append(ReductionStep(key=key, options=options, generate=generate, n_carried=n_elements * N_ELEMENTS))
+        return steps, [(default,) for _, _, default, _ in schedule]
+
 
 final_exponentiation = FinalExponentiation(fq12=fq12_script)
@@ -9,8 +9,19 @@ from src.zkscript.script_types.stack_elements import (
     StackEllipticCurvePointProjective,
     StackFiniteFieldElement,
 )
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, check_order
-from src.zkscript.util.utility_scripts import bool_to_moving_function, mod, move, pick, roll, verify_bottom_constant
+from src.zkscript.util.utility_scripts import (
+    bool_to_moving_function,
+    mod,
+    move,
+    nums_to_script,
+    pick,
+    roll,
+    verify_bottom_constant,
+)
 
 
 class LineFunctions:
@@ -25,6 +36,9 @@ class LineFunctions:
         self.modulus = fq2.modulus
         self.fq2 = fq2
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_evaluation(
         self,
         take_modulo: bool,
@@ -173,6 +187,96 @@ class LineFunctions:
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    def line_evaluation_fixed_argument(
+        self,
+        take_modulo: bool,
+        gradient: list[int],
+        intercept: list[int],
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+        P: StackEllipticCurvePoint = StackEllipticCurvePoint(  # noqa: B008, N803
+            StackFiniteFieldElement(1, False, 1),  # noqa: B008
+            StackFiniteFieldElement(0, False, 1),  # noqa: B008
+        ),
+        rolling_option: int = 1,
+    ) -> Script:
+        r"""Evaluate at P the line `y = gradient * x + intercept`, whose coefficients are hard-coded in the script.
+
+        Stack input:
+            - stack:    [q, ..., P, ..], `P` is in `E(F_q)`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., ev_l(P)], `ev_l(P)` is an element in F_q^12, the cubic extension of F_q^4
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            gradient (list[int]): The gradient of the line, an element of F_q^2.
+            intercept (list[int]): The intercept of the line, an element of F_q^2.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            is_constant_reused (bool | None, optional): If `True`, `q` remains as the second-to-top element on the stack
+                after execution. Defaults to `None`.
+            P (StackEllipticCurvePoint): The position of the point `P` on the stack. Defaults to:
+                `StackEllipticCurvePoint(
+                    StackFiniteFieldElement(1, False, 1),
+                    StackFiniteFieldElement(0, False, 1),
+                )`
+            rolling_option (int): If `1`, `P` is rolled, if `0` it is picked. Defaults to `1`.
+
+        Returns:
+            Script to evaluate the line `y = gradient * x + intercept` at `P`.
+
+        Notes:
+            - If the line passes through `T` and `Q`, the output is the same as that of `line_evaluation`. Only
+                `-gradient * xP` is computed in the script: the other components are hard-coded or moved.
+            - `ev_l(P)` does NOT include the zero in the second component, this is to optimise the script size.
+        """
+        is_p_rolled = bitmask_to_boolean_list(rolling_option, 1)[0]
+
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # For BLS12 M-twist, the line function returns:
+        # (gradient, intercept, P) --> -intercept + yP * s - gradient * xP * r^2
+
+        # Compute - gradient * xP
+        # stack in:     [q .. P ..]
+        # stack out:    [q .. {xP} yP ..]
+        # altstack out: [-gradient*xP]
+        out += move(P.x, bool_to_moving_function(is_p_rolled))  # Move xP
+        out += Script.parse_string("OP_DUP")
+        out += nums_to_script([-gradient[1] % self.modulus])
+        out += Script.parse_string("OP_MUL OP_TOALTSTACK")
+        out += nums_to_script([-gradient[0] % self.modulus])
+        out += Script.parse_string("OP_MUL OP_TOALTSTACK")
+
+        # Load -intercept and yP
+        # stack in:     [q .. {xP} yP ..]
+        # altstack in:  [-gradient*xP]
+        # stack out:    [q .. {xP} {yP} .. -intercept yP]
+        # altstack out: [-gradient*xP]
+        out += nums_to_script([-el % self.modulus for el in intercept])
+        out += move(P.y.shift(2), bool_to_moving_function(is_p_rolled))  # Move yP
+
+        if take_modulo:
+            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
+            out += mod(stack_preparation="", is_mod_on_top=True, is_positive=positive_modulo)
+            out += mod(is_positive=positive_modulo)
+            out += mod(is_constant_reused=is_constant_reused, is_positive=positive_modulo)
+        else:
+            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+
+        return out
+
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_evaluation_proj(
         self,
         take_modulo: bool,
@@ -5,8 +5,12 @@ from typing import ClassVar
 from tx_engine import Script
 
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq2_script, fq4_script
+from src.zkscript.fields.fq4 import Fq4
 from src.zkscript.fields.fq12_3_over_2_over_2 import Fq12Cubic as Fq12CubicScriptModel
-from src.zkscript.util.utility_scripts import mod, pick, roll, verify_bottom_constant
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
+from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll, verify_bottom_constant
 
 
 class MillerOutputOperations(Fq12CubicScriptModel):
@@ -21,8 +25,35 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
     The output of line evaluations are sparse elements.
     The product of two line evaluations are somewhat sparse elements.
+
+    Attributes:
+        modulus (int): The characteristic of the field F_q.
+        extension_degree (int): The extension degree over the prime field, equal to 12.
+        prime_field: The Bitcoin Script implementation of the prime field F_q.
+        fq4 (Fq4): Bitcoin script instance to perform arithmetic operations in F_q^4.
+        fq2_non_residue (tuple[int, int]): The non-residue `xi = xi_0 + xi_1 u` defining F_q^4 = F_q^2[s] / (s^2 - xi).
     """
 
+    def __init__(self, q: int, fq4: Fq4, fq2_non_residue: tuple[int, int] = (1, 1)):
+        """Initialise the arithmetic for Miller loop.
+
+        Args:
+            q (int): The characteristic of the field F_q.
+            fq4 (Fq4): Bitcoin script instance to perform arithmetic operations in F_q^4.
+            fq2_non_residue (tuple[int, int]): The non-residue `xi = xi_0 + xi_1 u` defining
+                F_q^4 = F_q^2[s] / (s^2 - xi). Defaults to `(1, 1)`, the non-residue of BLS12-381.
+        """
+        super().__init__(q=q, fq4=fq4)
+        self.fq2_non_residue = fq2_non_residue
+
+    @staticmethod
+    def __mul_by_int(n: int) -> Script:
+        """Multiply the top of the stack by `n`, with an empty script if `n = 1`."""
+        return Script() if n == 1 else nums_to_script([n]) + Script.parse_string("OP_MUL")
+
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval(
         self,
         take_modulo: bool,
@@ -145,7 +176,11 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         )  # Compute a1*a2
         # After this, the stack is: (a1*a2 + (b2*b1*xi))_0,
         # altstack = [fifthComponent, fourthComponent, thirdComponent, secondComponent, (a1*a2 + (b2*b1*xi))_1]
-        compute_first_component += Script.parse_string("OP_FROMALTSTACK OP_TUCK OP_ADD OP_TOALTSTACK OP_ADD")
+        compute_first_component += Script.parse_string("OP_FROMALTSTACK OP_TUCK")
+        compute_first_component += self.__mul_by_int(self.fq2_non_residue[1])
+        compute_first_component += Script.parse_string("OP_ADD OP_TOALTSTACK")
+        compute_first_component += self.__mul_by_int(self.fq2_non_residue[0])
+        compute_first_component += Script.parse_string("OP_ADD")
         if take_modulo:
             if clean_constant:
                 fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
@@ -178,6 +213,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval(
         self,
         take_modulo: bool,
@@ -437,6 +475,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -829,6 +870,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * 10))
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1058,6 +1102,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1402,6 +1449,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1800,6 +1850,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_square(
         self,
         take_modulo: bool,
@@ -1818,6 +1871,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_mul(
         self,
         take_modulo: bool,
@@ -1836,6 +1892,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_miller_loop_output(
         self,
         take_modulo: bool,
@@ -1853,6 +1912,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1871,6 +1933,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1889,6 +1954,9 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
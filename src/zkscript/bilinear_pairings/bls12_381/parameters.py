@@ -1,10 +1,13 @@
 """Curve parameters for BLS12-381."""
 
+from src.zkscript.util.exponent_recoding import shortest_signed_binary
+
 # Seed
 u = -0xD201000000010000
 
-# Signed base two decomposition of u - LSB to MSB
-exp_miller_loop = [-int(bin(abs(u))[i]) for i in range(2, len(bin(abs(u))))][::-1]
+# Signed base two decomposition of u with the fewest addition steps, and then the fewest doubling steps - LSB to MSB
+# It is the binary expansion of u: the non-adjacent form has the same number of non-zero digits, and one more digit
+exp_miller_loop = shortest_signed_binary(u)
 
 # Modulus
 q = (u - 1) ** 2 * (u**4 - u**2 + 1) // 3 + u
@@ -18,6 +21,11 @@ b = 4
 twisted_a = [0, 0]
 twisted_b = [b, b]
 
+# Endomorphism of G1: (x, y) -> (GLV_BETA * x, y) is the multiplication by GLV_LAMBDA
+# GLV_BETA is a cube root of unity in F_q, and r = GLV_LAMBDA^2 + GLV_LAMBDA + 1
+GLV_LAMBDA = u**2 - 1
+GLV_BETA = 0x1A0111EA397FE699EC02408663D4DE85AA0D857D89759AD4897D29650FB85F9B409427EB4F49FFFD8BFD00000000AAAC
+
 
 # Non-residue
 NON_RESIDUE_FQ = -1  # List serialisation
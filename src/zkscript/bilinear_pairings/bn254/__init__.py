@@ -0,0 +1,12 @@
+"""bn254 package.
+
+This package provides modules for constructing Bitcoin scripts for operations specific to BN254.
+
+Modules:
+    - bn254: Build pairing model for BN254.
+    - fields: Finite field arithmetic for BN254.
+    - final_exponentiation: Final exponentiation for BN254.
+    - line_functions: Line evaluation for BN254.
+    - miller_output_operations: Operations between Miller output and line evaluations.
+    - parameters: BN254 curve parameters.
+"""
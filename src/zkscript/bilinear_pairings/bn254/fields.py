@@ -0,0 +1,28 @@
+"""Import finite field arithmetic for BN254."""
+
+from types import MethodType
+
+from src.zkscript.bilinear_pairings.bls12_381.fields import to_quadratic
+from src.zkscript.bilinear_pairings.bn254.parameters import GAMMAS, NON_RESIDUE_FQ, q
+from src.zkscript.fields.fq import Fq
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.fields.fq4 import Fq4
+from src.zkscript.fields.fq6_3_over_2 import Fq6
+from src.zkscript.fields.fq12_2_over_3_over_2 import Fq12
+from src.zkscript.fields.fq12_3_over_2_over_2 import Fq12Cubic
+
+# Fq implementation
+fq_script = Fq(q=q)
+# Fq2 implementation, NON_RESIDUE = -1
+fq2_script = Fq2(q=q, non_residue=NON_RESIDUE_FQ, mul_by_fq2_non_residue=Fq2.mul_by_thirteen_plus_u)
+# Fq4 implementation, FQ2_NON_RESIDUE = u
+fq4_script = Fq4(q=q, base_field=fq2_script, mul_by_fq4_non_residue=Fq4.mul_by_u)
+# Fq6 implementation, FQ2_NON_RESIDUE = 13 + u
+fq6_script = Fq6(q=q, base_field=fq2_script, mul_by_fq6_non_residue=Fq6.mul_by_v)
+# Fq12 implementation, NON_RESIDUE_OVER_FQ6 = v
+fq12_script = Fq12(q=q, fq2=fq2_script, fq6=fq6_script, gammas_frobenius=GAMMAS)
+
+# Fq12Cubic implementation: FQ4_NON_RESIDUE = 13 + u
+# The tower has the same shape as the one of BLS12-381, so the conversion to Fq12 is the same
+fq12cubic_script = Fq12Cubic(q=q, fq4=fq4_script)
+fq12cubic_script.to_quadratic = MethodType(to_quadratic, fq12cubic_script)
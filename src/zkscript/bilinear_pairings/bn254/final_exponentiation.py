@@ -0,0 +1,267 @@
+"""Bitcoin scripts that perform the final exponentiation in the pairing for BN254."""
+
+from collections.abc import Callable
+
+from tx_engine import Script
+
+from src.zkscript.bilinear_pairings.bls12_381.final_exponentiation import (
+    FinalExponentiation as Bls12381FinalExponentiation,
+)
+from src.zkscript.bilinear_pairings.bn254.fields import fq12_script
+from src.zkscript.bilinear_pairings.bn254.parameters import exp_u
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
+from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
+
+
+class FinalExponentiation(Bls12381FinalExponentiation):
+    """Final exponentiation in the pairing for BN254.
+
+    The tower of F_q^12 has the same shape as the one of BLS12-381 (see `fields`), so the easy part of the
+    exponentiation is the one of BLS12-381.
+
+    Attributes:
+        modulus (int): Modulus of the field.
+        fq12 (Fq12): Bitcoin script instance to perform arithmetic operations in F_q^12, the quadratic extension of
+            F_q^6.
+        cyclotomic_inverse (function): Cyclotomic inverse function in F_q^12.
+        square (function): Square function in the cyclotomic subgroup of F_q^12.
+        mul (function): Multiply function in F_q^12.
+        extension_degree (int): Extension degree of the field. Equal to 12.
+    """
+
+    @profile_script
+    @check_stack_effect
+    def hard_exponentiation(
+        self,
+        take_modulo: bool,
+        modulo_threshold: int,
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        lazy_modulo: bool = False,
+    ) -> Script:
+        """Hard part of the final exponentiation.
+
+        Stack input:
+            - stack:    [q, ..., g], `g` is an element in F_q^12, the quadratic extension of F_q^6
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., g^[(q^4 - q^2 + 1)/r]]
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            lazy_modulo (bool): If `True`, the cyclotomic exponentiations place their reductions in the lazy mode
+                (see `CyclotomicExponentiation.cyclotomic_exponentiation`). Defaults to `False`.
+
+        Returns:
+            Script to perform the hard part of the exponentiation in the pairing for BN254.
+
+        Notes:
+            - `g` is the output of the easy part of the exponentiation.
+            - The exponent `(q^4 - q^2 + 1)/r` is written in base `q` with coefficients polynomial in `u`, and
+                computed with three exponentiations by `u` and a vector addition chain (Scott et al., "On the final
+                exponentiation for calculating pairings on ordinary elliptic curves"). Hence, the pairing is the
+                reduced optimal ate pairing, with no extra power.
+        """
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        steps, defaults = self.__hard_exponentiation_steps(
+            take_modulo, modulo_threshold, positive_modulo, clean_constant, lazy_modulo
+        )
+        modulos = (
+            modulo_planner.plan(
+                steps,
+                modulus_bits=self.modulus.bit_length(),
+                modulo_threshold=modulo_threshold,
+                n_inputs=self.extension_degree,
+                key=("BN254 hard exponentiation", take_modulo, positive_modulo, clean_constant),
+            )
+            if modulo_planner.is_enabled
+            else defaults
+        )
+        for step, modulo in zip(steps, modulos, strict=True):
+            out += step.generate(modulo)
+
+        return out
+
+    def __hard_exponentiation_steps(
+        self, take_modulo: bool, modulo_threshold: int, positive_modulo: bool, clean_constant: bool, lazy_modulo: bool
+    ) -> tuple[list[ReductionStep], list[tuple[bool]]]:
+        """Split `hard_exponentiation` into steps ending with an operation whose result may be left unreduced.
+
+        The results of the steps feeding a cyclotomic exponentiation are always reduced, as the reductions in the
+        cyclotomic exponentiation assume reduced inputs.
+
+        Returns:
+            The steps, as consumed by `modulo_planner`, and the reductions performed by default.
+        """
+        N_ELEMENTS = self.extension_degree
+
+        def cyclotomic_exponentiation_by_u(position: int) -> Callable[[tuple[bool]], Script]:
+            def generate(modulo: tuple[bool]) -> Script:
+                out = pick(position=position, n_elements=N_ELEMENTS)
+                out += self.cyclotomic_exponentiation(
+                    exp_e=exp_u,
+                    take_modulo=modulo[0],
+                    positive_modulo=False,
+                    modulo_threshold=modulo_threshold,
+                    check_constant=False,
+                    clean_constant=False,
+                    recode=True,
+                    lazy_modulo=lazy_modulo,
+                )
+                return out
+
+            return generate
+
+        def mul(modulo: tuple[bool]) -> Script:
+            if modulo[0]:
+                return self.fq12.mul(
+                    take_modulo=True,
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+            return self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        def square(modulo: tuple[bool]) -> Script:
+            return self.square(
+                take_modulo=modulo[0],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+            )
+
+        def frobenius_times(position: int, n: int) -> Callable[[tuple[bool]], Script]:
+            def generate(modulo: tuple[bool]) -> Script:
+                out = pick(position=position, n_elements=N_ELEMENTS)
+                out += self.fq12.frobenius_odd(n=n, take_modulo=False, check_constant=False, clean_constant=False)
+                out += mul(modulo)
+                return out
+
+            return generate
+
+        def step_4(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t0 t1 t2, t2 = t2 * t1
+            return pick(position=23, n_elements=12) + mul(modulo)
+
+        def step_6(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t0 t1 t2, t2 = t2 * t0
+            return pick(position=35, n_elements=12) + mul(modulo)
+
+        def step_7(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t1 t2 t3, t3 = t0^q * t2
+            out = roll(position=35, n_elements=12)  # Roll t0
+            out += self.fq12.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
+            out += pick(position=23, n_elements=12)  # Pick t2
+            out += mul(modulo)  # Compute t0^q * t2
+            return out
+
+        def step_8(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t1 t2 t3, t3 = t3 * t1
+            return pick(position=35, n_elements=12) + mul(modulo)
+
+        def step_9(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t3 t2, t2 = Conjugate(t2) * t1^(q^2)
+            out = roll(position=23, n_elements=12)  # Roll t2
+            out += self.fq12.conjugate(
+                take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute Conjugate(t2)
+            out += roll(position=35, n_elements=12)  # Roll t1
+            out += self.fq12.frobenius_even(
+                n=2, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute t1^(q^2)
+            out += mul(modulo)  # Compute Conjugate(t2) * t1^(q^2)
+            return out
+
+        def step_10(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t3, t3 = Conjugate(t3)^2 * t2
+            out = roll(position=23, n_elements=12)  # Roll t3
+            out += self.fq12.conjugate(
+                take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute Conjugate(t3)
+            out += self.square(take_modulo=False, check_constant=False, clean_constant=False)  # Compute Conjugate(t3)^2
+            out += mul(modulo)  # Compute Conjugate(t3)^2 * t2
+            return out
+
+        def step_12(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g t3 t2, t2 = t3 * Conjugate(g)
+            out = pick(position=23, n_elements=12)  # Pick g
+            out += self.fq12.conjugate(
+                take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute Conjugate(g)
+            out += pick(position=23, n_elements=12)  # Pick t3
+            out += mul(modulo)  # Compute t3 * Conjugate(g)
+            return out
+
+        def step_15(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: t3 g, g = (g * g^(q^2))^q * g^(q^2)
+            out = roll(position=23, n_elements=12)  # Roll g
+            out += pick(position=11, n_elements=12)  # Pick g
+            out += self.fq12.frobenius_even(
+                n=2, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute g^(q^2)
+            out += roll(position=23, n_elements=12)  # Roll g
+            out += pick(position=23, n_elements=12)  # Pick g^(q^2)
+            out += self.fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)  # Compute g * g^(q^2)
+            out += self.fq12.frobenius_odd(
+                n=1, take_modulo=False, check_constant=False, clean_constant=False
+            )  # Compute (g * g^(q^2))^q
+            out += mul(modulo)  # Compute (g * g^(q^2))^q * g^(q^2)
+            return out
+
+        def step_16(modulo: tuple[bool]) -> Script:
+            # After this, the stack is: g^[(q^4 - q^2 + 1)/r]
+            return self.fq12.mul(
+                take_modulo=modulo[0],
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=False,
+            )
+
+        fixed, free = ((True,),), ((True,), (False,))
+        # (generator, admissible reductions, reduction by default, number of elements of F_q^12 on the stack after)
+        # The comments give the stack after each step, with the exponent of `g` of the new element. The chain is the
+        # one of Scott et al., "On the final exponentiation for calculating pairings on ordinary elliptic curves".
+        schedule = [
+            (cyclotomic_exponentiation_by_u(11), fixed, True, 2),  # g t0: u
+            (cyclotomic_exponentiation_by_u(11), fixed, True, 3),  # g t0 t1: u^2
+            (cyclotomic_exponentiation_by_u(11), free, True, 4),  # g t0 t1 t2: u^3
+            (frobenius_times(11, 1), free, True, 4),  # g t0 t1 t2: u^3 (q + 1)
+            (square, free, True, 4),  # g t0 t1 t2: 2u^3 (q + 1)
+            (step_4, free, True, 4),  # g t0 t1 t2: 2u^3 (q + 1) + u^2
+            (frobenius_times(23, 1), free, True, 4),  # g t0 t1 t2: (2u^3 + u^2)(q + 1)
+            (step_6, free, True, 4),  # g t0 t1 t2: (2u^3 + u^2)(q + 1) + u
+            (step_7, free, True, 4),  # g t1 t2 t3: (2u^3 + u^2 + u)(q + 1)
+            (step_8, free, True, 4),  # g t1 t2 t3: (2u^3 + u^2 + u)(q + 1) + u^2
+            (step_9, free, True, 3),  # g t3 t2: u^2 q^2 - (2u^3 + u^2)(q + 1) - u
+            (step_10, free, True, 2),  # g t3: u^2 q^2 - (6u^3 + 3u^2 + 2u)(q + 1) - 2u^2 - u
+            (square, free, True, 2),  # g t3: 2u^2 q^2 - (12u^3 + 6u^2 + 4u)(q + 1) - 4u^2 - 2u
+            (step_12, free, True, 3),  # g t3 t2: 2u^2 q^2 - (12u^3 + 6u^2 + 4u)(q + 1) - 4u^2 - 2u - 1
+            (square, free, True, 3),  # g t3 t2: 4u^2 q^2 - (24u^3 + 12u^2 + 8u)(q + 1) - 8u^2 - 4u - 2
+            (mul, free, True, 2),  # g t3: 6u^2 q^2 - (36u^3 + 18u^2 + 12u)(q + 1) - 12u^2 - 6u - 2
+            (step_15, free, True, 2),  # t3 g: q^3 + q^2 + q
+            (step_16, fixed if take_modulo else free, take_modulo, 1),  # g^[(q^4 - q^2 + 1)/r]
+        ]
+
+        steps = []
+        for i, (generate, options, _, n_elements) in enumerate(schedule):
+            key = ("BN254 hard exponentiation", i, modulo_threshold, modulo_planner.objective)
+            if i == len(schedule) - 1:
+                key += (positive_modulo, clean_constant)
+            steps.append(ReductionStep(key=key, options=options, generate=generate, n_carried=n_elements * N_ELEMENTS))
+        return steps, [(default,) for _, _, default, _ in schedule]
+
+
+final_exponentiation = FinalExponentiation(fq12=fq12_script)
@@ -0,0 +1,10 @@
+"""Bitcoin scripts that perform line evaluation for BN254.
+
+The twisted curve of BN254 is an M-type sextic twist over the same tower as BLS12-381 (see `parameters`), so the line
+evaluations are the ones of BLS12-381.
+"""
+
+from src.zkscript.bilinear_pairings.bls12_381.line_functions import LineFunctions
+from src.zkscript.bilinear_pairings.bn254.fields import fq2_script
+
+line_functions = LineFunctions(fq2=fq2_script)
@@ -0,0 +1,11 @@
+"""Operations between Miller output (in F_q^12 as cubic extension of F_q^4) and line evaluations for BN254.
+
+The line evaluations of BN254 are sparse in the same way as those of BLS12-381 (see `line_functions`), so the
+operations are the ones of BLS12-381, with the non-residue of BN254.
+"""
+
+from src.zkscript.bilinear_pairings.bls12_381.miller_output_operations import MillerOutputOperations
+from src.zkscript.bilinear_pairings.bn254.fields import fq2_script, fq4_script
+from src.zkscript.bilinear_pairings.bn254.parameters import NON_RESIDUE_FQ2
+
+miller_output_ops = MillerOutputOperations(q=fq2_script.modulus, fq4=fq4_script, fq2_non_residue=NON_RESIDUE_FQ2)
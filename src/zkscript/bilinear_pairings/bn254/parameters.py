@@ -0,0 +1,254 @@
+"""Curve parameters for BN254."""
+
+from src.zkscript.util.exponent_recoding import shortest_signed_binary
+
+# Seed
+u = 0x44E992B44A6909F1
+
+# Modulus
+q = 36 * u**4 + 36 * u**3 + 24 * u**2 + 6 * u + 1
+
+# r-torsion = q - t + 1
+r = 36 * u**4 + 36 * u**3 + 18 * u**2 + 6 * u + 1
+
+# Trace of the Frobenius
+t = 6 * u**2 + 1
+
+# The Miller loop is the one of the optimal ate pairing, computed over 6u + 2 and followed by the lines through pi(Q)
+# and -pi^2(Q) (see FROBENIUS_TWISTED_CURVE). Signed base two decomposition of 6u + 2 with the fewest addition steps,
+# and then the fewest doubling steps - LSB to MSB
+exp_miller_loop = shortest_signed_binary(6 * u + 2)
+
+# Signed base two decomposition of u, used in the hard part of the final exponentiation - LSB to MSB
+exp_u = shortest_signed_binary(u)
+
+# Curve coefficients
+a = 0
+b = 3
+# The twisted curve is the M-type sextic twist y^2 = x^3 + b * (13 + u), so that F_q^12 is built as in BLS12-381,
+# with the non-residue 13 + u in place of 1 + u
+twisted_a = [0, 0]
+twisted_b = [13 * b, b]
+
+# The usual D-type sextic twist y^2 = x^3 + b / (9 + u) (the one of EIP-197, circom, gnark, arkworks) is mapped to the
+# twisted curve by (x, y) -> (D_TWIST_ISOMORPHISM[0] * x, D_TWIST_ISOMORPHISM[1] * y)
+D_TWIST_ISOMORPHISM = [
+    [
+        3018496349621091176831479943005588278972261524338767209468340863502225230761,
+        18392547068753685267169041522432298966305981041259550843579551505851050229249,
+    ],
+    [
+        11367526779948164191241120536053670379631464214247444020207784499054688663177,
+        20733726059347999736103389889469378559270180168245066431888102952331500195549,
+    ],
+]
+
+# Frobenius endomorphism of the twisted curve: pi(x, y) = (FROBENIUS_TWISTED_CURVE[0][0] * conjugate(x),
+# FROBENIUS_TWISTED_CURVE[0][1] * conjugate(y)) and pi^2(x, y) = (FROBENIUS_TWISTED_CURVE[1][0] * x,
+# FROBENIUS_TWISTED_CURVE[1][1] * y), where FROBENIUS_TWISTED_CURVE[0] = ((13 + u)^-((q-1)/3), (13 + u)^-((q-1)/2))
+FROBENIUS_TWISTED_CURVE = [
+    [
+        [
+            13034754706269710542875369558924844560348501992761890524989377155543316934443,
+            19436401194717568782160136227502600753310656986050046617117081012012426848129,
+        ],
+        [
+            19758446031135684374837035121068496812731280320992526070293945630287877201030,
+            5799116057307405794075412369196842498849089714671045038447161542000310889606,
+        ],
+    ],
+    [
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [q - 1, 0],
+    ],
+]
+
+# Endomorphism of G1: (x, y) -> (GLV_BETA * x, y) is the multiplication by GLV_LAMBDA
+# GLV_BETA is a cube root of unity in F_q, and r divides GLV_LAMBDA^2 + GLV_LAMBDA + 1
+GLV_LAMBDA = 36 * u**3 + 18 * u**2 + 6 * u + 1
+GLV_BETA = 18 * u**3 + 18 * u**2 + 9 * u + 1
+
+# Non-residues
+NON_RESIDUE_FQ = -1  # List serialisation
+NON_RESIDUE_FQ2 = (13, 1)  # F_q^12 = F_q^2[w] / (w^6 - NON_RESIDUE_FQ2)
+
+# Embedding degrees and other constants
+EMBEDDING_DEGREE = 12
+TWIST_DEGREE = 6
+EXTENSION_DEGREE = EMBEDDING_DEGREE // TWIST_DEGREE
+N_POINTS_CURVE = 2
+N_POINTS_TWIST = EXTENSION_DEGREE * N_POINTS_CURVE
+N_ELEMENTS_MILLER_OUTPUT = 12
+N_ELEMENTS_EVALUATION_OUTPUT = 5
+N_ELEMENTS_EVALUATION_TIMES_EVALUATION = 10
+
+# Gammas for Frobenius
+GAMMAS = [
+    [
+        [
+            2957063998959910777171550989634179300058680136766134929275253065113072534400,
+            7405543939377292323819255796735701492734369635933629185760968931475801126597,
+        ],
+        [
+            9051996594691492128185276391365643107670166345463623575592540943746714220198,
+            16065050092840953949279153223077291100876305086686011518287019566520532519350,
+        ],
+        [
+            2129796840703590847409370624188778275965030836305297592395092264357349007553,
+            5799116057307405794075412369196842498849089714671045038447161542000310889606,
+        ],
+        [
+            20231679290344138335856490724430522698472352916290734263380510334479635494880,
+            8458889782732166859855221688299389776210471547931450993900536630224035811803,
+        ],
+        [
+            13025497243889245332352585481185087650849679748100334205699231212253440286827,
+            1150736027583967423481781378039791983476821343404904997284069036512790186405,
+        ],
+    ],
+    [
+        [2203960485148121921418603742825762020974279258880205651967, 0],
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+        [21888242871839275222246405745257275088696311157297823662689037894645226208582, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556617, 0],
+    ],
+    [
+        [
+            16269185527520637436401350492763058324436950789835733536540550747519485892008,
+            20320208876053832457212393035918349956776236148270495816680207105862715189102,
+        ],
+        [
+            21689734442717347773432165540224062509373953976370133224796157690000421262525,
+            3371351101876614832880983004425309652434351899364035098830061445491894328779,
+        ],
+        [
+            19758446031135684374837035121068496812731280320992526070293945630287877201030,
+            16089126814531869428170993376060432589847221442626778624241876352644915318977,
+        ],
+        [
+            60734779351528554575179540652387566133698300967470799062051502380911022150,
+            6741512812031542876943439698338111543363073164001131179244173636826201915483,
+        ],
+        [
+            12008361054651482045222929710174086279869757480461220280332624769001946173673,
+            18964253614594592470207163423405403568766304006122548862335506189237508536006,
+        ],
+    ],
+    [
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [1, 0],
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+    ],
+    [
+        [
+            13312121528560726659229799503128879024378270653069598607265297682406413357608,
+            12914664936676540133393137239182648464041866512336866630919238174386914062505,
+        ],
+        [
+            13034754706269710542875369558924844560348501992761890524989377155543316934443,
+            2451841677121706440086269517754674335385654171247777045571956882632799360454,
+        ],
+        [
+            2129796840703590847409370624188778275965030836305297592395092264357349007553,
+            5799116057307405794075412369196842498849089714671045038447161542000310889606,
+        ],
+        [
+            1595828802143608331814735480174364824090259940039618600246476057784679691553,
+            6687840277075565485447744358619773769122766445365241489544327627594988481297,
+        ],
+        [
+            20871106682601511935116749974246273717716388889658709737322431451393732095429,
+            17813517587010625046725382045365611585289482662717643865051437152724718349601,
+        ],
+    ],
+    [
+        [21888242871839275222246405745257275088696311157297823662689037894645226208582, 0],
+        [1, 0],
+        [21888242871839275222246405745257275088696311157297823662689037894645226208582, 0],
+        [1, 0],
+        [21888242871839275222246405745257275088696311157297823662689037894645226208582, 0],
+    ],
+    [
+        [
+            18931178872879364445074854755623095788637631020531688733413784829532153674183,
+            14482698932461982898427149948521573595961941521364194476928068963169425081986,
+        ],
+        [
+            9051996594691492128185276391365643107670166345463623575592540943746714220198,
+            16065050092840953949279153223077291100876305086686011518287019566520532519350,
+        ],
+        [
+            19758446031135684374837035121068496812731280320992526070293945630287877201030,
+            16089126814531869428170993376060432589847221442626778624241876352644915318977,
+        ],
+        [
+            20231679290344138335856490724430522698472352916290734263380510334479635494880,
+            8458889782732166859855221688299389776210471547931450993900536630224035811803,
+        ],
+        [
+            8862745627950029889893820264072187437846631409197489456989806682391785921756,
+            20737506844255307798764624367217483105219489813892918665404968858132436022178,
+        ],
+    ],
+    [
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+        [1, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+    ],
+    [
+        [
+            5619057344318637785845055252494216764259360367462090126148487147125740316575,
+            1568033995785442765034012709338925131920075009027327846008830788782511019481,
+        ],
+        [
+            21689734442717347773432165540224062509373953976370133224796157690000421262525,
+            3371351101876614832880983004425309652434351899364035098830061445491894328779,
+        ],
+        [
+            2129796840703590847409370624188778275965030836305297592395092264357349007553,
+            5799116057307405794075412369196842498849089714671045038447161542000310889606,
+        ],
+        [
+            60734779351528554575179540652387566133698300967470799062051502380911022150,
+            6741512812031542876943439698338111543363073164001131179244173636826201915483,
+        ],
+        [
+            9879881817187793177023476035083188808826553676836603382356413125643280034910,
+            2923989257244682752039242321851871519930007151175274800353531705407717672577,
+        ],
+    ],
+    [
+        [21888242871839275220042445260109153167277707414472061641714758635765020556617, 0],
+        [21888242871839275220042445260109153167277707414472061641714758635765020556616, 0],
+        [21888242871839275222246405745257275088696311157297823662689037894645226208582, 0],
+        [2203960485148121921418603742825762020974279258880205651966, 0],
+        [2203960485148121921418603742825762020974279258880205651967, 0],
+    ],
+    [
+        [
+            8576121343278548563016606242128396064318040504228225055423740212238812850975,
+            8973577935162735088853268506074626624654444644960957031769799720258312146078,
+        ],
+        [
+            13034754706269710542875369558924844560348501992761890524989377155543316934443,
+            2451841677121706440086269517754674335385654171247777045571956882632799360454,
+        ],
+        [
+            19758446031135684374837035121068496812731280320992526070293945630287877201030,
+            16089126814531869428170993376060432589847221442626778624241876352644915318977,
+        ],
+        [
+            1595828802143608331814735480174364824090259940039618600246476057784679691553,
+            6687840277075565485447744358619773769122766445365241489544327627594988481297,
+        ],
+        [
+            1017136189237763287129655771011001370979922267639113925366606443251494113154,
+            4074725284828650175521023699891663503406828494580179797637600741920507858982,
+        ],
+    ],
+]
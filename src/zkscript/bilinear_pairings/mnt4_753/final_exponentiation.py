@@ -1,5 +1,7 @@
 """Bitcoin scripts that perform the final exponentiation in the pairing for MNT4-753."""
 
+from itertools import product
+
 from tx_engine import Script
 
 from src.zkscript.bilinear_pairings.mnt4_753.fields import fq2_script, fq4_script
@@ -8,6 +10,9 @@ from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import Cyclo
 from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.fields.fq2_over_2_residue_equal_u import Fq2Over2ResidueEqualU
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import move, pick, roll, verify_bottom_constant
 
 
@@ -38,6 +43,8 @@ class FinalExponentiation(CyclotomicExponentiation):
         self.mul = fq4.mul
         self.extension_degree = 4
 
+    @profile_script
+    @check_stack_effect
     def easy_exponentiation_with_inverse_check(
         self,
         take_modulo: bool,
@@ -112,6 +119,8 @@ class FinalExponentiation(CyclotomicExponentiation):
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def hard_exponentiation(
         self,
         take_modulo: bool,
@@ -119,6 +128,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         positive_modulo: bool = True,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        lazy_modulo: bool = False,
     ) -> Script:
         """Hard part of the final exponentiation.
 
@@ -136,6 +146,8 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            lazy_modulo (bool): If `True`, the cyclotomic exponentiations place their reductions in the lazy mode
+                (see `CyclotomicExponentiation.cyclotomic_exponentiation`). Defaults to `False`.
 
         Returns:
             Script to perform the hard part of the exponentiation in the pairing for MNT4-753.
@@ -145,40 +157,93 @@ class FinalExponentiation(CyclotomicExponentiation):
         """
         out = verify_bottom_constant(self.modulus) if check_constant else Script()
 
-        # After this, the stack is: g, altstack = [g^q]
-        out += pick(position=3, n_elements=4)
-        out += self.fq4.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * 4))
-
-        # After this, the stack is: g g^u, altstack = [g^q]
-        out += pick(position=3, n_elements=4)
-        out += self.cyclotomic_exponentiation(
-            exp_e=exp_miller_loop,
-            take_modulo=True,
-            positive_modulo=False,
-            modulo_threshold=modulo_threshold,
-            check_constant=False,
-            clean_constant=False,
+        steps, defaults = self.__hard_exponentiation_steps(
+            take_modulo, modulo_threshold, positive_modulo, clean_constant, lazy_modulo
         )
-
-        # After this, the stack is: g^[q + u + 1]
-        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * 4))
-        out += self.fq4.mul(
-            take_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            is_constant_reused=False,
-            positive_modulo=False,
-        )
-        out += self.fq4.mul(
-            take_modulo=take_modulo,
-            check_constant=False,
-            clean_constant=clean_constant,
-            is_constant_reused=False,
-            positive_modulo=positive_modulo,
+        modulos = (
+            modulo_planner.plan(
+                steps,
+                modulus_bits=self.modulus.bit_length(),
+                modulo_threshold=modulo_threshold,
+                n_inputs=self.extension_degree,
+                key=("MNT4-753 hard exponentiation", take_modulo, positive_modulo, clean_constant),
+            )
+            if modulo_planner.is_enabled
+            else defaults
         )
+        for step, modulo in zip(steps, modulos, strict=True):
+            out += step.generate(modulo)
 
         return out
 
+    def __hard_exponentiation_steps(
+        self, take_modulo: bool, modulo_threshold: int, positive_modulo: bool, clean_constant: bool, lazy_modulo: bool
+    ) -> tuple[list[ReductionStep], list[tuple[bool, ...]]]:
+        """Split `hard_exponentiation` into steps whose results may be left unreduced.
+
+        The first step computes `g^(q + u)`: its options decide whether to reduce `g^u` and `g^(q + u)`. The second
+        step computes `g^(q + u + 1)`.
+
+        Returns:
+            The steps, as consumed by `modulo_planner`, and the reductions performed by default.
+        """
+
+        def multiply_frobenius_and_power(modulos: tuple[bool, bool]) -> Script:
+            # After this, the stack is: g, altstack = [g^q]
+            out = pick(position=3, n_elements=4)
+            out += self.fq4.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
+            out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * 4))
+
+            # After this, the stack is: g g^u, altstack = [g^q]
+            out += pick(position=3, n_elements=4)
+            out += self.cyclotomic_exponentiation(
+                exp_e=exp_miller_loop,
+                take_modulo=modulos[0],
+                positive_modulo=False,
+                modulo_threshold=modulo_threshold,
+                check_constant=False,
+                clean_constant=False,
+                recode=True,
+                lazy_modulo=lazy_modulo,
+            )
+
+            # After this, the stack is: g g^(q + u)
+            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * 4))
+            out += self.fq4.mul(
+                take_modulo=modulos[1],
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                positive_modulo=False,
+            )
+            return out
+
+        def multiply(modulos: tuple[bool]) -> Script:
+            # After this, the stack is: g^[q + u + 1]
+            return self.fq4.mul(
+                take_modulo=modulos[0],
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=False,
+                positive_modulo=positive_modulo,
+            )
+
+        key = ("MNT4-753 hard exponentiation", modulo_threshold, modulo_planner.objective)
+        steps = [
+            ReductionStep(
+                key=(*key, 0),
+                options=tuple(product([True, False], repeat=2)),
+                generate=multiply_frobenius_and_power,
+                n_carried=2 * self.extension_degree,
+            ),
+            ReductionStep(
+                key=(*key, 1, take_modulo, positive_modulo, clean_constant),
+                options=((True,),) if take_modulo else ((True,), (False,)),
+                generate=multiply,
+                n_carried=self.extension_degree,
+            ),
+        ]
+        return steps, [(True, False), (take_modulo,)]
+
 
 final_exponentiation = FinalExponentiation(fq2=fq2_script, fq4=fq4_script)
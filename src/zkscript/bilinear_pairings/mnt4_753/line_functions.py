@@ -8,11 +8,15 @@ from src.zkscript.script_types.stack_elements import (
     StackEllipticCurvePointProjective,
     StackFiniteFieldElement,
 )
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, check_order
 from src.zkscript.util.utility_scripts import (
     bool_to_moving_function,
     mod,
     move,
+    nums_to_script,
     pick,
     roll,
     verify_bottom_constant,
@@ -31,6 +35,9 @@ class LineFunctions:
         self.modulus = fq2.modulus
         self.fq2 = fq2
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_evaluation(
         self,
         take_modulo: bool,
@@ -163,6 +170,106 @@ class LineFunctions:
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    def line_evaluation_fixed_argument(
+        self,
+        take_modulo: bool,
+        gradient: list[int],
+        intercept: list[int],
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+        P: StackEllipticCurvePoint = StackEllipticCurvePoint(  # noqa: B008, N803
+            StackFiniteFieldElement(1, False, 1),  # noqa: B008
+            StackFiniteFieldElement(0, False, 1),  # noqa: B008
+        ),
+        rolling_option: int = 1,
+    ) -> Script:
+        r"""Evaluate at P the line `y = gradient * x + intercept`, whose coefficients are hard-coded in the script.
+
+        Stack input:
+            - stack:    [q, ..., P, ..], `P` is in `E(F_q)`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., ev_l(P)], `ev_l(P)` is an element in F_q^4
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            gradient (list[int]): The gradient of the line, an element of F_q^2.
+            intercept (list[int]): The intercept of the line, an element of F_q^2.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            is_constant_reused (bool | None, optional): If `True`, `q` remains as the second-to-top element on the stack
+                after execution. Defaults to `None`.
+            P (StackEllipticCurvePoint): The position of the point `P` on the stack. Defaults to:
+                `StackEllipticCurvePoint(
+                    StackFiniteFieldElement(1, False, 1),
+                    StackFiniteFieldElement(0, False, 1),
+                )`
+            rolling_option (int): If `1`, `P` is rolled, if `0` it is picked. Defaults to `1`.
+
+        Returns:
+            Script to evaluate the line `y = gradient * x + intercept` at `P`.
+
+        Raises:
+            ValueError: If `take_modulo` is `True` and `clean_constant` or `is_constant_reused` is `None`.
+
+        Notes:
+            - If the line passes through `T` and `Q`, the output is the same as that of `line_evaluation`. Only
+                `-intercept - gradient * xP * u` is computed in the script, with two multiplications in F_q.
+            - The four elements of F_q hard-coded per line take more bytes than the point arithmetic they save, so the
+                lines of fixed arguments give a larger script that executes fewer opcodes. They are only used if
+                requested (see `triple_miller_loop`).
+            - `ev_l(P)` does NOT include the zero in the second component, this is to optimise the script size.
+        """
+        is_p_rolled = bitmask_to_boolean_list(rolling_option, 1)[0]
+
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # Line evaluation for MNT4 returns: (gradient, intercept, P) --> (-intercept - gradient * xP * u, yP) as a
+        # point in Fq4, where gradient * u = gradient_1 * NON_RESIDUE + gradient_0 * u
+
+        # Compute -intercept - gradient * xP * u
+        # stack in:     [q .. P ..]
+        # stack out:    [q .. {xP} yP .. (-intercept - gradient * xP * u)_0]
+        # altstack out: [(-intercept - gradient * xP * u)_1]
+        out += move(P.x, bool_to_moving_function(is_p_rolled))  # Move xP
+        out += Script.parse_string("OP_DUP")
+        out += nums_to_script([-gradient[0] % self.modulus])
+        out += Script.parse_string("OP_MUL")
+        out += nums_to_script([-intercept[1] % self.modulus])
+        out += Script.parse_string("OP_ADD OP_TOALTSTACK")
+        out += nums_to_script([-gradient[1] * self.fq2.non_residue % self.modulus])
+        out += Script.parse_string("OP_MUL")
+        out += nums_to_script([-intercept[0] % self.modulus])
+        out += Script.parse_string("OP_ADD")
+
+        if take_modulo:
+            if clean_constant is None and is_constant_reused is None:
+                msg = f"If take_modulo is set, both clean_constant: {clean_constant}"
+                msg += f"and is_constant_reused: {is_constant_reused} must be set."
+                raise ValueError(msg)
+
+            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
+            out += mod(stack_preparation="", is_mod_on_top=True, is_positive=positive_modulo)
+            out += mod(is_positive=positive_modulo)
+            out += move(P.y.shift(3), bool_to_moving_function(is_p_rolled))  # Move yP
+            out += Script.parse_string("OP_ROT")
+            out += mod(stack_preparation="", is_constant_reused=is_constant_reused, is_positive=positive_modulo)
+        else:
+            out += Script.parse_string("OP_FROMALTSTACK")
+            out += move(P.y.shift(2), bool_to_moving_function(is_p_rolled))  # Move yP
+
+        return out
+
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_evaluation_proj(
         self,
         take_modulo: bool,
@@ -8,6 +8,9 @@ from src.zkscript.bilinear_pairings.mnt4_753.fields import fq4_script
 
 # Fq2 Script implementation
 from src.zkscript.fields.fq2_over_2_residue_equal_u import Fq2Over2ResidueEqualU
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, pick, roll, verify_bottom_constant
 
 
@@ -19,6 +22,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
     We call `sparse` elements of the form: a + bu + cus. Output of line evaluations are sparse elements in F_q^4.
     """
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval(
         self,
         take_modulo: bool,
@@ -125,6 +131,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval(
         self,
         take_modulo: bool,
@@ -225,6 +234,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -243,6 +255,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -341,6 +356,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -359,6 +377,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -377,6 +398,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def line_eval_times_eval_times_miller_loop_output(
         self,
         take_modulo: bool,
@@ -395,6 +419,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_square(
         self,
         take_modulo: bool,
@@ -413,6 +440,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_mul(
         self,
         take_modulo: bool,
@@ -431,6 +461,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -449,6 +482,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -467,6 +503,9 @@ class MillerOutputOperations(Fq2Over2ResidueEqualU):
             is_constant_reused=is_constant_reused,
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
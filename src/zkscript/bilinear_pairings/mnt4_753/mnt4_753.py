@@ -13,6 +13,7 @@ from src.zkscript.bilinear_pairings.mnt4_753.parameters import (
     N_ELEMENTS_MILLER_OUTPUT,
     N_POINTS_CURVE,
     N_POINTS_TWIST,
+    NON_RESIDUE_FQ,
     exp_miller_loop,
     q,
     twisted_a,
@@ -31,6 +32,7 @@ mnt4_753 = PairingModel(
     extension_degree=EXTENSION_DEGREE,
     n_points_curve=N_POINTS_CURVE,
     n_points_twist=N_POINTS_TWIST,
+    non_residue_fq=NON_RESIDUE_FQ,
     n_elements_miller_output=N_ELEMENTS_MILLER_OUTPUT,
     n_elements_evaluation_output=N_ELEMENTS_EVALUATION_OUTPUT,
     n_elements_evaluation_times_evaluation=N_ELEMENTS_EVALUATION_TIMES_EVALUATION,
@@ -42,6 +44,8 @@ mnt4_753 = PairingModel(
     point_addition_twisted_curve_proj=twisted_curve_operations_proj.point_algebraic_mixed_addition,
     line_eval=line_functions.line_evaluation,
     line_eval_proj=line_functions.line_evaluation_proj,
+    line_eval_fixed_argument=line_functions.line_evaluation_fixed_argument,
+    frobenius_twisted_curve=None,
     line_eval_times_eval=miller_output_ops.line_eval_times_eval,
     line_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval,
     line_eval_times_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval_times_eval,
@@ -4,6 +4,7 @@
 u = -0x15474B1D641A3FD86DCBCEE5DCDA7FE51852C8CBE26E600733B714AA43C31A66B0344C4E2C428B07A7713041BA18000
 
 # Signed base two decomposition of abs(u) - MSB to LSB (minus_exp_u is LSB to MSB)
+# It is the non-adjacent form of abs(u), so it has the fewest addition steps (see `shortest_signed_binary`)
 minus_exp_miller_loop = [
     1,
     0,
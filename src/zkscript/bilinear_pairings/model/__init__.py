@@ -5,7 +5,9 @@ This package provides modules for constructing Bitcoin scripts that perform bili
 Modules:
     - cyclotomic_exponentiation.
     - miller_loop.
+    - miller_loop_scheduler.
     - model_definition.
+    - multi_miller_loop_proj.
     - pairing.
     - triple_miller_loop.
 """
@@ -1,10 +1,20 @@
 """Bitcoin scripts that perform exponentiation in the cyclotomic subgroup."""
 
+from functools import partial
+from itertools import product
 from math import ceil, log2
+from weakref import WeakKeyDictionary
 
 from tx_engine import Script
 
-from src.zkscript.util.utility_scripts import pick, verify_bottom_constant
+from src.zkscript.util.exponent_recoding import recodings
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script, script_profiler
+from src.zkscript.util.stack_simulator import check_stack_effect
+from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
+
+# The sizes of the exponentiations for every encoding of the exponents, see `CyclotomicExponentiation.recoding_sizes`
+_recoding_sizes = WeakKeyDictionary()
 
 
 class CyclotomicExponentiation:
@@ -27,6 +37,8 @@ class CyclotomicExponentiation:
         self.mul = mul
         self.extension_degree = extension_degree
 
+    @profile_script
+    @check_stack_effect
     def cyclotomic_exponentiation(
         self,
         exp_e: list[int],
@@ -35,6 +47,8 @@ class CyclotomicExponentiation:
         positive_modulo: bool = True,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        recode: bool = False,
+        lazy_modulo: bool = False,
     ) -> Script:
         """Exponentiation in the cyclotomic subgroup.
 
@@ -49,32 +63,163 @@ class CyclotomicExponentiation:
         Args:
             exp_e (list[int]): Exponent `exp_e = [e_0, ..., e_(l-1)]` such that:
                 - `e := sum_(i=1)^(l-1) e_i 2^i`
-                - `e_i in {-1,0,1}`
+                - `e_i` is zero or odd (e.g., `e_i in {-1,0,1}`)
                 - `e_(l-1) different from 0`
+                If some `|e_i| > 1`, the odd powers of `x` up to `max |e_i|` are precomputed.
             take_modulo (bool): If `True`, the result is reduced modulo `q`.
             modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
             positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            recode (bool): If `True`, the exponent is encoded as in `best_recoding` (e.g., in non-adjacent form or
+                with sliding windows) before generating the script. Defaults to `False`.
+            lazy_modulo (bool): If `True`, the bound on the bit lengths of the powers of `x` is carried through the
+                squarings and the multiplications, which only reduce their results if the bound exceeds
+                `modulo_threshold` (see `PrimeFieldExtension.lazy_modulo`). If `False`, the reductions are placed
+                from estimates of the bit lengths. Ignored if `modulo_planner` is enabled. Defaults to `False`.
 
         Returns:
             Script to perform exponentiation in the cyclotomic subgroup.
         """
-        # Bit size of q
-        q = self.modulus
-        BIT_SIZE_Q = ceil(log2(q))
+        if recode:
+            exp_e = self.best_recoding(
+                exp_e, take_modulo, modulo_threshold, positive_modulo, clean_constant, lazy_modulo
+            )
 
-        cyclotomic_inverse = self.cyclotomic_inverse
-        square = self.square
-        mul = self.mul
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
 
-        N_ELEMENTS = self.extension_degree
+        # Prepare the stack with the copies of the powers of f needed
+        out += (
+            self.__stage_signed_powers(exp_e)
+            if max(abs(digit) for digit in exp_e) == 1
+            else self.__stage_odd_powers(exp_e)
+        )
 
         # --------------------------------------------------------------------------------------------------------------
 
-        out = verify_bottom_constant(q) if check_constant else Script()
+        modulos = (
+            self.__planned_modulos(exp_e, take_modulo, modulo_threshold, positive_modulo, clean_constant)
+            if modulo_planner.is_enabled
+            else self.__lazy_modulos(exp_e, take_modulo, modulo_threshold)
+            if lazy_modulo
+            else self.__estimated_modulos(exp_e, take_modulo, modulo_threshold)
+        )
+        for i, (modulo_square, modulo_multiplication) in zip(range(len(exp_e) - 2, -1, -1), modulos, strict=True):
+            out += self._cyclotomic_exponentiation_step(
+                is_multiplication=exp_e[i] != 0,
+                modulo_square=modulo_square,
+                modulo_multiplication=modulo_multiplication,
+                positive_modulo=positive_modulo if i == 0 else False,
+                clean_constant=clean_constant if i == 0 else False,
+            )
+
+        return out
+
+    def best_recoding(
+        self,
+        exp_e: list[int],
+        take_modulo: bool,
+        modulo_threshold: int,
+        positive_modulo: bool = True,
+        clean_constant: bool | None = None,
+        lazy_modulo: bool = False,
+    ) -> list[int]:
+        """Return the encoding of the exponent for which `cyclotomic_exponentiation` generates the shortest script.
+
+        Args:
+            exp_e (list[int]): The digits of the exponent, from the least to the most significant.
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            lazy_modulo (bool): If `True`, the reductions are placed in the lazy mode, see `cyclotomic_exponentiation`.
+                Defaults to `False`.
+
+        Returns:
+            The digits of the best encoding among `exponent_recoding.recodings(exp_e)`. Ties are broken in favour of
+            the encoding listed first, so `exp_e` is returned unless another encoding is strictly shorter.
+        """
+        sizes = self.recoding_sizes(exp_e, take_modulo, modulo_threshold, positive_modulo, clean_constant, lazy_modulo)
+        return recodings(exp_e)[min(sizes, key=sizes.get)]
+
+    def recoding_sizes(
+        self,
+        exp_e: list[int],
+        take_modulo: bool,
+        modulo_threshold: int,
+        positive_modulo: bool = True,
+        clean_constant: bool | None = None,
+        lazy_modulo: bool = False,
+    ) -> dict[str, int]:
+        """Return the size in bytes of `cyclotomic_exponentiation` for every encoding of the exponent.
+
+        The sizes depend on the state of `modulo_planner`, and they are computed once for every state. The scripts are
+        generated with `script_profiler` suspended, as they are only measured.
 
-        # Prepare the stack with the copies of f and Inverse(f) needed
+        Args:
+            exp_e (list[int]): The digits of the exponent, from the least to the most significant.
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            lazy_modulo (bool): If `True`, the reductions are placed in the lazy mode, see `cyclotomic_exponentiation`.
+                Defaults to `False`.
+
+        Returns:
+            A dictionary mapping the name of every encoding in `exponent_recoding.recodings(exp_e)` to the number of
+            bytes of the script.
+        """
+        key = (
+            tuple(exp_e),
+            take_modulo,
+            modulo_threshold,
+            positive_modulo,
+            clean_constant,
+            lazy_modulo,
+            modulo_planner.is_enabled,
+            modulo_planner.objective,
+        )
+        cache = _recoding_sizes.setdefault(self, {})
+        if key not in cache:
+            with script_profiler.suspended():
+                cache[key] = {
+                    name: len(
+                        self.cyclotomic_exponentiation(
+                            exp_e=digits,
+                            take_modulo=take_modulo,
+                            modulo_threshold=modulo_threshold,
+                            positive_modulo=positive_modulo,
+                            check_constant=False,
+                            clean_constant=clean_constant,
+                            lazy_modulo=lazy_modulo,
+                        ).raw_serialize()
+                    )
+                    for name, digits in recodings(exp_e).items()
+                }
+        return dict(cache[key])
+
+    def __stage_signed_powers(self, exp_e: list[int]) -> Script:
+        """Prepare the stack with the copies of `f` and `Inverse(f)` needed by `cyclotomic_exponentiation`.
+
+        Stack input:
+            - stack:    [q, ..., f]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., f^(e_i0), ..., f^(e_(l-1))], where `e_i0` is the first non-zero digit of `exp_e`
+            - altstack: []
+
+        Args:
+            exp_e (list[int]): The digits of the exponent, in `{-1, 0, 1}`.
+
+        Returns:
+            Script to stage the copies of `f` and `Inverse(f)`.
+        """
+        cyclotomic_inverse = self.cyclotomic_inverse
+
+        N_ELEMENTS = self.extension_degree
+
+        out = Script()
 
         # ever seen f?
         ever_seen_f = False
@@ -114,7 +259,7 @@ class CyclotomicExponentiation:
                 if prev == 1:
                     if ever_seen_inverse:
                         # Pick Inverse(f)
-                        out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=4)
+                        out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=N_ELEMENTS)
                         prev = -1
                         count_prev = 1
                     else:
@@ -137,14 +282,150 @@ class CyclotomicExponentiation:
             else:
                 pass
 
-        # --------------------------------------------------------------------------------------------------------------
+        return out
+
+    def __stage_odd_powers(self, exp_e: list[int]) -> Script:
+        """Prepare the stack with the copies of the odd powers of `f` needed by `cyclotomic_exponentiation`.
+
+        The odd powers `f, f^3, ..., f^m`, where `m` is the largest digit of `exp_e` in absolute value, are computed
+        and reduced first, and those not appearing in `exp_e` are discarded. Then, for every non-zero digit `e_i`, from
+        the least significant, a copy of `f^(|e_i|)` is moved to the top of the stack and inverted if `e_i < 0`. The
+        last copy of every power is rolled, so that no power is left on the stack.
 
+        Stack input:
+            - stack:    [q, ..., f]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., f^(e_i0), ..., f^(e_(l-1))], where `e_i0` is the first non-zero digit of `exp_e`
+            - altstack: []
+
+        Args:
+            exp_e (list[int]): The digits of the exponent. The non-zero digits must be odd.
+
+        Returns:
+            Script to stage the copies of the odd powers of `f`.
+        """
+        N_ELEMENTS = self.extension_degree
+
+        digits = [digit for digit in exp_e if digit != 0]
+        powers = {abs(digit) for digit in digits}
+
+        # After this, the stack is: f f^2
+        out = pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+        out += self.square(
+            take_modulo=True,
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+        )
+        # The powers of f on the stack below f^2, from the bottom
+        stack = [1]
+        for power in range(3, max(powers) + 1, 2):
+            # After this, the stack is: f^(power-2) f^2 f^(power-2) f^2 if f^(power-2) is needed, else
+            # f^2 f^(power-2) f^2
+            is_needed = power - 2 in powers
+            out += (pick if is_needed else roll)(position=2 * N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+            out += pick(position=2 * N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+            # After this, the stack is: f^(power-2) f^power f^2 if f^(power-2) is needed, else f^power f^2
+            out += self.mul(
+                take_modulo=True,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+            )
+            out += roll(position=2 * N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+            if not is_needed:
+                stack.pop()
+            stack.append(power)
+        # Drop f^2
+        out += Script.parse_string(" ".join(["OP_2DROP"] * (N_ELEMENTS // 2) + ["OP_DROP"] * (N_ELEMENTS % 2)))
+
+        last_use = {abs(digit): i for i, digit in enumerate(digits)}
+        for i, digit in enumerate(digits):
+            if i > 0 and digit == digits[i - 1] and last_use[abs(digit)] != i:
+                # Duplicate the previous copy
+                out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+            else:
+                position = N_ELEMENTS * (len(stack) - stack.index(abs(digit))) - 1
+                if last_use[abs(digit)] == i:
+                    out += roll(position=position, n_elements=N_ELEMENTS)
+                    stack.remove(abs(digit))
+                else:
+                    out += pick(position=position, n_elements=N_ELEMENTS)
+                if digit < 0:
+                    out += self.cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+            # The copies are never picked from the table
+            stack.append(None)
+
+        return out
+
+    def _cyclotomic_exponentiation_step(
+        self,
+        is_multiplication: bool,
+        modulo_square: bool,
+        modulo_multiplication: bool,
+        positive_modulo: bool,
+        clean_constant: bool,
+    ) -> Script:
+        """Generate the script of a step of `cyclotomic_exponentiation`.
+
+        Stack input:
+            - stack:    [q, ..., f, g] if `is_multiplication`, else [q, ..., g], `f` and `g` in F_{q^k}
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., g^2 * f] if `is_multiplication`, else [q, ..., g^2]
+            - altstack: []
+
+        Args:
+            is_multiplication (bool): Whether the step multiplies `g^2` by `f` (i.e., whether the bit of the exponent
+                is non-zero).
+            modulo_square (bool): If `True`, `g^2` is reduced modulo `q`.
+            modulo_multiplication (bool): If `True`, `g^2 * f` is reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            clean_constant (bool): If `True`, remove `q` from the bottom of the stack.
+
+        Returns:
+            Script to perform a step of the exponentiation in the cyclotomic subgroup.
+        """
+        if is_multiplication:
+            # After this, the stack is: f Conjugate(f) g^2
+            out = self.square(
+                take_modulo=modulo_square,
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+            )
+            out += self.mul(
+                take_modulo=modulo_multiplication,
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=False,
+            )
+            return out
+        # After this, the stack is: f g^2
+        return self.square(
+            take_modulo=modulo_square,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+            is_constant_reused=False,
+        )
+
+    def __estimated_modulos(self, exp_e: list[int], take_modulo: bool, modulo_threshold: int) -> list[list[bool]]:
+        """Return whether to reduce after the squaring and after the multiplication in the steps, from estimates."""
+        BIT_SIZE_Q = ceil(log2(self.modulus))
+
+        modulos = []
         current_size = BIT_SIZE_Q
-        positive_modulo_i = False
         for i in range(len(exp_e) - 2, -1, -1):
             modulo_square = False
             modulo_multiplication = False
-            clean_constant_final = False
 
             """
             Compute future size:
@@ -166,9 +447,6 @@ class CyclotomicExponentiation:
             If i == 0, always mod after multiplication
             """
 
-            if i == 0:
-                clean_constant_final = clean_constant
-                positive_modulo_i = positive_modulo
             if i == 0 and take_modulo:
                 modulo_square = True
                 if exp_e[0] != 0:
@@ -197,30 +475,91 @@ class CyclotomicExponentiation:
                 else:
                     current_size = future_size
 
+            modulos.append([modulo_square, modulo_multiplication])
+        return modulos
+
+    def __lazy_modulos(self, exp_e: list[int], take_modulo: bool, modulo_threshold: int) -> list[list[bool]]:
+        """Return whether to reduce after the squaring and after the multiplication in the steps, in the lazy mode.
+
+        The bound on the bit lengths of `g` is carried through the steps, and a result is only reduced if its bound
+        exceeds `modulo_threshold` (see `PrimeFieldExtension.lazy_modulo`). The powers of `x` multiplying `g` are
+        reduced. The last step reduces everything if `take_modulo` is `True`.
+        """
+        BIT_SIZE_Q = self.modulus.bit_length()
+
+        modulos = []
+        current_size = BIT_SIZE_Q
+        for i in range(len(exp_e) - 2, -1, -1):
+            modulo_square, current_size = self.__lazy_modulo(self.square, (current_size,), modulo_threshold)
+            modulo_multiplication = False
             if exp_e[i] != 0:
-                # After this, the stack is: f Conjugate(f) g^2
-                out += square(
-                    take_modulo=modulo_square,
-                    positive_modulo=positive_modulo_i,
-                    check_constant=False,
-                    clean_constant=False,
-                    is_constant_reused=False,
-                )
-                out += mul(
-                    take_modulo=modulo_multiplication,
-                    positive_modulo=positive_modulo_i,
-                    check_constant=False,
-                    clean_constant=clean_constant_final,
-                    is_constant_reused=False,
-                )
-            else:
-                # After this, the stack is: f g^2
-                out += square(
-                    take_modulo=modulo_square,
-                    positive_modulo=positive_modulo_i,
-                    check_constant=False,
-                    clean_constant=clean_constant_final,
-                    is_constant_reused=False,
+                modulo_multiplication, current_size = self.__lazy_modulo(
+                    self.mul, (BIT_SIZE_Q, current_size), modulo_threshold
                 )
+            if i == 0 and take_modulo:
+                # The last operation reduces the result
+                modulo_square = modulo_square or exp_e[0] == 0
+                modulo_multiplication = exp_e[0] != 0
+            modulos.append([modulo_square, modulo_multiplication])
+        return modulos
 
-        return out
+    @staticmethod
+    def __lazy_modulo(operation, input_bits: tuple[int, ...], modulo_threshold: int) -> tuple[bool, int]:
+        """Return `PrimeFieldExtension.lazy_modulo` for `operation`, a method of a field extension."""
+        return operation.__self__.lazy_modulo(operation.__name__, input_bits, modulo_threshold)
+
+    def __planned_modulos(
+        self,
+        exp_e: list[int],
+        take_modulo: bool,
+        modulo_threshold: int,
+        positive_modulo: bool,
+        clean_constant: bool,
+    ) -> list[list[bool]]:
+        """Return whether to reduce after the squaring and after the multiplication in the steps, from `modulo_planner`.
+
+        The steps carry `g`. The last step reduces everything if `take_modulo` is `True`.
+        """
+        steps = []
+        for i in range(len(exp_e) - 2, -1, -1):
+            options = ((True, True),) if i == 0 and take_modulo else tuple(product([True, False], repeat=2))
+            if exp_e[i] == 0:
+                # There is no multiplication: the second flag is irrelevant
+                options = tuple(option for option in options if option[1])
+            generate = partial(
+                self.__generate_step,
+                is_multiplication=exp_e[i] != 0,
+                positive_modulo=positive_modulo if i == 0 else False,
+                clean_constant=clean_constant if i == 0 else False,
+            )
+            key = ("CyclotomicExponentiation", self.modulus, self.extension_degree, exp_e[i] != 0, i == 0)
+            if i == 0:
+                key += (take_modulo, positive_modulo, clean_constant)
+            steps.append(ReductionStep(key=key, options=options, generate=generate, n_carried=self.extension_degree))
+        plan = modulo_planner.plan(
+            steps,
+            modulus_bits=self.modulus.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=self.extension_degree,
+            key=(
+                "CyclotomicExponentiation",
+                self.modulus,
+                self.extension_degree,
+                tuple(exp_e),
+                take_modulo,
+                positive_modulo,
+                clean_constant,
+            ),
+        )
+        return [list(option) for option in plan]
+
+    def __generate_step(
+        self, modulos: tuple[bool, bool], is_multiplication: bool, positive_modulo: bool, clean_constant: bool
+    ) -> Script:
+        return self._cyclotomic_exponentiation_step(
+            is_multiplication=is_multiplication,
+            modulo_square=modulos[0],
+            modulo_multiplication=modulos[1],
+            positive_modulo=positive_modulo,
+            clean_constant=clean_constant,
+        )
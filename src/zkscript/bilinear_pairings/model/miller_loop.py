@@ -1,17 +1,25 @@
 """Bitcoin scripts that compute the Miller loop."""
 
+from functools import partial
+from itertools import product
 from math import ceil, log2
 
 from tx_engine import Script
 
+from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.script_types.stack_elements import StackEllipticCurvePoint, StackFiniteFieldElement
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import boolean_list_to_bitmask, optimise_script
-from src.zkscript.util.utility_scripts import move, pick, roll, verify_bottom_constant
+from src.zkscript.util.utility_scripts import move, nums_to_script, pick, roll, verify_bottom_constant
 
 
 class MillerLoop:
     """Miller loop operation."""
 
+    @profile_script
+    @check_stack_effect
     def __one_step_without_addition(
         self,
         i: int,
@@ -109,6 +117,8 @@ class MillerLoop:
         )
         return out
 
+    @profile_script
+    @check_stack_effect
     def __one_step_with_addition(
         self,
         i: int,
@@ -248,6 +258,421 @@ class MillerLoop:
         )
         return out
 
+    def _miller_loop_step(
+        self,
+        i: int,
+        take_modulo: list[bool],
+        positive_modulo: bool,
+        verify_gradients: bool,
+        clean_constant: bool,
+        gradient_doubling: StackFiniteFieldElement,
+        gradient_addition: StackFiniteFieldElement,
+        P: StackEllipticCurvePoint,  # noqa: N803
+        Q: StackEllipticCurvePoint,  # noqa: N803
+        T: StackEllipticCurvePoint,  # noqa: N803
+    ) -> Script:
+        """Generate the script of the step `i` of `miller_loop`.
+
+        The script squares the Miller output (except in the first two steps), then performs the step with or without
+        addition depending on `exp_miller_loop[i]`.
+
+        Args:
+            i (int): The step being performed in the computation of the Miller loop.
+            take_modulo (list[bool]): List of two booleans that declare whether to take modulos after
+                calculating the evaluations and the point doublings.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            verify_gradients (bool): If `True` the validity of the gradients used for this step of
+                the Miller loop is verified.
+            clean_constant (bool): Whether to clean the constant at the end of the execution of the
+                Miller loop.
+            gradient_doubling (StackFiniteFieldElement): The gradient needed for doubling.
+            gradient_addition (StackFiniteFieldElement): The gradient needed for addition. Unused if
+                `exp_miller_loop[i] == 0`.
+            P (StackEllipticCurvePoint): The point P needed for the evaluations.
+            Q (StackEllipticCurvePoint): The point Q needed for the evaluations and the additions.
+            T (StackEllipticCurvePoint): The point T needed for the evaluations and the doublings.
+        """
+        out = Script()
+        if i == len(self.exp_miller_loop) - 3:
+            if self.exp_miller_loop[i + 1] == 0:
+                # stack in:  [P, Q, T, ev_(l_(T,T))(P)]
+                # stack out: [P, Q, T, Dense(ev_(l_(T,T))(P)^2)]
+                out += pick(
+                    position=self.N_ELEMENTS_EVALUATION_OUTPUT - 1, n_elements=self.N_ELEMENTS_EVALUATION_OUTPUT
+                )  # Duplicate ev_(l_(T,T))(P)
+                out += self.line_eval_times_eval(
+                    take_modulo=take_modulo[0],
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+                out += self.pad_eval_times_eval_to_miller_output
+            else:
+                # stack in:  [P, Q, T, ev_(l_(T,T))(P), ev_(l_(2T, ± Q))(P)]
+                # stack out: [P, Q, T, Dense((ev_(l_(T,T))(P) * ev_(l_(2T, ± Q))(P))^2)]
+                out += pick(
+                    position=self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION - 1,
+                    n_elements=self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION,
+                )
+                out += self.line_eval_times_eval_times_eval_times_eval(
+                    take_modulo=take_modulo[0],
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                )
+                out += self.pad_eval_times_eval_times_eval_times_eval_to_miller_output
+
+        if i < len(self.exp_miller_loop) - 3:
+            # stack in:  [gradient_(2T), P, Q, T, f_i]
+            # stack out: [gradient_(2T), P, Q, T, f_i^2]
+            out += self.miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
+
+        if self.exp_miller_loop[i] == 0:
+            # stack in:  [gradient_(2T), ..., P, Q, T, f_i^2]
+            # stack out: [gradient_(2T) if not verify_gradients, ..., P, Q, 2T, (f_i^2 * ev_(l_(T,T))(P))]
+            out += self.__one_step_without_addition(
+                i=i,
+                take_modulo=take_modulo,
+                positive_modulo=positive_modulo,
+                verify_gradient=verify_gradients,
+                clean_constant=clean_constant,
+                gradient_doubling=gradient_doubling,
+                P=P,
+                T=T,
+            )
+        else:
+            # stack in:  [gradient_(2T ± Q), gradient_(2T), ..., P, Q, T, f_i^2]
+            # stack out: [gradient_(2T ± Q) in not verify_gradients, gradient_(2T) if not_verify_gradients, ..., P,
+            #               Q, (2T ± Q), (f_i^2 * ev_(l_(T,T))(P) * ev_(l_(2T, ± Q))(P))]
+            out += self.__one_step_with_addition(
+                i=i,
+                take_modulo=take_modulo,
+                positive_modulo=positive_modulo,
+                verify_gradients=verify_gradients,
+                clean_constant=clean_constant,
+                gradient_doubling=gradient_doubling,
+                gradient_addition=gradient_addition,
+                P=P,
+                Q=Q,
+                T=T,
+            )
+        return out
+
+    def _n_gradients(self) -> int:
+        """Return the number of gradients used by the Miller loop of a pair in affine coordinates."""
+        return sum(1 if digit == 0 else 2 for digit in self.exp_miller_loop[:-1]) + (
+            2 if self.frobenius_twisted_curve is not None else 0
+        )
+
+    def frobenius_gradients(self, Q: list[int], gradients: list[list[list[int]]]) -> list[list[list[int]]]:  # noqa: N803
+        """Return the gradients of the lines through `pi(Q)` and `-pi^2(Q)` of the optimal ate Miller loop of `Q`.
+
+        If the pairing model has the constants `frobenius_twisted_curve`, the loop over `exp_miller_loop` computing
+        `T = w*Q` is followed by the additions `T + pi(Q)` and `(T + pi(Q)) - pi^2(Q)`, whose gradients are computed
+        here from the gradients of the loop, so that the gradients of the Miller loop of `Q` are
+        `gradients + frobenius_gradients(Q, gradients)`.
+
+        Args:
+            Q (list[int]): The point `Q`, an element of E'(F_q^2).
+            gradients (list[list[list[int]]]): The gradients of the loop over `exp_miller_loop` of `Q`, in the format
+                of `precomputed_gradients[0]` in `triple_miller_loop`.
+
+        Returns:
+            The list `[[gradient_(T + pi(Q)), gradient_((T + pi(Q)) - pi^2(Q))]]`, or `[]` if the pairing model has no
+            lines through the Frobenius of `Q`.
+
+        Preconditions:
+            - `gradients` are the gradients of the loop over `exp_miller_loop` of `Q`.
+        """
+        if self.frobenius_twisted_curve is None:
+            return []
+
+        q = self.modulus
+
+        def mul(a: list[int], b: list[int]) -> list[int]:
+            return [(a[0] * b[0] + self.NON_RESIDUE_FQ * a[1] * b[1]) % q, (a[0] * b[1] + a[1] * b[0]) % q]
+
+        def sub(a: list[int], b: list[int]) -> list[int]:
+            return [(a[0] - b[0]) % q, (a[1] - b[1]) % q]
+
+        def conjugate(a: list[int]) -> list[int]:
+            return [a[0], -a[1] % q]
+
+        def gradient(x: list[int], y: list[int], x_t: list[int], y_t: list[int]) -> list[int]:
+            # Gradient of the line through (x, y) and (x_t, y_t)
+            dx = sub(x, x_t)
+            norm_inverse = pow(dx[0] ** 2 - self.NON_RESIDUE_FQ * dx[1] ** 2, -1, q)
+            return mul(sub(y, y_t), [el * norm_inverse % q for el in conjugate(dx)])
+
+        x_q, y_q = Q[: self.N_POINTS_TWIST // 2], Q[self.N_POINTS_TWIST // 2 :]
+        x_t, y_t = x_q, [-el % q for el in y_q] if self.exp_miller_loop[-1] == -1 else y_q
+        for step, loop_i in enumerate(range(len(self.exp_miller_loop) - 2, -1, -1)):
+            # The second point of the line tangent at T is T itself
+            xs = [x_t] if self.exp_miller_loop[loop_i] == 0 else [x_t, x_q]
+            for step_gradient, x in zip(gradients[step], xs, strict=True):
+                x_sum = sub(sub(mul(step_gradient, step_gradient), x_t), x)
+                x_t, y_t = x_sum, sub(mul(step_gradient, sub(x_t, x_sum)), y_t)
+
+        (gamma_x, gamma_y), (gamma_square_x, gamma_square_y) = self.frobenius_twisted_curve
+        points = [
+            [mul(gamma_x, conjugate(x_q)), mul(gamma_y, conjugate(y_q))],
+            [mul(gamma_square_x, x_q), mul([-el % q for el in gamma_square_y], y_q)],
+        ]
+        out = []
+        for x, y in points:
+            out.append(gradient(x, y, x_t, y_t))
+            x_sum = sub(sub(mul(out[-1], out[-1]), x_t), x)
+            x_t, y_t = x_sum, sub(mul(out[-1], sub(x_t, x_sum)), y_t)
+        return [out]
+
+    def _frobenius_twisted_points(self, Q: StackEllipticCurvePoint) -> Script:  # noqa: N803
+        """Generate the script to compute `pi(Q)` and `-pi^2(Q)`, where `pi` is the Frobenius of the twisted curve.
+
+        Stack input:
+            - stack:    [q, ..., Q, ...]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., Q, ..., pi(Q), -pi^2(Q)]
+            - altstack: []
+
+        Args:
+            Q (StackEllipticCurvePoint): The position of the point `Q` in the stack. It is picked.
+
+        Returns:
+            Script to compute `pi(Q)` and `-pi^2(Q)`.
+        """
+        fq2 = Fq2(self.modulus, self.NON_RESIDUE_FQ)
+        (gamma_x, gamma_y), (gamma_square_x, gamma_square_y) = self.frobenius_twisted_curve
+        minus_gamma_square_y = [-el % self.modulus for el in gamma_square_y]
+
+        out = Script()
+        for i, (coordinate, constant, is_conjugated) in enumerate(
+            [
+                (Q.x, gamma_x, True),
+                (Q.y, gamma_y, True),
+                (Q.x, gamma_square_x, False),
+                (Q.y, minus_gamma_square_y, False),
+            ]
+        ):
+            out += move(coordinate.shift(i * self.extension_degree), pick)
+            if is_conjugated:
+                out += fq2.conjugate(take_modulo=False, check_constant=False, clean_constant=False)
+            if constant != [1, 0]:
+                out += nums_to_script(constant)
+                out += fq2.mul(
+                    take_modulo=True,
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+        return out
+
+    def _frobenius_step(
+        self,
+        positive_modulo: bool,
+        verify_gradient: bool,
+        clean_constant: bool,
+        gradients: list[StackFiniteFieldElement] | list[list[int]],
+        P: StackEllipticCurvePoint,  # noqa: N803
+        Q: StackEllipticCurvePoint,  # noqa: N803
+        T: StackEllipticCurvePoint,  # noqa: N803
+    ) -> Script:
+        """Generate the script to multiply the Miller output by the lines through `pi(Q)` and `-pi^2(Q)`.
+
+        The script is the last step of the optimal ate Miller loop of a pair in affine coordinates: it computes the
+        lines through `T` and `pi(Q)`, and through `T + pi(Q)` and `-pi^2(Q)`, multiplies the Miller output by their
+        evaluations at `P`, and updates `T`. The Miller output and the point are reduced modulo `q`.
+
+        Stack input:
+            - stack:    [q, ..., gradient_((T + pi(Q)) - pi^2(Q)), gradient_(T + pi(Q)), ..., P, ..., Q, ..., T, ...,
+                f]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., {gradients}, ..., P, ..., Q, ..., ..., (T + pi(Q)) - pi^2(Q),
+                f * ev_(l_(T, pi(Q)))(P) * ev_(l_(T + pi(Q), -pi^2(Q)))(P)]
+            - altstack: []
+
+        Args:
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            verify_gradient (bool): If `True`, the gradients are verified and removed from the stack. Otherwise, they
+                are left on the stack. Ignored if the gradients are injected.
+            clean_constant (bool): If `True`, remove `q` from the bottom of the stack.
+            gradients (list[StackFiniteFieldElement] | list[list[int]]): The positions in the stack of the gradients
+                `[gradient_(T + pi(Q)), gradient_((T + pi(Q)) - pi^2(Q))]`, or their values, in which case they are
+                injected in the script and not verified.
+            P (StackEllipticCurvePoint): The position of the point `P`. It is picked.
+            Q (StackEllipticCurvePoint): The position of the point `Q`. It is picked.
+            T (StackEllipticCurvePoint): The position of the point `T`. It is rolled.
+
+        Returns:
+            Script of the step of the lines through the Frobenius of `Q`.
+
+        Notes:
+            The positions are computed without `f`. If the gradients are on the stack, `P`, `Q` and `T` must be above
+            them, with `gradient_(T + pi(Q))` above `gradient_((T + pi(Q)) - pi^2(Q))`. Injected gradients are pushed
+            right before they are used.
+        """
+        is_injected = not isinstance(gradients[0], StackFiniteFieldElement)
+        frobenius_point = StackEllipticCurvePoint(
+            StackFiniteFieldElement(self.N_POINTS_TWIST - 1, False, self.N_POINTS_TWIST // 2),
+            StackFiniteFieldElement(self.N_POINTS_TWIST // 2 - 1, False, self.N_POINTS_TWIST // 2),
+        )
+        injected_gradient = StackFiniteFieldElement(self.extension_degree - 1, False, self.extension_degree)
+        # Injected gradients are pushed on top of the stack right before they are used, and rolled
+        shift_injected = self.extension_degree if is_injected else 0
+
+        # stack in:     [..., P, ..., Q, ..., T, ..., f]
+        # stack out:    [..., P, ..., Q, ..., T, ..., pi(Q), -pi^2(Q), f]
+        out = Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out += self._frobenius_twisted_points(Q)
+        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        P, T = P.shift(2 * self.N_POINTS_TWIST), T.shift(2 * self.N_POINTS_TWIST)
+        if not is_injected:
+            gradients = [gradient.shift(2 * self.N_POINTS_TWIST) for gradient in gradients]
+
+        # stack out:    [..., P, ..., Q, ..., T, ..., pi(Q), -pi^2(Q)]
+        # altstack out: [f * ev_(l_(T, pi(Q)))(P) * ev_(l_(T + pi(Q), -pi^2(Q)))(P)]
+        shift = self.N_ELEMENTS_MILLER_OUTPUT
+        for gradient, point in zip(gradients, [T, frobenius_point], strict=True):
+            if is_injected:
+                out += nums_to_script(gradient)
+            out += self.line_eval(
+                take_modulo=True,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                gradient=injected_gradient if is_injected else gradient.shift(shift),
+                P=P.shift(shift + shift_injected),
+                Q=point.shift(shift + shift_injected),
+                rolling_option=boolean_list_to_bitmask([is_injected, False, False]),
+            )  # Compute ev_(l_(T, pi(Q)))(P), then ev_(l_(T + pi(Q), -pi^2(Q)))(P)
+            shift += self.N_ELEMENTS_EVALUATION_OUTPUT
+        out += self.line_eval_times_eval(
+            take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+        )
+        out += self.miller_loop_output_times_eval_times_eval(
+            take_modulo=True,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+        )
+        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+
+        # stack out:    [..., {gradients}, ..., P, ..., Q, ..., ..., (T + pi(Q)) - pi^2(Q)]
+        # altstack out: [f * ev_(l_(T, pi(Q)))(P) * ev_(l_(T + pi(Q), -pi^2(Q)))(P)]
+        if is_injected:
+            out += nums_to_script(gradients[0])
+        out += self.point_addition_twisted_curve(
+            take_modulo=True,
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            verify_gradient=verify_gradient and not is_injected,
+            gradient=injected_gradient if is_injected else gradients[0],
+            P=T.shift(shift_injected),
+            Q=frobenius_point.shift(self.N_POINTS_TWIST + shift_injected),
+            rolling_option=boolean_list_to_bitmask([verify_gradient or is_injected, True, True]),
+        )  # Compute T + pi(Q)
+        if is_injected:
+            out += nums_to_script(gradients[1])
+        out += self.point_addition_twisted_curve(
+            take_modulo=True,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+            verify_gradient=verify_gradient and not is_injected,
+            gradient=injected_gradient
+            if is_injected
+            else gradients[1].shift(-self.N_POINTS_TWIST - (self.extension_degree if verify_gradient else 0)),
+            P=frobenius_point.shift(self.N_POINTS_TWIST + shift_injected),
+            Q=frobenius_point.shift(shift_injected),
+            rolling_option=boolean_list_to_bitmask([verify_gradient or is_injected, True, True]),
+        )  # Compute (T + pi(Q)) - pi^2(Q)
+
+        # stack out:    [..., {gradients}, ..., P, ..., Q, ..., ..., (T + pi(Q)) - pi^2(Q),
+        #                   f * ev_(l_(T, pi(Q)))(P) * ev_(l_(T + pi(Q), -pi^2(Q)))(P)]
+        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out
+
+    def __estimated_take_modulos(self, modulo_threshold: int) -> list[list[bool]]:
+        """Return the `take_modulo` arguments of the steps of `miller_loop`, from the size estimates."""
+        BIT_SIZE_Q = ceil(log2(self.modulus))
+        size_point_multiplication = BIT_SIZE_Q
+        size_miller_output = BIT_SIZE_Q
+
+        take_modulos = []
+        for i in range(len(self.exp_miller_loop) - 2, -1, -1):
+            (
+                take_modulo_miller_loop_output,
+                take_modulo_point_multiplication,
+                size_miller_output,
+                size_point_multiplication,
+            ) = self.size_estimation_miller_loop(
+                self.modulus,
+                modulo_threshold,
+                i,
+                self.exp_miller_loop,
+                size_miller_output,
+                size_point_multiplication,
+                False,
+            )
+            take_modulos.append([take_modulo_miller_loop_output, take_modulo_point_multiplication])
+        return take_modulos
+
+    def __planned_take_modulos(self, modulo_threshold: int, steps: list[dict]) -> list[list[bool]]:
+        """Return the `take_modulo` arguments of the steps of `miller_loop`, from `modulo_planner`.
+
+        The steps carry the point `T` and the Miller output `f` (the line evaluations after the first step).
+        """
+        first = len(self.exp_miller_loop) - 2
+        reduction_steps = []
+        for step in steps:
+            i = step["i"]
+            key = (
+                "MillerLoop",
+                self.modulus,
+                self.exp_miller_loop[i],
+                self.exp_miller_loop[i + 1] if i >= first - 1 else None,
+                i == first,
+                i == first - 1,
+                i == 0,
+                step["positive_modulo"],
+                step["clean_constant"],
+                step["verify_gradients"],
+            )
+            if i != first:
+                n_miller_output = self.N_ELEMENTS_MILLER_OUTPUT
+            elif self.exp_miller_loop[i] == 0:
+                n_miller_output = self.N_ELEMENTS_EVALUATION_OUTPUT
+            else:
+                n_miller_output = self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+            reduction_steps.append(
+                ReductionStep(
+                    key=key,
+                    options=((True, True),) if i == 0 else tuple(product([True, False], repeat=2)),
+                    generate=partial(self.__generate_step, step),
+                    n_carried=self.N_POINTS_TWIST + n_miller_output,
+                )
+            )
+        plan = modulo_planner.plan(
+            reduction_steps,
+            modulus_bits=self.modulus.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=self.N_POINTS_TWIST,
+            key=tuple(step.key for step in reduction_steps),
+        )
+        return [list(option) for option in plan]
+
+    def __generate_step(self, step: dict, take_modulo: tuple[bool, bool]) -> Script:
+        return self._miller_loop_step(take_modulo=list(take_modulo), **step)
+
+    @profile_script
+    @check_stack_effect
     def miller_loop(
         self,
         modulo_threshold: int,
@@ -255,16 +680,20 @@ class MillerLoop:
         verify_gradients: bool = True,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
     ) -> Script:
         """Evaluation of the Miller loop at points `P` and `Q`.
 
         Stack input:
             - stack:    [q, ..., gradients, P, Q], `P` is a point on E(F_q), `Q` is a point on E'(F_q^{k/d}),
-                `gradients` is the sequence of gradients to compute the miller loop
+                `gradients` is the sequence of gradients to compute the miller loop, followed by
+                `frobenius_gradients` if the model has the lines through the Frobenius of `Q`
             - altstack: []
 
         Stack output:
-            - stack:    [q, ..., wQ, miller(P,Q)], `miller(P,Q) = f_(w,Q)(P)` is in F_q^k
+            - stack:    [q, ..., wQ, miller(P,Q)], `miller(P,Q) = f_(w,Q)(P)` is in F_q^k. If the model has the lines
+                through the Frobenius of `Q`, `wQ` is `w*Q + pi(Q) - pi^2(Q)`, and `miller(P,Q)` is multiplied by the
+                evaluations of these lines at `P`
             - altstack: []
 
         Args:
@@ -273,6 +702,9 @@ class MillerLoop:
             verify_gradients (bool): If `True` the validity of the gradients used for the Miller loop is verified.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
 
         Returns:
             Script to evaluate the Miller loop at points `P` and `Q`.
@@ -313,10 +745,6 @@ class MillerLoop:
             if self.exp_miller_loop[-1] == -1 and j >= self.N_POINTS_TWIST // 2:
                 out += Script.parse_string("OP_NEGATE")
 
-        BIT_SIZE_Q = ceil(log2(self.modulus))
-        size_point_multiplication = BIT_SIZE_Q
-        size_miller_output = BIT_SIZE_Q
-
         gradient_addition = StackFiniteFieldElement(
             2 * self.N_POINTS_TWIST + self.N_POINTS_CURVE + 2 * self.extension_degree - 1, False, self.extension_degree
         )
@@ -339,98 +767,56 @@ class MillerLoop:
             StackFiniteFieldElement(self.N_POINTS_TWIST - 1, False, self.N_POINTS_TWIST // 2),
             StackFiniteFieldElement(self.N_POINTS_TWIST // 2 - 1, False, self.N_POINTS_TWIST // 2),
         )
-        # stack in:  [P, Q, T]
-        # stack out: [w*Q, miller(P,Q)]
+        # The last step of the loop over exp_miller_loop is the last step of the Miller loop, unless it is followed by
+        # the lines through the Frobenius of Q
+        is_last_step = self.frobenius_twisted_curve is None
+        steps = []
         gradient_tracker = 0
         for i in range(len(self.exp_miller_loop) - 2, -1, -1):
-            positive_modulo_i = positive_modulo if i == 0 else False
-            clean_constant_i = clean_constant if i == 0 else False
+            steps.append(
+                {
+                    "i": i,
+                    "positive_modulo": positive_modulo if i == 0 and is_last_step else False,
+                    "verify_gradients": verify_gradients,
+                    "clean_constant": clean_constant if i == 0 and is_last_step else False,
+                    "gradient_doubling": gradient_doubling.shift(gradient_tracker),
+                    "gradient_addition": gradient_addition.shift(gradient_tracker),
+                    "P": P,
+                    "Q": Q,
+                    "T": T,
+                }
+            )
+            n_gradients = 1 if self.exp_miller_loop[i] == 0 else 2
+            gradient_tracker += n_gradients * self.extension_degree if not verify_gradients else 0
 
-            (
-                take_modulo_miller_loop_output,
-                take_modulo_point_multiplication,
-                size_miller_output,
-                size_point_multiplication,
-            ) = self.size_estimation_miller_loop(
-                self.modulus,
-                modulo_threshold,
-                i,
-                self.exp_miller_loop,
-                size_miller_output,
-                size_point_multiplication,
-                False,
+        take_modulos = (
+            self.__planned_take_modulos(modulo_threshold, steps)
+            if modulo_planner.is_enabled
+            else self.__estimated_take_modulos(modulo_threshold)
+        )
+
+        # stack in:  [P, Q, T]
+        # stack out: [w*Q, miller(P,Q)]
+        for step, take_modulo in zip(steps, take_modulos, strict=True):
+            out += self._miller_loop_step(take_modulo=take_modulo, **step)
+
+        if not is_last_step:
+            # stack in:  [gradients, P, Q, T, f]
+            # stack out: [P, Q, (T + pi(Q)) - pi^2(Q), f * ev_(l_(T, pi(Q)))(P) * ev_(l_(T + pi(Q), -pi^2(Q)))(P)]
+            out += self._frobenius_step(
+                positive_modulo=positive_modulo,
+                verify_gradient=verify_gradients,
+                clean_constant=clean_constant,
+                gradients=[gradient_doubling.shift(gradient_tracker), gradient_addition.shift(gradient_tracker)],
+                P=P,
+                Q=Q,
+                T=T,
             )
 
-            if i == len(self.exp_miller_loop) - 3:
-                if self.exp_miller_loop[i + 1] == 0:
-                    # stack in:  [P, Q, T, ev_(l_(T,T))(P)]
-                    # stack out: [P, Q, T, Dense(ev_(l_(T,T))(P)^2)]
-                    out += pick(
-                        position=self.N_ELEMENTS_EVALUATION_OUTPUT - 1, n_elements=self.N_ELEMENTS_EVALUATION_OUTPUT
-                    )  # Duplicate ev_(l_(T,T))(P)
-                    out += self.line_eval_times_eval(
-                        take_modulo=take_modulo_miller_loop_output,
-                        positive_modulo=False,
-                        check_constant=False,
-                        clean_constant=False,
-                        is_constant_reused=False,
-                    )
-                    out += self.pad_eval_times_eval_to_miller_output
-                else:
-                    # stack in:  [P, Q, T, ev_(l_(T,T))(P), ev_(l_(2T, ± Q))(P)]
-                    # stack out: [P, Q, T, Dense((ev_(l_(T,T))(P) * ev_(l_(2T, ± Q))(P))^2)]
-                    out += pick(
-                        position=self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION - 1,
-                        n_elements=self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION,
-                    )
-                    out += self.line_eval_times_eval_times_eval_times_eval(
-                        take_modulo=take_modulo_miller_loop_output,
-                        positive_modulo=False,
-                        check_constant=False,
-                        clean_constant=False,
-                    )
-                    out += self.pad_eval_times_eval_times_eval_times_eval_to_miller_output
-
-            if i < len(self.exp_miller_loop) - 3:
-                # stack in:  [gradient_(2T), P, Q, T, f_i]
-                # stack out: [gradient_(2T), P, Q, T, f_i^2]
-                out += self.miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
-
-            if self.exp_miller_loop[i] == 0:
-                # stack in:  [gradient_(2T), ..., P, Q, T, f_i^2]
-                # stack out: [gradient_(2T) if not verify_gradients, ..., P, Q, 2T, (f_i^2 * ev_(l_(T,T))(P))]
-                out += self.__one_step_without_addition(
-                    i=i,
-                    take_modulo=[take_modulo_miller_loop_output, take_modulo_point_multiplication],
-                    positive_modulo=positive_modulo_i,
-                    verify_gradient=verify_gradients,
-                    clean_constant=clean_constant_i,
-                    gradient_doubling=gradient_doubling.shift(gradient_tracker),
-                    P=P,
-                    T=T,
-                )
-                gradient_tracker += self.extension_degree if not verify_gradients else 0
-            else:
-                # stack in:  [gradient_(2T ± Q), gradient_(2T), ..., P, Q, T, f_i^2]
-                # stack out: [gradient_(2T ± Q) in not verify_gradients, gradient_(2T) if not_verify_gradients, ..., P,
-                #               Q, (2T ± Q), (f_i^2 * ev_(l_(T,T))(P) * ev_(l_(2T, ± Q))(P))]
-                out += self.__one_step_with_addition(
-                    i=i,
-                    take_modulo=[take_modulo_miller_loop_output, take_modulo_point_multiplication],
-                    positive_modulo=positive_modulo_i,
-                    verify_gradients=verify_gradients,
-                    clean_constant=clean_constant_i,
-                    gradient_doubling=gradient_doubling.shift(gradient_tracker),
-                    gradient_addition=gradient_addition.shift(gradient_tracker),
-                    P=P,
-                    Q=Q,
-                    T=T,
-                )
-                gradient_tracker += 2 * self.extension_degree if not verify_gradients else 0
         # stack in:  [P, Q, w*Q, miller(P,Q)]
         # stack out: [w*Q, miller(P,Q)]
         out += move(Q.shift(self.N_ELEMENTS_MILLER_OUTPUT), roll)  # Roll Q
         out += move(P.shift(self.N_ELEMENTS_MILLER_OUTPUT), roll)  # Roll P
         out += Script.parse_string(" ".join(["OP_DROP"] * (self.N_POINTS_TWIST + self.N_POINTS_CURVE)))
 
-        return optimise_script(out)
+        return optimise_script(out) if optimise else out
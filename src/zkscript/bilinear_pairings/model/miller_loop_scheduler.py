@@ -0,0 +1,308 @@
+"""Choice of the coordinate systems of the steps of the hybrid Miller loop.
+
+The steps of `hybrid_miller_loop` are computed in affine coordinates, with a gradient per doubling and per addition,
+or in projective coordinates, with more arithmetic but no gradient. The gradients of an argument `Q` known when the
+locking script is generated (e.g., `-gamma` and `-delta` in Groth16) can be hard-coded in the locking script, the
+others are supplied in the unlocking script and verified. The best trade-off between the size of the locking script,
+the size of the unlocking script and the cost of the execution depends on the argument and on the step.
+
+The `MillerLoopScheduler` chooses, by dynamic programming over the steps, for every argument the number of its first
+steps computed in affine coordinates (an argument switches from affine to projective coordinates at most once). The
+cost of every step is measured on its script, generated once for every combination of the step type (the digit of the
+expansion of the Miller loop parameter, first or last step), of the arguments in affine coordinates and of the
+arguments switching to projective coordinates after the step.
+
+Example:
+    >>> schedule, lock = bls12_381.scheduled_miller_loop(
+    ...     n_pairs=3, modulo_threshold=1600, objective="lock_size", precomputed_gradients=[None, gamma, delta]
+    ... )
+    >>> schedule.affine_steps
+    (63, 63, 63)
+"""
+
+from dataclasses import dataclass
+from itertools import product
+from typing import Literal
+
+from tx_engine import Script
+
+from src.zkscript.bilinear_pairings.model.multi_miller_loop_proj import hybrid_gradients_order
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.stack_simulator import StackSimulator
+from src.zkscript.util.utility_scripts import nums_to_script
+
+Objective = Literal["size", "lock_size", "execution"] | ExecutionCostModel
+
+
+@dataclass(frozen=True)
+class MillerLoopSchedule:
+    """Coordinate systems of the steps of `hybrid_miller_loop`.
+
+    Attributes:
+        affine_steps (tuple[int, ...]): `affine_steps[j]` is the number of the first steps of the j-th Miller loop
+            computed in affine coordinates (see `hybrid_miller_loop`).
+        lock_size (int): The estimated size in bytes of the steps of the Miller loops in the locking script.
+        unlock_size (int): The estimated size in bytes of the gradients in the unlocking script.
+        arithmetic_cost (int): The estimated cost of the execution of the steps of the Miller loops (see
+            `StackSimulation.arithmetic_cost`).
+        validation_time (float): The time in seconds taken to execute the steps of the Miller loops, estimated by
+            an `ExecutionCostModel` (see `ExecutionCostModel.estimate`). `0.0` if no model was given.
+    """
+
+    affine_steps: tuple[int, ...]
+    lock_size: int
+    unlock_size: int
+    arithmetic_cost: int
+    validation_time: float = 0.0
+
+    def value(self, objective: Objective) -> tuple[float, int]:
+        """Return the value of the schedule for `objective`, followed by its total size to break the ties."""
+        total_size = self.lock_size + self.unlock_size
+        if isinstance(objective, ExecutionCostModel):
+            return (self.validation_time, total_size)
+        return {
+            "size": (total_size, total_size),
+            "lock_size": (self.lock_size, total_size),
+            "execution": (self.arithmetic_cost, total_size),
+        }[objective]
+
+
+def _prepend_step(
+    schedule: MillerLoopSchedule, step_cost: MillerLoopSchedule, is_affine: tuple[bool, ...]
+) -> MillerLoopSchedule:
+    """Return `schedule` preceded by a step with cost `step_cost`, in which the pairs `is_affine` are affine."""
+    return MillerLoopSchedule(
+        affine_steps=tuple(n + affine for n, affine in zip(schedule.affine_steps, is_affine, strict=True)),
+        lock_size=schedule.lock_size + step_cost.lock_size,
+        unlock_size=schedule.unlock_size + step_cost.unlock_size,
+        arithmetic_cost=schedule.arithmetic_cost + step_cost.arithmetic_cost,
+        validation_time=schedule.validation_time + step_cost.validation_time,
+    )
+
+
+class MillerLoopScheduler:
+    """Choice of the coordinate systems of the steps of `hybrid_miller_loop`."""
+
+    def __step_cost(
+        self,
+        costs: dict,
+        step: int,
+        is_affine: tuple[bool, ...],
+        is_converted: tuple[bool, ...],
+        is_precomputed: list[bool],
+        *,
+        cost_model: ExecutionCostModel | None,
+    ) -> MillerLoopSchedule:
+        """Return the cost of the step `step` of `hybrid_miller_loop`.
+
+        Args:
+            costs (dict): The costs of the steps already measured, updated with the cost of this step.
+            step (int): The step of the Miller loop, from `0` (the first step).
+            is_affine (tuple[bool, ...]): Whether the pairs are in affine coordinates during the step.
+            is_converted (tuple[bool, ...]): Whether the pairs switch to projective coordinates after the step.
+            is_precomputed (list[bool]): Whether the gradients of the pairs are hard-coded in the locking script.
+            cost_model (ExecutionCostModel | None): The model estimating the validation time of the step, or `None`
+                to leave it at `0.0`.
+
+        Returns:
+            The cost of the step as a `MillerLoopSchedule` (with `affine_steps = is_affine`). The precomputed
+            gradients are replaced by `q - 1`, so the size of the locking script is estimated.
+        """
+        n_steps = len(self.exp_miller_loop) - 1
+        loop_i = n_steps - 1 - step
+        # The scripts of the steps with the same digit differ only by the positions of the gradients
+        key = (self.exp_miller_loop[loop_i], step == 0, loop_i == 0, is_affine, is_converted)
+        if key in costs:
+            return costs[key]
+
+        affine_steps = [
+            (step + 1 if is_converted[j] else n_steps) if is_affine[j] else 0 for j in range(len(is_affine))
+        ]
+        gradient = [self.modulus - 1] * self.extension_degree
+        script = self._hybrid_miller_loop_step(
+            loop_i=loop_i,
+            affine_steps=affine_steps,
+            precomputed_gradients=[
+                [[gradient, gradient]] * n_steps if is_precomputed[j] else None for j in range(len(is_affine))
+            ],
+        )
+        n_gradients = sum(
+            gradient_step == step
+            for gradient_step, _, _ in hybrid_gradients_order(self.exp_miller_loop, affine_steps, is_precomputed)
+        )
+        costs[key] = MillerLoopSchedule(
+            affine_steps=tuple(int(affine) for affine in is_affine),
+            lock_size=len(script.raw_serialize()),
+            unlock_size=n_gradients * len(nums_to_script(gradient).raw_serialize()),
+            arithmetic_cost=StackSimulator(default_bits=self.modulus.bit_length()).simulate(script).arithmetic_cost,
+            validation_time=0.0
+            if cost_model is None
+            else cost_model.estimate(script, n_inputs=None, default_bits=self.modulus.bit_length()).validation_time,
+        )
+        return costs[key]
+
+    def miller_loop_schedule(
+        self,
+        n_pairs: int,
+        objective: Objective = "size",
+        is_precomputed: list[bool] | None = None,
+    ) -> MillerLoopSchedule:
+        """Choose the steps of `hybrid_miller_loop` computed in affine coordinates.
+
+        Args:
+            n_pairs (int): The number `n` of pairs `(Pj, Qj)`. Must be at least `2`.
+            objective (Objective): What the schedule minimises: `"size"` for the size of the locking script plus the
+                size of the gradients in the unlocking script, `"lock_size"` for the size of the locking script,
+                `"execution"` for the estimated cost of the execution (see `StackSimulation.arithmetic_cost`), or an
+                `ExecutionCostModel` for the time taken to execute the steps estimated by the model. The ties are
+                broken by the total size. Defaults to `"size"`.
+            is_precomputed (list[bool] | None): Whether the gradients of the j-th Miller loop are hard-coded in the
+                locking script (see the argument `precomputed_gradients` of `hybrid_miller_loop`). Defaults to
+                `None`, i.e., all the gradients are in the unlocking script.
+
+        Returns:
+            The schedule minimising `objective`, with its estimated costs (see `evaluate_miller_loop_schedule`). The
+            validation time is estimated only if `objective` is an `ExecutionCostModel`.
+
+        Raises:
+            ValueError: If `n_pairs` is smaller than `2`, if `objective` is not one of `"size"`, `"lock_size"`,
+                `"execution"` and an `ExecutionCostModel`, or if `is_precomputed` does not have one entry per pair.
+        """
+        if not isinstance(objective, ExecutionCostModel) and objective not in {"size", "lock_size", "execution"}:
+            msg = f"The objective must be 'size', 'lock_size', 'execution' or an ExecutionCostModel, got {objective!r}"
+            raise ValueError(msg)
+        is_precomputed = self.__check_pairs(n_pairs, is_precomputed)
+        cost_model = objective if isinstance(objective, ExecutionCostModel) else None
+        n_steps = len(self.exp_miller_loop) - 1
+        costs = {}
+
+        # best[is_affine] is the cheapest schedule of the steps from `step` to the last one, for the pairs in affine
+        # coordinates at `step` given by `is_affine`
+        states = list(product([False, True], repeat=n_pairs))
+        best = {(False,) * n_pairs: MillerLoopSchedule((0,) * n_pairs, 0, 0, 0)}
+        for step in range(n_steps - 1, -1, -1):
+            new_best = {}
+            for is_affine in states:
+                candidates = []
+                for is_still_affine, schedule in best.items():
+                    if any(still and not affine for affine, still in zip(is_affine, is_still_affine, strict=True)):
+                        # The pairs switch from affine to projective coordinates, never back
+                        continue
+                    is_converted = tuple(
+                        affine and not still and step != n_steps - 1
+                        for affine, still in zip(is_affine, is_still_affine, strict=True)
+                    )
+                    step_cost = self.__step_cost(
+                        costs, step, is_affine, is_converted, is_precomputed, cost_model=cost_model
+                    )
+                    candidates.append(_prepend_step(schedule, step_cost, is_affine))
+                new_best[is_affine] = min(candidates, key=lambda schedule: schedule.value(objective))
+            best = new_best
+
+        return min(best.values(), key=lambda schedule: schedule.value(objective))
+
+    def evaluate_miller_loop_schedule(
+        self,
+        affine_steps: list[int],
+        is_precomputed: list[bool] | None = None,
+        cost_model: ExecutionCostModel | None = None,
+    ) -> MillerLoopSchedule:
+        """Estimate the costs of `hybrid_miller_loop` with the given `affine_steps`.
+
+        The costs are the sums of the costs of the steps, measured on their scripts: they do not include the
+        initialisation of the points `Tj` and the computation of the Miller output from its rational form, which are
+        the same for all the schedules. The precomputed gradients are replaced by `q - 1` in the locking script, and
+        every gradient is counted as `q - 1` in the unlocking script.
+
+        Args:
+            affine_steps (list[int]): The number of steps of each Miller loop computed in affine coordinates.
+            is_precomputed (list[bool] | None): Whether the gradients of each Miller loop are hard-coded in the
+                locking script. Defaults to `None`, i.e., none of them is.
+            cost_model (ExecutionCostModel | None): The model estimating the validation time of the steps. Defaults
+                to `None`, i.e., the validation time is left at `0.0`.
+
+        Returns:
+            The schedule with its estimated costs.
+
+        Raises:
+            ValueError: If there are fewer than two pairs, or if `is_precomputed` does not have one entry per pair.
+        """
+        is_precomputed = self.__check_pairs(len(affine_steps), is_precomputed)
+        n_steps = len(self.exp_miller_loop) - 1
+        costs = {}
+
+        schedule = MillerLoopSchedule((0,) * len(affine_steps), 0, 0, 0)
+        for step in range(n_steps - 1, -1, -1):
+            is_affine = tuple(step < n for n in affine_steps)
+            is_converted = tuple(step == n - 1 and step != n_steps - 1 for n in affine_steps)
+            schedule = _prepend_step(
+                schedule,
+                self.__step_cost(costs, step, is_affine, is_converted, is_precomputed, cost_model=cost_model),
+                is_affine,
+            )
+        return schedule
+
+    def __check_pairs(self, n_pairs: int, is_precomputed: list[bool] | None) -> list[bool]:
+        """Check the number of pairs and return `is_precomputed`, with `None` replaced by `[False] * n_pairs`."""
+        if n_pairs < 2:  # noqa: PLR2004
+            msg = f"The number of pairs must be at least 2, got {n_pairs}"
+            raise ValueError(msg)
+        is_precomputed = [False] * n_pairs if is_precomputed is None else list(is_precomputed)
+        if len(is_precomputed) != n_pairs:
+            msg = f"The precomputed gradients must be given for {n_pairs} pairs, got {len(is_precomputed)}"
+            raise ValueError(msg)
+        return is_precomputed
+
+    def scheduled_miller_loop(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        objective: Objective = "size",
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        precomputed_gradients: list[list[list[list[int]]] | None] | None = None,
+        optimise: bool = True,
+    ) -> tuple[MillerLoopSchedule, Script]:
+        """Evaluation of the product of `n_pairs` Miller loops with the schedule minimising `objective`.
+
+        Stack input:
+            - stack:    [q, ..., gradients, P1, .., Pn, Q1, .., Qn], see `hybrid_miller_loop`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., miller(P1,Q1) * .. * miller(Pn,Qn)]
+            - altstack: []
+
+        Args:
+            n_pairs (int): The number `n` of pairs `(Pj, Qj)`. Must be at least `2`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            objective (Objective): What the schedule minimises, see `miller_loop_schedule`. Defaults to `"size"`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            precomputed_gradients (list[list[list[list[int]]] | None] | None): The gradients hard-coded in the locking
+                script, see `hybrid_miller_loop`. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+
+        Returns:
+            The schedule (see `miller_loop_schedule`) and the script `hybrid_miller_loop` with its `affine_steps`.
+        """
+        schedule = self.miller_loop_schedule(
+            n_pairs=n_pairs,
+            objective=objective,
+            is_precomputed=None
+            if precomputed_gradients is None
+            else [gradients is not None for gradients in precomputed_gradients],
+        )
+        return schedule, self.hybrid_miller_loop(
+            affine_steps=list(schedule.affine_steps),
+            modulo_threshold=modulo_threshold,
+            positive_modulo=positive_modulo,
+            check_constant=check_constant,
+            clean_constant=clean_constant,
+            precomputed_gradients=precomputed_gradients,
+            optimise=optimise,
+        )
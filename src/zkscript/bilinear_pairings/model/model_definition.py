@@ -1,12 +1,19 @@
 """Pairing Model."""
 
+from tx_engine import Script
+
 from src.zkscript.bilinear_pairings.model.miller_loop import MillerLoop
+from src.zkscript.bilinear_pairings.model.miller_loop_scheduler import MillerLoopScheduler
+from src.zkscript.bilinear_pairings.model.multi_miller_loop_proj import MultiMillerLoopProj
 from src.zkscript.bilinear_pairings.model.pairing import Pairing
 from src.zkscript.bilinear_pairings.model.triple_miller_loop import TripleMillerLoop
 from src.zkscript.bilinear_pairings.model.triple_miller_loop_proj import TripleMillerLoopProj
+from src.zkscript.util.script_builder import bytes_to_script
 
 
-class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
+class PairingModel(
+    MillerLoop, TripleMillerLoop, TripleMillerLoopProj, MultiMillerLoopProj, MillerLoopScheduler, Pairing
+):
     """Pairing Model."""
 
     def __init__(
@@ -16,6 +23,7 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
         extension_degree,
         n_points_curve,
         n_points_twist,
+        non_residue_fq,
         n_elements_miller_output,
         n_elements_evaluation_output,
         n_elements_evaluation_times_evaluation,
@@ -27,6 +35,8 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
         point_addition_twisted_curve_proj,
         line_eval,
         line_eval_proj,
+        line_eval_fixed_argument,
+        frobenius_twisted_curve,
         line_eval_times_eval,
         line_eval_times_eval_times_eval,
         line_eval_times_eval_times_eval_times_eval,
@@ -54,6 +64,8 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
             extension_degree: Extension degree.
             n_points_curve: Number of integers needed to define a point on the base curve.
             n_points_twist: Number of integers needed to define a point on the twisted curve.
+            non_residue_fq: Non-residue defining F_q^2 = F_q[u] / (u^2 - non_residue_fq), the field over which the
+                twisted curve is defined.
             n_elements_miller_output: Number of integers needed to write the Miller output.
             n_elements_evaluation_output: Number of integers needed to write the result of a line evaluation.
             n_elements_evaluation_times_evaluation: Number of integers needed to write the result of the product of two
@@ -68,6 +80,13 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
                 projective, the other affine) on the twisted curve.
             line_eval: Script for line evaluation.
             line_eval_proj: Script for line evaluation in projective coordinates.
+            line_eval_fixed_argument: Script for the evaluation of a line whose coefficients are hard-coded, or `None`
+                if the lines of fixed arguments are not hard-coded for this curve (see `triple_miller_loop`).
+            frobenius_twisted_curve: The constants `[[a, b], [c, d]]` in F_q^2 such that the Frobenius endomorphism
+                of the twisted curve is `pi(x, y) = (a * conjugate(x), b * conjugate(y))` and
+                `pi^2(x, y) = (c * x, d * y)`, or `None`. If not `None`, the Miller loop is the one of the optimal ate
+                pairing: the loop over `exp_miller_loop` is followed by the lines through `pi(Q)` and `-pi^2(Q)` (see
+                `frobenius_gradients`).
             line_eval_times_eval: Script for product of two line evaluations.
             line_eval_times_eval_times_eval: Script for product of three line evaluations, assuming the first product
                 has been calculated: the script computes ev * t1, where t1 = ev * ev.
@@ -108,6 +127,7 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
         self.extension_degree = extension_degree
         self.N_POINTS_CURVE = n_points_curve
         self.N_POINTS_TWIST = n_points_twist
+        self.NON_RESIDUE_FQ = non_residue_fq
         self.N_ELEMENTS_MILLER_OUTPUT = n_elements_miller_output
         self.N_ELEMENTS_EVALUATION_OUTPUT = n_elements_evaluation_output
         self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION = n_elements_evaluation_times_evaluation
@@ -121,6 +141,8 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
 
         self.line_eval = line_eval
         self.line_eval_proj = line_eval_proj
+        self.line_eval_fixed_argument = line_eval_fixed_argument
+        self.frobenius_twisted_curve = frobenius_twisted_curve
         self.line_eval_times_eval = line_eval_times_eval
         self.line_eval_times_eval_times_eval = line_eval_times_eval_times_eval
         self.line_eval_times_eval_times_eval_times_eval = line_eval_times_eval_times_eval_times_eval
@@ -146,3 +168,20 @@ class PairingModel(MillerLoop, TripleMillerLoop, TripleMillerLoopProj, Pairing):
         self.hard_exponentiation = hard_exponentiation
         # Function to estimate size of elements in the Miller loop and triple Miller loop
         self.size_estimation_miller_loop = size_estimation_miller_loop
+
+    def __getstate__(self) -> tuple[dict, dict[str, bytes]]:
+        """Return the state of the model for pickling, with the scripts it holds replaced by their raw bytes.
+
+        Pickling the model is needed to generate its scripts in a `ProcessPoolExecutor` (see `ScriptFragments`).
+        """
+        state = {key: value for key, value in self.__dict__.items() if not isinstance(value, Script)}
+        scripts = {
+            key: bytes(value.raw_serialize()) for key, value in self.__dict__.items() if isinstance(value, Script)
+        }
+        return state, scripts
+
+    def __setstate__(self, state: tuple[dict, dict[str, bytes]]):
+        """Restore the state of the model from the output of `PairingModel.__getstate__`."""
+        attributes, scripts = state
+        self.__dict__.update(attributes)
+        self.__dict__.update({key: bytes_to_script(raw) for key, raw in scripts.items()})
@@ -0,0 +1,776 @@
+"""Bitcoin scripts that compute the product of any number of Miller loops in projective or mixed coordinates."""
+
+from tx_engine import Script
+
+from src.zkscript.script_types.stack_elements import (
+    StackEllipticCurvePoint,
+    StackEllipticCurvePointProjective,
+    StackFiniteFieldElement,
+)
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
+from src.zkscript.util.utility_functions import boolean_list_to_bitmask, optimise_script
+from src.zkscript.util.utility_scripts import nums_to_script, pick, roll, verify_bottom_constant
+
+
+def line_product_chunks(n_pairs: int) -> list[range]:
+    """Split the indices of `n_pairs` line evaluations into the chunks multiplied together before updating `f`.
+
+    The products of the chunks use the line-product combinations of the pairing model: two evaluations are multiplied
+    with `line_eval_times_eval`, three with `line_eval_times_eval_times_eval`, four with
+    `line_eval_times_eval_times_eval_times_eval` and six with
+    `line_eval_times_eval_times_eval_times_eval_times_eval_times_eval`. The chunks have six evaluations, except the
+    last ones, which have two, three or four evaluations.
+
+    Raises:
+        ValueError: If `n_pairs` is smaller than `2`.
+    """
+    if n_pairs < 2:  # noqa: PLR2004
+        msg = f"The number of pairs must be at least 2, got {n_pairs}"
+        raise ValueError(msg)
+    n_sixes, remainder = divmod(n_pairs, 6)
+    sizes = [6] * n_sixes + {0: [], 1: [4, 3], 2: [2], 3: [3], 4: [4], 5: [3, 2]}[remainder]
+    if remainder == 1:
+        sizes.remove(6)
+    starts = [sum(sizes[:i]) for i in range(len(sizes))]
+    return [range(start, start + size) for start, size in zip(starts, sizes, strict=True)]
+
+
+def hybrid_gradients_order(
+    exp_miller_loop: list[int],
+    affine_steps: list[int],
+    is_precomputed: list[bool],
+    has_frobenius_step: bool = False,
+) -> list[tuple[int, int, int]]:
+    """Return the gradients read from the unlocking script by `hybrid_miller_loop`, in the order in which they are used.
+
+    Args:
+        exp_miller_loop (list[int]): The expansion of the Miller loop parameter.
+        affine_steps (list[int]): The number of steps computed in affine coordinates for each pair.
+        is_precomputed (list[bool]): Whether the gradients of each pair are hard-coded in the locking script.
+        has_frobenius_step (bool): Whether the Miller loop ends with the lines through the Frobenius twisted points
+            (see `frobenius_gradients`), whose gradients are at the step `len(exp_miller_loop) - 1` for the pairs
+            computed in affine coordinates only. Defaults to `False`.
+
+    Returns:
+        The list of triples `(step, k, j)`, where the gradient is `gradients[j][step][k]`: `k = 0` for the gradient
+        of the doubling, `k = 1` for the gradient of the addition.
+    """
+    out = []
+    for step, loop_i in enumerate(range(len(exp_miller_loop) - 2, -1, -1)):
+        for k in range(1 if exp_miller_loop[loop_i] == 0 else 2):
+            out.extend(
+                (step, k, j) for j in range(len(affine_steps)) if step < affine_steps[j] and not is_precomputed[j]
+            )
+    if has_frobenius_step:
+        n_steps = len(exp_miller_loop) - 1
+        for k in range(2):
+            out.extend(
+                (n_steps, k, j)
+                for j in range(len(affine_steps))
+                if affine_steps[j] == n_steps and not is_precomputed[j]
+            )
+    return out
+
+
+class _StackLayout:
+    """Sizes of the blocks of elements on the stack, from the bottom to the top.
+
+    The blocks are identified by keys: `("P", j)`, `("Q", j)` and `("T", j)` for the points of the j-th pair,
+    `("frobenius", 1, j)` and `("frobenius", 2, j)` for the points `pi(Qj)` and `-pi^2(Qj)`, and
+    `("gradient", step, k, j)` for the gradient `k` (`0` for the doubling, `1` for the addition) of the j-th pair at
+    the step `step` of the Miller loop.
+    """
+
+    def __init__(self, blocks: list[tuple[tuple, int]]):
+        self.blocks = list(blocks)
+
+    def size(self, key: tuple) -> int:
+        return dict(self.blocks)[key]
+
+    def push(self, key: tuple, size: int) -> None:
+        self.blocks.append((key, size))
+
+    def remove(self, key: tuple) -> None:
+        self.blocks.remove((key, self.size(key)))
+
+    def position(self, key: tuple) -> int:
+        """Return the position in the stack of the first element of the block `key`."""
+        depth = 0
+        for block_key, size in reversed(self.blocks):
+            depth += size
+            if block_key == key:
+                return depth - 1
+        msg = f"The block {key} is not on the stack"
+        raise ValueError(msg)
+
+
+class MultiMillerLoopProj:
+    """Product of any number of Miller loops in projective (or mixed affine and projective) coordinates."""
+
+    def __stack_point(
+        self, layout: _StackLayout, key: tuple, shift: int = 0
+    ) -> StackEllipticCurvePoint | StackEllipticCurvePointProjective:
+        """Return the point in the block `key` of `layout`, with `shift` elements above the blocks."""
+        degree = 1 if key[0] == "P" else self.extension_degree
+        coordinates = [
+            StackFiniteFieldElement(layout.position(key) + shift - i * degree, False, degree)
+            for i in range(layout.size(key) // degree)
+        ]
+        return (
+            StackEllipticCurvePoint(*coordinates)
+            if len(coordinates) == 2  # noqa: PLR2004
+            else StackEllipticCurvePointProjective(*coordinates)
+        )
+
+    def __hybrid_layout(self, step: int, affine_steps: list[int], is_precomputed: list[bool]) -> _StackLayout:
+        """Return the layout of the stack at the beginning of the step `step` of `hybrid_miller_loop` (without `f`)."""
+        gradients = [
+            gradient
+            for gradient in hybrid_gradients_order(
+                self.exp_miller_loop, affine_steps, is_precomputed, self.frobenius_twisted_curve is not None
+            )
+            if gradient[0] >= step
+        ]
+        layout = _StackLayout([(("gradient", *gradient), self.extension_degree) for gradient in reversed(gradients)])
+        for j in range(len(affine_steps)):
+            layout.push(("P", j), self.N_POINTS_CURVE)
+        for j in range(len(affine_steps)):
+            layout.push(("Q", j), self.N_POINTS_TWIST)
+        for j in range(len(affine_steps)):
+            # The pairs computed in affine coordinates only are never converted to projective coordinates
+            is_affine = step < affine_steps[j] or affine_steps[j] == len(self.exp_miller_loop) - 1
+            layout.push(("T", j), self.N_POINTS_TWIST + (0 if is_affine else self.extension_degree))
+        for j in range(len(affine_steps)):
+            if step < affine_steps[j] and is_precomputed[j]:
+                layout.push(("gradient", step, 0, j), self.extension_degree)
+        return layout
+
+    def __line_evaluations_product(
+        self,
+        loop_i: int,
+        chunk: range,
+        is_tangent: bool,
+        shift: int,
+        layout: _StackLayout,
+        is_affine: list[bool],
+        frobenius_power: int = 0,
+    ) -> tuple[Script, bool]:
+        """Generate the script to compute the product of the line evaluations of the pairs in `chunk`.
+
+        Stack input:
+            - stack:    [.., P1, .., Pn, Q1, .., Qn, T1, .., Tn, .., shift elements]
+            - altstack: []
+
+        Stack output:
+            - stack:    [.., P1, .., Pn, Q1, .., Qn, T1, .., Tn, .., shift elements, prod_(j in chunk) ev_(l_j)(Pj)]
+            - altstack: []
+
+        Args:
+            loop_i (int): The step being performed in the computation of the Miller loop.
+            chunk (range): The indices of the pairs whose line evaluations are multiplied, see `line_product_chunks`.
+            is_tangent (bool): If `True`, `l_j` is the line tangent at `Tj`, otherwise it is the line through `Tj`
+                and `± Qj`.
+            shift (int): The number of elements above the blocks of `layout`.
+            layout (_StackLayout): The positions of the points and of the gradients in the stack.
+            is_affine (list[bool]): Whether the points `Tj` are in affine coordinates, in which case the lines are
+                computed from the gradients in `layout`.
+            frobenius_power (int): If not `0`, `l_j` is the line through `Tj` and `pi(Qj)` (`1`) or `-pi^2(Qj)`
+                (`2`), in the block `("frobenius", frobenius_power, j)` of `layout`. Defaults to `0`.
+
+        Returns:
+            The script, and whether the product is a full Miller output (otherwise, it is a product of two line
+            evaluations).
+        """
+        N_ELEMENTS_EVALUATION_OUTPUT_PROJ = self.N_ELEMENTS_EVALUATION_OUTPUT + 1
+        N_ELEMENTS_EVALUATION_TIMES_EVALUATION_PROJ = self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION + 1
+
+        def line_evaluation(j: int, extra_shift: int) -> Script:
+            # Compute ev_(l_j)(Pj)
+            P = self.__stack_point(layout, ("P", j), shift + extra_shift)
+            T = self.__stack_point(layout, ("T", j), shift + extra_shift)
+            if frobenius_power != 0:
+                Q = self.__stack_point(layout, ("frobenius", frobenius_power, j), shift + extra_shift)
+            else:
+                Q = self.__stack_point(layout, ("Q", j), shift + extra_shift).set_negate(
+                    self.exp_miller_loop[loop_i] == -1
+                )
+            if is_affine[j]:
+                gradient = (
+                    ("gradient", len(self.exp_miller_loop) - 1, frobenius_power - 1, j)
+                    if frobenius_power != 0
+                    else ("gradient", len(self.exp_miller_loop) - 2 - loop_i, 0 if is_tangent else 1, j)
+                )
+                out = self.line_eval(
+                    take_modulo=True,
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    gradient=StackFiniteFieldElement(
+                        layout.position(gradient) + shift + extra_shift, False, self.extension_degree
+                    ),
+                    P=P,
+                    Q=T if is_tangent else Q,
+                    rolling_option=0,
+                )
+                # The denominator of the affine line evaluation is 1
+                return out + Script.parse_string("OP_1")
+            points = {"P": P, "T": T} if is_tangent else {"P": P, "T": T, "Q": Q}
+            return self.line_eval_proj(
+                take_modulo=True,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                is_tangent=is_tangent,
+                rolling_option=0,
+                **points,
+            )
+
+        def product(function_name: str) -> Script:
+            return self.rational_form(
+                function_name=function_name,
+                take_modulo=False,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+            )
+
+        out = Script()
+        if len(chunk) in {2, 3}:
+            # stack out: [.., ev_(l_j)(Pj) for j in chunk]
+            for i, j in enumerate(chunk):
+                out += line_evaluation(j, i * N_ELEMENTS_EVALUATION_OUTPUT_PROJ)
+            out += product("line_eval_times_eval")
+            if len(chunk) == 3:  # noqa: PLR2004
+                out += product("line_eval_times_eval_times_eval")
+            return out, len(chunk) == 3  # noqa: PLR2004
+
+        # stack out: [.., ev_(l_j)(Pj) * ev_(l_(j+1))(P(j+1)) for j in chunk[::2]]
+        for i, j in enumerate(chunk[::2]):
+            out += line_evaluation(j, i * N_ELEMENTS_EVALUATION_TIMES_EVALUATION_PROJ)
+            out += line_evaluation(
+                j + 1, i * N_ELEMENTS_EVALUATION_TIMES_EVALUATION_PROJ + N_ELEMENTS_EVALUATION_OUTPUT_PROJ
+            )
+            out += product("line_eval_times_eval")
+        out += product("line_eval_times_eval_times_eval_times_eval")
+        if len(chunk) == 6:  # noqa: PLR2004
+            out += product("line_eval_times_eval_times_eval_times_eval_times_eval_times_eval")
+        return out, True
+
+    def __update_miller_output(
+        self,
+        loop_i: int,
+        is_tangent: bool,
+        is_first_update: bool,
+        layout: _StackLayout,
+        is_affine: list[bool],
+        frobenius_power: int = 0,
+    ) -> Script:
+        """Generate the script to multiply `f` by the line evaluations of all the pairs.
+
+        Stack input:
+            - stack:    [.., P1, .., Pn, Q1, .., Qn, T1, .., Tn, .., f] (no `f` if `is_first_update`)
+            - altstack: []
+
+        Stack output:
+            - stack:    [.., P1, .., Pn, Q1, .., Qn, T1, .., Tn, .., f * prod_j ev_(l_j)(Pj)]
+            - altstack: []
+
+        The product is reduced modulo `q` after every chunk of `line_product_chunks`, except the last one. The lines
+        are the ones of `__line_evaluations_product`.
+        """
+        N_ELEMENTS_MILLER_OUTPUT_PROJ = self.N_ELEMENTS_MILLER_OUTPUT + 1
+
+        out = Script()
+        chunks = line_product_chunks(len(is_affine))
+        for i, chunk in enumerate(chunks):
+            has_f = not is_first_update or i > 0
+            product, is_dense = self.__line_evaluations_product(
+                loop_i=loop_i,
+                chunk=chunk,
+                is_tangent=is_tangent,
+                shift=N_ELEMENTS_MILLER_OUTPUT_PROJ if has_f else 0,
+                layout=layout,
+                is_affine=is_affine,
+                frobenius_power=frobenius_power,
+            )
+            out += product
+            if has_f:
+                out += self.rational_form(
+                    function_name="miller_loop_output_times_eval_times_eval_times_eval"
+                    if is_dense
+                    else "miller_loop_output_times_eval_times_eval",
+                    take_modulo=i != len(chunks) - 1,
+                    positive_modulo=False,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+            elif not is_dense and self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION != self.N_ELEMENTS_MILLER_OUTPUT:
+                # The denominator is not padded
+                out += Script.parse_string("OP_TOALTSTACK")
+                out += self.pad_eval_times_eval_to_miller_output
+                out += Script.parse_string("OP_FROMALTSTACK")
+        return out
+
+    @profile_script
+    @check_stack_effect
+    def _hybrid_miller_loop_step(
+        self,
+        loop_i: int,
+        affine_steps: list[int],
+        precomputed_gradients: list[list[list[list[int]]] | None],
+    ) -> Script:
+        """Generate the script of the step `loop_i` of `hybrid_miller_loop`.
+
+        The script squares `f` (except in the first step), multiplies it by the line evaluations of the pairs and
+        updates the points `Tj`. The points of the pairs whose last affine step is this one are converted to projective
+        coordinates, and the precomputed gradients of the next step are pushed on the stack.
+
+        Stack input:
+            - stack:    [gradients, P1, .., Pn, Q1, .., Qn, T1, .., Tn, precomputed gradients, {f_(i+1)}], where
+                `precomputed gradients` are the precomputed gradients of the doublings of this step (no `f_(i+1)` in
+                the first step)
+            - altstack: []
+
+        Stack output:
+            - stack:    [gradients, P1, .., Pn, Q1, .., Qn, (2*T1 (± Q1)), .., (2*Tn (± Qn)), precomputed gradients,
+                f_i], where `gradients` are the gradients of the next steps and `precomputed gradients` are the
+                precomputed gradients of the doublings of the next step
+            - altstack: []
+
+        Args:
+            loop_i (int): The step being performed in the computation of the Miller loop.
+            affine_steps (list[int]): The number of steps computed in affine coordinates for each pair.
+            precomputed_gradients (list[list[list[list[int]]] | None]): The gradients hard-coded in the locking
+                script for each pair, or `None` if the gradients of the pair are in the unlocking script.
+
+        Returns:
+            The script of the step.
+        """
+        N_ELEMENTS_MILLER_OUTPUT_PROJ = self.N_ELEMENTS_MILLER_OUTPUT + 1
+        step = len(self.exp_miller_loop) - 2 - loop_i
+        is_precomputed = [gradients is not None for gradients in precomputed_gradients]
+        is_affine = [step < n_steps for n_steps in affine_steps]
+        has_addition = self.exp_miller_loop[loop_i] != 0
+        layout = self.__hybrid_layout(step, affine_steps, is_precomputed)
+
+        def push_precomputed_gradients(step: int, k: int) -> Script:
+            # Push the precomputed gradients `k` of the step `step`
+            out = Script()
+            for j, gradients in enumerate(precomputed_gradients):
+                if gradients is not None and step < min(affine_steps[j], len(self.exp_miller_loop) - 1):
+                    out += nums_to_script(gradients[step][k])
+                    layout.push(("gradient", step, k, j), self.extension_degree)
+            return out
+
+        def update_points(k: int) -> Script:
+            # Compute 2*Tj (k = 0) or Tj ± Qj (k = 1) for every j
+            out = Script()
+            for j in range(len(affine_steps)):
+                T = self.__stack_point(layout, ("T", j))
+                Q = self.__stack_point(layout, ("Q", j)).set_negate(self.exp_miller_loop[loop_i] == -1)
+                if is_affine[j]:
+                    gradient = ("gradient", step, k, j)
+                    affine_update = {
+                        "take_modulo": True,
+                        "positive_modulo": False,
+                        "check_constant": False,
+                        "clean_constant": False,
+                        "verify_gradient": not is_precomputed[j],
+                        "gradient": StackFiniteFieldElement(layout.position(gradient), False, self.extension_degree),
+                    }
+                    out += (
+                        self.point_doubling_twisted_curve(**affine_update, P=T, rolling_option=3)
+                        if k == 0
+                        else self.point_addition_twisted_curve(
+                            **affine_update, P=Q, Q=T, rolling_option=boolean_list_to_bitmask([True, False, True])
+                        )
+                    )
+                    layout.remove(gradient)
+                else:
+                    out += (
+                        self.point_doubling_twisted_curve_proj(
+                            take_modulo=True,
+                            positive_modulo=False,
+                            check_constant=False,
+                            clean_constant=False,
+                            P=T,
+                            rolling_option=1,
+                        )
+                        if k == 0
+                        else self.point_addition_twisted_curve_proj(
+                            take_modulo=True,
+                            positive_modulo=False,
+                            check_constant=False,
+                            clean_constant=False,
+                            P=T,
+                            Q=Q,
+                            rolling_option=boolean_list_to_bitmask([True, False]),
+                        )
+                    )
+                layout.remove(("T", j))
+                layout.push(("T", j), self.N_POINTS_TWIST + (0 if is_affine[j] else self.extension_degree))
+                if k == int(has_addition) and step == affine_steps[j] - 1 and loop_i != 0:
+                    # Convert Tj to projective coordinates
+                    out += Script.parse_string(f"OP_1 {'OP_0 ' * (self.extension_degree - 1)}"[:-1])
+                    layout.remove(("T", j))
+                    layout.push(("T", j), self.N_POINTS_TWIST + self.extension_degree)
+            return out
+
+        out = Script()
+        if step != 0:
+            # stack out: [.., f_(i+1)^2]
+            out += self.rational_form(
+                function_name="miller_loop_output_square",
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=False,
+            )
+
+        # stack out: [.., {f_(i+1)^2} * prod_j ev_(l_(Tj,Tj))(Pj)]
+        out += self.__update_miller_output(
+            loop_i=loop_i, is_tangent=True, is_first_update=step == 0, layout=layout, is_affine=is_affine
+        )
+
+        # stack out:    [.., (2*T1), .., (2*Tn), precomputed gradients]
+        # altstack out: [{f_(i+1)^2} * prod_j ev_(l_(Tj,Tj))(Pj)]
+        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+        out += update_points(0)
+        out += push_precomputed_gradients(step, 1) if has_addition else push_precomputed_gradients(step + 1, 0)
+        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+
+        if has_addition:
+            # stack out: [.., (2*T1), .., (2*Tn), precomputed gradients,
+            #               {f_(i+1)^2} * prod_j ev_(l_(Tj,Tj))(Pj) * prod_j ev_(l_(2*Tj,± Qj))(Pj)]
+            out += self.__update_miller_output(
+                loop_i=loop_i, is_tangent=False, is_first_update=False, layout=layout, is_affine=is_affine
+            )
+
+            # stack out:    [.., (2*T1 ± Q1), .., (2*Tn ± Qn), precomputed gradients]
+            # altstack out: [{f_(i+1)^2} * prod_j ev_(l_(Tj,Tj))(Pj) * prod_j ev_(l_(2*Tj,± Qj))(Pj)]
+            out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+            out += update_points(1)
+            out += push_precomputed_gradients(step + 1, 0)
+            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+
+        return out
+
+    @profile_script
+    @check_stack_effect
+    def _hybrid_frobenius_step(
+        self,
+        affine_steps: list[int],
+        precomputed_gradients: list[list[list[list[int]]] | None],
+    ) -> Script:
+        """Generate the script of the lines through the Frobenius twisted points at the end of `hybrid_miller_loop`.
+
+        The script multiplies `f` by the evaluations of the lines through `Tj` and `pi(Qj)`, and through
+        `Tj + pi(Qj)` and `-pi^2(Qj)`, and updates the points `Tj`, as in `MillerLoop.frobenius_gradients`. The
+        pairs computed in affine coordinates only use the gradients of the step `len(self.exp_miller_loop) - 1`.
+
+        Stack input:
+            - stack:    [gradients, P1, .., Pn, Q1, .., Qn, T1, .., Tn, f], where `gradients` are the gradients of
+                this step
+            - altstack: []
+
+        Stack output:
+            - stack:    [P1, .., Pn, Q1, .., Qn, {T1 + pi(Q1) - pi^2(Q1), .., Tn + pi(Qn) - pi^2(Qn)},
+                f * prod_j ev_(l_(Tj,pi(Qj)))(Pj) * ev_(l_(Tj + pi(Qj),-pi^2(Qj)))(Pj)], where the points are not in
+                order
+            - altstack: []
+
+        Args:
+            affine_steps (list[int]): The number of steps computed in affine coordinates for each pair.
+            precomputed_gradients (list[list[list[list[int]]] | None]): The gradients hard-coded in the locking
+                script for each pair, or `None` if the gradients of the pair are in the unlocking script.
+
+        Returns:
+            The script of the step.
+        """
+        N_ELEMENTS_MILLER_OUTPUT_PROJ = self.N_ELEMENTS_MILLER_OUTPUT + 1
+        n_steps = len(self.exp_miller_loop) - 1
+        is_precomputed = [gradients is not None for gradients in precomputed_gradients]
+        is_affine = [n == n_steps for n in affine_steps]
+        layout = self.__hybrid_layout(n_steps, affine_steps, is_precomputed)
+
+        def push_precomputed_gradients(k: int) -> Script:
+            # Push the precomputed gradients `k` of the pairs computed in affine coordinates only
+            out = Script()
+            for j, gradients in enumerate(precomputed_gradients):
+                if gradients is not None and is_affine[j]:
+                    out += nums_to_script(gradients[n_steps][k])
+                    layout.push(("gradient", n_steps, k, j), self.extension_degree)
+            return out
+
+        def update_points(k: int) -> Script:
+            # Compute Tj + pi(Qj) (k = 0) or Tj - pi^2(Qj) (k = 1) for every j
+            out = Script()
+            for j in range(len(affine_steps)):
+                T = self.__stack_point(layout, ("T", j))
+                Q = self.__stack_point(layout, ("frobenius", k + 1, j))
+                if is_affine[j]:
+                    gradient = ("gradient", n_steps, k, j)
+                    out += self.point_addition_twisted_curve(
+                        take_modulo=True,
+                        positive_modulo=False,
+                        check_constant=False,
+                        clean_constant=False,
+                        verify_gradient=not is_precomputed[j],
+                        gradient=StackFiniteFieldElement(layout.position(gradient), False, self.extension_degree),
+                        P=T if k == 0 else Q,
+                        Q=Q if k == 0 else T,
+                        rolling_option=7,
+                    )
+                    layout.remove(gradient)
+                else:
+                    out += self.point_addition_twisted_curve_proj(
+                        take_modulo=True,
+                        positive_modulo=False,
+                        check_constant=False,
+                        clean_constant=False,
+                        P=T,
+                        Q=Q,
+                        rolling_option=3,
+                    )
+                layout.remove(("frobenius", k + 1, j))
+                size = layout.size(("T", j))
+                layout.remove(("T", j))
+                layout.push(("T", j), size)
+            return out
+
+        # stack out:    [.., T1, .., Tn, pi(Q1), -pi^2(Q1), .., pi(Qn), -pi^2(Qn), projective Tj, precomputed gradients]
+        # altstack out: [f]
+        out = Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+        for j in range(len(affine_steps)):
+            out += self._frobenius_twisted_points(self.__stack_point(layout, ("Q", j)))
+            layout.push(("frobenius", 1, j), self.N_POINTS_TWIST)
+            layout.push(("frobenius", 2, j), self.N_POINTS_TWIST)
+        for j in range(len(affine_steps)):
+            if not is_affine[j]:
+                # The projective points must be above the affine points they are added to
+                size = layout.size(("T", j))
+                out += roll(position=layout.position(("T", j)), n_elements=size)
+                layout.remove(("T", j))
+                layout.push(("T", j), size)
+        out += push_precomputed_gradients(0)
+        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+
+        for k in range(2):
+            # stack out: [.., f * prod_j ev_(l_(Tj,pi(Qj)))(Pj)] (k = 0) or
+            #               [.., f * prod_j ev_(l_(Tj,pi(Qj)))(Pj) * ev_(l_(Tj + pi(Qj),-pi^2(Qj)))(Pj)] (k = 1)
+            out += self.__update_miller_output(
+                loop_i=0,
+                is_tangent=False,
+                is_first_update=False,
+                layout=layout,
+                is_affine=is_affine,
+                frobenius_power=k + 1,
+            )
+
+            # stack out:    [.., Tj + pi(Qj), .., -pi^2(Qj), .., precomputed gradients] (k = 0) or
+            #                   [.., Tj + pi(Qj) - pi^2(Qj), ..] (k = 1)
+            # altstack out: [f * ..]
+            out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+            out += update_points(k)
+            if k == 0:
+                out += push_precomputed_gradients(1)
+            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT_PROJ))
+
+        return out
+
+    @profile_script
+    @check_stack_effect
+    def hybrid_miller_loop(
+        self,
+        affine_steps: list[int],
+        modulo_threshold: int,
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        precomputed_gradients: list[list[list[list[int]]] | None] | None = None,
+        optimise: bool = True,
+    ) -> Script:
+        """Evaluation of the product of Miller loops computed partly in affine and partly in projective coordinates.
+
+        The j-th Miller loop is computed in affine coordinates in its first `affine_steps[j]` steps, and in projective
+        coordinates in the following ones: after its last affine step, `Tj` is converted to projective coordinates by
+        appending the coordinate `z = 1`. The affine steps use the gradients of the doublings and of the additions,
+        which are either in the unlocking script (and verified), or hard-coded in the locking script (and not
+        verified). The Miller loops share the Miller output `f` as in `multi_miller_loop_proj`: the line evaluations
+        of the affine steps are given the denominator `1`.
+
+        If `frobenius_twisted_curve` is not `None`, the loop ends with the lines through the Frobenius twisted points
+        (see `_hybrid_frobenius_step`), whose gradients are the last ones of `precomputed_gradients[j]` for the pairs
+        computed in affine coordinates only.
+
+        Stack input:
+            - stack:    [q, ..., gradients, P1, .., Pn, Q1, .., Qn], `Pj` are points on E(F_q), `Qj` are points on
+                E'(F_q^{k/d}), `gradients` are the gradients of the affine steps of the pairs whose gradients are not
+                precomputed, in the order given by `hybrid_gradients_order` (the first one on top), with
+                `has_frobenius_step` if `frobenius_twisted_curve` is not `None`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., miller(P1,Q1) * .. * miller(Pn,Qn)]
+            - altstack: []
+
+        Args:
+            affine_steps (list[int]): `affine_steps[j]` is the number of steps of the j-th Miller loop computed in
+                affine coordinates, between `0` (projective coordinates only) and `len(self.exp_miller_loop) - 1`
+                (affine coordinates only). The number of pairs `n` is `len(affine_steps)`, and it must be at least
+                `2`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            precomputed_gradients (list[list[list[list[int]]] | None] | None): If `precomputed_gradients[j]` is not
+                `None`, the gradients of the j-th Miller loop are hard-coded in the locking script:
+                `precomputed_gradients[j][s]` is the list of the gradients of the doubling and of the addition of the
+                step `s`, as in `triple_miller_loop`. Defaults to `None`, i.e., all the gradients are in the
+                unlocking script.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+
+        Returns:
+            Script to evaluate the product of the Miller loops.
+
+        Raises:
+            ValueError: If there are fewer than `2` pairs, if one of the `affine_steps` is out of range, or if
+                `precomputed_gradients` does not have one entry per pair.
+
+        Notes:
+            With `affine_steps = [0] * n`, the script is the same as `multi_miller_loop_proj`. The points `Pj` and
+            `Qj` must not be the point at infinity.
+        """
+        n_pairs = len(affine_steps)
+        if n_pairs < 2:  # noqa: PLR2004
+            msg = f"The number of pairs must be at least 2, got {n_pairs}"
+            raise ValueError(msg)
+        if not all(0 <= n_steps <= len(self.exp_miller_loop) - 1 for n_steps in affine_steps):
+            msg = f"The number of affine steps must be between 0 and {len(self.exp_miller_loop) - 1}: {affine_steps}"
+            raise ValueError(msg)
+        precomputed_gradients = [None] * n_pairs if precomputed_gradients is None else precomputed_gradients
+        if len(precomputed_gradients) != n_pairs:
+            msg = f"The precomputed gradients must be given for {n_pairs} pairs, got {len(precomputed_gradients)}"
+            raise ValueError(msg)
+
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # stack in:  [gradients, P1, .., Pn, Q1, .., Qn]
+        # stack out: [gradients, P1, .., Pn, Q1, .., Qn, T1, .., Tn, precomputed gradients]
+        for i in range(n_pairs):
+            n_elements_above = sum(
+                self.N_POINTS_TWIST + (affine_steps[k] == 0) * self.extension_degree for k in range(i)
+            )
+            for j in range(self.N_POINTS_TWIST):
+                out += pick(position=(n_pairs - i) * self.N_POINTS_TWIST - 1 + n_elements_above, n_elements=1)
+                out += Script.parse_string(
+                    "OP_NEGATE" if self.exp_miller_loop[-1] == -1 and j >= self.N_POINTS_TWIST // 2 else ""
+                )
+            if affine_steps[i] == 0:
+                # convert Ti to projective coordinates
+                out += Script.parse_string(f"OP_1 {'OP_0 ' * (self.extension_degree - 1)}"[:-1])
+        for j, gradients in enumerate(precomputed_gradients):
+            if gradients is not None and affine_steps[j] > 0:
+                out += nums_to_script(gradients[0][0])
+
+        # stack in:  [gradients, P1, .., Pn, Q1, .., Qn, T1, .., Tn, precomputed gradients]
+        # stack out: [P1, .., Pn, Q1, .., Qn, w*Q1, .., w*Qn, miller(P1,Q1) * .. * miller(Pn,Qn)]
+        for loop_i in range(len(self.exp_miller_loop) - 2, -1, -1):
+            out += self._hybrid_miller_loop_step(
+                loop_i=loop_i, affine_steps=affine_steps, precomputed_gradients=precomputed_gradients
+            )
+        if self.frobenius_twisted_curve is not None:
+            # stack in:  [frobenius gradients, P1, .., Pn, Q1, .., Qn, w*Q1, .., w*Qn, f]
+            # stack out: [P1, .., Pn, Q1, .., Qn, {wQ1, .., wQn}, f], where wQj = w*Qj + pi(Qj) - pi^2(Qj)
+            out += self._hybrid_frobenius_step(affine_steps=affine_steps, precomputed_gradients=precomputed_gradients)
+
+        # num = numerator of (miller(P1,Q1) * .. * miller(Pn,Qn)) in F_q^{k/d}
+        # denom = denominator of (miller(P1,Q1) * .. * miller(Pn,Qn)) in F_q
+        # stack in:  [P1, .., Pn, Q1, .., Qn, w*Q1, .., w*Qn, num, denom]
+        # stack out: [miller(P1,Q1) * .. * miller(Pn,Qn)]
+        out += self.inverse_fq(
+            take_modulo=True,
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+            rolling_option=1,
+            mod_frequency=modulo_threshold // (self.modulus.bit_length() * 3 + 3),
+            modulo_threshold=modulo_threshold,
+        )
+        out += self.scalar_multiplication_fq(
+            take_modulo=True,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+            is_constant_reused=False,
+            rolling_option=3,
+        )
+
+        n_steps = len(self.exp_miller_loop) - 1
+        for _ in range(
+            n_pairs * (2 * self.N_POINTS_TWIST + self.N_POINTS_CURVE)
+            + self.extension_degree * sum(affine_steps[j] < n_steps for j in range(n_pairs))
+        ):
+            out += roll(position=self.N_ELEMENTS_MILLER_OUTPUT, n_elements=1)
+            out += Script.parse_string("OP_DROP")
+
+        return optimise_script(out) if optimise else out
+
+    @profile_script
+    @check_stack_effect
+    def multi_miller_loop_proj(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        optimise: bool = True,
+    ) -> Script:
+        """Evaluation of the product of `n_pairs` Miller loops.
+
+        The Miller loops share the Miller output `f`: at every step, `f` is squared once and multiplied by the product
+        of the line evaluations of all the pairs, computed by chunks as in `line_product_chunks`.
+
+        Stack input:
+            - stack:    [q, ..., P1, .., Pn, Q1, .., Qn], `Pj` are points on E(F_q), `Qj` are points on
+                E'(F_q^{k/d})
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., miller(P1,Q1) * .. * miller(Pn,Qn)]
+            - altstack: []
+
+        Args:
+            n_pairs (int): The number `n` of pairs `(Pj, Qj)`. Must be at least `2`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+
+        Returns:
+            Script to evaluate the product of `n_pairs` Miller loops.
+
+        Raises:
+            ValueError: If `n_pairs` is smaller than `2`.
+
+        Notes:
+            With `n_pairs = 3`, the script is the same as `triple_miller_loop_proj`. The points `Pj` and `Qj` must not
+            be the point at infinity. The script is `hybrid_miller_loop` with all the steps in projective coordinates.
+        """
+        return self.hybrid_miller_loop(
+            affine_steps=[0] * n_pairs,
+            modulo_threshold=modulo_threshold,
+            positive_modulo=positive_modulo,
+            check_constant=check_constant,
+            clean_constant=clean_constant,
+            optimise=optimise,
+        )
@@ -1,8 +1,13 @@
 """Bitcoin scripts that compute bilinear pairings."""
 
+from concurrent.futures import Executor
+
 from tx_engine import Script
 
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.script_fragments import ScriptFragments
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import optimise_script
 from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
 
@@ -10,6 +15,8 @@ from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
 class Pairing:
     """Pairing class."""
 
+    @profile_script
+    @check_stack_effect
     def single_pairing(
         self,
         modulo_threshold: int,
@@ -17,6 +24,7 @@ class Pairing:
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         positive_modulo: bool = True,
+        optimise: bool = True,
     ) -> Script:
         """Bilinear pairing.
 
@@ -37,6 +45,9 @@ class Pairing:
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
             positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
 
         Returns:
             Script to evaluate the bilinear pairing e(P,Q).
@@ -79,11 +90,10 @@ class Pairing:
             verify_gradients=verify_gradients,
             check_constant=False,
             clean_constant=False,
+            optimise=False,
         )
 
-        gradient_tracker = (0 if verify_gradients else self.extension_degree) * sum(
-            [1 if i == 0 else 2 for i in self.exp_miller_loop[:-1]]
-        )
+        gradient_tracker = (0 if verify_gradients else self.extension_degree) * self._n_gradients()
 
         # This is where one would perform subgroup membership checks if they were needed
         # For Groth16, they are not, so we simply drop uQ
@@ -127,8 +137,10 @@ class Pairing:
             out += Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL OP_DROP")
         out += Script.parse_string("OP_ENDIF")
 
-        return optimise_script(out)
+        return optimise_script(out) if optimise else out
 
+    @profile_script
+    @check_stack_effect
     def triple_pairing(
         self,
         modulo_threshold: int,
@@ -138,7 +150,10 @@ class Pairing:
         positive_modulo: bool = True,
         is_precomputed_gradients_on_stack: bool = True,
         precomputed_gradients: list[list[list[list[int]]]] | None = None,
+        fixed_arguments: list[list[int]] | None = None,
         is_miller_loop_proj: bool = False,
+        optimise: bool = True,
+        executor: Executor | None = None,
     ) -> Script:
         """Product of three bilinear pairings.
 
@@ -146,7 +161,8 @@ class Pairing:
             - stack:    [q, ..., (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))^-1, lambdas, P1, P2, P3, Q1, Q2, Q3],
                 `Pi` are points on E(F_q), `Qi` are points on E'(F_q^{k/d}), `lambdas` is the sequence of gradients to
                 compute the miller loops, `(miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))^-1` is the inverse of the
-                product of the miller loops computed on each Pi,Qi
+                product of the miller loops computed on each Pi,Qi. `Q2` and `Q3` are not on the stack if
+                `fixed_arguments` is not `None`.
             - altstack: []
 
         Stack output:
@@ -167,21 +183,79 @@ class Pairing:
                 miller loop. The meaning of the lists is:
                     - precomputed_gradients[0]: gradients required to compute w*(-gamma)
                     - precomputed_gradients[1]: gradients required to compute w*(-delta)
+            fixed_arguments (list[list[int]] | None): If not `None`, the points `[Q2, Q3]`, whose lines are
+                hard-coded in the Miller loop (see `triple_miller_loop`). Requires `is_precomputed_gradients_on_stack`
+                to be `False` and `is_miller_loop_proj` to be `False`. Defaults to `None`.
             is_miller_loop_proj (bool): boolean flag to switch between the projective and non projective implementation
                 of the Miller loop. Default to False.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            executor (Executor | None): If not `None`, the steps of the Miller loop (if `is_miller_loop_proj` is
+                `False`), the easy and the hard part of the final exponentiation are generated in `executor` (see
+                `ScriptFragments`). The script is the same. Defaults to `None`.
 
         Returns:
             Script to compute the product of three bilinear pairings e(P1,Q1) * e(P2,Q2) * e(P3,Q3).
 
+        Raises:
+            ValueError: If `fixed_arguments` is not `None` and `is_miller_loop_proj` is `True` or the lines of fixed
+                arguments are not supported by the model (see `triple_miller_loop`).
+
         Notes:
             At the moment, this function does not handle the case where one of the Pi's or one of the Qi's is the
             point at infinity.
         """
+        if fixed_arguments is not None and is_miller_loop_proj:
+            msg = "The fixed arguments are not supported by the projective Miller loop"
+            raise ValueError(msg)
+
         q = self.modulus
 
         easy_exponentiation_with_inverse_check = self.easy_exponentiation_with_inverse_check
         hard_exponentiation = self.hard_exponentiation
 
+        if is_miller_loop_proj:
+            # There are no gradients on the stack if we use projective coordinates in the Miller loop.
+            gradient_tracker = 0
+        else:
+            # Update the value of the verify_gradients vector to compute the gradient tracker.
+            # If is_precomputed_gradients_on_stack is False, the last two gradients are injected and consumed
+            # inside the triple miller loop, and thus are not on the stack anymore. Otherwise, they may still be
+            # on the stack, and we need to count them to update gradient_tracker.
+            checked_gradients = [
+                verify_gradients[0],
+                verify_gradients[1] or not is_precomputed_gradients_on_stack,
+                verify_gradients[2] or not is_precomputed_gradients_on_stack,
+            ]
+            gradient_tracker = (
+                sum(self.extension_degree for gradient in checked_gradients if not gradient) * self._n_gradients()
+            )
+
+        # The final exponentiation does not depend on the Miller loop: it is submitted first, so that it is generated
+        # while the Miller loop is, if an executor is supplied.
+        final_exponentiation = ScriptFragments(executor)
+        final_exponentiation.submit(
+            easy_exponentiation_with_inverse_check,
+            take_modulo=True,
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+            f_inverse=StackFiniteFieldElement(
+                2 * self.N_ELEMENTS_MILLER_OUTPUT - 1, False, self.N_ELEMENTS_MILLER_OUTPUT
+            ).shift(gradient_tracker),
+            f=StackFiniteFieldElement(self.N_ELEMENTS_MILLER_OUTPUT - 1, False, self.N_ELEMENTS_MILLER_OUTPUT),
+        )
+        final_exponentiation.submit(
+            hard_exponentiation,
+            take_modulo=True,
+            modulo_threshold=modulo_threshold,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+        )
+
         out = verify_bottom_constant(q) if check_constant else Script()
 
         # After this, the stack is:
@@ -189,11 +263,12 @@ class Pairing:
         # [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)]
         if is_miller_loop_proj:
             out += self.triple_miller_loop_proj(
-                modulo_threshold=modulo_threshold, positive_modulo=True, check_constant=False, clean_constant=False
+                modulo_threshold=modulo_threshold,
+                positive_modulo=True,
+                check_constant=False,
+                clean_constant=False,
+                optimise=False,
             )
-            # There are no gradients on the stack if we use projective coordinates in the Miller loop.
-            gradient_tracker = 0
-
         else:
             out += self.triple_miller_loop(
                 modulo_threshold=modulo_threshold,
@@ -203,21 +278,80 @@ class Pairing:
                 clean_constant=False,
                 is_precomputed_gradients_on_stack=is_precomputed_gradients_on_stack,
                 precomputed_gradients=precomputed_gradients,
-            )
-            # Update the value of the verify_gradients vector to compute the gradient tracker.
-            # If is_precomputed_gradients_on_stack is False, the last two gradients are injected and consumed
-            # inside the triple miller loop, and thus are not on the stack anymore. Otherwise, they may still be
-            # on the stack, and we need to count them to update gradient_tracker.
-            checked_gradients = [
-                verify_gradients[0],
-                verify_gradients[1] or not is_precomputed_gradients_on_stack,
-                verify_gradients[2] or not is_precomputed_gradients_on_stack,
-            ]
-            gradient_tracker = sum(self.extension_degree for gradient in checked_gradients if not gradient) * sum(
-                [1 if i == 0 else 2 for i in self.exp_miller_loop[:-1]]
+                fixed_arguments=fixed_arguments,
+                optimise=False,
+                executor=executor,
             )
 
-        out += easy_exponentiation_with_inverse_check(
+        out += final_exponentiation.to_script()
+
+        return optimise_script(out) if optimise else out
+
+    @profile_script
+    @check_stack_effect
+    def multi_pairing(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        positive_modulo: bool = True,
+        optimise: bool = True,
+        executor: Executor | None = None,
+        affine_steps: list[int] | None = None,
+        precomputed_gradients: list[list[list[list[int]]] | None] | None = None,
+    ) -> Script:
+        """Product of `n_pairs` bilinear pairings.
+
+        The Miller loops are computed in projective coordinates by `multi_miller_loop_proj`, which shares the Miller
+        output across the pairs, or partly in affine coordinates by `hybrid_miller_loop` if `affine_steps` is given.
+        The final exponentiation is computed once.
+
+        Stack input:
+            - stack:    [q, ..., (miller(P1,Q1) * .. * miller(Pn,Qn))^-1, gradients, P1, .., Pn, Q1, .., Qn], `Pj`
+                are points on E(F_q), `Qj` are points on E'(F_q^{k/d}), `(miller(P1,Q1) * .. * miller(Pn,Qn))^-1` is
+                the inverse of the product of the miller loops computed on each Pj,Qj, `gradients` are the gradients
+                of the affine steps read from the unlocking script (see `hybrid_miller_loop`)
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., e(P1,Q1) * .. * e(Pn,Qn)]
+            - altstack: []
+
+        Args:
+            n_pairs (int): The number `n` of pairs `(Pj, Qj)`. Must be at least `2`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            executor (Executor | None): If not `None`, the easy and the hard part of the final exponentiation are
+                generated in `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            affine_steps (list[int] | None): The number of steps of each Miller loop computed in affine coordinates,
+                e.g., as chosen by `miller_loop_schedule` (see `hybrid_miller_loop`). Defaults to `None`, i.e., the
+                Miller loops are computed in projective coordinates.
+            precomputed_gradients (list[list[list[list[int]]] | None] | None): The gradients hard-coded in the locking
+                script, see `hybrid_miller_loop`. Defaults to `None`.
+
+        Returns:
+            Script to compute the product of bilinear pairings e(P1,Q1) * .. * e(Pn,Qn).
+
+        Raises:
+            ValueError: If `n_pairs` is smaller than `2`, or if `affine_steps` does not have `n_pairs` entries.
+
+        Notes:
+            With `n_pairs = 3`, the script is the same as `triple_pairing` with `is_miller_loop_proj=True`. This
+            function does not handle the case where one of the Pj's or one of the Qj's is the point at infinity.
+        """
+        if affine_steps is not None and len(affine_steps) != n_pairs:
+            msg = f"The affine steps must be given for {n_pairs} pairs, got {len(affine_steps)}"
+            raise ValueError(msg)
+
+        final_exponentiation = ScriptFragments(executor)
+        final_exponentiation.submit(
+            self.easy_exponentiation_with_inverse_check,
             take_modulo=True,
             positive_modulo=False,
             check_constant=False,
@@ -225,11 +359,11 @@ class Pairing:
             is_constant_reused=False,
             f_inverse=StackFiniteFieldElement(
                 2 * self.N_ELEMENTS_MILLER_OUTPUT - 1, False, self.N_ELEMENTS_MILLER_OUTPUT
-            ).shift(gradient_tracker),
+            ),
             f=StackFiniteFieldElement(self.N_ELEMENTS_MILLER_OUTPUT - 1, False, self.N_ELEMENTS_MILLER_OUTPUT),
         )
-
-        out += hard_exponentiation(
+        final_exponentiation.submit(
+            self.hard_exponentiation,
             take_modulo=True,
             modulo_threshold=modulo_threshold,
             positive_modulo=positive_modulo,
@@ -237,4 +371,20 @@ class Pairing:
             clean_constant=clean_constant,
         )
 
-        return optimise_script(out)
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # After this, the stack is:
+        # [miller(P1,Q1) * .. * miller(Pn,Qn)]^-1 [miller(P1,Q1) * .. * miller(Pn,Qn)]
+        out += self.hybrid_miller_loop(
+            affine_steps=[0] * n_pairs if affine_steps is None else affine_steps,
+            modulo_threshold=modulo_threshold,
+            positive_modulo=True,
+            check_constant=False,
+            clean_constant=False,
+            precomputed_gradients=precomputed_gradients,
+            optimise=False,
+        )
+
+        out += final_exponentiation.to_script()
+
+        return optimise_script(out) if optimise else out
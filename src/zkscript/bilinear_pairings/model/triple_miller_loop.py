@@ -1,17 +1,27 @@
 """Bitcoin scripts that compute the product of three Miller loops."""
 
+from concurrent.futures import Executor
+from functools import partial
+from itertools import product
 from math import ceil, log2
 
 from tx_engine import Script
 
 from src.zkscript.script_types.stack_elements import StackEllipticCurvePoint, StackFiniteFieldElement
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner, worst_case
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_fragments import ScriptFragments
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import boolean_list_to_bitmask, optimise_script
-from src.zkscript.util.utility_scripts import move, nums_to_script, pick, roll, verify_bottom_constant
+from src.zkscript.util.utility_scripts import move, pick, roll, verify_bottom_constant
 
 
 class TripleMillerLoop:
     """Triple Miller loop."""
 
+    @profile_script
+    @check_stack_effect
     def __one_step_without_addition(
         self,
         loop_i: int,
@@ -107,7 +117,7 @@ class TripleMillerLoop:
             T (list[StackEllipticCurvePoint]): List of the points T needed for the evaluations and the
                 doublings. i-th step of the calculation of w*Q
         """
-        out = Script()
+        out = ScriptBuilder()
 
         shift = 0 if loop_i == len(self.exp_miller_loop) - 2 else self.N_ELEMENTS_MILLER_OUTPUT
         # stack in:  [gradient_(2*T1), gradient_(2*T2), gradient_(2*T3), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, {f_i^2}]
@@ -183,7 +193,7 @@ class TripleMillerLoop:
         #                   {f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
         # stack out:    [gradient_(2*T1), gradient_(2*T2), gradient_(2*T3), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
         # altstack out: [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
-        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         # stack in:     [gradient_(2*T1), gradient_(2*T2), gradient_(2*T3), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
         # altstack in:  [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
         # stack out:    [gradient_(2*T1) if not verify_gradient[0], gradient_(2*T2), gradient_(2*T3), P1, P2, P3, Q1,
@@ -233,8 +243,8 @@ class TripleMillerLoop:
         # altstack in:  [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
         # stack out:    [..., P1, P2, P3, Q1, Q2, Q3, T3, (2*T1), (2*T2), (2*T3)
         #                   {f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
-        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
-        return out
+        out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out.to_script()
 
     def __one_step_without_addition_inject_precomputed_gradients(
         self,
@@ -274,17 +284,13 @@ class TripleMillerLoop:
         """
         # stack in:  [gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, {f_i^2}]
         # stack out: [gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, gradient_(2*T2), gradient_(2*T3), {f_i^2}]
-        out = (
-            Script()
-            if loop_i == len(self.exp_miller_loop) - 2
-            else Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
-        )
+        out = ScriptBuilder()
+        if loop_i != len(self.exp_miller_loop) - 2:
+            out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         for k in range(len(precomputed_gradients)):
-            out += nums_to_script(
-                precomputed_gradients[k][0]
-            )  # since it is without addition, len(precomputed_gradients[0]) == 1
+            out.nums(precomputed_gradients[k][0])  # since it is without addition, len(precomputed_gradients[0]) == 1
         if loop_i != len(self.exp_miller_loop) - 2:
-            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+            out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
 
         shift_injected_gradients = 2 * self.extension_degree
         shift_miller_output = 0 if loop_i == len(self.exp_miller_loop) - 2 else self.N_ELEMENTS_MILLER_OUTPUT
@@ -365,7 +371,7 @@ class TripleMillerLoop:
         #                   {f_i^2} * ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
         # stack out:    [gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, gradient_(2*T2), gradient_(2*T3)]
         # altstack out: [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
-        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         # stack in:     [gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, gradient_(2*T2), gradient_(2*T3)]
         # altstack in:  [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
         # stack out:    [{gradient_(2*T1) if not verify_gradient[0]}, P1, P2, P3, Q1, Q2, Q3, T2, T3,
@@ -415,9 +421,11 @@ class TripleMillerLoop:
         # altstack in:  [{f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3))]
         # stack out:    [..., P1, P2, P3, Q1, Q2, Q3, (2*T1), (2*T2), (2*T3)
         #                   {f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
-        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
-        return out
+        out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
     def __one_step_with_addition(
         self,
         loop_i: int,
@@ -529,7 +537,7 @@ class TripleMillerLoop:
 
         """
         shift = 0 if loop_i == len(self.exp_miller_loop) - 2 else self.N_ELEMENTS_MILLER_OUTPUT
-        out = Script()
+        out = ScriptBuilder()
         # stack in:  [gradient_(2* T1 ± Q1), gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T1),
         #               gradient_(2*T2) gradient_(2*T3) P1, P2, P3, Q1, Q2, Q3, T1, T2, T3 {f_i^2}]
         # stack out: [gradient_(2* T1 ± Q1), gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T1),
@@ -707,7 +715,7 @@ class TripleMillerLoop:
                 clean_constant=False,
                 is_constant_reused=False,
             )
-        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         # stack in:     [gradient_(2* T1 ± Q1), gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T1),
         #                   gradient_(2*T2), gradient_(2*T3), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
         # altstack in:  [{f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
@@ -815,8 +823,8 @@ class TripleMillerLoop:
         # altstack in:  [{f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
         # stack out:    [..., P1, P2, P3, Q1, Q2, Q3, (2*T1 ± Q1), (2*T2 ± Q2), (2*T3 ± Q3),
         #                    {f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
-        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
-        return out
+        out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out.to_script()
 
     def __one_step_with_addition_inject_precomputed_gradients(
         self,
@@ -862,17 +870,15 @@ class TripleMillerLoop:
         # stack in:  [gradient_(2* T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, {f_i^2}]
         # stack out: [gradient_(2* T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3,
         #                gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T2), gradient_(2*T3), {f_i^2}]
-        out = (
-            Script()
-            if loop_i == len(self.exp_miller_loop) - 2
-            else Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
-        )
+        out = ScriptBuilder()
+        if loop_i != len(self.exp_miller_loop) - 2:
+            out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         for j in range(len(precomputed_gradients[0]) - 1, -1, -1):
             for k in range(2):
-                out += nums_to_script(precomputed_gradients[k][j])
+                out.nums(precomputed_gradients[k][j])
 
         if loop_i != len(self.exp_miller_loop) - 2:
-            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+            out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
 
         shift_injected_gradients = 4 * self.extension_degree
         shift_miller_output = 0 if loop_i == len(self.exp_miller_loop) - 2 else self.N_ELEMENTS_MILLER_OUTPUT
@@ -1045,7 +1051,7 @@ class TripleMillerLoop:
                 clean_constant=False,
                 is_constant_reused=False,
             )
-        out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
         # stack in:  [gradient_(2* T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, Q2, Q3, T1, T2, T3,
         #                gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T2), gradient_(2*T3)]
         # altstack in:  [{f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
@@ -1165,9 +1171,603 @@ class TripleMillerLoop:
         # altstack in:  [{f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
         # stack out:    [..., P1, P2, P3, Q1, Q2, Q3, (2*T1 ± Q1), (2*T2 ± Q2), (2*T3 ± Q3),
         #                    {f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
-        out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out.to_script()
+
+    def _triple_miller_loop_step(
+        self,
+        loop_i: int,
+        take_modulo: list[bool],
+        positive_modulo: bool,
+        verify_gradients: tuple[bool],
+        clean_constant: bool,
+        gradients_doubling: list[StackFiniteFieldElement],
+        gradients_addition: list[StackFiniteFieldElement],
+        P: list[StackEllipticCurvePoint],  # noqa: N803
+        Q: list[StackEllipticCurvePoint],  # noqa: N803
+        T: list[StackEllipticCurvePoint],  # noqa: N803
+        is_precomputed_gradients_on_stack: bool,
+        precomputed_gradients: list[list[list[int]]] | None,
+    ) -> Script:
+        """Generate the script of the step `loop_i` of `triple_miller_loop`.
+
+        The script squares the Miller output (except in the first step), then performs the step with or without
+        addition depending on `exp_miller_loop[loop_i]`. The step only depends on its arguments, so that the steps
+        of the loop can be generated independently.
+
+        Args:
+            loop_i (int): The step begin performed in the computation of the Miller loop.
+            take_modulo (list[bool]): List of two booleans that declare whether to take modulos after
+                calculating the evaluations and the points doubling.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            verify_gradients (tuple[bool]): Tuple of bools detailing which gradients should be mathematically
+                verified.
+            clean_constant (bool): Whether to clean the constant at the end of the execution of the
+                Miller loop.
+            gradients_doubling (list[StackFiniteFieldElement]): List of gradients needed for doubling.
+            gradients_addition (list[StackFiniteFieldElement]): List of gradients needed for addition. Unused if
+                `exp_miller_loop[loop_i] == 0`.
+            P (list[StackEllipticCurvePoint]): List of the points P needed for the evaluations.
+            Q (list[StackEllipticCurvePoint]): List of the points Q needed for the evaluations and the
+                additions.
+            T (list[StackEllipticCurvePoint]): List of the points T needed for the evaluations and the
+                doublings. i-th step of the calculation of w*Q
+            is_precomputed_gradients_on_stack (bool): If `True`, the precomputed gradients are on the stack,
+                otherwise they are injected during the script execution.
+            precomputed_gradients (list[list[list[int]]] | None): The precomputed gradients injected in this step if
+                `is_precomputed_gradients_on_stack` is `False`.
+        """
+        out = Script()
+        if loop_i != len(self.exp_miller_loop) - 2:
+            # stack in:  [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f_i]
+            # stack out: [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f_i^2]
+            out += self.miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
+        if self.exp_miller_loop[loop_i] == 0:
+            # stack in:  [gradient_(2*T1), gradient_(2*T2), gradient_(2*T3), ..., P1, P2, P3, Q1, Q2, Q3, T1, T2,
+            #               T3, {f_i^2}]
+            # stack out: [non-verified gradients, P1, P2, P3, Q1, Q2, Q3, (2*T1), (2*T2), (2*T3),
+            #               {f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
+            out += self.__one_step_without_addition(
+                loop_i=loop_i,
+                take_modulo=take_modulo,
+                positive_modulo=positive_modulo,
+                verify_gradients=verify_gradients,
+                clean_constant=clean_constant,
+                gradients_doubling=gradients_doubling,
+                P=P,
+                T=T,
+                is_precomputed_gradients_on_stack=is_precomputed_gradients_on_stack,
+                precomputed_gradients=precomputed_gradients,
+            )
+        else:
+            # stack in:  [gradient_(2* T1 ± Q1), gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T1),
+            #               gradient_(2*T2), gradient_(2*T3), ..., P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, {f_i^2}]
+            # stack out: [non-verified gradients, P1, P2, P3, Q1, Q2, Q3, (2*T1 ± Q1), (2*T2 ± Q2), (2*T3 ± Q3),
+            #               {f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
+            out += self.__one_step_with_addition(
+                loop_i=loop_i,
+                take_modulo=take_modulo,
+                positive_modulo=positive_modulo,
+                verify_gradients=verify_gradients,
+                clean_constant=clean_constant,
+                gradients_doubling=gradients_doubling,
+                gradients_addition=gradients_addition,
+                P=P,
+                Q=Q,
+                T=T,
+                is_precomputed_gradients_on_stack=is_precomputed_gradients_on_stack,
+                precomputed_gradients=precomputed_gradients,
+            )
         return out
 
+    def fixed_argument_lines(self, Q: list[int], gradients: list[list[list[int]]]) -> list[list[list[list[int]]]]:  # noqa: N803
+        """Return the lines of the Miller loop of the fixed point `Q` on the twisted curve.
+
+        The lines are computed from the gradients of the Miller loop, so that no inversion is needed.
+
+        Args:
+            Q (list[int]): The point `Q`, an element of E'(F_q^2).
+            gradients (list[list[list[int]]]): The gradients of the Miller loop of `Q`, in the format of
+                `precomputed_gradients[0]` in `triple_miller_loop`.
+
+        Returns:
+            The list `lines` such that `lines[s]` contains the lines of the `s`-th step of the loop, that is, of the
+            step `loop_i = len(exp_miller_loop) - 2 - s`: the line tangent at `T` and, if `exp_miller_loop[loop_i]`
+            is not zero, the line through `2*T` and `± Q`. Every line is the pair `[gradient, intercept]` of elements
+            of F_q^2 such that the line is `y = gradient * x + intercept`.
+
+        Preconditions:
+            - `gradients` are the gradients of the Miller loop of `Q`.
+        """
+        q = self.modulus
+
+        def mul(a: list[int], b: list[int]) -> list[int]:
+            return [(a[0] * b[0] + self.NON_RESIDUE_FQ * a[1] * b[1]) % q, (a[0] * b[1] + a[1] * b[0]) % q]
+
+        def sub(a: list[int], b: list[int]) -> list[int]:
+            return [(a[0] - b[0]) % q, (a[1] - b[1]) % q]
+
+        x_q, y_q = Q[: self.N_POINTS_TWIST // 2], Q[self.N_POINTS_TWIST // 2 :]
+        minus_y_q = [-el % q for el in y_q]
+        x_t, y_t = x_q, minus_y_q if self.exp_miller_loop[-1] == -1 else y_q
+
+        lines = []
+        for step, loop_i in enumerate(range(len(self.exp_miller_loop) - 2, -1, -1)):
+            # The second point of the line tangent at T is T itself
+            points = [[x_t, y_t]]
+            if self.exp_miller_loop[loop_i] != 0:
+                points.append([x_q, minus_y_q if self.exp_miller_loop[loop_i] == -1 else y_q])
+            step_lines = []
+            for gradient, (x, _) in zip(gradients[step], points, strict=True):
+                step_lines.append([gradient, sub(y_t, mul(gradient, x_t))])
+                x_sum = sub(sub(mul(gradient, gradient), x_t), x)
+                x_t, y_t = x_sum, sub(mul(gradient, sub(x_t, x_sum)), y_t)
+            lines.append(step_lines)
+        return lines
+
+    @profile_script
+    @check_stack_effect
+    def _triple_miller_loop_fixed_arguments_step(
+        self,
+        loop_i: int,
+        take_modulo: list[bool],
+        positive_modulo: bool,
+        verify_gradient: bool,
+        clean_constant: bool,
+        gradient_doubling: StackFiniteFieldElement,
+        gradient_addition: StackFiniteFieldElement,
+        P: list[StackEllipticCurvePoint],  # noqa: N803
+        Q: StackEllipticCurvePoint,  # noqa: N803
+        T: StackEllipticCurvePoint,  # noqa: N803
+        lines: list[list[list[list[int]]]],
+    ) -> Script:
+        """Generate the script of the step `loop_i` of `triple_miller_loop` with fixed arguments.
+
+        The script squares the Miller output (except in the first step), evaluates the lines of the step at `P1`,
+        `P2` and `P3`, and updates `T1`. The lines through the multiples of `Q2` and `Q3` are hard-coded, so the
+        multiples of `Q2` and `Q3` are not computed.
+
+        Args:
+            loop_i (int): The step begin performed in the computation of the Miller loop.
+            take_modulo (list[bool]): List of two booleans that declare whether to take modulos after
+                calculating the evaluations and the update of `T1`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            verify_gradient (bool): Whether the gradients used to update `T1` should be mathematically verified.
+            clean_constant (bool): Whether to clean the constant at the end of the execution of the
+                Miller loop.
+            gradient_doubling (StackFiniteFieldElement): The gradient needed to double `T1`.
+            gradient_addition (StackFiniteFieldElement): The gradient needed to compute `2*T1 ± Q1`. Unused if
+                `exp_miller_loop[loop_i] == 0`.
+            P (list[StackEllipticCurvePoint]): List of the points P needed for the evaluations.
+            Q (StackEllipticCurvePoint): The point `Q1`.
+            T (StackEllipticCurvePoint): The point `T1`, the i-th step of the calculation of w*Q1.
+            lines (list[list[list[list[int]]]]): The lines of the step for `Q2` and `Q3`, in the format returned by
+                `fixed_argument_lines`.
+        """
+        is_first_step = loop_i == len(self.exp_miller_loop) - 2
+        shift_miller_output = 0 if is_first_step else self.N_ELEMENTS_MILLER_OUTPUT
+
+        out = ScriptBuilder()
+        if not is_first_step:
+            # stack in:  [P1, P2, P3, Q1, T1, f_i]
+            # stack out: [P1, P2, P3, Q1, T1, f_i^2]
+            out += self.miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # stack in:  [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}]
+        # stack out: [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}, ev_(l_(T1,T1))(P1)]
+        out += self.line_eval(
+            take_modulo=True,
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+            gradient=gradient_doubling.shift(shift_miller_output),
+            P=P[0].shift(shift_miller_output),
+            Q=T.shift(shift_miller_output),
+            rolling_option=0,
+        )  # Compute ev_(l_(T1,T1))(P1)
+        shift_evaluation = self.N_ELEMENTS_EVALUATION_OUTPUT
+        # stack in:  [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}, ev_(l_(T1,T1))(P1)]
+        # stack out: [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}, ev_(l_(T1,T1))(P1), ev_(l_(T2,T2))(P2)]
+        out += self.line_eval_fixed_argument(
+            take_modulo=True,
+            gradient=lines[0][0][0],
+            intercept=lines[0][0][1],
+            positive_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            is_constant_reused=False,
+            P=P[1].shift(shift_miller_output + shift_evaluation),
+            rolling_option=0,
+        )  # Compute ev_(l_(T2,T2))(P2)
+
+        if self.exp_miller_loop[loop_i] == 0:
+            # stack in:  [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}, ev_(l_(T1,T1))(P1), ev_(l_(T2,T2))(P2)]
+            # stack out: [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+            #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
+            out += self.line_eval_fixed_argument(
+                take_modulo=True,
+                gradient=lines[1][0][0],
+                intercept=lines[1][0][1],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                P=P[2].shift(shift_miller_output + 2 * shift_evaluation),
+                rolling_option=0,
+            )  # Compute ev_(l_(T3,T3))(P3)
+            out += self.line_eval_times_eval(
+                take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+            )
+            out += self.line_eval_times_eval_times_eval(
+                take_modulo=take_modulo[0] if is_first_step else False,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+            )
+            if not is_first_step:
+                # stack in:  [gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+                #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
+                # stack out: [gradient_(2*T1), P1, P2, P3, Q1, T1,
+                #               {f_i^2} * ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
+                out += self.miller_loop_output_times_eval_times_eval_times_eval(
+                    take_modulo=take_modulo[0],
+                    positive_modulo=positive_modulo,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+            # stack in:     [gradient_(2*T1), P1, P2, P3, Q1, T1, f_(i+1)]
+            # stack out:    [{gradient_(2*T1) if not verify_gradient}, P1, P2, P3, Q1, (2*T1)]
+            # altstack out: [f_(i+1)]
+            out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+            out += self.point_doubling_twisted_curve(
+                take_modulo=take_modulo[1],
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=(loop_i == 0) and clean_constant,
+                verify_gradient=verify_gradient,
+                gradient=gradient_doubling,
+                P=T,
+                rolling_option=boolean_list_to_bitmask([verify_gradient, True]),
+            )  # Compute 2*T1
+        else:
+            # stack in:  [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2}, ev_(l_(T1,T1))(P1),
+            #               ev_(l_(T2,T2))(P2)]
+            # stack out: [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+            #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2), ev_(l_(T3,T3))(P3) * ev_(l_(2*T1,± Q1))(P1)]
+            out += self.line_eval_times_eval(
+                take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+            )
+            shift_evaluation = self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+            out += self.line_eval_fixed_argument(
+                take_modulo=True,
+                gradient=lines[1][0][0],
+                intercept=lines[1][0][1],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                P=P[2].shift(shift_miller_output + shift_evaluation),
+                rolling_option=0,
+            )  # Compute ev_(l_(T3,T3))(P3)
+            shift_evaluation += self.N_ELEMENTS_EVALUATION_OUTPUT
+            out += self.line_eval(
+                take_modulo=True,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                gradient=gradient_addition.shift(shift_miller_output + shift_evaluation),
+                P=P[0].shift(shift_miller_output + shift_evaluation),
+                Q=Q.shift(shift_miller_output + shift_evaluation).set_negate(self.exp_miller_loop[loop_i] == -1),
+                rolling_option=0,
+            )  # Compute ev_(l_(2*T1,± Q1))(P1)
+            out += self.line_eval_times_eval(
+                take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+            )
+            shift_evaluation = 2 * self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+            # stack in:  [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+            #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2), ev_(l_(T3,T3))(P3) * ev_(l_(2*T1,± Q1))(P1)]
+            # stack out: [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+            #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2), ev_(l_(T3,T3))(P3) * ev_(l_(2*T1,± Q1))(P1),
+            #                   ev_(l_(2*T2,± Q2))(P2) * ev_(l_(2*T3,± Q3))(P3)]
+            out += self.line_eval_fixed_argument(
+                take_modulo=True,
+                gradient=lines[0][1][0],
+                intercept=lines[0][1][1],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                P=P[1].shift(shift_miller_output + shift_evaluation),
+                rolling_option=0,
+            )  # Compute ev_(l_(2*T2,± Q2))(P2)
+            shift_evaluation += self.N_ELEMENTS_EVALUATION_OUTPUT
+            out += self.line_eval_fixed_argument(
+                take_modulo=True,
+                gradient=lines[1][1][0],
+                intercept=lines[1][1][1],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                P=P[2].shift(shift_miller_output + shift_evaluation),
+                rolling_option=0,
+            )  # Compute ev_(l_(2*T3,± Q3))(P3)
+            out += self.line_eval_times_eval(
+                take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+            )
+            # stack in:  [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, {f_i^2},
+            #               ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2), ev_(l_(T3,T3))(P3) * ev_(l_(2*T1,± Q1))(P1),
+            #                   ev_(l_(2*T2,± Q2))(P2) * ev_(l_(2*T3,± Q3))(P3)]
+            # stack out: [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, f_(i+1)]
+            out += self.line_eval_times_eval_times_eval_times_eval(
+                take_modulo=False, positive_modulo=False, check_constant=False, clean_constant=False
+            )
+            out += self.line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
+                take_modulo=take_modulo[0] if is_first_step else False,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+            )
+            if not is_first_step:
+                out += self.miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
+                    take_modulo=take_modulo[0],
+                    positive_modulo=positive_modulo,
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+            # stack in:     [gradient_(2*T1 ± Q1), gradient_(2*T1), P1, P2, P3, Q1, T1, f_(i+1)]
+            # stack out:    [{gradient_(2*T1 ± Q1) if not verify_gradient}, {gradient_(2*T1) if not verify_gradient},
+            #                   P1, P2, P3, Q1, (2*T1 ± Q1)]
+            # altstack out: [f_(i+1)]
+            out.append_opcodes(" ".join(["OP_TOALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+            out += self.point_doubling_twisted_curve(
+                take_modulo=take_modulo[1],
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                verify_gradient=verify_gradient,
+                gradient=gradient_doubling,
+                P=T,
+                rolling_option=boolean_list_to_bitmask([verify_gradient, True]),
+            )  # Compute 2*T1
+            out += self.point_addition_twisted_curve(
+                take_modulo=take_modulo[1],
+                positive_modulo=positive_modulo,
+                check_constant=False,
+                clean_constant=(loop_i == 0) and clean_constant,
+                verify_gradient=verify_gradient,
+                gradient=gradient_addition.shift(-self.extension_degree if verify_gradient else 0),
+                P=Q.set_negate(self.exp_miller_loop[loop_i] == -1),
+                Q=T,  # 2*T1 is where T1 was
+                rolling_option=boolean_list_to_bitmask([verify_gradient, False, True]),
+            )  # Compute 2*T1 ± Q1
+
+        # stack in:     [..., P1, P2, P3, Q1, T1']
+        # altstack in:  [f_(i+1)]
+        # stack out:    [..., P1, P2, P3, Q1, T1', f_(i+1)]
+        out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * self.N_ELEMENTS_MILLER_OUTPUT))
+        return out.to_script()
+
+    def __estimated_take_modulos(self, modulo_threshold: int) -> list[list[bool]]:
+        """Return the `take_modulo` arguments of the steps of `triple_miller_loop`, from the size estimates."""
+        BIT_SIZE_Q = ceil(log2(self.modulus))
+        size_point_multiplication = BIT_SIZE_Q
+        size_miller_output = BIT_SIZE_Q
+
+        take_modulos = []
+        for loop_i in range(len(self.exp_miller_loop) - 2, -1, -1):
+            (
+                take_modulo_miller_loop_output,
+                take_modulo_point_multiplication,
+                size_miller_output,
+                size_point_multiplication,
+            ) = self.size_estimation_miller_loop(
+                self.modulus,
+                modulo_threshold,
+                loop_i,
+                self.exp_miller_loop,
+                size_miller_output,
+                size_point_multiplication,
+                True,
+            )
+            take_modulos.append([take_modulo_miller_loop_output, take_modulo_point_multiplication])
+        return take_modulos
+
+    def __planned_take_modulos(self, modulo_threshold: int, steps: list[dict]) -> list[list[bool]]:
+        """Return the `take_modulo` arguments of the steps of `triple_miller_loop`, from `modulo_planner`.
+
+        The steps carry the points `T1, T2, T3` and the Miller output `f`. The precomputed gradients injected in the
+        steps are replaced by `q - 1` in the simulations, so that their bit lengths are the worst-case ones.
+        """
+        reduction_steps = []
+        for step in steps:
+            loop_i = step["loop_i"]
+            key = (
+                "TripleMillerLoop",
+                self.modulus,
+                self.exp_miller_loop[loop_i],
+                loop_i == len(self.exp_miller_loop) - 2,
+                loop_i == 0,
+                step["positive_modulo"],
+                step["clean_constant"],
+                tuple(step["verify_gradients"]),
+                step["is_precomputed_gradients_on_stack"],
+            )
+            representative = {**step, "precomputed_gradients": worst_case(step["precomputed_gradients"], self.modulus)}
+            reduction_steps.append(
+                ReductionStep(
+                    key=key,
+                    options=((True, True),) if loop_i == 0 else tuple(product([True, False], repeat=2)),
+                    generate=partial(self.__generate_step, representative),
+                    n_carried=3 * self.N_POINTS_TWIST + self.N_ELEMENTS_MILLER_OUTPUT,
+                )
+            )
+        plan = modulo_planner.plan(
+            reduction_steps,
+            modulus_bits=self.modulus.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=3 * self.N_POINTS_TWIST,
+            key=tuple(step.key for step in reduction_steps),
+        )
+        return [list(option) for option in plan]
+
+    def __generate_step(self, step: dict, take_modulo: tuple[bool, bool]) -> Script:
+        return self._triple_miller_loop_step(take_modulo=list(take_modulo), **step)
+
+    def __planned_take_modulos_fixed_arguments(self, modulo_threshold: int, steps: list[dict]) -> list[list[bool]]:
+        """Return the `take_modulo` arguments of the steps of `triple_miller_loop` with fixed arguments.
+
+        The steps carry the point `T1` and the Miller output `f`. The hard-coded lines are replaced by `q - 1` in the
+        simulations, so that their bit lengths are the worst-case ones.
+        """
+        reduction_steps = []
+        for step in steps:
+            loop_i = step["loop_i"]
+            key = (
+                "TripleMillerLoopFixedArguments",
+                self.modulus,
+                self.exp_miller_loop[loop_i],
+                loop_i == len(self.exp_miller_loop) - 2,
+                loop_i == 0,
+                step["positive_modulo"],
+                step["clean_constant"],
+                step["verify_gradient"],
+            )
+            representative = {**step, "lines": worst_case(step["lines"], self.modulus)}
+            reduction_steps.append(
+                ReductionStep(
+                    key=key,
+                    options=((True, True),) if loop_i == 0 else tuple(product([True, False], repeat=2)),
+                    generate=partial(self.__generate_fixed_arguments_step, representative),
+                    n_carried=self.N_POINTS_TWIST + self.N_ELEMENTS_MILLER_OUTPUT,
+                )
+            )
+        plan = modulo_planner.plan(
+            reduction_steps,
+            modulus_bits=self.modulus.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=self.N_POINTS_TWIST,
+            key=tuple(step.key for step in reduction_steps),
+        )
+        return [list(option) for option in plan]
+
+    def __generate_fixed_arguments_step(self, step: dict, take_modulo: tuple[bool, bool]) -> Script:
+        return self._triple_miller_loop_fixed_arguments_step(take_modulo=list(take_modulo), **step)
+
+    def __triple_miller_loop_fixed_arguments(
+        self,
+        modulo_threshold: int,
+        positive_modulo: bool,
+        verify_gradient: bool,
+        check_constant: bool | None,
+        clean_constant: bool | None,
+        precomputed_gradients: list[list[list[list[int]]]],
+        fixed_arguments: list[list[int]],
+        executor: Executor | None,
+    ) -> Script:
+        """Evaluation of the product of three Miller loops, the last two of which have fixed arguments.
+
+        See `triple_miller_loop`, of which this is the implementation if `fixed_arguments` is not `None`.
+        """
+        gradient_addition = StackFiniteFieldElement(
+            2 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE + 2 * self.extension_degree - 1,
+            False,
+            self.extension_degree,
+        )
+        gradient_doubling = StackFiniteFieldElement(
+            2 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE + self.extension_degree - 1,
+            False,
+            self.extension_degree,
+        )
+        P = [
+            StackEllipticCurvePoint(
+                StackFiniteFieldElement(
+                    2 * self.N_POINTS_TWIST + i * self.N_POINTS_CURVE - 1, False, self.N_POINTS_CURVE // 2
+                ),
+                StackFiniteFieldElement(
+                    2 * self.N_POINTS_TWIST + (i - 1) * self.N_POINTS_CURVE + self.N_POINTS_CURVE // 2 - 1,
+                    False,
+                    self.N_POINTS_CURVE // 2,
+                ),
+            )
+            for i in range(3, 0, -1)
+        ]
+        Q = StackEllipticCurvePoint(
+            StackFiniteFieldElement(2 * self.N_POINTS_TWIST - 1, False, self.N_POINTS_TWIST // 2),
+            StackFiniteFieldElement(
+                self.N_POINTS_TWIST + self.N_POINTS_TWIST // 2 - 1, False, self.N_POINTS_TWIST // 2
+            ),
+        )
+        T = StackEllipticCurvePoint(
+            StackFiniteFieldElement(self.N_POINTS_TWIST - 1, False, self.N_POINTS_TWIST // 2),
+            StackFiniteFieldElement(self.N_POINTS_TWIST // 2 - 1, False, self.N_POINTS_TWIST // 2),
+        )
+        lines = [
+            self.fixed_argument_lines(point, gradients)
+            for point, gradients in zip(fixed_arguments, precomputed_gradients, strict=True)
+        ]
+
+        out = ScriptFragments(executor, verify_bottom_constant(self.modulus) if check_constant else None)
+
+        # stack in:  [P1, P2, P3, Q1]
+        # stack out: [P1, P2, P3, Q1, T1]
+        for j in range(self.N_POINTS_TWIST):
+            out += pick(position=self.N_POINTS_TWIST - 1, n_elements=1)
+            out += Script.parse_string(
+                "OP_NEGATE" if self.exp_miller_loop[-1] == -1 and j >= self.N_POINTS_TWIST // 2 else ""
+            )
+
+        steps = []
+        gradient_tracker = 0
+        for loop_i in range(len(self.exp_miller_loop) - 2, -1, -1):
+            step = len(self.exp_miller_loop) - 2 - loop_i
+            steps.append(
+                {
+                    "loop_i": loop_i,
+                    "positive_modulo": positive_modulo if loop_i == 0 else False,
+                    "verify_gradient": verify_gradient,
+                    "clean_constant": clean_constant if loop_i == 0 else False,
+                    "gradient_doubling": gradient_doubling.shift(gradient_tracker),
+                    "gradient_addition": gradient_addition.shift(gradient_tracker),
+                    "P": P,
+                    "Q": Q,
+                    "T": T,
+                    "lines": [point_lines[step] for point_lines in lines],
+                }
+            )
+            # update gradient_tracker taking into account the gradients of T1 left on the stack
+            n_gradients = 1 if self.exp_miller_loop[loop_i] == 0 else 2
+            gradient_tracker += 0 if verify_gradient else n_gradients * self.extension_degree
+
+        take_modulos = (
+            self.__planned_take_modulos_fixed_arguments(modulo_threshold, steps)
+            if modulo_planner.is_enabled
+            else self.__estimated_take_modulos(modulo_threshold)
+        )
+
+        # stack in:  [P1, P2, P3, Q1, T1]
+        # stack out: [P1, P2, P3, Q1, w*Q1, (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
+        for step, take_modulo in zip(steps, take_modulos, strict=True):
+            # stack in:  [gradients, ..., P1, P2, P3, Q1, T1, f_i]
+            # stack out: [non-verified gradients, ..., P1, P2, P3, Q1, T1', f_(i+1)]
+            out.submit(self._triple_miller_loop_fixed_arguments_step, take_modulo=take_modulo, **step)
+
+        # stack in:  [P1, P2, P3, Q1, w*Q1, (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
+        # stack out: [(miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
+        out += roll(
+            position=2 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE + self.N_ELEMENTS_MILLER_OUTPUT - 1,
+            n_elements=2 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE,
+        )
+        out += Script.parse_string(" ".join(["OP_DROP"] * (2 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE)))
+
+        return out.to_script()
+
+    @profile_script
+    @check_stack_effect
     def triple_miller_loop(
         self,
         modulo_threshold: int,
@@ -1177,12 +1777,15 @@ class TripleMillerLoop:
         clean_constant: bool | None = None,
         is_precomputed_gradients_on_stack: bool = True,
         precomputed_gradients: list[list[list[list[int]]]] | None = None,
+        fixed_arguments: list[list[int]] | None = None,
+        optimise: bool = True,
+        executor: Executor | None = None,
     ) -> Script:
         """Evaluation of the product of three Miller loops.
 
         Stack input:
             - stack:    [q, ..., gradients, P1, P2, P3, Q1, Q2, Q3], `P` is a point on E(F_q), `Q` is a point on
-                E'(F_q^{k/d})
+                E'(F_q^{k/d}). `Q2` and `Q3` are not on the stack if `fixed_arguments` is not `None`.
             - altstack: []
 
         Stack output:
@@ -1202,10 +1805,26 @@ class TripleMillerLoop:
                 The meaning of the lists is:
                     - precomputed_gradients[0]: gradients required to compute w*(-gamma)
                     - precomputed_gradients[1]: gradients required to compute w*(-delta)
+            fixed_arguments (list[list[int]] | None): If not `None`, the points `[Q2, Q3]`. The lines of their
+                Miller loops are computed from `precomputed_gradients` (see `fixed_argument_lines`) and hard-coded in
+                the script: the multiples of `Q2` and `Q3` are not computed, and the evaluation of every line at
+                `P2` or `P3` costs a few multiplications in F_q. Requires `is_precomputed_gradients_on_stack` to be
+                `False`, and is only supported if `line_eval_fixed_argument` is not `None` (not over BN254). Every line
+                costs two hard-coded elements of F_q^2: over MNT4-753, where the elements of F_q are large, the script
+                executes fewer opcodes but is larger. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            executor (Executor | None): If not `None`, the steps of the loop are generated in `executor` (see
+                `ScriptFragments`). The script is the same. Defaults to `None`.
 
         Returns:
             Script to evaluate the product of three Miller loops.
 
+        Raises:
+            ValueError: If `fixed_arguments` is not `None` and `is_precomputed_gradients_on_stack` is `True`,
+                `precomputed_gradients` is `None` or the lines of fixed arguments are not supported by the model.
+
         Preconditions:
             - Pi are passed as couples of integers (minimally encoded, in little endian)
             - Qi are passed as couples of elements in F_q^{k/d}
@@ -1246,8 +1865,35 @@ class TripleMillerLoop:
 
             Modulo operations are carried out as in a similar fashion to a single miller loop, with the only difference
             being that the update of f is now always of the form: f <-- f^2 * Dense
+
+            If `fixed_arguments` is not `None`, the stack at the beginning of every iteration of the loop is
+                [... gradient_(2*T1) P1 P2 P3 Q1 T1 f_i]
+            and `t_2`, `t_3`, `t'_2`, `t'_3` are computed from the hard-coded lines.
+
+            If `frobenius_twisted_curve` is not `None`, the loop is followed by the lines through `T_j` and
+            `pi(Q_j)`, and through `T_j + pi(Q_j)` and `-pi^2(Q_j)` (see `_frobenius_step`), whose gradients are the
+            last ones of every pair.
         """
         assert is_precomputed_gradients_on_stack or precomputed_gradients is not None
+        if fixed_arguments is not None:
+            if self.line_eval_fixed_argument is None:
+                msg = "The fixed arguments are not supported by this pairing model"
+                raise ValueError(msg)
+            if is_precomputed_gradients_on_stack or precomputed_gradients is None:
+                msg = "The fixed arguments require the precomputed gradients to be injected in the script"
+                raise ValueError(msg)
+            out = self.__triple_miller_loop_fixed_arguments(
+                modulo_threshold=modulo_threshold,
+                positive_modulo=positive_modulo,
+                verify_gradient=verify_gradients[0],
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                precomputed_gradients=precomputed_gradients,
+                fixed_arguments=fixed_arguments,
+                executor=executor,
+            )
+            return optimise_script(out) if optimise else out
+
         gradients_addition = (
             [
                 StackFiniteFieldElement(
@@ -1320,11 +1966,7 @@ class TripleMillerLoop:
             for i in range(3, 0, -1)
         ]
 
-        BIT_SIZE_Q = ceil(log2(self.modulus))
-        size_point_multiplication = BIT_SIZE_Q
-        size_miller_output = BIT_SIZE_Q
-
-        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+        out = ScriptFragments(executor, verify_bottom_constant(self.modulus) if check_constant else None)
 
         # stack in:  [P1, P2, P3, Q1, Q2, Q3]
         # stack out: [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
@@ -1335,97 +1977,84 @@ class TripleMillerLoop:
                     "OP_NEGATE" if self.exp_miller_loop[-1] == -1 and j >= self.N_POINTS_TWIST // 2 else ""
                 )
 
-        # stack in:  [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
-        # stack out: [P1, P2, P3, Q1, Q2, Q3, w*Q1, w*Q2, w*Q3, (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
+        steps = []
         gradient_tracker = 0
+        is_last_step = self.frobenius_twisted_curve is None
         for loop_i in range(len(self.exp_miller_loop) - 2, -1, -1):
-            positive_modulo_i = positive_modulo if loop_i == 0 else False
-            clean_constant_i = clean_constant if loop_i == 0 else False
-
-            (
-                take_modulo_miller_loop_output,
-                take_modulo_point_multiplication,
-                size_miller_output,
-                size_point_multiplication,
-            ) = self.size_estimation_miller_loop(
-                self.modulus,
-                modulo_threshold,
-                loop_i,
-                self.exp_miller_loop,
-                size_miller_output,
-                size_point_multiplication,
-                True,
-            )
-
-            if loop_i != len(self.exp_miller_loop) - 2:
-                # stack in:  [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f_i]
-                # stack out: [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f_i^2]
-                out += self.miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
-            precomputed_gradient = (
-                None
-                if is_precomputed_gradients_on_stack
-                else [gradient[len(self.exp_miller_loop) - 2 - loop_i] for gradient in precomputed_gradients]
+            steps.append(
+                {
+                    "loop_i": loop_i,
+                    "positive_modulo": positive_modulo if loop_i == 0 and is_last_step else False,
+                    "verify_gradients": verify_gradients,
+                    "clean_constant": clean_constant if loop_i == 0 and is_last_step else False,
+                    "gradients_doubling": [gradient.shift(gradient_tracker) for gradient in gradients_doubling],
+                    "gradients_addition": [gradient.shift(gradient_tracker) for gradient in gradients_addition],
+                    "P": P,
+                    "Q": Q,
+                    "T": T,
+                    "is_precomputed_gradients_on_stack": is_precomputed_gradients_on_stack,
+                    "precomputed_gradients": None
+                    if is_precomputed_gradients_on_stack
+                    else [gradient[len(self.exp_miller_loop) - 2 - loop_i] for gradient in precomputed_gradients],
+                }
             )
-            if self.exp_miller_loop[loop_i] == 0:
-                # stack in:  [gradient_(2*T1), gradient_(2*T2), gradient_(2*T3), ..., P1, P2, P3, Q1, Q2, Q3, T1, T2,
-                #               T3, {f_i^2}]
-                # stack out: [non-verified gradients, P1, P2, P3, Q1, Q2, Q3, (2*T1), (2*T2), (2*T3),
-                #               {f_i^2} * (ev_(l_(T1,T1))(P1) * ev_(l_(T2,T2))(P2) * ev_(l_(T3,T3))(P3)]
-                out += self.__one_step_without_addition(
-                    loop_i=loop_i,
-                    take_modulo=[take_modulo_miller_loop_output, take_modulo_point_multiplication],
-                    positive_modulo=positive_modulo_i,
-                    verify_gradients=verify_gradients,
-                    clean_constant=clean_constant_i,
-                    gradients_doubling=[gradient.shift(gradient_tracker) for gradient in gradients_doubling],
-                    P=P,
-                    T=T,
-                    is_precomputed_gradients_on_stack=is_precomputed_gradients_on_stack,
-                    precomputed_gradients=precomputed_gradient,
+            # update gradient_tracker taking into account the gradients left on the stack (one per point for the
+            # doubling, one more for the addition).
+            # If the second and third gradients are injected in the locking script
+            # (i.e. is_precomputed_gradients_on_stack is False), there is no need to verify them.
+            n_gradients = 1 if self.exp_miller_loop[loop_i] == 0 else 2
+            gradient_tracker += n_gradients * sum(
+                self.extension_degree if not verify_gradient else 0
+                for verify_gradient in (
+                    verify_gradients if is_precomputed_gradients_on_stack else [verify_gradients[0], True, True]
                 )
-                if is_precomputed_gradients_on_stack:
-                    # update gradient_tracker taking into account the gradients left on the stack
-                    gradient_tracker += sum(
-                        self.extension_degree if not verify_gradient else 0 for verify_gradient in verify_gradients
-                    )
+            )
+
+        take_modulos = (
+            self.__planned_take_modulos(modulo_threshold, steps)
+            if modulo_planner.is_enabled
+            else self.__estimated_take_modulos(modulo_threshold)
+        )
+
+        # stack in:  [P1, P2, P3, Q1, Q2, Q3, T1, T2, T3]
+        # stack out: [P1, P2, P3, Q1, Q2, Q3, w*Q1, w*Q2, w*Q3, (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
+        for step, take_modulo in zip(steps, take_modulos, strict=True):
+            # stack in:  [gradients, ..., P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f_i]
+            # stack out: [non-verified gradients, ..., P1, P2, P3, Q1, Q2, Q3, T1', T2', T3', f_(i+1)]
+            out.submit(self._triple_miller_loop_step, take_modulo=take_modulo, **step)
+
+        if not is_last_step:
+            # stack in:  [frobenius_gradients, ..., P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, f]
+            # stack out: [non-verified frobenius_gradients, ..., P1, P2, P3, Q1, Q2, Q3, T1', T2', T3', f']
+            # The Frobenius gradients on the stack, from the bottom: the second ones of every pair, then the first
+            # ones. Only the ones of the first pair are on the stack if the others are injected.
+            frobenius_gradients = [(i, j) for i in (1, 0) for j in range(3 if is_precomputed_gradients_on_stack else 1)]
+            above = gradient_tracker + 6 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE
+            for j in range(3):
+                if j == 0 or is_precomputed_gradients_on_stack:
+                    gradients = [
+                        StackFiniteFieldElement(
+                            above
+                            + (len(frobenius_gradients) - frobenius_gradients.index((i, j))) * self.extension_degree
+                            - 1,
+                            False,
+                            self.extension_degree,
+                        )
+                        for i in range(2)
+                    ]
+                    if verify_gradients[j]:
+                        frobenius_gradients = [gradient for gradient in frobenius_gradients if gradient[1] != j]
                 else:
-                    # update gradient_tracker taking into account the gradients left on the stack.
-                    # If the second and third gradients are injected in the locking script
-                    # (i.e. is_precomputed_gradients_on_stack is False), there is no need to verify them.
-                    gradient_tracker += sum(
-                        self.extension_degree if not gradient else 0 for gradient in [verify_gradients[0], True, True]
-                    )
-            else:
-                # stack in:  [gradient_(2* T1 ± Q1), gradient_(2* T2 ± Q2), gradient_(2* T3 ± Q3), gradient_(2*T1),
-                #               gradient_(2*T2), gradient_(2*T3), ..., P1, P2, P3, Q1, Q2, Q3, T1, T2, T3, {f_i^2}]
-                # stack out: [non-verified gradients, P1, P2, P3, Q1, Q2, Q3, (2*T1 ± Q1), (2*T2 ± Q2), (2*T3 ± Q3),
-                #               {f_i^2}*(ev_(l_(T1,T1))(P1)*ev_(l_(T2,T2))(P2)) *(ev_(l_(T3,T3))(P3)*ev_(l_(2*T1,± Q1))(P1)) * (ev_(l_(2*T2,± Q2))(P2)*ev_(l_(2*T3,± Q3))(P3))]  # noqa: E501
-                out += self.__one_step_with_addition(
-                    loop_i=loop_i,
-                    take_modulo=[take_modulo_miller_loop_output, take_modulo_point_multiplication],
-                    positive_modulo=positive_modulo_i,
-                    verify_gradients=verify_gradients,
-                    clean_constant=clean_constant_i,
-                    gradients_doubling=[gradient.shift(gradient_tracker) for gradient in gradients_doubling],
-                    gradients_addition=[gradient.shift(gradient_tracker) for gradient in gradients_addition],
-                    P=P,
-                    Q=Q,
-                    T=T,
-                    is_precomputed_gradients_on_stack=is_precomputed_gradients_on_stack,
-                    precomputed_gradients=precomputed_gradient,
+                    gradients = precomputed_gradients[j - 1][len(self.exp_miller_loop) - 1]
+                out += self._frobenius_step(
+                    positive_modulo=positive_modulo if j == len(P) - 1 else False,
+                    verify_gradient=verify_gradients[j],
+                    clean_constant=clean_constant if j == len(P) - 1 else False,
+                    gradients=gradients,
+                    P=P[j],
+                    Q=Q[j],
+                    T=T[0],
                 )
-                if is_precomputed_gradients_on_stack:
-                    # update gradient_tracker taking into account the gradients left on the stack
-                    gradient_tracker += 2 * sum(
-                        self.extension_degree if not verify_gradient else 0 for verify_gradient in verify_gradients
-                    )
-                else:
-                    # update gradient_tracker taking into account the gradients left on the stack.
-                    # If the second and third gradients are injected in the locking script
-                    # (i.e. is_precomputed_gradients_on_stack is False), there is no need to verify them.
-                    gradient_tracker += 2 * sum(
-                        self.extension_degree if not gradient else 0 for gradient in [verify_gradients[0], True, True]
-                    )
 
         # stack in:  [P1, P2, P3, Q1, Q2, Q3, w*Q1, w*Q2, w*Q3, (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
         # stack out: [(miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3))]
@@ -1435,4 +2064,4 @@ class TripleMillerLoop:
         )
         out += Script.parse_string(" ".join(["OP_DROP"] * (6 * self.N_POINTS_TWIST + 3 * self.N_POINTS_CURVE)))
 
-        return optimise_script(out)
+        return optimise_script(out.to_script()) if optimise else out.to_script()
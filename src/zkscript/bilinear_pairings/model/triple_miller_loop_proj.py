@@ -7,6 +7,8 @@ from src.zkscript.script_types.stack_elements import (
     StackEllipticCurvePointProjective,
     StackFiniteFieldElement,
 )
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import boolean_list_to_bitmask, optimise_script
 from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
 
@@ -14,6 +16,8 @@ from src.zkscript.util.utility_scripts import pick, roll, verify_bottom_constant
 class TripleMillerLoopProj:
     """Triple Miller loop in projective coordinates."""
 
+    @profile_script
+    @check_stack_effect
     def __one_step_without_addition_proj(
         self,
         loop_i: int,
@@ -171,6 +175,8 @@ class TripleMillerLoopProj:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def __one_step_with_addition_proj(
         self,
         loop_i: int,
@@ -337,12 +343,15 @@ class TripleMillerLoopProj:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def triple_miller_loop_proj(
         self,
         modulo_threshold: int,
         positive_modulo: bool = True,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
     ) -> Script:
         """Evaluation of the product of three Miller loops.
 
@@ -360,6 +369,9 @@ class TripleMillerLoopProj:
             positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
 
         Returns:
             Script to evaluate the product of three Miller loops.
@@ -472,6 +484,11 @@ class TripleMillerLoopProj:
                     T=T,
                 )
 
+        if self.frobenius_twisted_curve is not None:
+            # stack in:  [P1, P2, P3, Q1, Q2, Q3, w*Q1, w*Q2, w*Q3, f]
+            # stack out: [P1, P2, P3, Q1, Q2, Q3, {wQ1, wQ2, wQ3}, f], where wQj = w*Qj + pi(Qj) - pi^2(Qj)
+            out += self._hybrid_frobenius_step(affine_steps=[0] * 3, precomputed_gradients=[None] * 3)
+
         # num = numerator of (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)) in F_q^{k/d}
         # denom = denominator of (miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)) in F_q
         # stack in:  [P1, P2, P3, Q1, Q2, Q3, w*Q1, w*Q2, w*Q3, num, denom]
@@ -485,6 +502,7 @@ class TripleMillerLoopProj:
             is_constant_reused=False,
             rolling_option=1,
             mod_frequency=modulo_threshold // (self.modulus.bit_length() * 3 + 3),
+            modulo_threshold=modulo_threshold,
         )
         out += self.scalar_multiplication_fq(
             take_modulo=True,
@@ -503,4 +521,4 @@ class TripleMillerLoopProj:
             out += roll(position=self.N_ELEMENTS_MILLER_OUTPUT, n_elements=1)
             out += Script.parse_string("OP_DROP")
 
-        return optimise_script(out)
+        return optimise_script(out) if optimise else out
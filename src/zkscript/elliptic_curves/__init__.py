@@ -7,6 +7,8 @@ Modules:
     - ec_operations_fq2: Contains the EllipticCurveFq2 class for elliptic curve arithmetic over F_q^2.
     - ec_operations_fq_unrolled: Contains the EllipticCurveFqUnrolled class for elliptic curve arithmetic over F_q
     with unrolled multiplication.
+    - util: Contains the Python elliptic curve arithmetic used to compute the constants and the gradients of the
+    scripts.
 
 Usage example:
     >>> from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
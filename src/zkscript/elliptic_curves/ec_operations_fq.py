@@ -1,10 +1,21 @@
 """Bitcoin scripts that perform arithmetic operations over the elliptic curve E(F_q)."""
 
+from functools import partial
 from math import ceil, log2
 
 from tx_engine import Script
 
+from src.zkscript.elliptic_curves.util import (
+    glv_bases,
+    glv_max_multipliers,
+    interleaved_rows,
+    interleaved_table,
+    point_addition,
+)
 from src.zkscript.script_types.stack_elements import StackEllipticCurvePoint, StackFiniteFieldElement, StackNumber
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, boolean_list_to_bitmask, check_order
 from src.zkscript.util.utility_scripts import (
     bool_to_moving_function,
@@ -1048,6 +1059,8 @@ class EllipticCurveFq:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def unrolled_multiplication(
         self,
         max_multiplier: int,
@@ -1101,87 +1114,21 @@ class EllipticCurveFq:
         # stack out: [marker_a_is_zero, [lambdas,a], P, T]
         out += Script.parse_string("OP_2DUP")
 
-        size_q = ceil(log2(self.modulus))
-        current_size = size_q
-
         # Compute aP
         # stack in:  [marker_a_is_zero, [lambdas, a], P, T]
         # stack out: [marker_a_s_zero, P, aP]
-        for i in range(int(log2(max_multiplier)) - 1, -1, -1):
-            # This is an approximation, but I'm quite sure it works.
-            # We always have to take into account both operations
-            # because we don't know which ones are going to be executed.
-            size_after_operations = 2 * 4 * current_size
-            positive_modulo_i = False
-
-            if size_after_operations > modulo_threshold or i == 0:
-                take_modulo = True
-                current_size = size_q
-                positive_modulo_i = positive_modulo and i == 0
-            else:
-                take_modulo = False
-                current_size = size_after_operations
-
-            # Roll marker to decide whether to execute the loop and the auxiliary data
-            # stack in:  [auxiliary_data, marker_doubling, P, T]
-            # stack out: [auxiliary_data, P, T, marker_doubling]
-            out += roll(position=4, n_elements=1)
-
-            # stack in:  [auxiliary_data, P, T, marker_doubling]
-            # stack out: [P, T] if marker_doubling = 0, else [P, 2T]
-            out += Script.parse_string("OP_IF")  # Check marker for executing iteration
-            out += self.point_algebraic_doubling(
-                take_modulo=take_modulo,
-                check_constant=False,
-                clean_constant=False,
-                verify_gradient=True,
-                positive_modulo=positive_modulo_i,
-                gradient=StackFiniteFieldElement(4, False, 1),
-                P=StackEllipticCurvePoint(
-                    StackFiniteFieldElement(1, False, 1),
-                    StackFiniteFieldElement(0, False, 1),
-                ),
-                rolling_option=boolean_list_to_bitmask([True, True]),
-            )  # Compute 2T
-
-            # Roll marker for addition and auxiliary data addition
-            # stack in:  [auxiliary_data_addition, marker_addition, P, 2T]
-            # stack out: [auxiliary_data_addition, P, 2T, marker_addition]
-            out += roll(position=4, n_elements=1)
-
-            # Check marker for +P and compute 2T + P if marker is 1
-            # stack in:  [auxiliary_data_addition, P, 2T, marker_addition]
-            # stack out: [P, 2T, if marker_addition = 0, else P, (2T+P)]
-            out += Script.parse_string("OP_IF")
-            out += self.point_algebraic_addition(
+        n_steps = int(log2(max_multiplier))
+        take_modulos = (
+            self.__planned_take_modulos(n_steps, modulo_threshold, positive_modulo, fixed_length_unlock)
+            if modulo_planner.is_enabled
+            else self.__estimated_take_modulos(n_steps, modulo_threshold)
+        )
+        for i, take_modulo in zip(range(n_steps - 1, -1, -1), take_modulos, strict=True):
+            out += self._unrolled_multiplication_step(
                 take_modulo=take_modulo,
-                check_constant=False,
-                clean_constant=False,
-                verify_gradient=True,
-                positive_modulo=positive_modulo_i,
-                gradient=StackFiniteFieldElement(4, False, 1),
-                P=StackEllipticCurvePoint(
-                    StackFiniteFieldElement(3, False, 1),
-                    StackFiniteFieldElement(2, False, 1),
-                ),
-                Q=StackEllipticCurvePoint(
-                    StackFiniteFieldElement(1, False, 1),
-                    StackFiniteFieldElement(0, False, 1),
-                ),
-                rolling_option=boolean_list_to_bitmask([not fixed_length_unlock, False, True]),
-            )  # Compute 2T + P
-
-            # Conclude the conditional branches and clear auxiliary data
-            if fixed_length_unlock:
-                out += (
-                    Script.parse_string("OP_ENDIF OP_ELSE")
-                    + roll(position=5, n_elements=2)  # delete the gradients
-                    + Script.parse_string("OP_2DROP OP_ENDIF")
-                )
-                # drop marker_addition
-                out += roll(position=4, n_elements=1) + Script.parse_string("OP_DROP")
-            else:
-                out += Script.parse_string("OP_ENDIF OP_ENDIF")
+                positive_modulo=positive_modulo and i == 0,
+                fixed_length_unlock=fixed_length_unlock,
+            )
 
         # Check if a == 0
         # stack in:  [marker_a_is_zero, P, aP]
@@ -1196,6 +1143,160 @@ class EllipticCurveFq:
 
         return out
 
+    def _unrolled_multiplication_step(
+        self, take_modulo: bool, positive_modulo: bool, fixed_length_unlock: bool
+    ) -> Script:
+        """Generate the script of a step of `unrolled_multiplication`.
+
+        Stack input:
+            - stack:    [q, ..., auxiliary_data, marker_doubling, P, T], `auxiliary_data` are the gradients and the
+                markers of the step, `P` and `T` are points on E(F_q)
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., P, T'], `T' = T` if `marker_doubling` is `0`, else `T' = 2T` or `T' = 2T + P`
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the coordinates of `T'` are reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive.
+            fixed_length_unlock (bool): If `True`, the unlocking script is expected to be padded to a fixed length.
+
+        Returns:
+            Script to perform a step of the double-and-add scalar multiplication.
+        """
+        out = Script()
+        # Roll marker to decide whether to execute the loop and the auxiliary data
+        # stack in:  [auxiliary_data, marker_doubling, P, T]
+        # stack out: [auxiliary_data, P, T, marker_doubling]
+        out += roll(position=4, n_elements=1)
+
+        # stack in:  [auxiliary_data, P, T, marker_doubling]
+        # stack out: [P, T] if marker_doubling = 0, else [P, 2T]
+        out += Script.parse_string("OP_IF")  # Check marker for executing iteration
+        out += self.point_algebraic_doubling(
+            take_modulo=take_modulo,
+            check_constant=False,
+            clean_constant=False,
+            verify_gradient=True,
+            positive_modulo=positive_modulo,
+            gradient=StackFiniteFieldElement(4, False, 1),
+            P=StackEllipticCurvePoint(
+                StackFiniteFieldElement(1, False, 1),
+                StackFiniteFieldElement(0, False, 1),
+            ),
+            rolling_option=boolean_list_to_bitmask([True, True]),
+        )  # Compute 2T
+
+        # Roll marker for addition and auxiliary data addition
+        # stack in:  [auxiliary_data_addition, marker_addition, P, 2T]
+        # stack out: [auxiliary_data_addition, P, 2T, marker_addition]
+        out += roll(position=4, n_elements=1)
+
+        # Check marker for +P and compute 2T + P if marker is 1
+        # stack in:  [auxiliary_data_addition, P, 2T, marker_addition]
+        # stack out: [P, 2T, if marker_addition = 0, else P, (2T+P)]
+        out += Script.parse_string("OP_IF")
+        out += self.point_algebraic_addition(
+            take_modulo=take_modulo,
+            check_constant=False,
+            clean_constant=False,
+            verify_gradient=True,
+            positive_modulo=positive_modulo,
+            gradient=StackFiniteFieldElement(4, False, 1),
+            P=StackEllipticCurvePoint(
+                StackFiniteFieldElement(3, False, 1),
+                StackFiniteFieldElement(2, False, 1),
+            ),
+            Q=StackEllipticCurvePoint(
+                StackFiniteFieldElement(1, False, 1),
+                StackFiniteFieldElement(0, False, 1),
+            ),
+            rolling_option=boolean_list_to_bitmask([not fixed_length_unlock, False, True]),
+        )  # Compute 2T + P
+
+        # Conclude the conditional branches and clear auxiliary data
+        if fixed_length_unlock:
+            out += (
+                Script.parse_string("OP_ENDIF OP_ELSE")
+                + roll(position=5, n_elements=2)  # delete the gradients
+                + Script.parse_string("OP_2DROP OP_ENDIF")
+            )
+            # drop marker_addition
+            out += roll(position=4, n_elements=1) + Script.parse_string("OP_DROP")
+        else:
+            out += Script.parse_string("OP_ENDIF OP_ENDIF")
+
+        return out
+
+    def __estimated_take_modulos(self, n_steps: int, modulo_threshold: int) -> list[bool]:
+        """Return the `take_modulo` arguments of the steps of `unrolled_multiplication`, from the size estimates.
+
+        We always have to take into account both operations because we don't know which ones are going to be executed.
+        """
+        size_q = ceil(log2(self.modulus))
+        current_size = size_q
+
+        take_modulos = []
+        for i in range(n_steps - 1, -1, -1):
+            # This is an approximation, but I'm quite sure it works.
+            size_after_operations = 2 * 4 * current_size
+            if size_after_operations > modulo_threshold or i == 0:
+                take_modulos.append(True)
+                current_size = size_q
+            else:
+                take_modulos.append(False)
+                current_size = size_after_operations
+        return take_modulos
+
+    def __planned_take_modulos(
+        self, n_steps: int, modulo_threshold: int, positive_modulo: bool, fixed_length_unlock: bool
+    ) -> list[bool]:
+        """Return the `take_modulo` arguments of the steps of `unrolled_multiplication`, from `modulo_planner`.
+
+        The steps carry the point `T`. Both the doubling and the addition are assumed to be executed.
+        """
+        steps = [
+            ReductionStep(
+                key=(
+                    "EllipticCurveFq.unrolled_multiplication",
+                    self.modulus,
+                    i == 0,
+                    positive_modulo and i == 0,
+                    fixed_length_unlock,
+                ),
+                options=((True,),) if i == 0 else ((True,), (False,)),
+                generate=partial(
+                    self.__generate_step,
+                    positive_modulo=positive_modulo and i == 0,
+                    fixed_length_unlock=fixed_length_unlock,
+                ),
+                n_carried=2,
+            )
+            for i in range(n_steps - 1, -1, -1)
+        ]
+        plan = modulo_planner.plan(
+            steps,
+            modulus_bits=self.modulus.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=2,
+            key=(
+                "EllipticCurveFq.unrolled_multiplication",
+                self.modulus,
+                n_steps,
+                positive_modulo,
+                fixed_length_unlock,
+            ),
+        )
+        return [take_modulo for (take_modulo,) in plan]
+
+    def __generate_step(self, take_modulo: tuple[bool], positive_modulo: bool, fixed_length_unlock: bool) -> Script:
+        return self._unrolled_multiplication_step(
+            take_modulo=take_modulo[0], positive_modulo=positive_modulo, fixed_length_unlock=fixed_length_unlock
+        )
+
+    @profile_script
+    @check_stack_effect
     def msm_with_fixed_bases(
         self,
         bases: list[list[int]],
@@ -1280,3 +1381,186 @@ class EllipticCurveFq:
         )
 
         return out
+
+    @profile_script
+    @check_stack_effect
+    def interleaved_msm_with_fixed_bases(
+        self,
+        bases: list[list[int]],
+        max_multipliers: list[int],
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        positive_modulo: bool = True,
+        window: int = 4,
+        glv: tuple[int, int] | None = None,
+    ) -> Script:
+        r"""Interleaved multi-scalar multiplication script in E(F_q) with fixed bases.
+
+        This function returns the script that computes the multi-scalar multiplication
+            ((a_1, .., a_n), (P_1, .., P_n)) --> \sum_(i=1)^n a_i P_i
+        with a single double-and-add loop for all the scalars (Straus-Shamir trick). The bases are split in groups
+        of `window` consecutive bases, and the script hard-codes the sums of the bases in every subset of every
+        group. At the step processing the j-th bit of the scalars, the point `T` accumulating the result is doubled,
+        and, for every group, the sum of the bases whose scalar has the j-th bit set is added to `T`. The sum is
+        selected by a number `s` supplied in the unlocking script, whose b-th bit is the j-th bit of the scalar of
+        the b-th base of the group.
+
+        Stack input:
+            - stack:    [q, ..., gradient_offset, data(step_(N-1)), .., data(step_0)]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., a_1 * P_1 + .. + a_n * P_n]
+            - altstack: []
+
+        Above, `data(step_j)` is the data required by the step processing the bits of weight `2^(N-1-j)`:
+            [.., gradient_(g_1), s_(g_1), gradient_(g_0), s_(g_0), gradient_doubling]
+        where `gradient_doubling` is the gradient of the doubling of `T` (only for `j > 0`), `g_0, g_1, ..` are the
+        groups that take part in the step (see `interleaved_rows`), and `s_g` and `gradient_g` are the selector of
+        the sum of bases of the g-th group and the gradient of its addition to `T` (`OP_0` if `s_g = 0`).
+        `gradient_offset` is the gradient required to remove the offset of `T` (see below) with
+        `point_addition_with_unknown_points`. See `InterleavedMsmWithFixedBasesUnlockingKey`.
+
+        Args:
+            bases (list[list[int]]): The bases of the multi scalar multiplication, passed as a list of coordinates.
+                `bases[i]` is `bases[i] = [x, y]` the list of the coordinates of P_i.
+            max_multipliers (list[int]): `max_multipliers[i]` is the maximum value allowed for `a_i`.
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            window (int): The maximum number of bases in a group. The script hard-codes `2^window - 1` points per
+                group. Defaults to `4`.
+            glv (tuple[int, int] | None): If not `None`, the pair `(beta, lambda)` such that the endomorphism
+                `phi(x, y) = (beta * x, y)` is the multiplication by `lambda` on the subgroup of the bases. The
+                script then computes the msm of the bases `[P_1, phi(P_1), .., P_n, phi(P_n)]` with the scalars
+                `[k_1, k'_1, .., k_n, k'_n]` such that `a_i = k_i + lambda * k'_i` (see `glv_scalars`), which are
+                about half as long as `a_i` if `lambda` is about the square root of the order of the bases.
+                Defaults to `None`.
+
+        Returns:
+            A Bitcoin script that computes a multi scalar multiplication with fixed bases.
+
+        Raises:
+            ValueError: If `bases` and `max_multipliers` have different lengths, if `window` is smaller than `1`,
+                or if the sum of a subset of a group of bases is the point at infinity.
+
+        Preconditions:
+            There is no linear relation with small coefficients between the bases (e.g., they are independent
+            points of a group of large prime order).
+
+        Notes:
+            To never handle the point at infinity in the loop, `T` starts from the offset `2 * P_1` instead of the
+            point at infinity, and the offset `2^N * P_1` is subtracted at the end. The gradient of the addition of
+            `table_g[s]` to `T` is only verified if `T != table_g[s]`, and the data can steer `T` onto a point of
+            the table (e.g., with `glv`, as `phi(P_i) = lambda * P_i`). Hence, the script checks that the
+            x-coordinates of `T` and `table_g[s]` differ modulo `q`, so that `T` is never equal to `table_g[s]` or
+            `-table_g[s]`. The operations executed depend on the scalars, so the coordinates of `T` are reduced
+            modulo `q` after every operation.
+            With `glv`, the script computes `(k_i + lambda * k'_i) P_i` for any `k_i, k'_i` in the data, so the
+            decomposition is sound without further checks, and the scalars `a_i = k_i + lambda * k'_i` are recomposed
+            when they are extracted (see `InterleavedMsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned`).
+        """
+        if len(bases) != len(max_multipliers):
+            msg = f"The number of bases ({len(bases)}) and of max multipliers ({len(max_multipliers)}) differ"
+            raise ValueError(msg)
+        if glv is not None:
+            bases = glv_bases(bases, glv, self.modulus)
+            max_multipliers = glv_max_multipliers(max_multipliers, glv)
+        table = interleaved_table(bases, window, self.modulus, self.curve_a)
+        rows = interleaved_rows(max_multipliers, window)
+        offset = point_addition(bases[0], bases[0], self.modulus, self.curve_a)
+
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # Load the sums of the bases and T = offset
+        # stack out: [.., data, table, T]
+        n_sums = 0
+        first_sums = []
+        for sums in table:
+            first_sums.append(n_sums)
+            n_sums += len(sums)
+            for point in sums:
+                out += nums_to_script(point)
+        out += nums_to_script(offset)
+
+        # The data of the steps is below the table and T
+        data = 2 * n_sums + 2
+        for j, groups in enumerate(rows):
+            if j > 0:
+                out += self.point_algebraic_doubling(
+                    take_modulo=True,
+                    check_constant=False,
+                    clean_constant=False,
+                    verify_gradient=True,
+                    positive_modulo=False,
+                    gradient=StackFiniteFieldElement(data, False, 1),
+                    rolling_option=boolean_list_to_bitmask([True, True]),
+                )
+            for g in groups:
+                out += self.__interleaved_addition(data, 4 + 2 * (n_sums - first_sums[g]), len(table[g]))
+
+        # Remove the table
+        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script.parse_string(" ".join(["OP_2DROP"] * n_sums))
+        out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+
+        # Remove the offset, which was doubled at every step but the first one
+        for _ in range(len(rows) - 1):
+            offset = point_addition(offset, offset, self.modulus, self.curve_a)
+        out += nums_to_script([offset[0], -offset[1] % self.modulus])
+        out += self.point_addition_with_unknown_points(
+            take_modulo=take_modulo,
+            positive_modulo=positive_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+        )
+
+        return out
+
+    def __interleaved_addition(self, data: int, table_end: int, n_sums: int) -> Script:
+        """Add the sum selected for a group to `T` in a step of `interleaved_msm_with_fixed_bases`.
+
+        Stack input:
+            - stack:    [q, ..., gradient, s, .., table, T], `s` is at position `data`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., .., table, T + table_g[s]], where `table_g[0]` is the point at infinity
+            - altstack: []
+
+        Args:
+            data (int): The position of `s`.
+            table_end (int): The number such that `table_end - 2s` is the position of the x-coordinate of
+                `table_g[s]` once `T` and this position are on the stack.
+            n_sums (int): The number of sums in the group.
+        """
+        # stack out: [.., gradient, .., table, T, s]
+        out = roll(position=data, n_elements=1)
+        # Check that 0 <= s <= n_sums, so that only the sums of the group can be picked
+        out += Script.parse_string("OP_DUP OP_0") + nums_to_script([n_sums + 1])
+        out += Script.parse_string("OP_WITHIN OP_VERIFY")
+
+        out += Script.parse_string("OP_IFDUP OP_IF")
+        # Pick table_g[s]
+        # stack out: [.., gradient, .., table, T, table_g[s]]
+        out += Script.parse_string("OP_DUP OP_ADD") + nums_to_script([table_end])
+        out += Script.parse_string("OP_SWAP OP_SUB OP_DUP OP_PICK OP_SWAP OP_1SUB OP_PICK")
+        # Check that x_T != x(table_g[s]) mod q, otherwise the gradient is not verified if T = table_g[s]
+        out += Script.parse_string("OP_OVER") + pick(position=4, n_elements=1)
+        out += Script.parse_string("OP_SUB OP_DEPTH OP_1SUB OP_PICK OP_MOD OP_0NOTEQUAL OP_VERIFY")
+        out += self.point_algebraic_addition(
+            take_modulo=True,
+            check_constant=False,
+            clean_constant=False,
+            verify_gradient=True,
+            positive_modulo=False,
+            gradient=StackFiniteFieldElement(data + 2, False, 1),
+            rolling_option=boolean_list_to_bitmask([True, True, True]),
+        )
+        out += Script.parse_string("OP_ELSE")
+        # s = 0: drop the placeholder of the gradient
+        out += roll(position=data, n_elements=1) + Script.parse_string("OP_DROP")
+        out += Script.parse_string("OP_ENDIF")
+        return out
@@ -4,6 +4,9 @@ from tx_engine import Script
 
 from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.script_types.stack_elements import StackEllipticCurvePoint, StackFiniteFieldElement
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, check_order
 from src.zkscript.util.utility_scripts import (
     bool_to_moving_function,
@@ -37,6 +40,9 @@ class EllipticCurveFq2:
         self.curve_a = curve_a
         self.fq2 = fq2
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def point_algebraic_addition(
         self,
         take_modulo: bool,
@@ -134,6 +140,9 @@ class EllipticCurveFq2:
             )
         )
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def point_algebraic_doubling(
         self,
         take_modulo: bool,
@@ -7,6 +7,8 @@ from src.zkscript.script_types.stack_elements import (
     StackEllipticCurvePointProjective,
     StackFiniteFieldElement,
 )
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, check_order
 from src.zkscript.util.utility_scripts import (
     bool_to_moving_function,
@@ -43,6 +45,8 @@ class EllipticCurveFq2Projective:
         self.curve_a = curve_a
         self.FQ2 = fq2
 
+    @profile_script
+    @check_stack_effect
     def point_algebraic_doubling(
         self,
         take_modulo: bool,
@@ -304,6 +308,8 @@ class EllipticCurveFq2Projective:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def point_algebraic_mixed_addition(
         self,
         take_modulo: bool,
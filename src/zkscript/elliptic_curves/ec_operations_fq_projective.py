@@ -10,6 +10,8 @@ from src.zkscript.script_types.stack_elements import (
     StackFiniteFieldElement,
     StackNumber,
 )
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, boolean_list_to_bitmask, check_order
 from src.zkscript.util.utility_scripts import (
     bool_to_moving_function,
@@ -378,6 +380,8 @@ class EllipticCurveFqProjective:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def unrolled_multiplication(
         self,
         max_multiplier: int,
@@ -731,6 +735,8 @@ class EllipticCurveFqProjective:
 
         return out
 
+    @profile_script
+    @check_stack_effect
     def msm_with_fixed_bases(
         self,
         bases: list[list[int]],
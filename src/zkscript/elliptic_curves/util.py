@@ -0,0 +1,178 @@
+"""Utility functions evaluating elliptic curve arithmetic over F_q in Python.
+
+They compute the constants hard-coded in the locking scripts (e.g., the sums of fixed bases) and the gradients
+supplied in the unlocking scripts. Points are lists `[x, y]` of integers modulo `q`, and the point at infinity is
+`None`.
+"""
+
+
+def gradient(P: list[int], Q: list[int], modulus: int, curve_a: int) -> int:  # noqa: N803
+    """Return the gradient of the line through `P` and `Q`, or of the line tangent at `P` if `P == Q`.
+
+    Args:
+        P (list[int]): A point on the curve, not the point at infinity.
+        Q (list[int]): A point on the curve, not the point at infinity.
+        modulus (int): The characteristic of the field F_q.
+        curve_a (int): The `a` coefficient in the Short-Weierstrass equation of the curve.
+
+    Raises:
+        ValueError: If `P == -Q`, as the line through `P` and `Q` is vertical.
+    """
+    if P[0] % modulus == Q[0] % modulus:
+        if (P[1] + Q[1]) % modulus == 0:
+            msg = "The line through P and -P is vertical"
+            raise ValueError(msg)
+        return (3 * P[0] * P[0] + curve_a) * pow(2 * P[1], -1, modulus) % modulus
+    return (Q[1] - P[1]) * pow(Q[0] - P[0], -1, modulus) % modulus
+
+
+def point_addition(P: list[int] | None, Q: list[int] | None, modulus: int, curve_a: int) -> list[int] | None:  # noqa: N803
+    """Return `P + Q`, handling the point at infinity.
+
+    Args:
+        P (list[int] | None): A point on the curve.
+        Q (list[int] | None): A point on the curve.
+        modulus (int): The characteristic of the field F_q.
+        curve_a (int): The `a` coefficient in the Short-Weierstrass equation of the curve.
+    """
+    if P is None:
+        return Q
+    if Q is None:
+        return P
+    if P[0] % modulus == Q[0] % modulus and (P[1] + Q[1]) % modulus == 0:
+        return None
+    lam = gradient(P, Q, modulus, curve_a)
+    x = (lam * lam - P[0] - Q[0]) % modulus
+    return [x, (lam * (P[0] - x) - P[1]) % modulus]
+
+
+def scalar_multiplication(scalar: int, P: list[int] | None, modulus: int, curve_a: int) -> list[int] | None:  # noqa: N803
+    """Return `scalar * P` for a non-negative `scalar`, with double-and-add.
+
+    Args:
+        scalar (int): The non-negative scalar.
+        P (list[int] | None): A point on the curve.
+        modulus (int): The characteristic of the field F_q.
+        curve_a (int): The `a` coefficient in the Short-Weierstrass equation of the curve.
+    """
+    out = None
+    for bit in f"{scalar:b}":
+        out = point_addition(out, out, modulus, curve_a)
+        if bit == "1":
+            out = point_addition(out, P, modulus, curve_a)
+    return out
+
+
+def to_affine(P: list[int], modulus: int) -> list[int] | None:  # noqa: N803
+    """Return the affine coordinates of `P`, given in affine `[x, y]` or projective `[x, y, z]` coordinates."""
+    if len(P) == 2:  # noqa: PLR2004
+        return P
+    if P[2] % modulus == 0:
+        return None
+    z_inverse = pow(P[2], -1, modulus)
+    return [P[0] * z_inverse % modulus, P[1] * z_inverse % modulus]
+
+
+def interleaved_groups(n_bases: int, window: int) -> list[range]:
+    """Split the indices of `n_bases` bases into consecutive groups of at most `window` bases.
+
+    Raises:
+        ValueError: If `window` is smaller than `1`.
+    """
+    if window < 1:
+        msg = f"The window must be at least 1, got {window}"
+        raise ValueError(msg)
+    return [range(start, min(start + window, n_bases)) for start in range(0, n_bases, window)]
+
+
+def interleaved_rows(max_multipliers: list[int], window: int) -> list[list[int]]:
+    """Return the groups of bases that are added at every step of an interleaved multi-scalar multiplication.
+
+    The steps process the bits of the scalars from the most significant one. The groups are those of
+    `interleaved_groups`, and a group takes part in the steps of the bits that its largest scalar can have.
+
+    Args:
+        max_multipliers (list[int]): `max_multipliers[i]` is the maximum value of the i-th scalar.
+        window (int): The maximum number of bases in a group.
+
+    Returns:
+        The list of the indices of the groups taking part in every step, from the most significant bit.
+    """
+    n_bits = [
+        max(max_multipliers[i].bit_length() for i in group)
+        for group in interleaved_groups(len(max_multipliers), window)
+    ]
+    n_steps = max(n_bits)
+    return [[g for g, bits in enumerate(n_bits) if n_steps - 1 - j < bits] for j in range(n_steps)]
+
+
+def interleaved_table(bases: list[list[int]], window: int, modulus: int, curve_a: int) -> list[list[list[int]]]:
+    """Return the sums of the bases in every group of `interleaved_groups(len(bases), window)`.
+
+    Args:
+        bases (list[list[int]]): The bases of the multi-scalar multiplication.
+        window (int): The maximum number of bases in a group.
+        modulus (int): The characteristic of the field F_q.
+        curve_a (int): The `a` coefficient in the Short-Weierstrass equation of the curve.
+
+    Returns:
+        The list `table` such that `table[g][s-1]` is the sum of the bases `bases[group[b]]` for which the `b`-th bit
+        of `s` is set, where `group` is the g-th group, for `s = 1, .., 2^len(group) - 1`.
+
+    Raises:
+        ValueError: If one of the sums is the point at infinity.
+    """
+    table = []
+    for group in interleaved_groups(len(bases), window):
+        sums = []
+        for s in range(1, 1 << len(group)):
+            total = None
+            for b, i in enumerate(group):
+                if s >> b & 1:
+                    total = point_addition(total, bases[i], modulus, curve_a)
+            if total is None:
+                indices = [i for b, i in enumerate(group) if s >> b & 1]
+                msg = f"The sum of the bases {indices} is the point at infinity"
+                raise ValueError(msg)
+            sums.append(total)
+        table.append(sums)
+    return table
+
+
+def glv_bases(bases: list[list[int]], glv: tuple[int, int], modulus: int) -> list[list[int]]:
+    """Return the bases `[P_1, phi(P_1), .., P_n, phi(P_n)]` of a GLV multi-scalar multiplication.
+
+    Args:
+        bases (list[list[int]]): The bases `[P_1, .., P_n]`.
+        glv (tuple[int, int]): The pair `(beta, lambda)` such that the endomorphism `phi(x, y) = (beta * x, y)` is
+            the multiplication by `lambda` on the subgroup of the bases.
+        modulus (int): The characteristic of the field F_q.
+    """
+    beta, _ = glv
+    return [point for base in bases for point in (base, [base[0] * beta % modulus, base[1]])]
+
+
+def glv_scalars(scalars: list[int], glv: tuple[int, int]) -> list[int]:
+    """Return the scalars `[k_1, k'_1, .., k_n, k'_n]` such that `scalars[i] = k_i + lambda * k'_i`.
+
+    The decomposition is `k'_i, k_i = divmod(scalars[i], lambda)`, so `0 <= k_i < lambda`. If `lambda` is close to
+    the square root of the order of the bases (e.g., `lambda = u^2 - 1` on BLS12-381 G1), both scalars are about
+    half as long as `scalars[i]`.
+
+    Args:
+        scalars (list[int]): The non-negative scalars to decompose.
+        glv (tuple[int, int]): The pair `(beta, lambda)`, see `glv_bases`.
+    """
+    _, glv_lambda = glv
+    return [k for scalar in scalars for k in divmod(scalar, glv_lambda)[::-1]]
+
+
+def glv_max_multipliers(max_multipliers: list[int], glv: tuple[int, int]) -> list[int]:
+    """Return the maximum values of the scalars returned by `glv_scalars`.
+
+    Args:
+        max_multipliers (list[int]): `max_multipliers[i]` is the maximum value of `scalars[i]`.
+        glv (tuple[int, int]): The pair `(beta, lambda)`, see `glv_bases`.
+    """
+    _, glv_lambda = glv
+    return [k for multiplier in max_multipliers for k in (min(multiplier, glv_lambda - 1), multiplier // glv_lambda)]
@@ -1,15 +1,20 @@
 """Bitcoin scripts that perform arithmetic operations in F_q."""
 
+from functools import partial
+
 from tx_engine import Script
 
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.addition_chain import addition_chains
+from src.zkscript.util.exponent_recoding import sliding_window
+from src.zkscript.util.modulo_planner import ReductionStep, modulo_planner
+from src.zkscript.util.script_builder import ScriptBuilder
 from src.zkscript.util.utility_functions import check_order
 from src.zkscript.util.utility_scripts import (
     bitmask_to_boolean_list,
     bool_to_moving_function,
-    mod,
+    is_mod_equal_to,
     move,
-    pick,
     roll,
     verify_bottom_constant,
 )
@@ -63,16 +68,16 @@ class Fq:
         check_order([x, y])
         is_x_rolled, is_y_rolled = bitmask_to_boolean_list(rolling_option, 2)
 
-        out = verify_bottom_constant(self.MODULUS) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.MODULUS) if check_constant else None)
 
         out += move(y, bool_to_moving_function(is_y_rolled))  # Move y
         out += move(x.shift(1 - is_y_rolled), bool_to_moving_function(is_x_rolled))  # Move x
-        out += Script.parse_string("OP_ADD" if (x.negate == y.negate) else "OP_SUB")
-        out += Script.parse_string("OP_NEGATE" if y.negate else "")
+        out.append_opcodes("OP_ADD" if (x.negate == y.negate) else "OP_SUB")
+        out.append_opcodes("OP_NEGATE" if y.negate else "")
         if take_modulo:
-            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
-            out += mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
-        return out
+            out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
+            out.mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
+        return out.to_script()
 
     def inverse(
         self,
@@ -84,10 +89,23 @@ class Fq:
         x: StackFiniteFieldElement = StackFiniteFieldElement(0, False, 1),  # noqa: B008
         rolling_option: int = 1,
         mod_frequency: int = 1,
+        modulo_threshold: int | None = None,
+        x_inverse: StackFiniteFieldElement | None = None,
+        addition_chain: bool = False,
     ) -> Script:
         """Compute x^-1.
 
-        The script computes `x^(self.MODULUS - 2) = x^-1` (in Fq) if `x != 0` else `0`.
+        The script computes `x^(self.MODULUS - 2) = x^-1` (in Fq) if `x != 0` else `0`. If `x_inverse` is not
+        `None`, the inverse is supplied in the unlocking script instead, and the script only checks that
+        `x * x_inverse = 1 mod q`, so it fails if `x = 0`.
+
+        Stack input:
+            - stack:    [q, ..., x_inverse (if supplied), ..., x, ...]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., x^-1] or fail
+            - altstack: []
 
         Args:
             take_modulo (bool): If `True`, the result is reduced modulo `q`.
@@ -99,37 +117,201 @@ class Fq:
             x (StackFiniteFieldElement): The position in the stack of `x` and if `x` is negated.
             rolling_option (int): Bitmask deciding if `x` is removed from the stack. Defaults to `1` (remove).
             mod_frequency (int): Integer defining after how many operation it is required to take the modulo.
+            modulo_threshold (int | None): Bit-length threshold. If not `None` and `modulo_planner` is enabled, the
+                reductions are placed by `modulo_planner` so that the intermediate powers of `x` do not exceed it, and
+                `mod_frequency` is ignored. Defaults to `None`.
+            x_inverse (StackFiniteFieldElement | None): If not `None`, the position in the stack of the inverse of
+                `x` supplied in the unlocking script, which must be below `x`. It is always removed from the stack.
+                Defaults to `None`.
+            addition_chain (bool): If `True`, `x^(self.MODULUS - 2)` is computed with the shortest addition chain of
+                `self.MODULUS - 2` found by `addition_chains` (which precomputes some odd powers of `x`) instead of
+                square-and-multiply. The chain is chosen once per modulus, as the one giving the shortest script with
+                `mod_frequency=1` and the default reductions, and it is then used for every `mod_frequency` and
+                `modulo_threshold`. Defaults to `False`.
 
         Returns:
             The script that computes `x^-1` if `x != 0` else `0`.
         """
+        if x_inverse is not None:
+            return self.__supplied_inverse(
+                take_modulo=take_modulo,
+                positive_modulo=positive_modulo,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                is_constant_reused=is_constant_reused,
+                x=x,
+                x_inverse=x_inverse,
+                rolling_option=rolling_option,
+            )
+
         is_x_rolled = bitmask_to_boolean_list(rolling_option, 1)
-        bin_mod = [int(digit) for digit in bin(self.MODULUS - 2)[2:]]
 
-        out = verify_bottom_constant(self.MODULUS) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.MODULUS) if check_constant else None)
         out += move(x, bool_to_moving_function(is_x_rolled))
-        out += Script.parse_string("OP_NEGATE") if x.negate else Script()
+        if x.negate:
+            out.append_opcodes("OP_NEGATE")
 
         # inverse computations in Fq2 and Fq3 are trivial
         if self.MODULUS not in {2, 3}:
-            out += Script.parse_string("OP_DUP")
+            digits = self.inverse_chain() if addition_chain else sliding_window(self.MODULUS - 2, width=1)
+            self.__append_power(out, digits, mod_frequency, modulo_threshold)
+
+        if take_modulo:
+            out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
+            out.mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
+        return out.to_script()
+
+    def __supplied_inverse(
+        self,
+        take_modulo: bool,
+        positive_modulo: bool,
+        check_constant: bool | None,
+        clean_constant: bool | None,
+        is_constant_reused: bool | None,
+        x: StackFiniteFieldElement,
+        x_inverse: StackFiniteFieldElement,
+        rolling_option: int,
+    ) -> Script:
+        """Check the inverse `x_inverse` of `x` supplied in the unlocking script, see `inverse`."""
+        check_order([x_inverse, x])
+        is_x_rolled = bitmask_to_boolean_list(rolling_option, 1)
+
+        out = ScriptBuilder(verify_bottom_constant(self.MODULUS) if check_constant else None)
+
+        # stack out: [q, .., x_inverse, ±x]
+        out += move(x_inverse, roll)
+        out += move(x.shift(1), bool_to_moving_function(is_x_rolled))
+        if x.negate:
+            out.append_opcodes("OP_NEGATE")
+        if x_inverse.negate:
+            out.append_opcodes("OP_SWAP OP_NEGATE OP_SWAP")
+
+        # Check that x * x_inverse - 1 = 0 mod q
+        # stack out: [q, .., x_inverse]
+        out.append_opcodes("OP_OVER OP_MUL OP_1SUB")
+        out += is_mod_equal_to(clean_constant=False, target=0, is_verify=True, rolling_option=True)
+
+        if take_modulo:
+            out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
+            out.mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
+        return out.to_script()
+
+    def inverse_chain(self) -> list[int]:
+        """Return the digits of the addition chain of `self.MODULUS - 2` used by `inverse` with `addition_chain`.
+
+        The chain is the one among `addition_chain.candidate_chains(self.MODULUS - 2)` for which the script of
+        `inverse` with `mod_frequency=1` and the default reductions is the shortest, see `AdditionChains.shortest`.
+        """
+        return addition_chains.shortest("Fq.inverse", self.MODULUS - 2, size=self.__chain_size)
 
+    def __chain_size(self, digits: list[int]) -> int:
+        out = ScriptBuilder()
+        self.__append_power(out, digits, mod_frequency=1, modulo_threshold=None)
+        return len(out.to_bytes())
+
+    def __append_power(
+        self, out: ScriptBuilder, digits: list[int], mod_frequency: int, modulo_threshold: int | None
+    ) -> None:
+        """Append to `out` the exponentiation of the element at the top of the stack following the chain `digits`.
+
+        The odd powers `x, x^3, ..., x^(2m - 1)` up to the largest digit are precomputed (and reduced), the power of
+        `x` is updated for every digit as in `_append_inverse_step`, and the last multiplication consumes the
+        precomputed powers.
+
+        Stack input:
+            - stack:    [q, ..., x]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., x^e], where `e` is the exponent encoded by `digits`
+            - altstack: []
+
+        Args:
+            out (ScriptBuilder): The builder to which the script is appended.
+            digits (list[int]): The digits of the chain, from the least to the most significant. The least and the
+                most significant digits must be non-zero.
+            mod_frequency (int): See `inverse`.
+            modulo_threshold (int | None): See `inverse`.
+        """
+        assert digits[0] != 0, "The exponent must be odd."
+        n_powers = (max(digits) + 1) // 2
+
+        if n_powers > 1:
+            # stack out: [q, ..., x, x^3, ..., x^(2 * n_powers - 1)]
+            out.append_opcodes("OP_DUP OP_DUP OP_MUL")
+            for _ in range(n_powers - 1):
+                out.append_opcodes("OP_2DUP OP_MUL")
+                out.pick(position=-1, n_elements=1)
+                out.mod(stack_preparation="", is_positive=False, is_constant_reused=False)
+                out.append_opcodes("OP_SWAP")
+            out.append_opcodes("OP_DROP")
+
+        # The position of x^digit below the power of x at the top of the stack
+        depths = [0 if digit == 0 else n_powers - (digit - 1) // 2 for digit in digits]
+
+        # stack out: [q, ..., x, ..., x^(2 * n_powers - 1), x^(digits[-1])]
+        out.pick(position=depths[-1] - 1, n_elements=1)
+
+        if modulo_threshold is not None and modulo_planner.is_enabled:
+            for depth, (reduce,) in zip(
+                depths[-2:0:-1], self.__planned_reductions(depths[-2:0:-1], modulo_threshold), strict=True
+            ):
+                _append_inverse_step(out, depth, reduce)
+        else:
             mul_tracker = 0
-            for digit in bin_mod[1:-1]:
-                if digit == 0:
-                    out += Script.parse_string("OP_DUP OP_MUL")
-                    mul_tracker += 1
-                else:
-                    out += Script.parse_string("OP_DUP OP_MUL OP_OVER OP_MUL")
-                    mul_tracker += 2
+            for depth in depths[-2:0:-1]:
+                mul_tracker += 1 if depth == 0 else 2
+                _append_inverse_step(out, depth, mul_tracker >= mod_frequency)
                 if mul_tracker >= mod_frequency:
-                    out += pick(position=-1, n_elements=1)
-                    out += mod(stack_preparation="", is_positive=False, is_constant_reused=False)
                     mul_tracker = 0
 
-            out += Script.parse_string("OP_DUP OP_MUL OP_MUL")
+        # stack out: [q, ..., x^e]
+        out.append_opcodes("OP_DUP OP_MUL")
+        if depths[0] > 1:
+            out.roll(position=depths[0], n_elements=1)
+        out.append_opcodes("OP_MUL" + " OP_NIP" * (n_powers - 1))
 
-        if take_modulo:
-            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
-            out += mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
-        return out
+    def __planned_reductions(self, depths: list[int], modulo_threshold: int) -> list[tuple[bool]]:
+        """Return whether to reduce the power of `x` after each step of the chain in `inverse`."""
+        steps = [
+            ReductionStep(
+                key=("Fq.inverse", depth),
+                options=((True,), (False,)),
+                generate=partial(_planned_inverse_step, depth),
+                n_carried=1,
+            )
+            for depth in depths
+        ]
+        return modulo_planner.plan(
+            steps,
+            modulus_bits=self.MODULUS.bit_length(),
+            modulo_threshold=modulo_threshold,
+            n_inputs=1,
+            key=("Fq.inverse", self.MODULUS, tuple(depths)),
+        )
+
+
+def _append_inverse_step(out: ScriptBuilder, depth: int, reduce: bool):
+    """Append to `out` the squaring of the power of `x` at the top of the stack, times `x^d` if `depth > 0`.
+
+    Stack input:
+        - stack:    [q, ..., x^d, ..., x^e], where `x^d` is at position `depth` below `x^e`
+        - altstack: []
+
+    Stack output:
+        - stack:    [q, ..., x^d, ..., x^(2e + d)] (or `x^(2e)` if `depth = 0`)
+        - altstack: []
+    """
+    out.append_opcodes("OP_DUP OP_MUL")
+    if depth > 0:
+        out.pick(position=depth, n_elements=1)
+        out.append_opcodes("OP_MUL")
+    if reduce:
+        out.pick(position=-1, n_elements=1)
+        out.mod(stack_preparation="", is_positive=False, is_constant_reused=False)
+
+
+def _planned_inverse_step(depth: int, option: tuple[bool]) -> bytes:
+    out = ScriptBuilder()
+    _append_inverse_step(out, depth, option[0])
+    return out.to_bytes()
@@ -6,6 +6,10 @@ from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.fields.fq6_3_over_2 import Fq6
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
+from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll, verify_bottom_constant
 
 
@@ -46,6 +50,9 @@ class Fq12(PrimeFieldExtension):
         self.fq6 = fq6
         self.gammas_frobenius = gammas_frobenius
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -142,6 +149,9 @@ class Fq12(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -375,6 +385,218 @@ class Fq12(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
+    def cyclotomic_square(
+        self,
+        take_modulo: bool,
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Squaring in the cyclotomic subgroup of F_q^12.
+
+        The script computes the square of an element of the cyclotomic subgroup of F_q^12 (i.e., an element `x` such
+        that `x^(q^4 - q^2 + 1) = 1`, such as the output of the easy part of the final exponentiation in a pairing)
+        with the formulas of Granger and Scott, "Faster Squaring in the Cyclotomic Subgroup of Sixth Degree
+        Extensions". Writing `x = (a0 + b1 * s) + (b0 + a2 * s) * u + (a1 + b2 * s) * u^2`, where `s = u^3` satisfies
+        `s^2 = non_residue_over_fq2`, the squaring only requires three squarings in F_q^2[s], instead of the
+        multiplications in F_q^6 of `Fq12.square`.
+
+        Stack input:
+            - stack:    [q, ..., x := (a0, a1, a2, b0, b1, b2)], `x` is a couple of elements of F_q^6, `a0`, ...,
+                `b2` are elements of F_q^2
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., x^2]
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            is_constant_reused (bool | None, optional): If `True`, `q` remains as the second-to-top element on the stack
+                after execution. Defaults to `None`.
+
+        Returns:
+            Script to square an element in the cyclotomic subgroup of F_q^12.
+
+        Notes:
+            The result is not the square of `x` if `x` is not in the cyclotomic subgroup.
+        """
+        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+
+        # Computation of sixth component ----------------------------------------------------------
+
+        # After this, the stack is: a0 a1 a2 b0 b1 b2, altstack = [2 * (3*b0*a2 + b2)]
+        compute_sixth_component = pick(position=5, n_elements=2)  # Pick b0
+        compute_sixth_component += pick(position=9, n_elements=2)  # Pick a2
+        compute_sixth_component += self.fq2.mul(take_modulo=False, check_constant=False, clean_constant=False, scalar=3)
+        compute_sixth_component += self.fq2.algebraic_sum(
+            x=StackFiniteFieldElement(3, False, 2),  # b2
+            y=StackFiniteFieldElement(1, False, 2),  # 3*b0*a2
+            take_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            scalar=2,
+            rolling_option=2,
+        )
+        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+
+        # End of computation of sixth component ---------------------------------------------------
+
+        # Computation of fifth component ----------------------------------------------------------
+
+        # After this, the stack is: a0 a1 a2 b0 b1 b2, altstack = [sixthComponent, 2 * (3*a0*b1 + b1)]
+        compute_fifth_component = pick(position=11, n_elements=2)  # Pick a0
+        compute_fifth_component += pick(position=5, n_elements=2)  # Pick b1
+        compute_fifth_component += self.fq2.mul(take_modulo=False, check_constant=False, clean_constant=False, scalar=3)
+        compute_fifth_component += self.fq2.algebraic_sum(
+            x=StackFiniteFieldElement(5, False, 2),  # b1
+            y=StackFiniteFieldElement(1, False, 2),  # 3*a0*b1
+            take_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            scalar=2,
+            rolling_option=2,
+        )
+        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+
+        # End of computation of fifth component ---------------------------------------------------
+
+        # Computation of fourth component ---------------------------------------------------------
+
+        # After this, the stack is: a0 a1 a2 b0 b1 b2,
+        # altstack = [sixthComponent, fifthComponent, 2 * (3*a1*b2*xi + b0)]
+        compute_fourth_component = pick(position=9, n_elements=2)  # Pick a1
+        compute_fourth_component += pick(position=3, n_elements=2)  # Pick b2
+        compute_fourth_component += self.fq2.mul(
+            take_modulo=False, check_constant=False, clean_constant=False, scalar=3
+        )
+        compute_fourth_component += self.fq2.mul_by_fq2_non_residue(
+            self=self.fq2, take_modulo=False, check_constant=False, clean_constant=False
+        )
+        compute_fourth_component += self.fq2.algebraic_sum(
+            x=StackFiniteFieldElement(7, False, 2),  # b0
+            y=StackFiniteFieldElement(1, False, 2),  # 3*a1*b2*xi
+            take_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            scalar=2,
+            rolling_option=2,
+        )
+        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+
+        # End of computation of fourth component --------------------------------------------------
+
+        # Computation of third component ----------------------------------------------------------
+
+        # After this, the stack is: a0 a1 a2 b0 b1 (a1^2 + b2^2*xi)
+        compute_third_component = self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_third_component += self.fq2.mul_by_fq2_non_residue(
+            self=self.fq2, take_modulo=False, check_constant=False, clean_constant=False
+        )
+        compute_third_component += pick(position=9, n_elements=2)  # Pick a1
+        compute_third_component += self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_third_component += self.fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        # After this, the stack is: a0 a1 a2 b0 b1,
+        # altstack = [sixthComponent, fifthComponent, fourthComponent, 3 * (a1^2 + b2^2*xi) - 2*a2]
+        compute_third_component += self.__triple_minus_double(x=StackFiniteFieldElement(7, False, 2), is_x_rolled=False)
+        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+
+        # End of computation of third component ---------------------------------------------------
+
+        # Computation of second component ---------------------------------------------------------
+
+        # After this, the stack is: a0 a1 b1 (b0^2 + a2^2*xi)
+        compute_second_component = roll(position=5, n_elements=2)  # Roll a2
+        compute_second_component += self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_second_component += self.fq2.mul_by_fq2_non_residue(
+            self=self.fq2, take_modulo=False, check_constant=False, clean_constant=False
+        )
+        compute_second_component += roll(position=5, n_elements=2)  # Roll b0
+        compute_second_component += self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_second_component += self.fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        # After this, the stack is: a0 b1,
+        # altstack = [sixthComponent, ..., thirdComponent, 3 * (b0^2 + a2^2*xi) - 2*a1]
+        compute_second_component += self.__triple_minus_double(x=StackFiniteFieldElement(5, False, 2), is_x_rolled=True)
+        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+
+        # End of computation of second component --------------------------------------------------
+
+        # Computation of first component ----------------------------------------------------------
+
+        # After this, the stack is: a0 (a0^2 + b1^2*xi)
+        compute_first_component = self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_first_component += self.fq2.mul_by_fq2_non_residue(
+            self=self.fq2, take_modulo=False, check_constant=False, clean_constant=False
+        )
+        compute_first_component += pick(position=3, n_elements=2)  # Pick a0
+        compute_first_component += self.fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_first_component += self.fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        # After this, the stack is: 3 * (a0^2 + b1^2*xi) - 2*a0, altstack = [sixthComponent, ..., secondComponent]
+        compute_first_component += self.__triple_minus_double(x=StackFiniteFieldElement(3, False, 2), is_x_rolled=True)
+
+        # End of computation of first component ---------------------------------------------------
+
+        out += (
+            compute_sixth_component
+            + compute_fifth_component
+            + compute_fourth_component
+            + compute_third_component
+            + compute_second_component
+            + compute_first_component
+        )
+
+        if take_modulo:
+            out += Script.parse_string("OP_TOALTSTACK")
+            out += self.take_modulo(
+                positive_modulo=positive_modulo, clean_constant=clean_constant, is_constant_reused=is_constant_reused
+            )
+        else:
+            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * 10))
+
+        return out
+
+    def __triple_minus_double(self, x: StackFiniteFieldElement, is_x_rolled: bool) -> Script:
+        """Compute `3 * y - 2 * x` in F_q^2, where `y` is at the top of the stack.
+
+        Stack input:
+            - stack:    [q, ..., x, ..., y]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., x, ..., 3 * y - 2 * x] if not `is_x_rolled`, else [q, ..., ..., 3 * y - 2 * x]
+            - altstack: []
+        """
+        # After this, the stack is: x ... 3 * (y - x)
+        out = self.fq2.algebraic_sum(
+            x=x.set_negate(True),
+            y=StackFiniteFieldElement(1, False, 2),
+            take_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            scalar=3,
+            rolling_option=2,
+        )
+        # After this, the stack is: x ... 3 * y - 2 * x
+        out += self.fq2.algebraic_sum(
+            x=x,
+            y=StackFiniteFieldElement(1, False, 2),
+            take_modulo=False,
+            check_constant=False,
+            clean_constant=False,
+            rolling_option=3 if is_x_rolled else 2,
+        )
+        return out
+
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def conjugate(
         self,
         take_modulo: bool,
@@ -425,6 +647,9 @@ class Fq12(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def frobenius_odd(
         self,
         n: int,
@@ -565,6 +790,9 @@ class Fq12(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def frobenius_even(
         self,
         n: int,
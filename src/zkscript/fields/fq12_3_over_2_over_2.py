@@ -5,6 +5,9 @@ from tx_engine import Script
 from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.fq4 import Fq4
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, pick, roll, verify_bottom_constant
 
 
@@ -39,6 +42,9 @@ class Fq12Cubic(PrimeFieldExtension):
         self.prime_field = Fq(q)
         self.fq4 = fq4
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -160,6 +166,9 @@ class Fq12Cubic(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
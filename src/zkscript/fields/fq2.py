@@ -6,6 +6,10 @@ from tx_engine import Script
 
 from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll, verify_bottom_constant
 
 
@@ -43,6 +47,9 @@ class Fq2(PrimeFieldExtension):
         self.prime_field = Fq(q)
         self.mul_by_fq2_non_residue = mul_by_fq2_non_residue
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def negate(
         self,
         take_modulo: bool,
@@ -101,6 +108,9 @@ class Fq2(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -138,41 +148,44 @@ class Fq2(PrimeFieldExtension):
         Returns:
             Script to multiply two elements in F_q^2 and then rescale the result.
         """
-        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.modulus) if check_constant else None)
 
         # stack in:  [.., x0, x1, y0, y1]
         # stack out: [.., x0, x1, y0, y1, scalar * ((x_0 * y_0) - (x_1 * y_1))]
-        out += Script.parse_string("OP_2OVER OP_2OVER")  # Duplicate X Y
-        out += Script.parse_string("OP_ROT OP_MUL")  # Compute x_1 * y_1
-        out += Script.parse_string("OP_TOALTSTACK")  # Place x_1 * y_1 on altstack
-        out += Script.parse_string("OP_MUL")  # Compute x_0 * y_0
-        out += Script.parse_string("OP_FROMALTSTACK")  # Pull x_1 * y_1 from altstack
+        out.append_opcodes("OP_2OVER OP_2OVER")  # Duplicate X Y
+        out.append_opcodes("OP_ROT OP_MUL")  # Compute x_1 * y_1
+        out.append_opcodes("OP_TOALTSTACK")  # Place x_1 * y_1 on altstack
+        out.append_opcodes("OP_MUL")  # Compute x_0 * y_0
+        out.append_opcodes("OP_FROMALTSTACK")  # Pull x_1 * y_1 from altstack
         if self.non_residue == -1:
-            out += Script.parse_string("OP_SUB")  # Compute (x_0 * y_0 - x_1 * y_1)
+            out.append_opcodes("OP_SUB")  # Compute (x_0 * y_0 - x_1 * y_1)
         else:
-            out += nums_to_script([self.non_residue]) + Script.parse_string(
+            out.nums([self.non_residue]).append_opcodes(
                 "OP_MUL OP_ADD"
             )  # Compute (x_0 * y_0 + x_1 * y_1 * non_residue)
         if scalar != 1:
-            out += nums_to_script([scalar]) + Script.parse_string("OP_MUL")
+            out.nums([scalar]).append_opcodes("OP_MUL")
 
         # stack in:  [.., x0, x1, y0, y1, scalar * ((x_0 * y_0) - (x_1 * y_1))]
         # stack out: [.., scalar * ((x_0 * y_0) - (x_1 * y_1)), scalar * (x_0 * y_1 + x_1 * y_0)]
-        out += Script.parse_string("OP_2SWAP OP_MUL")  # Compute x_1 * y_0
-        out += Script.parse_string("OP_2SWAP OP_MUL")  # Compute x_0 * y_1
-        out += Script.parse_string("OP_ADD")  # Compute (x_0 * y_1 + x_1 * y_0)
+        out.append_opcodes("OP_2SWAP OP_MUL")  # Compute x_1 * y_0
+        out.append_opcodes("OP_2SWAP OP_MUL")  # Compute x_0 * y_1
+        out.append_opcodes("OP_ADD")  # Compute (x_0 * y_1 + x_1 * y_0)
         if scalar != 1:
-            out += nums_to_script([scalar]) + Script.parse_string("OP_MUL")
+            out.nums([scalar]).append_opcodes("OP_MUL")
 
         if take_modulo:
-            out += Script.parse_string("OP_TOALTSTACK")
-            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
+            out.append_opcodes("OP_TOALTSTACK")
+            out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
 
-            out += mod(is_positive=positive_modulo, stack_preparation="")
-            out += mod(is_positive=positive_modulo, is_constant_reused=is_constant_reused)
+            out.mod(is_positive=positive_modulo, stack_preparation="")
+            out.mod(is_positive=positive_modulo, is_constant_reused=is_constant_reused)
 
-        return out
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -210,65 +223,58 @@ class Fq2(PrimeFieldExtension):
         Returns:
             Script to square an element in F_q^2 and rescale the result.
         """
-        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.modulus) if check_constant else None)
 
         if self.non_residue == -1:
             # stack in:  [.., x0, x1]
             # stack out: [.., x0, x1, scalar * (x0^2 - x1^2)]
-            out += Script.parse_string("OP_2DUP OP_2DUP")
-            out += Script.parse_string(
-                "OP_SUB OP_2SWAP OP_ADD OP_MUL"
-            )  # Compute (x0 - x1), compute (x0 + x1), multiply
+            out.append_opcodes("OP_2DUP OP_2DUP")
+            out.append_opcodes("OP_SUB OP_2SWAP OP_ADD OP_MUL")  # Compute (x0 - x1), compute (x0 + x1), multiply
             if scalar != 1:
-                out += nums_to_script([scalar]) + Script.parse_string("OP_MUL")
+                out.nums([scalar]).append_opcodes("OP_MUL")
 
             # stack in:  [.., x0, x1, scalar * (x0^2 - x1^2)]
             # stack out: [.., scalar * (x0^2 - x1^2), 2 * scalar * x0 * x1]
             if take_modulo:
-                out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
-                out += mod(stack_preparation="", is_positive=positive_modulo)
-                out += (
-                    Script.parse_string("OP_2SWAP OP_MUL")
-                    + nums_to_script([2 * scalar])
-                    + Script.parse_string("OP_MUL OP_ROT")
-                )
-                out += mod(
+                out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
+                out.mod(stack_preparation="", is_positive=positive_modulo)
+                out.append_opcodes("OP_2SWAP OP_MUL").nums([2 * scalar]).append_opcodes("OP_MUL OP_ROT")
+                out.mod(
                     stack_preparation="",
                     is_constant_reused=is_constant_reused,
                     is_positive=positive_modulo,
                 )
 
             else:
-                out += nums_to_script([2 * scalar]) + Script.parse_string("OP_2SWAP OP_MUL OP_MUL")
+                out.nums([2 * scalar]).append_opcodes("OP_2SWAP OP_MUL OP_MUL")
         else:
             # stack in:     [.., x0, x1]
             # stack out:    [.., x0, x1]
             # altstack out: [2 * scalar * x0 * x1]
-            out += Script.parse_string("OP_2DUP") + nums_to_script([2 * scalar]) + Script.parse_string("OP_MUL OP_MUL")
-            out += Script.parse_string("OP_TOALTSTACK")
+            out.append_opcodes("OP_2DUP").nums([2 * scalar]).append_opcodes("OP_MUL OP_MUL")
+            out.append_opcodes("OP_TOALTSTACK")
 
             # stack in:     [.., x0, x1]
             # altstack in:  [2 * scalar * x0 * x1]
             # stack out:    [.., scalar * (x0^2 + x1^2 * self.non_residue)]
             # altstack out: [2 * scalar * x0 * x1]
-            out += (
-                Script.parse_string("OP_DUP")
-                + nums_to_script([self.non_residue])
-                + Script.parse_string("OP_MUL OP_MUL")
-            )
-            out += Script.parse_string("OP_SWAP OP_DUP OP_MUL OP_ADD")
+            out.append_opcodes("OP_DUP").nums([self.non_residue]).append_opcodes("OP_MUL OP_MUL")
+            out.append_opcodes("OP_SWAP OP_DUP OP_MUL OP_ADD")
             if scalar != 1:
-                out += nums_to_script([scalar]) + Script.parse_string("OP_MUL")
+                out.nums([scalar]).append_opcodes("OP_MUL")
 
             if take_modulo:
-                out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
-                out += mod(stack_preparation="", is_positive=positive_modulo)
-                out += mod(is_constant_reused=is_constant_reused, is_positive=positive_modulo)
+                out.roll(position=-1, n_elements=1) if clean_constant else out.pick(position=-1, n_elements=1)
+                out.mod(stack_preparation="", is_positive=positive_modulo)
+                out.mod(is_constant_reused=is_constant_reused, is_positive=positive_modulo)
             else:
-                out += Script.parse_string("OP_FROMALTSTACK")
+                out.append_opcodes("OP_FROMALTSTACK")
 
-        return out
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def add_three(
         self,
         take_modulo: bool,
@@ -301,37 +307,40 @@ class Fq2(PrimeFieldExtension):
         Preconditions:
             - If take_modulo is `True`, then the coordinates of x, y and z must be positive.
         """
-        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.modulus) if check_constant else None)
 
         # After this, the stack is: x0 x1 y0 z0, altstack = [y1 + z1]
-        out += Script.parse_string("OP_ROT OP_ADD OP_TOALTSTACK")
+        out.append_opcodes("OP_ROT OP_ADD OP_TOALTSTACK")
         # After this, the stack is: x1 (x0 + y0 + z0)
-        out += Script.parse_string("OP_ADD OP_ROT OP_ADD")
+        out.append_opcodes("OP_ADD OP_ROT OP_ADD")
 
         if take_modulo:
             assert clean_constant is not None
             assert is_constant_reused is not None
             if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
+                out.append_opcodes("OP_DEPTH OP_1SUB OP_ROLL")
             else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+                out.append_opcodes("OP_DEPTH OP_1SUB OP_PICK")
 
             # After this, the stack is: x1 q [(x0 + y0 + z0) % q]
-            out += fetch_q + mod(stack_preparation="", is_positive=positive_modulo)
+            out.mod(stack_preparation="", is_positive=positive_modulo)
             # After this, the stack is: [(x0 + y0 + z0) % q] q (x1+y1+z1)
-            out += mod(
+            out.mod(
                 stack_preparation="OP_SWAP OP_ROT OP_FROMALTSTACK OP_ADD",
                 is_mod_on_top=False,
                 is_constant_reused=is_constant_reused,
                 is_positive=positive_modulo,
             )
         else:
-            out += Script.parse_string("OP_SWAP")
+            out.append_opcodes("OP_SWAP")
             # After this, the stack is: (x0 + y0 + z0) (x1 + y1 + z1)
-            out += Script.parse_string("OP_FROMALTSTACK OP_ADD")
+            out.append_opcodes("OP_FROMALTSTACK OP_ADD")
 
-        return out
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def conjugate(
         self,
         take_modulo: bool,
@@ -386,6 +395,9 @@ class Fq2(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul_by_u(
         self,
         take_modulo: bool,
@@ -445,6 +457,9 @@ class Fq2(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul_by_one_plus_u(
         self,
         take_modulo: bool,
@@ -474,28 +489,85 @@ class Fq2(PrimeFieldExtension):
         Returns:
             A script to multiply an element by 1 + u in F_q^2.
         """
-        out = verify_bottom_constant(self.modulus) if check_constant else Script()
+        out = ScriptBuilder(verify_bottom_constant(self.modulus) if check_constant else None)
 
         # After this, the stack is: x0 x1, altstack = [x0 + x1]
-        out += Script.parse_string("OP_2DUP OP_ADD")  # Compute (x_0 + x_1)
-        out += Script.parse_string("OP_TOALTSTACK")
+        out.append_opcodes("OP_2DUP OP_ADD")  # Compute (x_0 + x_1)
+        out.append_opcodes("OP_TOALTSTACK")
         if self.non_residue == -1:
-            out += Script.parse_string("OP_SUB")
+            out.append_opcodes("OP_SUB")
         else:
             # After this, the stack is: x0 + x1 * non_residue, altstack = [x0 + x1]
-            out += nums_to_script([self.non_residue])
-            out += Script.parse_string("OP_MUL OP_ADD")  # Compute (x_0 + x_1 * non_residue)
+            out.nums([self.non_residue])
+            out.append_opcodes("OP_MUL OP_ADD")  # Compute (x_0 + x_1 * non_residue)
 
-        out += (
-            self.take_modulo(
+        if take_modulo:
+            out += self.take_modulo(
                 positive_modulo=positive_modulo, clean_constant=clean_constant, is_constant_reused=is_constant_reused
             )
-            if take_modulo
-            else Script.parse_string(" ".join(["OP_FROMALTSTACK"] * (self.extension_degree - 1)))
-        )
+        else:
+            out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * (self.extension_degree - 1)))
 
-        return out
+        return out.to_script()
+
+    @profile_script
+    @check_stack_effect
+    @memoise_script
+    def mul_by_thirteen_plus_u(
+        self,
+        take_modulo: bool,
+        positive_modulo: bool = True,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Multiplication by 13 + u in F_q^2.
+
+        Stack input:
+            - stack:    [q, ..., x := (x0, x1)]
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., x * (13 + u) := (13 * x0 + x1 * non_residue, x0 + 13 * x1)]
+            - altstack: []
+
+        Args:
+            take_modulo (bool): If `True`, the result is reduced modulo `q`.
+            positive_modulo (bool): If `True` the modulo of the result is taken positive. Defaults to `True`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            is_constant_reused (bool | None, optional): If `True`, `q` remains as the second-to-top element on the stack
+                after execution. Defaults to `None`.
+
+        Returns:
+            A script to multiply an element by 13 + u in F_q^2.
+        """
+        out = ScriptBuilder(verify_bottom_constant(self.modulus) if check_constant else None)
+
+        # After this, the stack is: x0 x1, altstack = [x0 + 13 * x1]
+        out.append_opcodes("OP_2DUP OP_13 OP_MUL OP_ADD")  # Compute (x_0 + 13 * x_1)
+        out.append_opcodes("OP_TOALTSTACK")
+        # After this, the stack is: 13 * x0 x1
+        out.append_opcodes("OP_SWAP OP_13 OP_MUL OP_SWAP")
+        if self.non_residue == -1:
+            out.append_opcodes("OP_SUB")
+        else:
+            # After this, the stack is: 13 * x0 + x1 * non_residue, altstack = [x0 + 13 * x1]
+            out.nums([self.non_residue])
+            out.append_opcodes("OP_MUL OP_ADD")  # Compute (13 * x_0 + x_1 * non_residue)
+
+        if take_modulo:
+            out += self.take_modulo(
+                positive_modulo=positive_modulo, clean_constant=clean_constant, is_constant_reused=is_constant_reused
+            )
+        else:
+            out.append_opcodes(" ".join(["OP_FROMALTSTACK"] * (self.extension_degree - 1)))
+
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def cube(
         self,
         take_modulo: bool,
@@ -580,6 +652,9 @@ class Fq2(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def norm(
         self,
         take_modulo: bool,
@@ -3,6 +3,9 @@
 from tx_engine import Script
 
 from src.zkscript.fields.fq4 import Fq4
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll, verify_bottom_constant
 
 
@@ -16,6 +19,9 @@ class Fq2Over2ResidueEqualU(Fq4):
     `x0 + x1*u + x2*v + x3*uv`, where `x0`, `x1`, `x2`, `x3` are elements of F_q.
     """
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -124,6 +130,9 @@ class Fq2Over2ResidueEqualU(Fq4):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
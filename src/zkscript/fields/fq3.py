@@ -5,6 +5,9 @@ from tx_engine import Script
 from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import (
     bitmask_to_boolean_list,
     bool_to_moving_function,
@@ -42,6 +45,9 @@ class Fq3(PrimeFieldExtension):
         self.extension_degree = 3
         self.prime_field = Fq(q)
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -147,6 +153,9 @@ class Fq3(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -7,6 +7,9 @@ from tx_engine import Script
 from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll, verify_bottom_constant
 
 
@@ -58,6 +61,9 @@ class Fq4(PrimeFieldExtension):
         self.gammas_frobenius = gammas_frobenius
         self.mul_by_fq4_non_residue = mul_by_fq4_non_residue
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def scalar_mul(
         self,
         take_modulo: bool,
@@ -118,6 +124,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -195,6 +204,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -278,6 +290,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def add_three(
         self,
         take_modulo: bool,
@@ -336,6 +351,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def frobenius_odd(
         self,
         n: int,
@@ -413,6 +431,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def frobenius_even(
         self,
         n: int,
@@ -487,6 +508,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul_by_u(
         self,
         take_modulo: bool,
@@ -555,6 +579,9 @@ class Fq4(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def conjugate(
         self,
         take_modulo: bool,
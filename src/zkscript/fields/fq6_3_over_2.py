@@ -7,6 +7,9 @@ from tx_engine import Script
 from src.zkscript.fields.fq import Fq
 from src.zkscript.fields.fq2 import Fq2
 from src.zkscript.fields.prime_field_extension import PrimeFieldExtension
+from src.zkscript.util.script_memo import memoise_script
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_scripts import mod, pick, roll, verify_bottom_constant
 
 
@@ -47,6 +50,9 @@ class Fq6(PrimeFieldExtension):
         self.base_field = base_field
         self.mul_by_fq6_non_residue = mul_by_fq6_non_residue
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def scalar_mul(
         self,
         take_modulo: bool,
@@ -109,6 +115,9 @@ class Fq6(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def negate(
         self,
         take_modulo: bool,
@@ -174,6 +183,9 @@ class Fq6(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul(
         self,
         take_modulo: bool,
@@ -299,6 +311,9 @@ class Fq6(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def square(
         self,
         take_modulo: bool,
@@ -412,6 +427,9 @@ class Fq6(PrimeFieldExtension):
 
         return out
 
+    @profile_script
+    @check_stack_effect
+    @memoise_script
     def mul_by_v(
         self,
         take_modulo: bool,
@@ -1,8 +1,11 @@
 """Bitcoin scripts that perform arithmetic operations in F_q^n."""
 
+from weakref import WeakKeyDictionary
+
 from tx_engine import Script
 
 from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.stack_simulator import output_bits
 from src.zkscript.util.utility_functions import check_order
 from src.zkscript.util.utility_scripts import (
     bitmask_to_boolean_list,
@@ -15,6 +18,9 @@ from src.zkscript.util.utility_scripts import (
     verify_bottom_constant,
 )
 
+# The bounds computed by `PrimeFieldExtension.output_bits`, for every field
+_output_bits = WeakKeyDictionary()
+
 
 class PrimeFieldExtension:
     """Construct Bitcoin scripts that perform arithmetic operations in F_q^n.
@@ -478,3 +484,53 @@ class PrimeFieldExtension:
         )
 
         return out
+
+    def output_bits(self, operation: str, input_bits: tuple[int, ...]) -> int:
+        """Bound on the bit lengths of the components of the result of an operation, if it is not reduced.
+
+        The bounds of the inputs are propagated through the script of `operation` called with `take_modulo=False` (see
+        `StackSimulator`). The bound is computed once for every operation and every bound of the inputs.
+
+        Args:
+            operation (str): The name of a method of the field whose operands are elements of the field at the top of
+                the stack and whose result is an element of the field, e.g., `"mul"` or `"square"`.
+            input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the components of the operands, from the
+                first operand (the deepest in the stack) to the last.
+
+        Returns:
+            The maximum bit length of the components of the result.
+
+        Raises:
+            ValueError: If the bound cannot be computed, e.g., if the result is not an element of the field.
+        """
+        cache = _output_bits.setdefault(self, {})
+        key = (operation, tuple(input_bits))
+        if key not in cache:
+            cache[key] = output_bits(
+                getattr(self, operation)(take_modulo=False, check_constant=False, clean_constant=False),
+                input_bits=tuple(bits for bits in reversed(input_bits) for _ in range(self.extension_degree)),
+                n_outputs=self.extension_degree,
+                default_bits=self.modulus.bit_length(),
+            )
+        return cache[key]
+
+    def lazy_modulo(self, operation: str, input_bits: tuple[int, ...], modulo_threshold: int) -> tuple[bool, int]:
+        """Decide whether to reduce the result of an operation in the lazy mode.
+
+        In the lazy mode, the elements carry a bound on the bit lengths of their components, and the result of an
+        operation is only reduced if its bound would exceed `modulo_threshold`.
+
+        Args:
+            operation (str): The name of the operation, see `output_bits`.
+            input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the components of the operands, from the
+                first operand to the last.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+
+        Returns:
+            The value of `take_modulo` to pass to `operation`, and the bound on the bit lengths of the components of
+            its result.
+        """
+        bits = self.output_bits(operation, input_bits)
+        if bits > modulo_threshold:
+            return True, self.modulus.bit_length()
+        return False, bits
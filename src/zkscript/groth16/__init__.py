@@ -1,10 +1,11 @@
 """groth16 package.
 
-This package provides modules for constructing Bitcoin scripts that verify Groth16 proof over the BLS12-381 and
-MNT4-753 curves.
+This package provides modules for constructing Bitcoin scripts that verify Groth16 proof over the BLS12-381, BN254
+and MNT4-753 curves.
 
 Subpackages:
     - bls12_381: Contains a module for exporting the Groth16 Bitcoin script verifier over BLS12-381.
+    - bn254: Contains a module for exporting the Groth16 Bitcoin script verifier over BN254.
     - mnt4_753: Contains a module for exporting the Groth16 Bitcoin script verifier over MNT4-753.
     - model: Contains a module for constructing Bitcoin scripts that perform Groth16 proof verification.
 
@@ -1,7 +1,7 @@
 """Export Groth16 verifier over BLS12-381."""
 
 from src.zkscript.bilinear_pairings.bls12_381.bls12_381 import bls12_381 as bls12_381_pairing_model
-from src.zkscript.bilinear_pairings.bls12_381.parameters import a, b, r
+from src.zkscript.bilinear_pairings.bls12_381.parameters import GLV_BETA, GLV_LAMBDA, a, b, r
 from src.zkscript.groth16.model.groth16 import Groth16
 
-bls12_381 = Groth16(pairing_model=bls12_381_pairing_model, curve_a=a, curve_b=b, r=r)
+bls12_381 = Groth16(pairing_model=bls12_381_pairing_model, curve_a=a, curve_b=b, r=r, glv=(GLV_BETA, GLV_LAMBDA))
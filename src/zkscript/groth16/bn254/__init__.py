@@ -0,0 +1 @@
+"""bn254 package."""
@@ -0,0 +1,7 @@
+"""Export Groth16 verifier over BN254."""
+
+from src.zkscript.bilinear_pairings.bn254.bn254 import bn254 as bn254_pairing_model
+from src.zkscript.bilinear_pairings.bn254.parameters import GLV_BETA, GLV_LAMBDA, a, b, r
+from src.zkscript.groth16.model.groth16 import Groth16
+
+bn254 = Groth16(pairing_model=bn254_pairing_model, curve_a=a, curve_b=b, r=r, glv=(GLV_BETA, GLV_LAMBDA))
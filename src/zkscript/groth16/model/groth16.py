@@ -1,5 +1,11 @@
 """Bitcoin scripts that perform Groth16 proof verification."""
 
+import hashlib
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import fields, replace
+from math import log2
+
 from tx_engine import Script, encode_num, hash256d
 
 from src.zkscript.bilinear_pairings.model.model_definition import PairingModel
@@ -14,8 +20,25 @@ from src.zkscript.script_types.locking_keys.groth16_proj import (
     Groth16ProjLockingKey,
     Groth16ProjLockingKeyWithPrecomputedMsm,
 )
+from src.zkscript.util.modulo_planner import Objective, modulo_planner
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_cache import ScriptCache
+from src.zkscript.util.script_fragments import ScriptFragments
+from src.zkscript.util.script_profiler import profile_script
+from src.zkscript.util.script_template import ScriptTemplate
+from src.zkscript.util.stack_simulator import check_stack_effect
 from src.zkscript.util.utility_functions import optimise_script
-from src.zkscript.util.utility_scripts import nums_to_script, roll, verify_bottom_constant
+from src.zkscript.util.utility_scripts import is_mod_equal_to, verify_bottom_constant
+
+# Number of bits of the randomisers of the batch verifier
+BATCH_RANDOMISER_BITS = 128
+
+LockingKey = (
+    Groth16LockingKey
+    | Groth16LockingKeyWithPrecomputedMsm
+    | Groth16ProjLockingKey
+    | Groth16ProjLockingKeyWithPrecomputedMsm
+)
 
 
 class Groth16:
@@ -25,9 +48,13 @@ class Groth16:
         pairing_model: Pairing model used to instantiate Groth16.
         curve_a (int): A coefficient of the base curve over which Groth16 is instantiated.
         r (int): The order of G1/G2/GT.
+        glv (tuple[int, int] | None): The pair `(beta, lambda)` such that `(x, y) -> (beta * x, y)` is the
+            multiplication by `lambda` on G1, or `None` if G1 has no such endomorphism.
     """
 
-    def __init__(self, pairing_model: PairingModel, curve_a: int, curve_b: int, r: int):
+    def __init__(
+        self, pairing_model: PairingModel, curve_a: int, curve_b: int, r: int, glv: tuple[int, int] | None = None
+    ):
         """Initialise the Groth16 class.
 
         Args:
@@ -35,11 +62,34 @@ class Groth16:
             curve_a (int): A coefficient of the base curve over which Groth16 is instantiated.
             curve_b (int): B coefficient of the base curve over which Groth16 is instantiated.
             r (int): The order of G1/G2/GT.
+            glv (tuple[int, int] | None): The pair `(beta, lambda)` such that `(x, y) -> (beta * x, y)` is the
+                multiplication by `lambda` on G1, or `None` if G1 has no such endomorphism. Defaults to `None`.
         """
         self.pairing_model = pairing_model
         self.curve_a = curve_a
         self.curve_b = curve_b
         self.r = r
+        self.glv = glv
+
+    def __from_cache(
+        self, cache: ScriptCache, generator: Callable[..., Script], executor: Executor | None, **kwargs
+    ) -> Script:
+        """Return the script generated by `generator(executor=executor, **kwargs)`, reading it from `cache` if possible.
+
+        The cache key depends on the curve over which Groth16 is instantiated, on the name of `generator`, on
+        `kwargs` and on the objective of `modulo_planner` if it is enabled.
+        """
+        key = cache.key(
+            type(self).__name__,
+            self.pairing_model.modulus,
+            self.curve_a,
+            self.curve_b,
+            self.r,
+            generator.__name__,
+            kwargs,
+            *((modulo_planner.objective,) if modulo_planner.is_enabled else ()),
+        )
+        return cache.get_or_generate(key=key, generator=lambda: generator(executor=executor, **kwargs))
 
     def __gradients_to_hash_commitment(self, locking_key: Groth16LockingKey) -> bytes:
         """Construct the hash commitment for the gradients of -gamma and -delta.
@@ -80,11 +130,14 @@ class Groth16:
                         list_of_opcodes.append("OP_HASH256")
                         list_of_opcodes.append("OP_CAT")
         string_of_opcodes = " ".join(list_of_opcodes[:-1])
-        out = Script.parse_string(string_of_opcodes)
+        out = ScriptBuilder()
+        out.append_opcodes(string_of_opcodes)
         out.append_pushdata(verification_hash)
-        out += Script.parse_string("OP_EQUAL")
-        return out
+        out.append_opcodes("OP_EQUAL")
+        return out.to_script()
 
+    @profile_script
+    @check_stack_effect
     def groth16_verifier(
         self,
         locking_key: Groth16LockingKey,
@@ -93,6 +146,13 @@ class Groth16:
         max_multipliers: list[int] | None = None,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
+        cache: ScriptCache | None = None,
+        executor: Executor | None = None,
+        msm_window: int | None = None,
+        msm_glv: bool = False,
+        fixed_lines: bool = False,
+        objective: Objective | None = None,
     ) -> Script:
         """Groth16 verifier.
 
@@ -128,15 +188,79 @@ class Groth16:
                 statement.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            cache (ScriptCache | None): If not `None`, the script is read from `cache` if it was generated before,
+                and stored in it otherwise. Defaults to `None`.
+            executor (Executor | None): If not `None`, the independent sections of the script are generated in
+                `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            msm_window (int | None): If not `None`, the msm is computed by `interleaved_msm_with_fixed_bases` with
+                groups of `msm_window` bases, and the data of the msm on the stack is the one required by that
+                script (see `InterleavedMsmWithFixedBasesUnlockingKey`). All the public inputs are then extractable.
+                Defaults to `None`.
+            msm_glv (bool): If `True`, the interleaved msm splits every public input in two scalars of half the
+                length with the endomorphism `self.glv` (see `glv_scalars`), which halves the number of doublings.
+                Requires `msm_window`. Defaults to `False`.
+            fixed_lines (bool): If `True`, the lines of the Miller loops of `-gamma` and `-delta` are hard-coded in the
+                script (see the argument `fixed_arguments` of `triple_pairing`). Requires
+                `locking_key.has_precomputed_gradients`, and is not supported over BN254. Over MNT4-753 the script
+                executes fewer opcodes but is larger. Defaults to `False`.
+            objective (Objective | None): If not `None`, the modular reductions are chosen by `modulo_planner` with
+                this objective, e.g., `"size"` or an `ExecutionCostModel` (see `ModuloPlanner`). Defaults to `None`,
+                i.e., the state of `modulo_planner` is left unchanged.
 
         Returns:
             Script to verify the equation e(A,B) = alpha_beta * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
             which we turn into  e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], - gamma) * e(C, - delta) = alpha_beta.
             The LHS of the equation is a triple pairing defined in bilinear_pairings/model/triple_pairing.py
 
+        Raises:
+            ValueError: If `msm_glv` is `True` and `msm_window` or `self.glv` is `None`.
+            ValueError: If `fixed_lines` is `True` and `locking_key.has_precomputed_gradients` is `False` or the
+                pairing model does not support fixed lines.
+
         Notes:
             a_0 = 1.
         """
+        if cache is not None:
+            return self.__from_cache(
+                cache,
+                self.groth16_verifier,
+                executor,
+                locking_key=locking_key,
+                modulo_threshold=modulo_threshold,
+                extractable_inputs=extractable_inputs,
+                max_multipliers=max_multipliers,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                optimise=optimise,
+                msm_window=msm_window,
+                msm_glv=msm_glv,
+                fixed_lines=fixed_lines,
+                objective=objective,
+            )
+
+        if objective is not None:
+            with modulo_planner.active(objective):
+                return self.groth16_verifier(
+                    locking_key=locking_key,
+                    modulo_threshold=modulo_threshold,
+                    extractable_inputs=extractable_inputs,
+                    max_multipliers=max_multipliers,
+                    check_constant=check_constant,
+                    clean_constant=clean_constant,
+                    optimise=optimise,
+                    msm_window=msm_window,
+                    msm_glv=msm_glv,
+                    fixed_lines=fixed_lines,
+                    executor=executor,
+                )
+
+        if msm_glv and (msm_window is None or self.glv is None):
+            msg = "The GLV msm requires `msm_window` and an endomorphism of G1"
+            raise ValueError(msg)
+
         max_multipliers = (
             max_multipliers if max_multipliers is not None else [self.r] * (len(locking_key.gamma_abc) - 1)
         )
@@ -144,7 +268,7 @@ class Groth16:
         # Elliptic curve arithmetic
         ec_fq = EllipticCurveFq(q=self.pairing_model.modulus, curve_a=self.curve_a, curve_b=self.curve_b)
 
-        out = verify_bottom_constant(self.pairing_model.modulus) if check_constant else Script()
+        out = ScriptFragments(executor, verify_bottom_constant(self.pairing_model.modulus) if check_constant else None)
 
         # stack in:     [q, ..., inverse_miller_loop_triple_pairing,
         #                   (gradients_pairing if not locking_key.has_precomputed_gradients),
@@ -156,19 +280,33 @@ class Groth16:
         #                   (gradients_pairing if not locking_key.has_precomputed_gradients), A, B, C,
         #                       gradient[gamma_abc[0], sum_(i=1)^l a_i * gamma_abc[i]],
         #                           sum_(i=1)^l a_i * gamma_abc[i]]
-        out += ec_fq.msm_with_fixed_bases(
-            bases=locking_key.gamma_abc[1:],
-            max_multipliers=max_multipliers,
-            modulo_threshold=modulo_threshold,
-            take_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            positive_modulo=False,
-            extractable_scalars=extractable_inputs,
-        )
+        if msm_window is None:
+            out.submit(
+                ec_fq.msm_with_fixed_bases,
+                bases=locking_key.gamma_abc[1:],
+                max_multipliers=max_multipliers,
+                modulo_threshold=modulo_threshold,
+                take_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                positive_modulo=False,
+                extractable_scalars=extractable_inputs,
+            )
+        else:
+            out.submit(
+                ec_fq.interleaved_msm_with_fixed_bases,
+                bases=locking_key.gamma_abc[1:],
+                max_multipliers=max_multipliers,
+                take_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                positive_modulo=False,
+                window=msm_window,
+                glv=self.glv if msm_glv else None,
+            )
 
         # Load gamma_abc[0] to the stack
-        out += nums_to_script(locking_key.gamma_abc[0])
+        out.nums(locking_key.gamma_abc[0])
 
         # stack in:    [q, ..., inverse_miller_loop_triple_pairing,
         #                  (gradients_pairing if not locking_key.has_precomputed_gradients),
@@ -190,16 +328,26 @@ class Groth16:
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=clean_constant,
+            optimise=False,
+            executor=executor,
+            fixed_lines=fixed_lines,
         )
 
-        return optimise_script(out)
+        return optimise_script(out.to_script()) if optimise else out.to_script()
 
+    @profile_script
+    @check_stack_effect
     def groth16_verifier_with_precomputed_msm(
         self,
         locking_key: Groth16LockingKeyWithPrecomputedMsm,
         modulo_threshold: int,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
+        cache: ScriptCache | None = None,
+        executor: Executor | None = None,
+        fixed_lines: bool = False,
+        objective: Objective | None = None,
     ) -> Script:
         """Groth16 verifier.
 
@@ -224,37 +372,89 @@ class Groth16:
             modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            cache (ScriptCache | None): If not `None`, the script is read from `cache` if it was generated before,
+                and stored in it otherwise. Defaults to `None`.
+            executor (Executor | None): If not `None`, the independent sections of the script are generated in
+                `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            fixed_lines (bool): If `True`, the lines of the Miller loops of `-gamma` and `-delta` are hard-coded in the
+                script (see the argument `fixed_arguments` of `triple_pairing`). Requires
+                `locking_key.has_precomputed_gradients`, and is not supported over BN254. Over MNT4-753 the script
+                executes fewer opcodes but is larger. Defaults to `False`.
+            objective (Objective | None): If not `None`, the modular reductions are chosen by `modulo_planner` with
+                this objective, e.g., `"size"` or an `ExecutionCostModel` (see `ModuloPlanner`). Defaults to `None`,
+                i.e., the state of `modulo_planner` is left unchanged.
 
         Returns:
             Script to verify the equation e(A,B) = alpha_beta * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
             which we turn into  e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], - gamma) * e(C, - delta) = alpha_beta.
             The LHS of the equation is a triple pairing defined in bilinear_pairings/model/triple_pairing.py
 
+        Raises:
+            ValueError: If `fixed_lines` is `True` and `locking_key.has_precomputed_gradients` is `False` or the
+                pairing model does not support fixed lines.
+
         Notes:
             a_0 = 1.
         """
-        out = verify_bottom_constant(self.pairing_model.modulus) if check_constant else Script()
+        if cache is not None:
+            return self.__from_cache(
+                cache,
+                self.groth16_verifier_with_precomputed_msm,
+                executor,
+                locking_key=locking_key,
+                modulo_threshold=modulo_threshold,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                optimise=optimise,
+                fixed_lines=fixed_lines,
+                objective=objective,
+            )
+
+        if objective is not None:
+            with modulo_planner.active(objective):
+                return self.groth16_verifier_with_precomputed_msm(
+                    locking_key=locking_key,
+                    modulo_threshold=modulo_threshold,
+                    check_constant=check_constant,
+                    clean_constant=clean_constant,
+                    optimise=optimise,
+                    fixed_lines=fixed_lines,
+                    executor=executor,
+                )
+
+        if fixed_lines and not locking_key.has_precomputed_gradients:
+            msg = "The fixed lines require the precomputed gradients to be in the locking key"
+            raise ValueError(msg)
+        if fixed_lines and self.pairing_model.line_eval_fixed_argument is None:
+            msg = "The fixed lines are not supported by this pairing model"
+            raise ValueError(msg)
+
+        out = ScriptBuilder(verify_bottom_constant(self.pairing_model.modulus) if check_constant else None)
 
         # stack in:  [q, ..., inverse_miller_loop_triple_pairing,
         #                (gradients_pairing if not locking_key.has_precomputed_gradients),
         #                    A, B, C, sum_(i=0)^l a_i * gamma_abc[i]]
         # stack out: [q, ..., inverse_miller_loop_triple_pairing,
         #                (gradients_pairing if not locking_key.has_precomputed_gradients),
-        #                    A, sum_(i=0)^l a_i * gamma_abc[i], C, B, -gamma, -delta]
-        out += roll(
+        #                    A, sum_(i=0)^l a_i * gamma_abc[i], C, B, (-gamma, -delta if not fixed_lines)]
+        out.roll(
             position=2 * self.pairing_model.N_POINTS_CURVE - 1, n_elements=self.pairing_model.N_POINTS_CURVE
         )  # Roll C
-        out += roll(
+        out.roll(
             position=2 * self.pairing_model.N_POINTS_CURVE + self.pairing_model.N_POINTS_TWIST - 1,
             n_elements=self.pairing_model.N_POINTS_TWIST,
         )  # Roll B
-        out += nums_to_script(locking_key.minus_gamma)
-        out += nums_to_script(locking_key.minus_delta)
+        if not fixed_lines:
+            out.nums(locking_key.minus_gamma)
+            out.nums(locking_key.minus_delta)
 
         # Compute the triple pairing
         # stack in:  [q, ..., inverse_miller_loop_triple_pairing,
         #                (gradients_pairing if not locking_key.has_precomputed_gradients),
-        #                    A, sum_(i=0)^l a_i * gamma_abc[i], C, B, -gamma, -delta]
+        #                    A, sum_(i=0)^l a_i * gamma_abc[i], C, B, (-gamma, -delta if not fixed_lines)]
         # altstack in: [(gradients_pairing if locking_key.has_precomputed_gradients)]
         # stack out: [q, ..., (gradients_pairing if not locking_key.has_precomputed_gradients),
         #                   pairing(A,B) * pairing(sum_(i=0)^(l) a_i * gamma_abc[i], -gamma) * pairing(C, -delta)]
@@ -266,6 +466,9 @@ class Groth16:
             clean_constant=clean_constant,
             is_precomputed_gradients_on_stack=not locking_key.has_precomputed_gradients,
             precomputed_gradients=locking_key.gradients_pairings,
+            fixed_arguments=[locking_key.minus_gamma, locking_key.minus_delta] if fixed_lines else None,
+            optimise=False,
+            executor=executor,
         )
 
         # Verify pairing(A,B) * pairing(sum_(i=0)^(l) a_i * gamma_abc[i], -gamma) * pairing(C, -delta) == alpha_beta
@@ -273,11 +476,11 @@ class Groth16:
         #                   pairing(A,B) * pairing(sum_(i=0)^(l) a_i * gamma_abc[i], -gamma) * pairing(C, -delta)]
         # stack out: [q, ..., 0/1] if locking_key.has_precomputed_gradients else ([q, ..., gradients_pairing] or fail)
         for i, el in enumerate(locking_key.alpha_beta[::-1]):
-            out += nums_to_script([el])
-            out += (
-                Script.parse_string("OP_EQUAL")
+            out.nums([el])
+            out.append_opcodes(
+                "OP_EQUAL"
                 if locking_key.has_precomputed_gradients and i == len(locking_key.alpha_beta) - 1
-                else Script.parse_string("OP_EQUALVERIFY")
+                else "OP_EQUALVERIFY"
             )
 
         # If locking_key.has_precomputed_gradients is False, verify that the gradients supplied by the unlocking script
@@ -289,8 +492,10 @@ class Groth16:
             verification_hash = self.__gradients_to_hash_commitment(locking_key=locking_key)
             out += self.__verify_hash_commitment(locking_key=locking_key, verification_hash=verification_hash)
 
-        return optimise_script(out)
+        return optimise_script(out.to_script()) if optimise else out.to_script()
 
+    @profile_script
+    @check_stack_effect
     def groth16_verifier_proj(
         self,
         locking_key: Groth16ProjLockingKey,
@@ -299,11 +504,17 @@ class Groth16:
         max_multipliers: list[int] | None = None,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
+        cache: ScriptCache | None = None,
+        executor: Executor | None = None,
+        is_affine_msm_supplied: bool = False,
+        objective: Objective | None = None,
     ) -> Script:
         """Groth16 verifier with projective coordinates.
 
         Stack input:
-            - stack:    [q, ..., inverse_miller_loop_triple_pairing, A, B, C, ..., a_i, ..., a_1]
+            - stack:    [q, ..., inverse_miller_loop_triple_pairing, A, B, C,
+                            (sum_(i=0)^l a_i * gamma_abc[i] if is_affine_msm_supplied), ..., a_i, ..., a_1]
             - altstack: []
 
         Stack output:
@@ -320,6 +531,20 @@ class Groth16:
                 statement.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            cache (ScriptCache | None): If not `None`, the script is read from `cache` if it was generated before,
+                and stored in it otherwise. Defaults to `None`.
+            executor (Executor | None): If not `None`, the independent sections of the script are generated in
+                `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            is_affine_msm_supplied (bool): If `True`, the affine coordinates `(x', y')` of the msm are supplied in the
+                unlocking script, and the script checks that they are those of the projective msm `(x, y, z)` by
+                checking `x' * z = x` and `y' * z = y` mod `q`, instead of computing `z^-1` with `inverse_fq`. See
+                `Groth16ProjUnlockingKey`. Defaults to `False`.
+            objective (Objective | None): If not `None`, the modular reductions are chosen by `modulo_planner` with
+                this objective, e.g., `"size"` or an `ExecutionCostModel` (see `ModuloPlanner`). Defaults to `None`,
+                i.e., the state of `modulo_planner` is left unchanged.
 
         Returns:
             Script to verify the equation e(A,B) = alpha_beta * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
@@ -329,6 +554,36 @@ class Groth16:
         Notes:
             a_0 = 1.
         """
+        if cache is not None:
+            return self.__from_cache(
+                cache,
+                self.groth16_verifier_proj,
+                executor,
+                locking_key=locking_key,
+                modulo_threshold=modulo_threshold,
+                extractable_inputs=extractable_inputs,
+                max_multipliers=max_multipliers,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                optimise=optimise,
+                is_affine_msm_supplied=is_affine_msm_supplied,
+                objective=objective,
+            )
+
+        if objective is not None:
+            with modulo_planner.active(objective):
+                return self.groth16_verifier_proj(
+                    locking_key=locking_key,
+                    modulo_threshold=modulo_threshold,
+                    extractable_inputs=extractable_inputs,
+                    max_multipliers=max_multipliers,
+                    check_constant=check_constant,
+                    clean_constant=clean_constant,
+                    optimise=optimise,
+                    is_affine_msm_supplied=is_affine_msm_supplied,
+                    executor=executor,
+                )
+
         max_multipliers = (
             max_multipliers if max_multipliers is not None else [self.r] * (len(locking_key.gamma_abc) - 1)
         )
@@ -336,11 +591,12 @@ class Groth16:
         # Elliptic curve arithmetic
         ec_fq = EllipticCurveFqProjective(q=self.pairing_model.modulus, curve_a=self.curve_a, curve_b=self.curve_b)
 
-        out = verify_bottom_constant(self.pairing_model.modulus) if check_constant else Script()
+        out = ScriptFragments(executor, verify_bottom_constant(self.pairing_model.modulus) if check_constant else None)
 
         # stack in:     [q, ..., inverse_miller_loop_triple_pairing, A, B, C, ..., a_2, a_1],
         # stack out:    [q, ..., inverse_miller_loop_triple_pairing, A, B, C, sum_(i=0)^l a_i * gamma_abc[i]]
-        out += ec_fq.msm_with_fixed_bases(
+        out.submit(
+            ec_fq.msm_with_fixed_bases,
             bases=locking_key.gamma_abc[1:],
             max_multipliers=max_multipliers,
             take_modulo=True,
@@ -351,11 +607,11 @@ class Groth16:
         )
 
         # Load gamma_abc[0] to the stack
-        out += nums_to_script(locking_key.gamma_abc[0])
+        out.nums(locking_key.gamma_abc[0])
 
         # if gamma_abc[0] is affine, it is mapped to
         if len(locking_key.gamma_abc[0]) == 2:  # noqa PLR2004
-            out += Script.parse_string("OP_1")
+            out.append_opcodes("OP_1")
 
         # Sum gamma_abc[0] (a_0 = 1)
         out += ec_fq.point_addition_with_unknown_points(
@@ -363,18 +619,24 @@ class Groth16:
         )
 
         # Convert sum_(i=0)^l a_i * gamma_abc[i] in affine coordinates
-        # Compute the inverse of the z coordinate
-        out += self.pairing_model.inverse_fq(
-            take_modulo=True,
-            positive_modulo=False,
-            check_constant=False,
-            clean_constant=False,
-            is_constant_reused=False,
-            rolling_option=1,
-            mod_frequency=modulo_threshold // (self.pairing_model.modulus.bit_length() * 3 + 3),
-        )
-        # Multiply x and y for z^-1
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK OP_MUL OP_FROMALTSTACK")
+        if is_affine_msm_supplied:
+            # stack in:  [q, ..., x', y', x, y, z]
+            # stack out: [q, ..., x', y'] or fail
+            out += self.__verify_affine_coordinates(depth=0)
+        else:
+            # Compute the inverse of the z coordinate
+            out += self.pairing_model.inverse_fq(
+                take_modulo=True,
+                positive_modulo=False,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                rolling_option=1,
+                mod_frequency=modulo_threshold // (self.pairing_model.modulus.bit_length() * 3 + 3),
+                modulo_threshold=modulo_threshold,
+            )
+            # Multiply x and y for z^-1
+            out.append_opcodes("OP_TUCK OP_MUL OP_TOALTSTACK OP_MUL OP_FROMALTSTACK")
 
         # stack in:    [q, ..., inverse_miller_loop_triple_pairing, A, B, C, sum_(i=0)^l a_i * gamma_abc[i]]
         # stack out: [q, ..., 0/1]
@@ -383,16 +645,24 @@ class Groth16:
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=clean_constant,
+            optimise=False,
+            executor=executor,
         )
 
-        return optimise_script(out)
+        return optimise_script(out.to_script()) if optimise else out.to_script()
 
+    @profile_script
+    @check_stack_effect
     def groth16_verifier_proj_with_precomputed_msm(
         self,
         locking_key: Groth16ProjLockingKeyWithPrecomputedMsm,
         modulo_threshold: int,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        optimise: bool = True,
+        cache: ScriptCache | None = None,
+        executor: Executor | None = None,
+        objective: Objective | None = None,
     ) -> Script:
         """Groth16 verifier.
 
@@ -410,6 +680,16 @@ class Groth16:
             modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
             clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            cache (ScriptCache | None): If not `None`, the script is read from `cache` if it was generated before,
+                and stored in it otherwise. Defaults to `None`.
+            executor (Executor | None): If not `None`, the independent sections of the script are generated in
+                `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            objective (Objective | None): If not `None`, the modular reductions are chosen by `modulo_planner` with
+                this objective, e.g., `"size"` or an `ExecutionCostModel` (see `ModuloPlanner`). Defaults to `None`,
+                i.e., the state of `modulo_planner` is left unchanged.
 
         Returns:
             Script to verify the equation e(A,B) = alpha_beta * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
@@ -419,20 +699,44 @@ class Groth16:
         Notes:
             a_0 = 1.
         """
-        out = verify_bottom_constant(self.pairing_model.modulus) if check_constant else Script()
+        if cache is not None:
+            return self.__from_cache(
+                cache,
+                self.groth16_verifier_proj_with_precomputed_msm,
+                executor,
+                locking_key=locking_key,
+                modulo_threshold=modulo_threshold,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                optimise=optimise,
+                objective=objective,
+            )
+
+        if objective is not None:
+            with modulo_planner.active(objective):
+                return self.groth16_verifier_proj_with_precomputed_msm(
+                    locking_key=locking_key,
+                    modulo_threshold=modulo_threshold,
+                    check_constant=check_constant,
+                    clean_constant=clean_constant,
+                    optimise=optimise,
+                    executor=executor,
+                )
+
+        out = ScriptBuilder(verify_bottom_constant(self.pairing_model.modulus) if check_constant else None)
 
         # stack in:  [q, ..., inverse_miller_loop_triple_pairing, A, B, C, sum_(i=0)^l a_i * gamma_abc[i]]
         # stack out: [q, ..., inverse_miller_loop_triple_pairing, A, sum_(i=0)^l a_i * gamma_abc[i], C, B,
         #               -gamma, -delta]
-        out += roll(
+        out.roll(
             position=2 * self.pairing_model.N_POINTS_CURVE - 1, n_elements=self.pairing_model.N_POINTS_CURVE
         )  # Roll C
-        out += roll(
+        out.roll(
             position=2 * self.pairing_model.N_POINTS_CURVE + self.pairing_model.N_POINTS_TWIST - 1,
             n_elements=self.pairing_model.N_POINTS_TWIST,
         )  # Roll B
-        out += nums_to_script(locking_key.minus_gamma)
-        out += nums_to_script(locking_key.minus_delta)
+        out.nums(locking_key.minus_gamma)
+        out.nums(locking_key.minus_delta)
 
         # Compute the triple pairing
         # stack in:  [q, ..., inverse_miller_loop_triple_pairing, A, sum_(i=0)^l a_i * gamma_abc[i], C, B,
@@ -444,17 +748,497 @@ class Groth16:
             check_constant=False,
             clean_constant=clean_constant,
             is_miller_loop_proj=True,
+            optimise=False,
+            executor=executor,
         )
 
         # Verify pairing(A,B) * pairing(sum_(i=0)^(l) a_i * gamma_abc[i], -gamma) * pairing(C, -delta) == alpha_beta
         # stack in:  [q, ..., pairing(A,B) * pairing(sum_(i=0)^(l) a_i * gamma_abc[i], -gamma) * pairing(C, -delta)]
         # stack out: [q, ..., 0/1]
         for i, el in enumerate(locking_key.alpha_beta[::-1]):
-            out += nums_to_script([el])
-            out += (
-                Script.parse_string("OP_EQUAL")
-                if i == len(locking_key.alpha_beta) - 1
-                else Script.parse_string("OP_EQUALVERIFY")
+            out.nums([el])
+            out.append_opcodes("OP_EQUAL" if i == len(locking_key.alpha_beta) - 1 else "OP_EQUALVERIFY")
+
+        return optimise_script(out.to_script()) if optimise else out.to_script()
+
+    @staticmethod
+    def __verify_affine_coordinates(depth: int) -> Script:
+        """Verify that `(x', y')` are the affine coordinates of the projective point `(x, y, z)`.
+
+        The script checks `z != 0`, `y' * z = y` and `x' * z = x` mod `q`.
+
+        Stack input:
+            - stack: [q, ..., x', y', d_1, .., d_depth, x, y, z], `z` reduced modulo `q`
+        Stack output:
+            - stack: [q, ..., x', y', d_1, .., d_depth] or fail
+
+        Args:
+            depth (int): The number of elements between `(x', y')` and `(x, y, z)`.
+        """
+        out = ScriptBuilder()
+        out.append_opcodes("OP_DUP OP_0NOTEQUAL OP_VERIFY")
+        out.pick(position=3 + depth, n_elements=1)
+        out.append_opcodes("OP_OVER OP_MUL OP_ROT OP_SUB")
+        out += is_mod_equal_to(clean_constant=False, target=0, is_verify=True, rolling_option=True)
+        out.pick(position=3 + depth, n_elements=1)
+        out.append_opcodes("OP_MUL OP_SWAP OP_SUB")
+        out += is_mod_equal_to(clean_constant=False, target=0, is_verify=True, rolling_option=True)
+        return out.to_script()
+
+    @staticmethod
+    def __extract_scalar(depth: int, n_steps: int) -> Script:
+        """Extract the scalar from the data of `EllipticCurveFqProjective.unrolled_multiplication`.
+
+        The data is the one generated by `EllipticCurveFqProjectiveUnrolledUnlockingKey` with
+        `fixed_length_unlock=True`, and it is left on the stack.
+
+        Stack input:
+            - stack: [q, ..., marker_a_is_zero, markers, d_1, .., d_depth], `markers` are the `2 * n_steps` markers
+                of the unrolled multiplication
+        Stack output:
+            - stack: [q, ..., marker_a_is_zero, markers, d_1, .., d_depth, a]
+
+        Args:
+            depth (int): The number of elements above the data of the multiplication.
+            n_steps (int): The number of steps of the multiplication, i.e., `log2(max_multiplier)`.
+        """
+        out = ScriptBuilder()
+        out.pick(position=depth + 2 * n_steps - 1, n_elements=2 * n_steps)
+        out.append_opcodes("OP_1")
+        out.append_opcodes(
+            " ".join(["OP_SWAP OP_IF OP_2 OP_MUL OP_SWAP OP_IF OP_1ADD OP_ENDIF OP_ELSE OP_NIP OP_ENDIF"] * n_steps)
+        )
+        # If marker_a_is_zero is set, a = 0
+        out.pick(position=depth + 2 * n_steps + 1, n_elements=1)
+        out.append_opcodes("OP_IF OP_DROP OP_0 OP_ENDIF")
+        return out.to_script()
+
+    @staticmethod
+    def batch_randomiser_max_multipliers(n_proofs: int) -> list[int]:
+        """Return the maximum values of the randomisers returned by `batch_randomisers` for `n_proofs` proofs."""
+        return [2**BATCH_RANDOMISER_BITS] * (n_proofs - 1) + [
+            2 ** (BATCH_RANDOMISER_BITS + (n_proofs - 1).bit_length())
+        ]
+
+    @staticmethod
+    def batch_randomisers(
+        A: list[list[int]],  # noqa: N803
+        B: list[list[int]],  # noqa: N803
+        C: list[list[int]],  # noqa: N803
+        pub: list[list[int]],
+    ) -> list[int]:
+        """Return the randomisers of the batch verification of the proofs `(A[i], B[i], C[i])`.
+
+        The randomisers `rho_1, .., rho_(k-1)` are the first `BATCH_RANDOMISER_BITS` bits of `h_1, .., h_(k-1)`,
+        read as little-endian integers, where `h_0 = SHA256(SHA256(e_1) || .. || SHA256(e_n))` for the elements
+        `e_1, .., e_n` of `A[0], B[0], C[0], pub[0], .., A[k-1], B[k-1], C[k-1], pub[k-1]` (encoded as in the
+        unlocking script), and `h_i = SHA256(h_(i-1))`. The i-th proof is weighted by `rho_i` for `i < k`, and the
+        last one by `1 - (rho_1 + .. + rho_(k-1))`, so that the weights sum to `1`.
+
+        Returns:
+            The list `[rho_1, .., rho_(k-1), m]`, where `m = rho_1 + .. + rho_(k-1) - 1`.
+        """
+        transcript = b"".join(
+            hashlib.sha256(encode_num(element)).digest()
+            for proof in zip(A, B, C, pub, strict=True)
+            for point in proof
+            for element in point
+        )
+        h = hashlib.sha256(transcript).digest()
+        randomisers = []
+        for _ in range(len(A) - 1):
+            h = hashlib.sha256(h).digest()
+            randomisers.append(int.from_bytes(h[: BATCH_RANDOMISER_BITS // 8], "little"))
+        return [*randomisers, sum(randomisers) - 1]
+
+    @profile_script
+    @check_stack_effect
+    def groth16_batch_verifier_proj(
+        self,
+        locking_key: Groth16ProjLockingKey,
+        n_proofs: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        optimise: bool = True,
+        cache: ScriptCache | None = None,
+        executor: Executor | None = None,
+        objective: Objective | None = None,
+    ) -> Script:
+        """Groth16 verifier of `n_proofs` proofs for the same verifying key, with projective coordinates.
+
+        The proofs `(A_i, B_i, C_i)` with public inputs `pub_i` are verified with a random linear combination of their
+        equations: with `L_i = gamma_abc[0] + sum_(j=1)^l pub_i[j] * gamma_abc[j]` and weights `r_i` summing to `1`
+        (see `batch_randomisers`), the script checks
+            prod_i e(r_i * A_i, B_i) * e(sum_i r_i * C_i, -delta) * e(sum_i r_i * L_i, -gamma) = alpha_beta
+        with one multi-pairing (see `multi_pairing`). The weights are derived in script by hashing the proofs and
+        the public inputs, and the scalar multiplications by them are computed with `unrolled_multiplication`.
+        As `sum_i r_i * L_i = gamma_abc[0] + sum_(j=1)^l s_j * gamma_abc[j]` with `s_j = sum_i r_i * pub_i[j]`, a
+        single msm is computed.
+
+        Stack input:
+            - stack:    [q, ..., A_1, B_1, C_1, pub_1, .., A_k, B_k, C_k, pub_k, inverse_miller_output,
+                            r_1 * A_1, .., r_k * A_k, sum_i r_i * C_i, sum_i r_i * L_i,
+                                msm_data, markers(C_k), .., markers(C_1), markers(A_k), .., markers(A_1)]
+                where:
+                - `pub_i = [pub_i[1], .., pub_i[l]]` are the public inputs of the i-th proof
+                - `inverse_miller_output` is the inverse of the product of the Miller loops of the pairing above
+                - the points `r_i * A_i`, `sum_i r_i * C_i` and `sum_i r_i * L_i` are in affine coordinates
+                - `msm_data` is the data of the msm with scalars `s_j` (see `MsmWithFixedBasesProjectiveUnlockingKey`,
+                    with all the scalars extractable)
+                - `markers(P_i)` is the data of the unrolled multiplication of `P_i` by `rho_i`, padded to a fixed
+                    length (see `EllipticCurveFqProjectiveUnrolledUnlockingKey`), where `[rho_1, .., rho_k]` is
+                    returned by `batch_randomisers`
+            - altstack: []
+
+        Stack output:
+            - stack:    [q, ..., True/False]
+            - altstack: []
+
+        Args:
+            locking_key (Groth16ProjLockingKey): Locking key used to generate the verifier. Contains the data of the
+                CRS needed by the verifier.
+            n_proofs (int): The number `k` of proofs. Must be at least `2`.
+            modulo_threshold (int): Bit-length threshold. Values whose bit-length exceeds it are reduced modulo `q`.
+            check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            clean_constant (bool | None): If `True`, remove `q` from the bottom of the stack. Defaults to `None`.
+            optimise (bool): If `True`, the script is simplified with `optimise_script` before being returned. Set it
+                to `False` if the script is embedded in a larger script that is optimised as a whole. Defaults to
+                `True`.
+            cache (ScriptCache | None): If not `None`, the script is read from `cache` if it was generated before,
+                and stored in it otherwise. Defaults to `None`.
+            executor (Executor | None): If not `None`, the independent sections of the script are generated in
+                `executor` (see `ScriptFragments`). The script is the same. Defaults to `None`.
+            objective (Objective | None): If not `None`, the modular reductions are chosen by `modulo_planner` with
+                this objective, e.g., `"size"` or an `ExecutionCostModel` (see `ModuloPlanner`). Defaults to `None`,
+                i.e., the state of `modulo_planner` is left unchanged.
+
+        Returns:
+            Script to verify the `n_proofs` Groth16 proofs.
+
+        Raises:
+            ValueError: If `n_proofs` is smaller than `2`.
+
+        Notes:
+            The unlocking script is generated by `Groth16ProjBatchUnlockingKey`. The points `r_i * A_i`,
+            `sum_i r_i * C_i` and `sum_i r_i * L_i` must not be the point at infinity.
+        """
+        if cache is not None:
+            return self.__from_cache(
+                cache,
+                self.groth16_batch_verifier_proj,
+                executor,
+                locking_key=locking_key,
+                n_proofs=n_proofs,
+                modulo_threshold=modulo_threshold,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                optimise=optimise,
+                objective=objective,
+            )
+
+        if objective is not None:
+            with modulo_planner.active(objective):
+                return self.groth16_batch_verifier_proj(
+                    locking_key=locking_key,
+                    n_proofs=n_proofs,
+                    modulo_threshold=modulo_threshold,
+                    check_constant=check_constant,
+                    clean_constant=clean_constant,
+                    optimise=optimise,
+                    executor=executor,
+                )
+
+        if n_proofs < 2:  # noqa: PLR2004
+            msg = f"The number of proofs must be at least 2, got {n_proofs}"
+            raise ValueError(msg)
+
+        n_points_curve = self.pairing_model.N_POINTS_CURVE
+        n_points_twist = self.pairing_model.N_POINTS_TWIST
+        n_inputs = len(locking_key.gamma_abc) - 1
+        randomiser_steps = [int(log2(m)) for m in self.batch_randomiser_max_multipliers(n_proofs)]
+        msm_steps = int(log2(self.r))
+
+        size_proof = 2 * n_points_curve + n_points_twist + n_inputs
+        size_markers = 2 * sum(2 * steps + 1 for steps in randomiser_steps)
+        size_msm = n_inputs * (2 * msm_steps + 1)
+        size_affine = (n_proofs + 2) * n_points_curve
+        # Number of elements above the proofs in the unlocking script
+        size_data = self.pairing_model.N_ELEMENTS_MILLER_OUTPUT + size_affine + size_msm + size_markers
+
+        ec_fq = EllipticCurveFqProjective(q=self.pairing_model.modulus, curve_a=self.curve_a, curve_b=self.curve_b)
+
+        out = ScriptFragments(executor, verify_bottom_constant(self.pairing_model.modulus) if check_constant else None)
+
+        # Compute the randomisers
+        # stack out: [q, ..., markers(A_1), rho_1, .., rho_(k-1), m]
+        n_elements = n_proofs * size_proof
+        for i in range(n_elements):
+            out.pick(position=size_data + n_elements - i - (i == 0), n_elements=1)
+            out.append_opcodes("OP_SHA256" if i == 0 else "OP_SHA256 OP_CAT")
+        out.append_opcodes("OP_SHA256")
+        for _ in range(n_proofs - 1):
+            out.append_opcodes("OP_SHA256 OP_DUP")
+            out.nums([BATCH_RANDOMISER_BITS // 8])
+            out.append_opcodes("OP_SPLIT OP_DROP 0x00 OP_CAT OP_BIN2NUM OP_SWAP")
+        out.append_opcodes("OP_DROP")
+        out.pick(position=n_proofs - 2, n_elements=n_proofs - 1)
+        out.append_opcodes(" ".join(["OP_ADD"] * (n_proofs - 2) + ["OP_1SUB"]))
+
+        # Check that the unrolled multiplications are by the randomisers
+        # stack in:  [q, ..., markers(A_1), rho_1, .., rho_k]
+        # stack out: [q, ..., markers(A_1), rho_1, .., rho_k] or fail
+        depth = n_proofs
+        for i in list(range(n_proofs)) * 2:
+            out += self.__extract_scalar(depth=depth, n_steps=randomiser_steps[i])
+            out.pick(position=n_proofs - i, n_elements=1)
+            out.append_opcodes("OP_EQUALVERIFY")
+            depth += 2 * randomiser_steps[i] + 1
+
+        # Check the scalars of the msm: s_j = sum_(i=1)^(k-1) rho_i * pub_i[j] - m * pub_k[j] mod r
+        # stack in:  [q, ..., A_1, B_1, C_1, pub_1, .., A_k, B_k, C_k, pub_k, .., markers(A_1), rho_1, .., rho_k]
+        # stack out: [q, ..., A_1, B_1, C_1, .., A_k, B_k, C_k, .., markers(A_1), rho_1, .., rho_k] or fail
+        for j in range(n_inputs):
+            for i in range(n_proofs):
+                out.pick(position=n_proofs - 1 - i + (i > 0), n_elements=1)
+                out.roll(
+                    position=size_data
+                    + n_proofs
+                    + 1
+                    + (i > 0)
+                    + (n_proofs - 1 - i) * (size_proof - j)
+                    + n_inputs
+                    - j
+                    - 1,
+                    n_elements=1,
+                )
+                out.append_opcodes("OP_MUL")
+                if i > 0:
+                    out.append_opcodes("OP_SUB" if i == n_proofs - 1 else "OP_ADD")
+            out.nums([self.r])
+            out.mod(stack_preparation="", is_positive=True, is_constant_reused=False)
+            out += self.__extract_scalar(depth=size_markers + n_proofs + 1 + j * (2 * msm_steps + 1), n_steps=msm_steps)
+            out.append_opcodes("OP_EQUALVERIFY")
+        for _ in range(n_proofs // 2):
+            out.append_opcodes("OP_2DROP")
+        if n_proofs % 2 == 1:
+            out.append_opcodes("OP_DROP")
+
+        # Compute the scalar multiplications by the randomisers
+        # stack in:    [q, ..., A_1, B_1, C_1, .., A_k, B_k, C_k, .., markers(C_k), .., markers(A_1)]
+        # stack out:   [q, ..., B_1, .., B_k, inverse_miller_output, r_1 * A_1, .., sum_i r_i * L_i, msm_data]
+        # altstack out: [rho_1 * A_1, .., rho_k * A_k, rho_1 * C_1, .., rho_k * C_k]
+        size_proof -= n_inputs
+        depth = size_data
+        for is_c in [False, True]:
+            for i in range(n_proofs):
+                # Roll A_i or C_i
+                out.roll(
+                    position=depth + (n_proofs - 1 - i) * size_proof + (n_points_curve - 1 if is_c else size_proof - 1),
+                    n_elements=n_points_curve,
+                )
+                out.append_opcodes("OP_1")
+                out += ec_fq.unrolled_multiplication(
+                    max_multiplier=2 ** randomiser_steps[i],
+                    check_constant=False,
+                    clean_constant=False,
+                    positive_modulo=False,
+                    fixed_length_unlock=True,
+                )
+                out.append_opcodes("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_DROP OP_2DROP")
+                depth -= 2 * randomiser_steps[i] + 1
+            size_proof -= n_points_curve
+
+        # Compute sum_i r_i * L_i = gamma_abc[0] + sum_(j=1)^l s_j * gamma_abc[j]
+        # stack in:  [q, ..., r_1 * A_1, .., sum_i r_i * L_i, msm_data]
+        # stack out: [q, ..., r_1 * A_1, .., sum_i r_i * L_i]
+        out.submit(
+            ec_fq.msm_with_fixed_bases,
+            bases=locking_key.gamma_abc[1:],
+            max_multipliers=[self.r] * n_inputs,
+            take_modulo=True,
+            check_constant=False,
+            clean_constant=False,
+            positive_modulo=False,
+            extractable_scalars=n_inputs,
+        )
+        out.nums(locking_key.gamma_abc[0])
+        if len(locking_key.gamma_abc[0]) == 2:  # noqa PLR2004
+            out.append_opcodes("OP_1")
+        out += ec_fq.point_addition_with_unknown_points(
+            take_modulo=True, positive_modulo=False, check_constant=False, clean_constant=False
+        )
+        out += self.__verify_affine_coordinates(depth=0)
+
+        # Compute sum_i r_i * C_i = sum_(i=1)^(k-1) rho_i * C_i - m * C_k
+        # stack in:    [q, ..., r_1 * A_1, .., sum_i r_i * C_i, sum_i r_i * L_i]
+        # altstack in: [rho_1 * A_1, .., rho_k * A_k, rho_1 * C_1, .., rho_k * C_k]
+        # stack out:   [q, ..., r_1 * A_1, .., sum_i r_i * C_i, sum_i r_i * L_i]
+        # altstack out: [rho_1 * A_1, .., rho_k * A_k]
+        out.append_opcodes("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_SWAP OP_NEGATE OP_SWAP")
+        for _ in range(n_proofs - 1):
+            out.append_opcodes("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += ec_fq.point_addition_with_unknown_points(
+                take_modulo=True, positive_modulo=False, check_constant=False, clean_constant=False
             )
+        out += self.__verify_affine_coordinates(depth=n_points_curve)
+
+        # Check r_i * A_i, where r_k * A_k = - m * A_k
+        # stack in:    [q, ..., r_1 * A_1, .., r_k * A_k, sum_i r_i * C_i, sum_i r_i * L_i]
+        # altstack in: [rho_1 * A_1, .., rho_k * A_k]
+        # stack out:   [q, ..., r_1 * A_1, .., r_k * A_k, sum_i r_i * C_i, sum_i r_i * L_i]
+        for i in range(n_proofs - 1, -1, -1):
+            out.append_opcodes("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            if i == n_proofs - 1:
+                out.append_opcodes("OP_SWAP OP_NEGATE OP_SWAP")
+            out += self.__verify_affine_coordinates(depth=(n_proofs - i + 1) * n_points_curve)
+
+        # stack in:  [q, ..., B_1, .., B_k, inverse_miller_output, r_1 * A_1, .., sum_i r_i * L_i]
+        # stack out: [q, ..., inverse_miller_output, r_1 * A_1, .., sum_i r_i * L_i, B_1, .., B_k, -delta, -gamma]
+        out.roll(
+            position=self.pairing_model.N_ELEMENTS_MILLER_OUTPUT + size_affine + n_proofs * n_points_twist - 1,
+            n_elements=n_proofs * n_points_twist,
+        )
+        out.nums(locking_key.minus_delta)
+        out.nums(locking_key.minus_gamma)
 
-        return optimise_script(out)
+        # stack out: [q, ..., prod_i e(r_i * A_i, B_i) * e(sum_i r_i * C_i, -delta) * e(sum_i r_i * L_i, -gamma)]
+        out += self.pairing_model.multi_pairing(
+            n_pairs=n_proofs + 2,
+            modulo_threshold=modulo_threshold,
+            positive_modulo=True,
+            check_constant=False,
+            clean_constant=clean_constant,
+            optimise=False,
+            executor=executor,
+        )
+
+        # stack out: [q, ..., 0/1]
+        for i, el in enumerate(locking_key.alpha_beta[::-1]):
+            out.nums([el])
+            out.append_opcodes("OP_EQUAL" if i == len(locking_key.alpha_beta) - 1 else "OP_EQUALVERIFY")
+
+        return optimise_script(out.to_script()) if optimise else out.to_script()
+
+    def __template_constants(self, locking_key: LockingKey) -> dict[str, int | bytes]:
+        """Return the constants of `locking_key` pushed by the verifiers, indexed by their path in `locking_key`.
+
+        If `locking_key.has_precomputed_gradients` is `False`, the gradients are not pushed: the locking script only
+        contains their hash commitment, returned as `verification_hash`.
+        """
+        constants = {}
+        for field in fields(locking_key):
+            if field.name == "has_precomputed_gradients":
+                continue
+            if field.name == "gradients_pairings" and not locking_key.has_precomputed_gradients:
+                constants["verification_hash"] = self.__gradients_to_hash_commitment(locking_key=locking_key)
+                continue
+            constants.update(_flatten(field.name, getattr(locking_key, field.name)))
+        return constants
+
+    def groth16_verifier_template(
+        self, verifier: Callable[..., Script], locking_key: LockingKey, **kwargs
+    ) -> "Groth16VerifierTemplate":
+        """Compile the part of a Groth16 verifier that does not depend on the verifying key.
+
+        The verifier is generated once with sentinel values in place of the elements of `locking_key`, and split at
+        their pushes (see `ScriptTemplate`). The template can then be instantiated with any locking key with the
+        same shape as `locking_key`: same type, number of public inputs and value of `has_precomputed_gradients`.
+
+        Args:
+            verifier (Callable[..., Script]): The verifier to compile, e.g., `self.groth16_verifier`.
+            locking_key (LockingKey): A locking key with the shape of the keys with which the template is
+                instantiated. Only its shape is used.
+            **kwargs: The arguments passed to `verifier`, except `locking_key`.
+
+        Returns:
+            The template of the verifier.
+
+        Raises:
+            ValueError: If `msm_window` is passed in `kwargs` and is not `None`, as the interleaved msm hard-codes
+                sums of the elements of the locking key instead of the elements themselves.
+            ValueError: If `fixed_lines` is passed in `kwargs` and is `True`, as the script then hard-codes the lines
+                of `-gamma` and `-delta` instead of the points.
+
+        Example:
+            >>> template = bls12_381.groth16_verifier_template(
+            ...     bls12_381.groth16_verifier, locking_key, modulo_threshold=1600, check_constant=True,
+            ...     clean_constant=True
+            ... )
+            >>> lock = template.instantiate(other_locking_key)
+        """
+        if kwargs.get("msm_window") is not None:
+            msg = "The verifiers with an interleaved msm cannot be compiled to a template"
+            raise ValueError(msg)
+        if kwargs.get("fixed_lines"):
+            msg = "The verifiers with fixed lines cannot be compiled to a template"
+            raise ValueError(msg)
+        sentinel_key = replace(
+            locking_key,
+            **{
+                field.name: _sentinels(field.name, getattr(locking_key, field.name))
+                for field in fields(locking_key)
+                if field.name != "has_precomputed_gradients"
+            },
+        )
+        script = verifier(locking_key=sentinel_key, **kwargs)
+        return Groth16VerifierTemplate(
+            script_template=ScriptTemplate(script, self.__template_constants(sentinel_key)),
+            constants=self.__template_constants,
+        )
+
+
+class Groth16VerifierTemplate:
+    """Groth16 verifier with patchable verifying key.
+
+    Attributes:
+        script_template (ScriptTemplate): The template of the verifier.
+        constants (Callable[[LockingKey], dict[str, int | bytes]]): The function mapping a locking key to the
+            constants pushed in the verifier.
+    """
+
+    def __init__(self, script_template: ScriptTemplate, constants: Callable[[LockingKey], dict[str, int | bytes]]):
+        """Initialise the template.
+
+        Args:
+            script_template (ScriptTemplate): The template of the verifier.
+            constants (Callable[[LockingKey], dict[str, int | bytes]]): The function mapping a locking key to the
+                constants pushed in the verifier.
+        """
+        self.script_template = script_template
+        self.constants = constants
+
+    def instantiate(self, locking_key: LockingKey) -> Script:
+        """Return the verifier for `locking_key`.
+
+        The script is the same as the one generated by the verifier from which the template was compiled.
+
+        Args:
+            locking_key (LockingKey): The locking key of the verifier. It must have the same shape as the key used
+                to compile the template.
+
+        Raises:
+            ValueError: If `locking_key` does not have the shape of the key used to compile the template.
+        """
+        return self.script_template.instantiate(self.constants(locking_key))
+
+
+def _flatten(name: str, value: int | list) -> dict[str, int]:
+    """Flatten the nested lists `value`, indexing the integers by their path starting from `name`."""
+    if isinstance(value, int):
+        return {name: value}
+    out = {}
+    for i, element in enumerate(value):
+        out.update(_flatten(f"{name}[{i}]", element))
+    return out
+
+
+def _sentinels(name: str, value: int | list) -> int | list:
+    """Replace the integers in the nested lists `value` with values derived from their path starting from `name`.
+
+    The sentinels are 256-bit hashes, so they are distinct and they do not coincide with the other constants of the
+    verifiers.
+    """
+    if isinstance(value, int):
+        return int.from_bytes(hashlib.sha256(name.encode()).digest(), "big")
+    return [_sentinels(f"{name}[{i}]", element) for i, element in enumerate(value)]
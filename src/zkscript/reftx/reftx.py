@@ -4,8 +4,13 @@ from tx_engine import SIGHASH, Script
 
 from src.zkscript.groth16.model.groth16 import Groth16
 from src.zkscript.script_types.locking_keys.reftx import RefTxLockingKey
+from src.zkscript.script_types.unlocking_keys.interleaved_msm_with_fixed_bases import (
+    InterleavedMsmWithFixedBasesUnlockingKey,
+)
 from src.zkscript.script_types.unlocking_keys.msm_with_fixed_bases import MsmWithFixedBasesUnlockingKey
-from src.zkscript.script_types.unlocking_keys.msm_with_fixed_bases_projective import MsmWithFixedBasesProjectiveUnlockingKey
+from src.zkscript.script_types.unlocking_keys.msm_with_fixed_bases_projective import (
+    MsmWithFixedBasesProjectiveUnlockingKey,
+)
 from src.zkscript.transaction_introspection.transaction_introspection import TransactionIntrospection
 from src.zkscript.util.utility_scripts import nums_to_script
 
@@ -82,6 +87,8 @@ class RefTx:
         modulo_threshold: int,
         max_multipliers: list[int] | None = None,
         check_constant: bool | None = None,
+        msm_window: int | None = None,
+        msm_glv: bool = False,
     ) -> Script:
         """Return the locking script required by RefTx.
 
@@ -93,15 +100,27 @@ class RefTx:
             max_multipliers (list[int]):  List where each element max_multipliers[i] is the max value of the i-th public
                 statement, disregarding the sighash. If None, it is computed automatically.
             check_constant (bool | None): If `True`, check if `q` is valid before proceeding. Defaults to `None`.
+            msm_window (int | None): If not `None`, the msm of the Groth16 verifier is interleaved, with groups of
+                `msm_window` bases (see `Groth16.groth16_verifier`). Defaults to `None`.
+            msm_glv (bool): If `True`, the interleaved msm uses the endomorphism of G1 (see
+                `Groth16.groth16_verifier`). Defaults to `False`.
 
         Returns:
             The locking script required by RefTx.
 
+        Raises:
+            ValueError: If `msm_window` is not `None` and `locking_key.use_proj_coordinates` is `True`.
+            ValueError: If `msm_glv` is `True` and `msm_window` is `None` (see `Groth16.groth16_verifier`).
+
         Note:
             The public inputs to the RefTx circuit are (l_out, sighash(stx), u_stx). When we talk about
             public inputs above (in the max_multipliers), we only consider u_stx. The max_multipliers for
             sighash(stx) are computed automatically, and l_out is hard-coded in the locking script.
         """
+        if msm_window is not None and locking_key.use_proj_coordinates:
+            msg = "The interleaved msm is only available in affine coordinates"
+            raise ValueError(msg)
+
         # Compute bytes sighash chunks and number of chunks
         bytes_sighash_chunks = self.__bytes_sighash_chunks()
         n_chunks = 32 // bytes_sighash_chunks
@@ -123,6 +142,13 @@ class RefTx:
                 out += MsmWithFixedBasesProjectiveUnlockingKey.extract_scalar_as_unsigned(
                     max_multipliers=max_multipliers, index=i, rolling_option=False
                 )
+            elif msm_window is not None:
+                out += InterleavedMsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned(
+                    max_multipliers=max_multipliers,
+                    index=i,
+                    window=msm_window,
+                    glv=self.groth16_model.glv if msm_glv else None,
+                )
             else:
                 out += MsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned(
                     max_multipliers=max_multipliers, index=i, rolling_option=False
@@ -151,6 +177,8 @@ class RefTx:
                 max_multipliers=max_multipliers,
                 check_constant=check_constant,
                 clean_constant=True,
+                msm_window=msm_window,
+                msm_glv=msm_glv,
             )
         out += Script.parse_string("OP_VERIFY")
 
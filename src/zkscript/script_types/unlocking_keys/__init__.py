@@ -2,10 +2,12 @@
 
 Modules:
     - groth16 - implement class Groth16UnlockingKey, Groth16UnlockingKeyWithPrecomputedMsm.
+    - interleaved_msm_with_fixed_bases - implement class InterleavedMsmWithFixedBasesUnlockingKey.
     - merkle_tree - implement classes MerkleTreeBitFlagsUnlockingKey and MerkleTreeTwoAuxUnlockingKey.
-    - miller_loops- implement classes MillerLoopUnlockingKey and TripleMillerLoopUnlockingKey.
+    - miller_loops- implement classes MillerLoopUnlockingKey, TripleMillerLoopUnlockingKey and
+        MultiMillerLoopProjUnlockingKey.
     - msm_with_fixed_bases - implement class MsmWithFixedBasesUnlockingKey.
-    - pairings - implement classes SinglePairingUnlockingKey and TriplePairingUnlockingKey.
+    - pairings - implement classes SinglePairingUnlockingKey, TriplePairingUnlockingKey and MultiPairingUnlockingKey.
     - unrolled_ec_multiplication - implement class EllipticCurveFqUnrolledUnlockingKey.
     - transaction_introspection - implement classes PushTxUnlockingKey and PushTxBitShiftUnlockingKey.
 """
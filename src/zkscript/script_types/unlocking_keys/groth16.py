@@ -1,5 +1,6 @@
 """Unlocking keys for Groth16."""
 
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from typing import Self
 
@@ -7,8 +8,11 @@ from tx_engine import Script
 
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 from src.zkscript.groth16.model.groth16 import Groth16
+from src.zkscript.script_types.unlocking_keys.interleaved_msm_with_fixed_bases import (
+    InterleavedMsmWithFixedBasesUnlockingKey,
+)
 from src.zkscript.script_types.unlocking_keys.msm_with_fixed_bases import MsmWithFixedBasesUnlockingKey
-from src.zkscript.util.utility_scripts import nums_to_script
+from src.zkscript.util.script_builder import ScriptBuilder
 
 
 @dataclass
@@ -27,8 +31,9 @@ class Groth16UnlockingKey:
                 - gradients_pairings[2]: gradients required to compute w*(-delta)
         inverse_miller_output (list[int]): the inverse of
             miller(A,B) * miller(gamma_abc[0] + \sum_{i >=0} pub[i] * gamma_abc[i+1], -gamma) * miller(C, -delta)
-        msm_key (MsmWithFixedBasesUnlockingKey): Unlocking key required to compute the msm
-            \sum_(i=1)^l pub[i] * gamma_abc[i+1]
+        msm_key (MsmWithFixedBasesUnlockingKey | InterleavedMsmWithFixedBasesUnlockingKey): Unlocking key required
+            to compute the msm \sum_(i=1)^l pub[i] * gamma_abc[i+1]. It is an `InterleavedMsmWithFixedBasesUnlockingKey`
+            for the verifiers generated with `msm_window`.
         gradient_gamma_abc_zero (list[int]): The gradient required to compute the sum
             gamma_abc[0] + \sum_(i=1)^l pub[i] * gamma_abc[i+1]
         has_precomputed_gradients (bool): Flag determining if the precomputed gradients used to compute
@@ -41,7 +46,7 @@ class Groth16UnlockingKey:
     C: list[int]
     gradients_pairings: list[list[list[list[int]]]]
     inverse_miller_output: list[int]
-    msm_key: MsmWithFixedBasesUnlockingKey
+    msm_key: MsmWithFixedBasesUnlockingKey | InterleavedMsmWithFixedBasesUnlockingKey
     gradient_gamma_abc_zero: list[int]
     has_precomputed_gradients: bool = True
 
@@ -121,31 +126,39 @@ class Groth16UnlockingKey:
         """
         ec_fq = EllipticCurveFq(groth16_model.pairing_model.modulus, groth16_model.curve_a, groth16_model.curve_b)
 
-        out = nums_to_script([groth16_model.pairing_model.modulus]) if load_modulus else Script()
+        out = ScriptBuilder()
+        if load_modulus:
+            out.nums([groth16_model.pairing_model.modulus])
+        return self._append_unlocking_script(out, ec_fq, extractable_inputs).to_script()
 
+    def _append_unlocking_script(
+        self, out: ScriptBuilder, ec_over_fq: EllipticCurveFq, extractable_inputs: int = 0
+    ) -> ScriptBuilder:
+        """Append the unlocking script, without the modulus, to `out`.
+
+        Args:
+            out (ScriptBuilder): The builder to which the unlocking script is appended.
+            ec_over_fq (EllipticCurveFq): The instantiation of ec arithmetic over Fq of the Groth16 model.
+            extractable_inputs (int): The number of inputs that are extractable in script. Defaults to `0`.
+        """
         # Load inverse_miller_output inverse
-        out += nums_to_script(self.inverse_miller_output)
+        out.nums(self.inverse_miller_output)
 
         # Load gradients_pairings. If has_precomputed_gradients is `True`, then all the gradients are added
         # to the script. Otherwise only the gradient used to compute w*B is added.
-        for i in range(len(self.gradients_pairings[0]) - 1, -1, -1):
-            for j in range(len(self.gradients_pairings[0][i]) - 1, -1, -1):
-                if self.has_precomputed_gradients:
-                    for k in range(3):
-                        out += nums_to_script(self.gradients_pairings[k][i][j])
-                else:
-                    out += nums_to_script(self.gradients_pairings[0][i][j])
+        _append_gradients_pairings(out, self.gradients_pairings, self.has_precomputed_gradients)
+
         # Load A, B, C
-        out += nums_to_script(self.A)
-        out += nums_to_script(self.B)
-        out += nums_to_script(self.C)
+        out.nums(self.A)
+        out.nums(self.B)
+        out.nums(self.C)
 
         # Sum w/ gamma_abc
-        out += nums_to_script(self.gradient_gamma_abc_zero)
+        out.nums(self.gradient_gamma_abc_zero)
 
         # MSM
         out += self.msm_key.to_unlocking_script(
-            ec_over_fq=ec_fq,
+            ec_over_fq=ec_over_fq,
             load_modulus=False,
             extractable_scalars=extractable_inputs,
         )
@@ -194,27 +207,91 @@ class Groth16UnlockingKeyWithPrecomputedMsm:
                 None, then n = groth16_model.r.
             load_modulus (bool): Whether or not to load the modulus. Defaults to `True`.
         """
-        out = nums_to_script([groth16_model.pairing_model.modulus]) if load_modulus else Script()
+        out = ScriptBuilder()
+        if load_modulus:
+            out.nums([groth16_model.pairing_model.modulus])
+        return self._append_unlocking_script(out).to_script()
 
+    def _append_unlocking_script(
+        self,
+        out: ScriptBuilder,
+        ec_over_fq: EllipticCurveFq | None = None,  # noqa: ARG002
+        extractable_inputs: int = 0,  # noqa: ARG002
+    ) -> ScriptBuilder:
+        """Append the unlocking script, without the modulus, to `out`.
+
+        The signature is the same as `Groth16UnlockingKey._append_unlocking_script`, but `ec_over_fq` and
+        `extractable_inputs` are unused, as the msm is precomputed.
+
+        Args:
+            out (ScriptBuilder): The builder to which the unlocking script is appended.
+            ec_over_fq (EllipticCurveFq | None): Unused.
+            extractable_inputs (int): Unused.
+        """
         # Load inverse_miller_output inverse
-        out += nums_to_script(self.inverse_miller_output)
+        out.nums(self.inverse_miller_output)
 
         # Load gradients_pairings. If has_precomputed_gradients is `True`, then all the gradients are added
         # to the script. Otherwise only the gradient used to compute w*B is added.
-        for i in range(len(self.gradients_pairings[0]) - 1, -1, -1):
-            for j in range(len(self.gradients_pairings[0][i]) - 1, -1, -1):
-                if self.has_precomputed_gradients:
-                    for k in range(3):
-                        out += nums_to_script(self.gradients_pairings[k][i][j])
-                else:
-                    out += nums_to_script(self.gradients_pairings[0][i][j])
+        _append_gradients_pairings(out, self.gradients_pairings, self.has_precomputed_gradients)
 
         # Load A, B, C
-        out += nums_to_script(self.A)
-        out += nums_to_script(self.B)
-        out += nums_to_script(self.C)
+        out.nums(self.A)
+        out.nums(self.B)
+        out.nums(self.C)
 
         # Load precomputed msm
-        out += nums_to_script(self.precomputed_msm)
+        out.nums(self.precomputed_msm)
 
         return out
+
+
+def _append_gradients_pairings(
+    out: ScriptBuilder, gradients_pairings: list[list[list[list[int]]]], has_precomputed_gradients: bool
+) -> None:
+    """Append the gradients required to compute the pairings in the Groth16 verification equation to `out`.
+
+    If `has_precomputed_gradients` is `True`, the gradients of w*B, w*(-gamma) and w*(-delta) are interleaved.
+    Otherwise, only the gradients of w*B are appended.
+    """
+    for i in range(len(gradients_pairings[0]) - 1, -1, -1):
+        for j in range(len(gradients_pairings[0][i]) - 1, -1, -1):
+            if has_precomputed_gradients:
+                for k in range(3):
+                    out.nums(gradients_pairings[k][i][j])
+            else:
+                out.nums(gradients_pairings[0][i][j])
+
+
+def groth16_unlocking_scripts(
+    groth16_model: Groth16,
+    unlocking_keys: Iterable[Groth16UnlockingKey | Groth16UnlockingKeyWithPrecomputedMsm],
+    load_modulus: bool = True,
+    extractable_inputs: int = 0,
+) -> Iterator[Script]:
+    """Generate the unlocking scripts of many proofs verified with the same Groth16 model.
+
+    The scripts are the same as those returned by `to_unlocking_script`, but the state that only depends on
+    `groth16_model` (the elliptic curve arithmetic and the push of the modulus) is built once. The scripts are
+    generated lazily, so that `unlocking_keys` can be a stream of proofs.
+
+    Args:
+        groth16_model (Groth16): The Groth16 script model used to construct the groth16_verifier script.
+        unlocking_keys (Iterable[Groth16UnlockingKey | Groth16UnlockingKeyWithPrecomputedMsm]): The unlocking keys
+            of the proofs.
+        load_modulus (bool): Whether or not to load the modulus. Defaults to `True`.
+        extractable_inputs (int): The number of inputs that are extractable in script. Defaults to `0`. Unused for
+            the keys of type `Groth16UnlockingKeyWithPrecomputedMsm`.
+
+    Yields:
+        The unlocking script of each key in `unlocking_keys`, in order.
+
+    Example:
+        >>> for unlock in groth16_unlocking_scripts(bls12_381, unlocking_keys):
+        ...     broadcast(unlock)
+    """
+    ec_fq = EllipticCurveFq(groth16_model.pairing_model.modulus, groth16_model.curve_a, groth16_model.curve_b)
+    modulus = ScriptBuilder().nums([groth16_model.pairing_model.modulus]).to_bytes() if load_modulus else b""
+    for unlocking_key in unlocking_keys:
+        out = ScriptBuilder(modulus)
+        yield unlocking_key._append_unlocking_script(out, ec_fq, extractable_inputs).to_script()  # noqa: SLF001
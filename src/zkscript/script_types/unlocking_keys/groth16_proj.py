@@ -6,10 +6,14 @@ from typing import Self
 from tx_engine import Script
 
 from src.zkscript.elliptic_curves.ec_operations_fq_projective import EllipticCurveFqProjective
+from src.zkscript.elliptic_curves.util import point_addition, scalar_multiplication, to_affine
 from src.zkscript.groth16.model.groth16 import Groth16
 from src.zkscript.script_types.unlocking_keys.msm_with_fixed_bases_projective import (
     MsmWithFixedBasesProjectiveUnlockingKey,
 )
+from src.zkscript.script_types.unlocking_keys.unrolled_projective_ec_multiplication import (
+    EllipticCurveFqProjectiveUnrolledUnlockingKey,
+)
 from src.zkscript.util.utility_scripts import nums_to_script
 
 
@@ -26,6 +30,8 @@ class Groth16ProjUnlockingKey:
             miller(A,B) * miller(gamma_abc[0] + \sum_{i >=0} pub[i] * gamma_abc[i+1], -gamma) * miller(C, -delta)
         msm_key (MsmWithFixedBasesUnlockingKey): Unlocking key required to compute the msm
             \sum_(i=1)^l pub[i] * gamma_abc[i+1]
+        affine_msm (list[int] | None): The affine coordinates of gamma_abc[0] + \sum_(i=1)^l pub[i] * gamma_abc[i+1],
+            required by the verifiers generated with `is_affine_msm_supplied`. Defaults to `None`.
     """
 
     pub: list[int]
@@ -34,6 +40,7 @@ class Groth16ProjUnlockingKey:
     C: list[int]
     inverse_miller_output: list[int]
     msm_key: MsmWithFixedBasesProjectiveUnlockingKey
+    affine_msm: list[int] | None = None
 
     @staticmethod
     def from_data(
@@ -44,6 +51,7 @@ class Groth16ProjUnlockingKey:
         C: list[int],  # noqa: N803
         max_multipliers: list[int] | None,
         inverse_miller_output: list[int],
+        gamma_abc: list[list[int]] | None = None,
     ) -> Self:
         r"""Construct an instance of `Self` from the provided data.
 
@@ -57,9 +65,24 @@ class Groth16ProjUnlockingKey:
                 multiplication of gamma_abc[i]
             inverse_miller_output (list[int]): the inverse of
                 miller(A,B) * miller(gamma_abc[0] + \sum_{i >=0} pub[i] * gamma_abc[i+1], -gamma) * miller(C, -delta)
+            gamma_abc (list[list[int]] | None): The points gamma_abc of the locking key, in affine or projective
+                coordinates. If not `None`, the affine msm required by the verifiers generated with
+                `is_affine_msm_supplied` is computed. Defaults to `None`.
         """
         max_multipliers = max_multipliers if max_multipliers is not None else [groth16_model.r] * len(pub)
 
+        affine_msm = None
+        if gamma_abc is not None:
+            modulus, curve_a = groth16_model.pairing_model.modulus, groth16_model.curve_a
+            affine_msm = to_affine(gamma_abc[0], modulus)
+            for scalar, base in zip(pub, gamma_abc[1:], strict=True):
+                affine_msm = point_addition(
+                    affine_msm,
+                    scalar_multiplication(scalar, to_affine(base, modulus), modulus, curve_a),
+                    modulus,
+                    curve_a,
+                )
+
         msm_key = MsmWithFixedBasesProjectiveUnlockingKey.from_data(
             scalars=pub,
             max_multipliers=max_multipliers,
@@ -72,6 +95,7 @@ class Groth16ProjUnlockingKey:
             C,
             inverse_miller_output,
             msm_key,
+            affine_msm,
         )
 
     def to_unlocking_script(
@@ -101,6 +125,10 @@ class Groth16ProjUnlockingKey:
         out += nums_to_script(self.B)
         out += nums_to_script(self.C)
 
+        # Load the affine msm
+        if self.affine_msm is not None:
+            out += nums_to_script(self.affine_msm)
+
         out += self.msm_key.to_unlocking_script(
             ec_over_fq=ec_fq,
             load_modulus=False,
@@ -156,3 +184,187 @@ class Groth16ProjUnlockingKeyWithPrecomputedMsm:
         out += nums_to_script(self.precomputed_msm)
 
         return out
+
+
+@dataclass
+class Groth16ProjBatchUnlockingKey:
+    r"""Class encapsulating the data to generate the unlocking script of `groth16_batch_verifier_proj`.
+
+    Attributes:
+        pub (list[list[int]]): `pub[i]` is the list of public statements of the i-th proof.
+        A (list[list[int]]): `A[i]` is the component `A` of the i-th proof.
+        B (list[list[int]]): `B[i]` is the component `B` of the i-th proof.
+        C (list[list[int]]): `C[i]` is the component `C` of the i-th proof.
+        inverse_miller_output (list[int]): the inverse of
+            miller(r_1 * A_1, B_1) * .. * miller(r_k * A_k, B_k) * miller(\sum_i r_i * C_i, -delta) *
+                miller(\sum_i r_i * L_i, -gamma)
+            where `r_i` are the weights of the proofs and `L_i` the msm of the i-th proof (see
+            `Groth16.groth16_batch_verifier_proj`).
+        randomised_points (list[list[int]]): The affine points
+            `[r_1 * A_1, .., r_k * A_k, \sum_i r_i * C_i, \sum_i r_i * L_i]`.
+        randomiser_keys (list[EllipticCurveFqProjectiveUnrolledUnlockingKey]): `randomiser_keys[i]` is the unlocking
+            key required to compute `rho_i * A_i` and `rho_i * C_i`, see `Groth16.batch_randomisers`.
+        msm_key (MsmWithFixedBasesProjectiveUnlockingKey): Unlocking key required to compute the msm
+            \sum_(j=1)^l s_j * gamma_abc[j], where `s_j = \sum_i r_i * pub[i][j-1] mod r`.
+    """
+
+    pub: list[list[int]]
+    A: list[list[int]]
+    B: list[list[int]]
+    C: list[list[int]]
+    inverse_miller_output: list[int]
+    randomised_points: list[list[int]]
+    randomiser_keys: list[EllipticCurveFqProjectiveUnrolledUnlockingKey]
+    msm_key: MsmWithFixedBasesProjectiveUnlockingKey
+
+    @staticmethod
+    def batch_scalars(
+        groth16_model: Groth16,
+        pub: list[list[int]],
+        A: list[list[int]],  # noqa: N803
+        B: list[list[int]],  # noqa: N803
+        C: list[list[int]],  # noqa: N803
+    ) -> tuple[list[int], list[int]]:
+        """Return the weights `[r_1, .., r_k]` of the proofs and the scalars `[s_1, .., s_l]` of the msm.
+
+        The weights are `r_i = rho_i` for `i < k` and `r_k = -m`, see `Groth16.batch_randomisers`.
+        """
+        randomisers = groth16_model.batch_randomisers(A, B, C, pub)
+        weights = [*randomisers[:-1], -randomisers[-1]]
+        scalars = [
+            sum(weight * statements[j] for weight, statements in zip(weights, pub, strict=True)) % groth16_model.r
+            for j in range(len(pub[0]))
+        ]
+        return weights, scalars
+
+    @staticmethod
+    def batch_points(
+        groth16_model: Groth16,
+        pub: list[list[int]],
+        A: list[list[int]],  # noqa: N803
+        B: list[list[int]],  # noqa: N803
+        C: list[list[int]],  # noqa: N803
+        gamma_abc: list[list[int]],
+    ) -> list[list[int]]:
+        r"""Return the affine points `[r_1 * A_1, .., r_k * A_k, \sum_i r_i * C_i, \sum_i r_i * L_i]`.
+
+        These are the points of G1 of the Miller loops computed by `groth16_batch_verifier_proj`, to be paired with
+        `[B_1, .., B_k, -delta, -gamma]`.
+
+        Args:
+            groth16_model (Groth16): The Groth16 script model used to construct the verifier.
+            pub (list[list[int]]): `pub[i]` is the list of public statements of the i-th proof.
+            A (list[list[int]]): `A[i]` is the component `A` of the i-th proof.
+            B (list[list[int]]): `B[i]` is the component `B` of the i-th proof.
+            C (list[list[int]]): `C[i]` is the component `C` of the i-th proof.
+            gamma_abc (list[list[int]]): The points gamma_abc of the locking key, in affine or projective
+                coordinates.
+        """
+        modulus, curve_a = groth16_model.pairing_model.modulus, groth16_model.curve_a
+        weights, scalars = Groth16ProjBatchUnlockingKey.batch_scalars(groth16_model, pub, A, B, C)
+
+        def weighted(weight: int, point: list[int]) -> list[int] | None:
+            out = scalar_multiplication(abs(weight), point, modulus, curve_a)
+            return out if weight >= 0 or out is None else [out[0], -out[1] % modulus]
+
+        randomised_a = [weighted(weight, a) for weight, a in zip(weights, A, strict=True)]
+        randomised_c = None
+        for weight, c in zip(weights, C, strict=True):
+            randomised_c = point_addition(randomised_c, weighted(weight, c), modulus, curve_a)
+        randomised_msm = to_affine(gamma_abc[0], modulus)
+        for scalar, base in zip(scalars, gamma_abc[1:], strict=True):
+            randomised_msm = point_addition(
+                randomised_msm,
+                scalar_multiplication(scalar, to_affine(base, modulus), modulus, curve_a),
+                modulus,
+                curve_a,
+            )
+
+        return [*randomised_a, randomised_c, randomised_msm]
+
+    @staticmethod
+    def from_data(
+        groth16_model: Groth16,
+        pub: list[list[int]],
+        A: list[list[int]],  # noqa: N803
+        B: list[list[int]],  # noqa: N803
+        C: list[list[int]],  # noqa: N803
+        inverse_miller_output: list[int],
+        gamma_abc: list[list[int]],
+    ) -> Self:
+        r"""Construct an instance of `Self` from the provided data.
+
+        Args:
+            groth16_model (Groth16): The Groth16 script model used to construct the verifier.
+            pub (list[list[int]]): `pub[i]` is the list of public statements of the i-th proof.
+            A (list[list[int]]): `A[i]` is the component `A` of the i-th proof.
+            B (list[list[int]]): `B[i]` is the component `B` of the i-th proof.
+            C (list[list[int]]): `C[i]` is the component `C` of the i-th proof.
+            inverse_miller_output (list[int]): the inverse of the product of the Miller loops of the points returned
+                by `batch_points` with `[B_1, .., B_k, -delta, -gamma]`.
+            gamma_abc (list[list[int]]): The points gamma_abc of the locking key, in affine or projective
+                coordinates.
+        """
+        randomisers = groth16_model.batch_randomisers(A, B, C, pub)
+        randomiser_keys = [
+            EllipticCurveFqProjectiveUnrolledUnlockingKey(P=None, a=randomiser, max_multiplier=multiplier)
+            for randomiser, multiplier in zip(
+                randomisers, groth16_model.batch_randomiser_max_multipliers(len(A)), strict=True
+            )
+        ]
+        _, scalars = Groth16ProjBatchUnlockingKey.batch_scalars(groth16_model, pub, A, B, C)
+        msm_key = MsmWithFixedBasesProjectiveUnlockingKey.from_data(
+            scalars=scalars,
+            max_multipliers=[groth16_model.r] * len(scalars),
+        )
+
+        return Groth16ProjBatchUnlockingKey(
+            pub,
+            A,
+            B,
+            C,
+            inverse_miller_output,
+            Groth16ProjBatchUnlockingKey.batch_points(groth16_model, pub, A, B, C, gamma_abc),
+            randomiser_keys,
+            msm_key,
+        )
+
+    def to_unlocking_script(
+        self,
+        groth16_model: Groth16,
+        load_modulus: bool = True,
+    ) -> Script:
+        """Return the script needed to execute the groth16_batch_verifier_proj script.
+
+        Args:
+            groth16_model (Groth16): The Groth16 script model used to construct the verifier.
+            load_modulus (bool): Whether or not to load the modulus. Defaults to `True`.
+        """
+        ec_fq = EllipticCurveFqProjective(
+            groth16_model.pairing_model.modulus, groth16_model.curve_a, groth16_model.curve_b
+        )
+
+        out = nums_to_script([groth16_model.pairing_model.modulus]) if load_modulus else Script()
+
+        # Load the proofs and their public statements
+        for a, b, c, statements in zip(self.A, self.B, self.C, self.pub, strict=True):
+            out += nums_to_script([*a, *b, *c, *statements])
+
+        # Load inverse_miller_output inverse
+        out += nums_to_script(self.inverse_miller_output)
+
+        # Load the randomised points
+        for point in self.randomised_points:
+            out += nums_to_script(point)
+
+        out += self.msm_key.to_unlocking_script(
+            ec_over_fq=ec_fq,
+            load_modulus=False,
+            extractable_scalars=len(self.msm_key.max_multipliers),
+        )
+
+        # Load the multiplications by the randomisers, first those of C_k, .., C_1, then those of A_k, .., A_1
+        for key in self.randomiser_keys[::-1] * 2:
+            out += key.to_unlocking_script(ec_over_fq=ec_fq, fixed_length_unlock=True, load_modulus=False, load_P=False)
+
+        return out
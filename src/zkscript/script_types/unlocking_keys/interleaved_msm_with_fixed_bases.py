@@ -0,0 +1,232 @@
+"""Unlocking key for `interleaved_msm_with_fixed_bases` in EllipticCurveFq."""
+
+from dataclasses import dataclass
+from typing import Self
+
+from tx_engine import Script
+
+from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
+from src.zkscript.elliptic_curves.util import (
+    glv_bases,
+    glv_max_multipliers,
+    glv_scalars,
+    gradient,
+    interleaved_groups,
+    interleaved_rows,
+    interleaved_table,
+    point_addition,
+)
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_scripts import nums_to_script
+
+
+@dataclass
+class InterleavedMsmWithFixedBasesUnlockingKey:
+    """Unlocking key for the interleaved multi scalar multiplication with fixed bases.
+
+    Args:
+        scalars (list[int]): `scalars[i]` is the scalar by which the i-th base is multiplied.
+        max_multipliers (list[int]): `max_multipliers[i]` is the maximum value of the i-th scalar.
+        window (int): The maximum number of bases in a group, as in the locking script.
+        gradients (list[list[int]]): The gradients of the operations of the double-and-add loop, in the order in
+            which they are consumed by the script. The gradients of the additions that are not executed (`s = 0`)
+            are empty lists.
+        gradient_offset (list[int]): The gradient required to subtract the offset from the output of the loop.
+            Empty if the result of the multi scalar multiplication is the point at infinity.
+        glv (tuple[int, int] | None): The pair `(beta, lambda)` passed to the locking script, or `None`. If not
+            `None`, the data is the one of the msm of the bases `[P_1, phi(P_1), .., P_n, phi(P_n)]` with the scalars
+            `glv_scalars(scalars, glv)`. Defaults to `None`.
+
+    Notes:
+        The data of every step of the loop is, in the order in which it is consumed: the gradient of the doubling
+        (except for the first step), and, for every group taking part in the step, the selector `s` of the sum of
+        bases to add and the gradient of the addition. See `EllipticCurveFq.interleaved_msm_with_fixed_bases`.
+    """
+
+    scalars: list[int]
+    max_multipliers: list[int]
+    window: int
+    gradients: list[list[int]]
+    gradient_offset: list[int]
+    glv: tuple[int, int] | None = None
+
+    @staticmethod
+    def from_data(
+        ec_over_fq: EllipticCurveFq,
+        scalars: list[int],
+        bases: list[list[int]],
+        max_multipliers: list[int],
+        window: int = 4,
+        glv: tuple[int, int] | None = None,
+    ) -> Self:
+        """Construct an instance of `Self`, computing the gradients required by the script.
+
+        Args:
+            ec_over_fq (EllipticCurveFq): The instantiation of ec arithmetic over Fq used to construct the
+                interleaved_msm_with_fixed_bases locking script.
+            scalars (list[int]): `scalars[i]` is the scalar by which the i-th base is multiplied.
+            bases (list[list[int]]): The bases hard-coded in the locking script.
+            max_multipliers (list[int]): `max_multipliers[i]` is the maximum value of the i-th scalar.
+            window (int): The maximum number of bases in a group. Defaults to `4`.
+            glv (tuple[int, int] | None): The pair `(beta, lambda)` passed to the locking script, or `None`.
+                Defaults to `None`.
+
+        Raises:
+            ValueError: If the lengths of `scalars`, `bases` and `max_multipliers` differ, if a scalar is negative
+                or larger than its max multiplier, or if the loop adds `T` or `-T` to `T` (the bases have a linear
+                relation with small coefficients), which the script rejects.
+        """
+        if not len(scalars) == len(bases) == len(max_multipliers):
+            msg = "The number of scalars, of bases and of max multipliers must be the same"
+            raise ValueError(msg)
+        for i, (scalar, multiplier) in enumerate(zip(scalars, max_multipliers, strict=True)):
+            if not 0 <= scalar <= multiplier:
+                msg = f"The scalar {i} must be between 0 and {multiplier}, got {scalar}"
+                raise ValueError(msg)
+
+        modulus, curve_a = ec_over_fq.modulus, ec_over_fq.curve_a
+        selectors = InterleavedMsmWithFixedBasesUnlockingKey.__selectors(scalars, max_multipliers, window, glv)
+        if glv is not None:
+            bases = glv_bases(bases, glv, modulus)
+        table = interleaved_table(bases, window, modulus, curve_a)
+
+        gradients = []
+        T = point_addition(bases[0], bases[0], modulus, curve_a)
+        for j, row in enumerate(selectors):
+            if j > 0:
+                gradients.append([gradient(T, T, modulus, curve_a)])
+                T = point_addition(T, T, modulus, curve_a)
+            for g, s in row:
+                if s != 0:
+                    if T[0] == table[g][s - 1][0]:
+                        msg = f"The step {j} of the loop adds T or -T to T"
+                        raise ValueError(msg)
+                    gradients.append([gradient(T, table[g][s - 1], modulus, curve_a)])
+                    T = point_addition(T, table[g][s - 1], modulus, curve_a)
+                else:
+                    gradients.append([])
+
+        # Subtract the offset 2^N * bases[0]
+        offset = point_addition(bases[0], bases[0], modulus, curve_a)
+        for _ in range(len(selectors) - 1):
+            offset = point_addition(offset, offset, modulus, curve_a)
+        offset = [offset[0], -offset[1] % modulus]
+        gradient_offset = (
+            [] if point_addition(T, offset, modulus, curve_a) is None else [gradient(T, offset, modulus, curve_a)]
+        )
+
+        return InterleavedMsmWithFixedBasesUnlockingKey(
+            scalars=scalars,
+            max_multipliers=max_multipliers,
+            window=window,
+            gradients=gradients,
+            gradient_offset=gradient_offset,
+            glv=glv,
+        )
+
+    def to_unlocking_script(
+        self,
+        ec_over_fq: EllipticCurveFq,
+        load_modulus: bool = True,
+        extractable_scalars: int = 0,  # noqa: ARG002
+    ) -> Script:
+        """Return the unlocking script required by the interleaved_msm_with_fixed_bases script.
+
+        Args:
+            ec_over_fq (EllipticCurveFq): The instantiation of ec arithmetic over Fq used to
+                construct the interleaved_msm_with_fixed_bases locking script.
+            load_modulus (bool): Whether or not to load the modulus on the stack. Defaults to `True`.
+            extractable_scalars (int): Unused, all the scalars are extractable (see `extract_scalar_as_unsigned`).
+                The argument is accepted for compatibility with `MsmWithFixedBasesUnlockingKey`.
+        """
+        selectors = self.__selectors(self.scalars, self.max_multipliers, self.window, self.glv)
+        gradients = iter(self.gradients)
+
+        # The elements of the data, in the order in which they are consumed
+        data = []
+        for j, row in enumerate(selectors):
+            if j > 0:
+                data.append(next(gradients))
+            for _, s in row:
+                data.append([s])
+                data.append(next(gradients))
+
+        out = ScriptBuilder()
+        if load_modulus:
+            out.nums([ec_over_fq.modulus])
+        out.nums(self.gradient_offset)
+        for element in data[::-1]:
+            out.nums(element or [0])
+
+        return out.to_script()
+
+    @staticmethod
+    def extract_scalar_as_unsigned(
+        max_multipliers: list[int], index: int, window: int, glv: tuple[int, int] | None = None
+    ) -> Script:
+        """Return the script that extracts the scalar at position `index` as an unsigned number.
+
+        The bits of the scalar are read from the selectors in the data of the script, which is left untouched. With
+        `glv`, the scalar is recomposed as `k + lambda * k'` from the two scalars in which it is decomposed.
+
+        Stack input:
+            - stack:    [.., data]
+            - altstack: []
+
+        Stack output:
+            - stack:    [.., data, scalars[index]]
+            - altstack: []
+
+        Args:
+            max_multipliers (list[int]): `max_multipliers[i]` is the maximum value of the i-th scalar.
+            index (int): The index of the scalar to extract.
+            window (int): The maximum number of bases in a group, as in the locking script.
+            glv (tuple[int, int] | None): The pair `(beta, lambda)` passed to the locking script, or `None`.
+                Defaults to `None`.
+        """
+        assert index < len(max_multipliers), "Index out of bounds"
+
+        if glv is not None:
+            multipliers = glv_max_multipliers(max_multipliers, glv)
+            extract = InterleavedMsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned
+            # stack out: [.., data, k + lambda * k']
+            out = extract(multipliers, 2 * index, window) + Script.parse_string("OP_TOALTSTACK")
+            out += extract(multipliers, 2 * index + 1, window)
+            out += nums_to_script([glv[1]]) + Script.parse_string("OP_MUL OP_FROMALTSTACK OP_ADD")
+            return out
+
+        group, bit = divmod(index, window)
+        out = Script.parse_string("OP_0")
+        position = 0
+        for j, groups in enumerate(interleaved_rows(max_multipliers, window)):
+            position += j > 0
+            for g in groups:
+                if g == group:
+                    # stack out: [.., data, 2 * acc + (s >> bit) % 2]
+                    out += Script.parse_string("OP_DUP OP_ADD") + nums_to_script([position + 1])
+                    out += Script.parse_string("OP_PICK")
+                    if bit > 0:
+                        out += nums_to_script([1 << bit]) + Script.parse_string("OP_DIV")
+                    out += Script.parse_string("OP_2 OP_MOD OP_ADD")
+                position += 2
+
+        return out
+
+    @staticmethod
+    def __selectors(
+        scalars: list[int], max_multipliers: list[int], window: int, glv: tuple[int, int] | None
+    ) -> list[list[tuple[int, int]]]:
+        """Return the pairs `(g, s)` of the groups taking part in every step of the loop and of their selectors.
+
+        The b-th bit of `s` is the bit processed at the step of the scalar of the b-th base of the g-th group. With
+        `glv`, the scalars are those of `glv_scalars(scalars, glv)`.
+        """
+        if glv is not None:
+            scalars, max_multipliers = glv_scalars(scalars, glv), glv_max_multipliers(max_multipliers, glv)
+        groups = interleaved_groups(len(scalars), window)
+        rows = interleaved_rows(max_multipliers, window)
+        selectors = []
+        for j, row in enumerate(rows):
+            bit = len(rows) - 1 - j
+            selectors.append([(g, sum((scalars[i] >> bit & 1) << b for b, i in enumerate(groups[g]))) for g in row])
+        return selectors
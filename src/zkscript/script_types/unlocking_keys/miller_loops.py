@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from tx_engine import Script
 
 from src.zkscript.bilinear_pairings.model.model_definition import PairingModel
+from src.zkscript.bilinear_pairings.model.multi_miller_loop_proj import hybrid_gradients_order
 from src.zkscript.util.utility_scripts import nums_to_script
 
 
@@ -54,12 +55,15 @@ class TripleMillerLoopUnlockingKey:
             w is the integer defining the Miller function f_w s.t. miller(P[i],Q[i]) = f_{w,Q[i]}(P[i]),
             gradients[i] is the list of gradients needed to compute w*Q[i].
         has_precomputed_gradients (bool): Whether the precomputed gradients are in the unloking key.
+        has_fixed_arguments (bool): Whether `Q[1]` and `Q[2]` are hard-coded in the locking script (see the argument
+            `fixed_arguments` of `triple_miller_loop`), in which case they are not in the unlocking script.
     """
 
     P: list[list[int]]
     Q: list[list[int]]
     gradients: list[list[list[list[int]]]]
     has_precomputed_gradients: bool = True
+    has_fixed_arguments: bool = False
 
     def to_unlocking_script(self, pairing_model: PairingModel) -> Script:
         """Return the unlocking script required to execute the `pairing_model.triple_miller_loop` method.
@@ -81,7 +85,7 @@ class TripleMillerLoopUnlockingKey:
                     out += nums_to_script(self.gradients[0][i][j])
         for i in range(3):
             out += nums_to_script(self.P[i])
-        for i in range(3):
+        for i in range(1 if self.has_fixed_arguments else 3):
             out += nums_to_script(self.Q[i])
 
         return out
@@ -117,3 +121,112 @@ class TripleMillerLoopProjUnlockingKey:
             out += nums_to_script(self.Q[i])
 
         return out
+
+
+@dataclass
+class MultiMillerLoopProjUnlockingKey:
+    r"""Class with the data to generate an unlocking script for the multi Miller loop in projective coordinates.
+
+    Attributes:
+        P (list[list[int]]): The points P for which the script computes \prod_i miller(P[i],Q[i])
+        Q (list[list[int]]): The points Q for which the script computes \prod_i miller(P[i],Q[i])
+    """
+
+    P: list[list[int]]
+    Q: list[list[int]]
+
+    def to_unlocking_script(self, pairing_model: PairingModel) -> Script:
+        """Return the unlocking script required to execute the `pairing_model.multi_miller_loop_proj` method.
+
+        Args:
+            pairing_model (PairingModel): The pairing model over which the Miller loop is computed.
+
+        Returns:
+            Script pushing [self.P, self.Q] on the stack.
+        """
+        out = nums_to_script([pairing_model.modulus])
+        for point in self.P:
+            out += nums_to_script(point)
+        for point in self.Q:
+            out += nums_to_script(point)
+
+        return out
+
+
+def hybrid_gradients_to_script(
+    pairing_model: PairingModel,
+    gradients: list[list[list[list[int]]]],
+    affine_steps: list[int],
+    has_precomputed_gradients: list[bool] | None = None,
+) -> Script:
+    """Return the script pushing the gradients read from the unlocking script by `pairing_model.hybrid_miller_loop`.
+
+    Args:
+        pairing_model (PairingModel): The pairing model over which the Miller loop is computed.
+        gradients (list[list[list[list[int]]]]): `gradients[j]` is the list of gradients required to compute
+            w * Q[j], as in `TripleMillerLoopUnlockingKey`.
+        affine_steps (list[int]): The number of steps of each Miller loop computed in affine coordinates.
+        has_precomputed_gradients (list[bool] | None): Whether the gradients of each Miller loop are hard-coded in the
+            locking script. Defaults to `None`, i.e., none of them is.
+
+    Returns:
+        Script pushing the gradients in the order given by `hybrid_gradients_order` (the first one on top).
+    """
+    has_precomputed_gradients = (
+        [False] * len(affine_steps) if has_precomputed_gradients is None else has_precomputed_gradients
+    )
+    out = Script()
+    for step, k, j in reversed(
+        hybrid_gradients_order(
+            pairing_model.exp_miller_loop,
+            affine_steps,
+            has_precomputed_gradients,
+            pairing_model.frobenius_twisted_curve is not None,
+        )
+    ):
+        out += nums_to_script(gradients[j][step][k])
+    return out
+
+
+@dataclass
+class HybridMillerLoopUnlockingKey:
+    r"""Class with the data to generate an unlocking script for the hybrid Miller loop.
+
+    Attributes:
+        P (list[list[int]]): The points P for which the script computes \prod_i miller(P[i],Q[i])
+        Q (list[list[int]]): The points Q for which the script computes \prod_i miller(P[i],Q[i])
+        gradients (list[list[list[list[int]]]]): The list of gradients required to compute w * Q[i], where
+            w is the integer defining the Miller function f_w s.t. miller(P[i],Q[i]) = f_{w,Q[i]}(P[i]),
+            gradients[i] is the list of gradients needed to compute w*Q[i].
+        affine_steps (list[int]): The number of steps of each Miller loop computed in affine coordinates (see the
+            argument `affine_steps` of `hybrid_miller_loop`).
+        has_precomputed_gradients (list[bool] | None): Whether the gradients of each Miller loop are hard-coded in the
+            locking script, in which case they are not in the unlocking script. Defaults to `None`, i.e., none of
+            them is.
+    """
+
+    P: list[list[int]]
+    Q: list[list[int]]
+    gradients: list[list[list[list[int]]]]
+    affine_steps: list[int]
+    has_precomputed_gradients: list[bool] | None = None
+
+    def to_unlocking_script(self, pairing_model: PairingModel) -> Script:
+        """Return the unlocking script required to execute the `pairing_model.hybrid_miller_loop` method.
+
+        Args:
+            pairing_model (PairingModel): The pairing model over which the Miller loop is computed.
+
+        Returns:
+            Script pushing [gradients, self.P, self.Q] on the stack.
+        """
+        out = nums_to_script([pairing_model.modulus])
+        out += hybrid_gradients_to_script(
+            pairing_model, self.gradients, self.affine_steps, self.has_precomputed_gradients
+        )
+        for point in self.P:
+            out += nums_to_script(point)
+        for point in self.Q:
+            out += nums_to_script(point)
+
+        return out
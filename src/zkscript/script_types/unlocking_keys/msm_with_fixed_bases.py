@@ -9,7 +9,8 @@ from tx_engine import Script
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 from src.zkscript.script_types.stack_elements import StackBaseElement
 from src.zkscript.script_types.unlocking_keys.unrolled_ec_multiplication import EllipticCurveFqUnrolledUnlockingKey
-from src.zkscript.util.utility_scripts import bool_to_moving_function, move, nums_to_script
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_scripts import bool_to_moving_function, move
 
 
 @dataclass
@@ -73,11 +74,13 @@ class MsmWithFixedBasesUnlockingKey:
         n_keys = len(self.scalar_multiplications_keys)
         assert extractable_scalars <= n_keys, "Index out of bounds"
 
-        out = nums_to_script([ec_over_fq.modulus]) if load_modulus else Script()
+        out = ScriptBuilder()
+        if load_modulus:
+            out.nums([ec_over_fq.modulus])
 
         # Load the gradients for the additions
         for gradient in self.gradients_additions[::-1]:
-            out += nums_to_script(gradient) if len(gradient) != 0 else Script()
+            out.nums(gradient)
 
         # Load the unlocking scripts for the scalar multiplications
         for i, key in enumerate(self.scalar_multiplications_keys[::-1]):
@@ -88,7 +91,7 @@ class MsmWithFixedBasesUnlockingKey:
                 load_P=False,
             )
 
-        return out
+        return out.to_script()
 
     @staticmethod
     def extract_scalar_as_unsigned(max_multipliers: list[int], index: int, rolling_option: bool) -> Script:
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from tx_engine import Script
 
 from src.zkscript.bilinear_pairings.model.model_definition import PairingModel
+from src.zkscript.script_types.unlocking_keys.miller_loops import hybrid_gradients_to_script
 from src.zkscript.util.utility_scripts import nums_to_script
 
 
@@ -83,6 +84,8 @@ class TriplePairingUnlockingKey:
         inverse_miller_loop (list[int]): the inverse of \prod_i miller(P[i],Q[i]).
         has_precomputed_gradients (bool): Whether the precomputed gradients are in the unloking key.
         is_miller_loop_proj (bool): Whether the Miller loop uses projective coordinates.
+        has_fixed_arguments (bool): Whether `Q[1]` and `Q[2]` are hard-coded in the locking script (see the argument
+            `fixed_arguments` of `triple_pairing`), in which case they are not in the unlocking script.
     """
 
     P: list[list[int]]
@@ -91,6 +94,7 @@ class TriplePairingUnlockingKey:
     inverse_miller_output: list[int] | None
     has_precomputed_gradients: bool = True
     is_miller_loop_proj: bool = False
+    has_fixed_arguments: bool = False
 
     def to_unlocking_script(self, pairing_model: PairingModel, load_modulus: bool = True) -> Script:
         """Returns a script containing the data required to execute the `pairing_model.single_pairing` method.
@@ -119,7 +123,56 @@ class TriplePairingUnlockingKey:
 
         for i in range(3):
             out += nums_to_script(self.P[i])
-        for i in range(3):
+        for i in range(1 if self.has_fixed_arguments else 3):
             out += nums_to_script(self.Q[i])
 
         return out
+
+
+@dataclass
+class MultiPairingUnlockingKey:
+    r"""Class encapsulating the data required to generate an unlocking script for the calculation of a multi pairing.
+
+    Attributes:
+        P (list[list[int]]): The points P for which the script computes \prod_i pairing(P[i],Q[i])
+        Q (list[list[int]]): The points Q for which the script computes \prod_i pairing(P[i],Q[i])
+        inverse_miller_output (list[int]): the inverse of \prod_i miller(P[i],Q[i]).
+        gradients (list[list[list[list[int]]]] | None): The gradients required to compute w * Q[i], if some steps of
+            the Miller loops are computed in affine coordinates (see `HybridMillerLoopUnlockingKey`). Defaults to
+            `None`.
+        affine_steps (list[int] | None): The number of steps of each Miller loop computed in affine coordinates (see
+            the argument `affine_steps` of `multi_pairing`). Defaults to `None`, i.e., none.
+        has_precomputed_gradients (list[bool] | None): Whether the gradients of each Miller loop are hard-coded in the
+            locking script. Defaults to `None`, i.e., none of them is.
+    """
+
+    P: list[list[int]]
+    Q: list[list[int]]
+    inverse_miller_output: list[int]
+    gradients: list[list[list[list[int]]]] | None = None
+    affine_steps: list[int] | None = None
+    has_precomputed_gradients: list[bool] | None = None
+
+    def to_unlocking_script(self, pairing_model: PairingModel, load_modulus: bool = True) -> Script:
+        """Returns a script containing the data required to execute the `pairing_model.multi_pairing` method.
+
+        Args:
+            pairing_model (PairingModel): The pairing model over which the Miller loop is computed.
+            load_modulus (bool): Whether or not to load the modulus on the stack. Defaults to `True`.
+
+        Returns:
+            Script pushing [(miller(P[0],Q[0]) * .. * miller(P[n-1],Q[n-1]))^-1, gradients, self.P, self.Q] on the
+            stack, where `gradients` are the gradients of the affine steps (see `HybridMillerLoopUnlockingKey`).
+        """
+        out = nums_to_script([pairing_model.modulus]) if load_modulus else Script()
+        out += nums_to_script(self.inverse_miller_output)
+        if self.affine_steps is not None:
+            out += hybrid_gradients_to_script(
+                pairing_model, self.gradients, self.affine_steps, self.has_precomputed_gradients
+            )
+        for point in self.P:
+            out += nums_to_script(point)
+        for point in self.Q:
+            out += nums_to_script(point)
+
+        return out
@@ -7,7 +7,8 @@ from tx_engine import Script
 
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 from src.zkscript.script_types.stack_elements import StackBaseElement
-from src.zkscript.util.utility_scripts import bool_to_moving_function, move, nums_to_script
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_scripts import bool_to_moving_function, move
 
 
 @dataclass
@@ -111,38 +112,40 @@ class EllipticCurveFqUnrolledUnlockingKey:
         """
         M = int(log2(self.max_multiplier))
 
-        out = nums_to_script([ec_over_fq.modulus]) if load_modulus else Script()
+        out = ScriptBuilder()
+        if load_modulus:
+            out.nums([ec_over_fq.modulus])
 
         # Add the gradients
         if self.a == 0:
-            out += Script.parse_string("OP_1") + Script.parse_string(
-                " ".join(["OP_0 OP_0 OP_0 OP_0"] * M if fixed_length_unlock else ["OP_0"] * M)
-            )
+            out.append_opcodes("OP_1")
+            out.append_opcodes(" ".join(["OP_0 OP_0 OP_0 OP_0"] * M if fixed_length_unlock else ["OP_0"] * M))
         else:
             exp_a = [int(bin(self.a)[j]) for j in range(2, len(bin(self.a)))][::-1]
 
             N = len(exp_a) - 1
 
             # Marker marker_a_equal_zero
-            out += Script.parse_string("OP_0")
+            out.append_opcodes("OP_0")
 
             # Load the gradients and the markers
             for j in range(len(self.gradients) - 1, -1, -1):
                 if exp_a[-j - 2] == 1:
-                    out += nums_to_script(self.gradients[j][1]) + Script.parse_string("OP_1")
-                    out += nums_to_script(self.gradients[j][0]) + Script.parse_string("OP_1")
+                    out.nums(self.gradients[j][1]).append_opcodes("OP_1")
+                    out.nums(self.gradients[j][0]).append_opcodes("OP_1")
                 else:
-                    out += Script.parse_string("OP_0 OP_0" if fixed_length_unlock else "OP_0")
-                    out += nums_to_script(self.gradients[j][0])
-                    out += Script.parse_string("OP_1")
-            out += Script.parse_string(
+                    out.append_opcodes("OP_0 OP_0" if fixed_length_unlock else "OP_0")
+                    out.nums(self.gradients[j][0])
+                    out.append_opcodes("OP_1")
+            out.append_opcodes(
                 " ".join(["OP_0 OP_0 OP_0 OP_0"] * (M - N) if fixed_length_unlock else ["OP_0"] * (M - N))
             )
 
         # Load P
-        out += nums_to_script(self.P) if load_P else Script()
+        if load_P:
+            out.nums(self.P)
 
-        return out
+        return out.to_script()
 
     @staticmethod
     def extract_scalar_as_unsigned(max_multiplier: int, rolling_option: bool, base_loaded: bool = True) -> Script:
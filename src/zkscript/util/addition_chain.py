@@ -0,0 +1,91 @@
+"""Windowed addition chains of the fixed exponents of in-script exponentiations.
+
+An exponentiation `x^e` by a fixed exponent (e.g., `x^(q-2)` in `Fq.inverse`) is computed by an addition chain: the
+odd powers `x, x^3, ..., x^(2m - 1)` are precomputed, and the remaining powers are obtained by squarings and by
+multiplications by a precomputed power. The chain is encoded by the digits `[e_0, ..., e_(l-1)]` of `e`, from the
+least to the most significant, such that `e = sum_(i=0)^(l-1) e_i 2^i`, every non-zero digit is odd and at most
+`2m - 1`, and the most significant digit is not zero: one squaring is computed for every digit but the most
+significant one, and one multiplication for every other non-zero digit.
+
+The digits of the binary expansion of `e` encode the square-and-multiply chain. The chain minimising the size of the
+script is searched among the sliding-window encodings of `e` (see `exponent_recoding.sliding_window`), with the size
+computed by the generator of the script. The search takes a few milliseconds and is performed once per exponent: the
+chains found are kept in memory by `addition_chains`. The chains are not stored on disk, as the scripts using them are
+(see `ScriptCache`).
+
+Example:
+    >>> lock = Fq(q).inverse(take_modulo=True, addition_chain=True)  # The chain of q - 2 is searched
+    >>> lock = Fq(q).inverse(take_modulo=True, addition_chain=True)  # The chain is read from memory
+"""
+
+from collections.abc import Callable
+
+from src.zkscript.util.exponent_recoding import sliding_window
+
+
+def candidate_chains(e: int, max_width: int = 8) -> dict[str, list[int]]:
+    """Return the candidate addition chains of `e`.
+
+    Args:
+        e (int): The exponent. Must be larger than `1`.
+        max_width (int): The largest window width of the sliding-window chains. Defaults to `8`.
+
+    Returns:
+        A dictionary mapping the name of every chain (`"binary"`, `"sliding-w"`) to its digits. Chains with the same
+        digits are listed once, under the first name. Chains with a single digit are not listed, as the
+        exponentiations compute at least one squaring.
+
+    Raises:
+        ValueError: If `e` is smaller than `2`.
+    """
+    if e < 2:  # noqa: PLR2004
+        msg = f"The exponent must be at least 2, got {e}"
+        raise ValueError(msg)
+    candidates = {"binary": sliding_window(e, width=1)}
+    for width in range(2, max_width + 1):
+        candidates[f"sliding-{width}"] = sliding_window(e, width)
+
+    out = {}
+    for name, digits in candidates.items():
+        if len(digits) > 1 and digits not in out.values():
+            out[name] = digits
+    return out
+
+
+class AdditionChains:
+    """In-memory cache of the shortest addition chains of the exponents of in-script exponentiations."""
+
+    def __init__(self):
+        """Initialise the cache, empty."""
+        self.__chains = {}
+
+    def clear(self):
+        """Remove the chains kept in memory."""
+        self.__chains = {}
+
+    def shortest(self, name: str, e: int, size: Callable[[list[int]], int], max_width: int = 8) -> list[int]:
+        """Return the chain of `e` among `candidate_chains(e, max_width)` for which `size` is the smallest.
+
+        Ties are broken in favour of the chain listed first, so the binary chain is returned unless another chain is
+        strictly shorter. The chain is searched once and kept under `(name, e, max_width)`.
+
+        Args:
+            name (str): The name of the exponentiation, e.g., `"Fq.inverse"`. Exponentiations with different
+                scripts must have different names.
+            e (int): The exponent.
+            size (Callable[[list[int]], int]): The function returning the size of the script of the exponentiation
+                for the digits of a chain.
+            max_width (int): The largest window width of the sliding-window chains. Defaults to `8`.
+
+        Returns:
+            The digits of the chain, from the least to the most significant.
+        """
+        key = (name, e, max_width)
+        if key not in self.__chains:
+            candidates = candidate_chains(e, max_width)
+            sizes = {chain: size(digits) for chain, digits in candidates.items()}
+            self.__chains[key] = candidates[min(sizes, key=sizes.get)]
+        return list(self.__chains[key])
+
+
+addition_chains = AdditionChains()
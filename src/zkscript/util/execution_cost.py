@@ -0,0 +1,205 @@
+"""Static estimate of the cost of executing Bitcoin scripts.
+
+`modulo_threshold` trades the size of a script for the cost of its big-integer arithmetic, which can otherwise only be
+measured by evaluating the script with `tx_engine.Context(...).evaluate()`. The `ExecutionCostModel` defined in this
+module estimates the time taken to validate a script, and the peak memory of its stacks, without evaluating it: the
+script is simulated by `StackSimulator`, which propagates worst-case bit lengths through the arithmetic opcodes, and
+every opcode is charged as a function of the sizes of the elements it reads and pushes:
+- every opcode has a fixed cost (dispatch),
+- the numeric opcodes decode their operands and encode their result, which is linear in their sizes, and `OP_MUL`,
+    `OP_DIV` and `OP_MOD` add the schoolbook cost of the operation on machine words,
+- the hash opcodes are linear in the number of 64-byte blocks hashed,
+- the opcodes copying elements (pushes, `OP_DUP`, `OP_PICK`, ...) are linear in the number of bytes copied, and
+    `OP_ROLL` is linear in the depth of the element moved.
+
+The default coefficients were fitted on the interpreter of `tx_engine`, on which they estimate the time taken by the
+Miller loops, the final exponentiations and the pairings of this library within about 25%. Signature checks are
+charged as any other opcode.
+
+A model is also an objective of `modulo_planner`, which then chooses the reductions minimising the estimated time.
+
+Example:
+    >>> cost = ExecutionCostModel().estimate(unlock + lock)
+    >>> cost.validation_time, cost.peak_stack_memory
+    >>> with modulo_planner.active(objective=ExecutionCostModel()):
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600)
+"""
+
+from dataclasses import dataclass
+
+from tx_engine import Script
+from tx_engine.engine import op_codes
+
+from src.zkscript.util.stack_simulator import StackSimulator, n_bytes
+
+_NUMERIC = {
+    getattr(op_codes, name)
+    for name in [
+        "OP_1ADD",
+        "OP_1SUB",
+        "OP_2MUL",
+        "OP_2DIV",
+        "OP_NEGATE",
+        "OP_ABS",
+        "OP_NOT",
+        "OP_0NOTEQUAL",
+        "OP_ADD",
+        "OP_SUB",
+        "OP_MUL",
+        "OP_DIV",
+        "OP_MOD",
+        "OP_BOOLAND",
+        "OP_BOOLOR",
+        "OP_NUMEQUAL",
+        "OP_NUMEQUALVERIFY",
+        "OP_NUMNOTEQUAL",
+        "OP_LESSTHAN",
+        "OP_GREATERTHAN",
+        "OP_LESSTHANOREQUAL",
+        "OP_GREATERTHANOREQUAL",
+        "OP_MIN",
+        "OP_MAX",
+        "OP_WITHIN",
+    ]
+    if hasattr(op_codes, name)
+}
+# Number of hash functions applied by the hash opcodes
+_HASHES = {
+    getattr(op_codes, name): n_passes
+    for name, n_passes in [
+        ("OP_RIPEMD160", 1),
+        ("OP_SHA1", 1),
+        ("OP_SHA256", 1),
+        ("OP_HASH160", 2),
+        ("OP_HASH256", 2),
+    ]
+    if hasattr(op_codes, name)
+}
+# Size in bytes of the blocks hashed by the hash functions, and of the padding appended to the message
+_HASH_BLOCK_BYTES = 64
+_HASH_PADDING_BYTES = 9
+# Size in bytes of the digests hashed by the second pass of `OP_HASH160` and `OP_HASH256`
+_DIGEST_BYTES = 32
+
+
+@dataclass(frozen=True)
+class ExecutionCost:
+    """The estimated cost of executing a script.
+
+    Attributes:
+        validation_time (float): The estimated time taken to execute the script, in seconds.
+        peak_stack_memory (int): The estimated maximum size in bytes of the elements on the stack and on the altstack
+            during the script.
+    """
+
+    validation_time: float
+    peak_stack_memory: int
+
+
+@dataclass(frozen=True)
+class ExecutionCostModel:
+    """Model of the time taken to execute the opcodes of a script.
+
+    The costs are in nanoseconds. The sizes of the elements are the ones of their encodings, sign bit included.
+
+    Attributes:
+        opcode (float): The cost of every opcode.
+        numeric (float): The additional cost of the numeric opcodes (e.g., `OP_ADD`, `OP_MUL`, `OP_NUMEQUAL`).
+        numeric_per_byte (float): The cost per byte of the operands and of the result of the numeric opcodes.
+        mul_per_word_product (float): The cost of `OP_MUL` per product of machine words.
+        div_per_word_product (float): The cost of `OP_DIV` and `OP_MOD` per product of machine words.
+        hash (float): The additional cost of every hash function applied by the hash opcodes.
+        hash_per_block (float): The cost per block hashed by the hash opcodes.
+        copy_per_byte (float): The cost per byte copied on the stack by pushes, `OP_PICK`, `OP_DUP`, ...
+        roll_per_position (float): The cost of `OP_ROLL` per element between the top of the stack and the element
+            moved.
+        word_bits (int): The number of bits of the machine words of the big-integer arithmetic.
+    """
+
+    opcode: float = 25.0
+    numeric: float = 130.0
+    numeric_per_byte: float = 1.45
+    mul_per_word_product: float = 0.4
+    div_per_word_product: float = 2.5
+    hash: float = 90.0
+    hash_per_block: float = 165.0
+    copy_per_byte: float = 0.025
+    roll_per_position: float = 0.18
+    word_bits: int = 64
+
+    def __words(self, bits: int) -> int:
+        """Return the number of machine words of a number of `bits` bits."""
+        return max(-(-bits // self.word_bits), 1)
+
+    def opcode_cost(
+        self, op: int, operands: tuple[int | None, ...], results: tuple[int | None, ...], position: int
+    ) -> float:
+        """Return the estimated time (in nanoseconds) taken to execute an opcode.
+
+        Args:
+            op (int): The opcode.
+            operands (tuple[int | None, ...]): The bit lengths of the elements read by the opcode (`None` if
+                unknown).
+            results (tuple[int | None, ...]): The bit lengths of the elements pushed by the opcode (`None` if
+                unknown).
+            position (int): The position from the top of the stack of the element accessed by `OP_PICK` and
+                `OP_ROLL`.
+
+        Returns:
+            The estimated time, see `OpcodeCost`. The elements whose bit lengths are unknown are assumed to be empty.
+        """
+        cost = self.opcode
+        if op in _NUMERIC:
+            cost += self.numeric + self.numeric_per_byte * sum(n_bytes(bits) for bits in (*operands, *results))
+            if None in operands:
+                return cost
+            if op == op_codes.OP_MUL:
+                cost += self.mul_per_word_product * self.__words(operands[0]) * self.__words(operands[1])
+            elif op in {op_codes.OP_DIV, op_codes.OP_MOD}:
+                a, b = self.__words(operands[0]), self.__words(operands[1])
+                cost += self.div_per_word_product * b * max(a - b + 1, 1)
+        elif op in _HASHES:
+            sizes = [n_bytes(operands[0]), *([_DIGEST_BYTES] * (_HASHES[op] - 1))]
+            for size in sizes:
+                cost += self.hash + self.hash_per_block * -(-(size + _HASH_PADDING_BYTES) // _HASH_BLOCK_BYTES)
+        elif op == op_codes.OP_ROLL:
+            cost += self.roll_per_position * position
+        else:
+            copied = sum(n_bytes(bits) for bits in results) - sum(n_bytes(bits) for bits in operands)
+            cost += self.copy_per_byte * max(copied, 0)
+        return cost
+
+    def estimate(
+        self,
+        script: Script | bytes,
+        n_inputs: int | None = 0,
+        input_bits: tuple[int, ...] = (),
+        default_bits: int | None = None,
+    ) -> ExecutionCost:
+        """Estimate the cost of executing `script`.
+
+        Args:
+            script (Script | bytes): The script, or its raw serialisation. To estimate the cost of validating a
+                transaction input, this is the concatenation of the unlocking and of the locking script.
+            n_inputs (int | None): The depth of the stack before the script, see `StackSimulator`. Defaults to `0`,
+                i.e., the script pushes all the elements it uses.
+            input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the elements at the top of the stack
+                before the script, from the top. Defaults to `()`.
+            default_bits (int | None): Upper bound on the bit lengths of the other elements before the script.
+                Defaults to `None`, i.e., unknown.
+
+        Returns:
+            The estimated validation time and peak stack memory. If the branches of a conditional leave stacks of
+            different depths, the simulation continues along the branch executed when the condition is true.
+
+        Raises:
+            ValueError: If the script cannot be simulated (see `StackSimulator.simulate`).
+        """
+        simulation = StackSimulator(
+            n_inputs=n_inputs,
+            strict_branches=False,
+            input_bits=input_bits,
+            default_bits=default_bits,
+            opcode_cost=self.opcode_cost,
+        ).simulate(script)
+        return ExecutionCost(validation_time=simulation.execution_cost * 1e-9, peak_stack_memory=simulation.max_memory)
@@ -0,0 +1,166 @@
+"""Recodings of the exponents of square-and-multiply exponentiations.
+
+An exponent `e` is encoded by a list of digits `[e_0, ..., e_(l-1)]`, from the least to the most significant, such
+that `e = sum_(i=0)^(l-1) e_i 2^i`. The exponentiations compute one squaring per digit and one multiplication per
+non-zero digit, by a precomputed power `x^(e_i)`. Encodings with fewer non-zero digits need fewer multiplications,
+at the price of precomputing the odd powers `x^3, x^5, ..., x^(2^(w-1) - 1)` (windowed encodings) and the inverse of
+`x` (signed encodings, the inverse is cheap in the cyclotomic subgroups).
+
+Example:
+    >>> naf(7)
+    [-1, 0, 0, 1]
+    >>> width_naf(7, width=3)
+    [-1, 0, 0, 1]
+    >>> sliding_window(7, width=3)
+    [7]
+"""
+
+
+def to_integer(digits: list[int]) -> int:
+    """Return the integer encoded by `digits`, from the least to the most significant."""
+    return sum(digit << i for i, digit in enumerate(digits))
+
+
+def width_naf(e: int, width: int) -> list[int]:
+    """Width-`width` non-adjacent form of `e`.
+
+    Every non-zero digit is odd, smaller than `2^(width-1)` in absolute value, and followed by at least `width - 1`
+    zeros.
+
+    Args:
+        e (int): The integer to encode. It can be negative.
+        width (int): The width of the window. Must be at least `2`.
+
+    Returns:
+        The digits of the encoding, from the least to the most significant.
+
+    Raises:
+        ValueError: If `width` is smaller than `2`.
+    """
+    if width < 2:  # noqa: PLR2004
+        msg = f"The width must be at least 2, got {width}"
+        raise ValueError(msg)
+    sign = -1 if e < 0 else 1
+    e = abs(e)
+    digits = []
+    while e > 0:
+        if e % 2 == 1:
+            digit = e % (1 << width)
+            if digit >= 1 << (width - 1):
+                digit -= 1 << width
+            e -= digit
+        else:
+            digit = 0
+        digits.append(sign * digit)
+        e >>= 1
+    return digits
+
+
+def naf(e: int) -> list[int]:
+    """Non-adjacent form of `e`: the digits are in `{-1, 0, 1}` and no two consecutive digits are non-zero."""
+    return width_naf(e, width=2)
+
+
+def shortest_signed_binary(e: int) -> list[int]:
+    """Signed binary encoding of `e` with the fewest non-zero digits, and then the fewest digits.
+
+    The digits are in `{-1, 0, 1}`, so the encoding can be used as the expansion of the parameter of a Miller loop:
+    the loop computes one doubling step per digit but the most significant one, and one addition step (of `Q` or
+    `-Q`) per non-zero digit but the most significant one. The non-adjacent form has the fewest non-zero digits, but
+    it can have one more digit than the binary expansion (e.g., `naf(13) = [1, 0, -1, 0, 1]`, while `13 = 0b1101`).
+    Among the encodings with the fewest non-zero digits and the fewest digits, the digits with the same sign as `e`
+    are preferred, so that the binary expansion is returned if it is one of them.
+
+    Args:
+        e (int): The integer to encode. It can be negative.
+
+    Returns:
+        The digits of the encoding, from the least to the most significant.
+    """
+    sign = -1 if e < 0 else 1
+    e = abs(e)
+    # best[c] is the cost (non-zero digits, digits) and the digits of the shortest encoding of (e >> k) + c, for
+    # c = 0, 1, computed from the most significant bits
+    best = [(0, 0, []), (1, 1, [1])]
+    for k in range(e.bit_length() - 1, -1, -1):
+        bit = e >> k & 1
+        new_best = []
+        for c in (0, 1):
+            if (bit + c) % 2 == 0:
+                weight, length, digits = best[(bit + c) // 2]
+                # The encoding of zero is empty
+                new_best.append((weight, length + 1, [0, *digits]) if length > 0 else (0, 0, []))
+            else:
+                options = [
+                    (weight + 1, length + 1, [digit, *digits])
+                    for digit, (weight, length, digits) in ((1, best[0]), (-1, best[1]))
+                ]
+                new_best.append(min(options, key=lambda option: option[:2]))
+        best = new_best
+    return [sign * digit for digit in best[0][2]]
+
+
+def sliding_window(e: int, width: int) -> list[int]:
+    """Sliding-window encoding of `e`.
+
+    The binary expansion of `e` is split, from the most significant bit, into windows of at most `width` bits
+    starting and ending with a one. Every non-zero digit is odd, positive (negative if `e` is negative) and smaller
+    than `2^width`.
+
+    Args:
+        e (int): The integer to encode. It can be negative.
+        width (int): The maximum width of the windows. Must be at least `1`.
+
+    Returns:
+        The digits of the encoding, from the least to the most significant.
+
+    Raises:
+        ValueError: If `width` is smaller than `1`.
+    """
+    if width < 1:
+        msg = f"The width must be at least 1, got {width}"
+        raise ValueError(msg)
+    sign = -1 if e < 0 else 1
+    bits = [int(bit) for bit in f"{abs(e):b}"[::-1]]
+    digits = [0] * len(bits)
+    i = len(bits) - 1
+    while i >= 0:
+        if bits[i] == 0:
+            i -= 1
+            continue
+        # The window is bits[j:i+1], with bits[j] = 1
+        j = max(i - width + 1, 0)
+        while bits[j] == 0:
+            j += 1
+        digits[j] = sign * to_integer(bits[j : i + 1])
+        i = j - 1
+    # The most significant digit is not zero
+    while digits and digits[-1] == 0:
+        digits.pop()
+    return digits
+
+
+def recodings(exp_e: list[int], max_width: int = 5) -> dict[str, list[int]]:
+    """Return the candidate encodings of the exponent encoded by `exp_e`.
+
+    Args:
+        exp_e (list[int]): The digits of the exponent, from the least to the most significant.
+        max_width (int): The largest window width of the windowed encodings. Defaults to `5`.
+
+    Returns:
+        A dictionary mapping the name of every encoding (`"given"`, `"naf"`, `"wnaf-w"`, `"sliding-w"`) to its
+        digits. Encodings with the same digits are listed once, under the first name. Encodings with a single digit
+        are not listed (except `"given"`), as the exponentiations compute at least one squaring.
+    """
+    e = to_integer(exp_e)
+    candidates = {"given": list(exp_e), "naf": naf(e)}
+    for width in range(3, max_width + 1):
+        candidates[f"wnaf-{width}"] = width_naf(e, width)
+    for width in range(2, max_width + 1):
+        candidates[f"sliding-{width}"] = sliding_window(e, width)
+
+    out = {}
+    for name, digits in candidates.items():
+        if (name == "given" or len(digits) > 1) and digits not in out.values():
+            out[name] = digits
+    return out
@@ -0,0 +1,227 @@
+"""Placement of the modular reductions of iterated computations.
+
+The scripts of the Miller loops, of the multi-scalar multiplications and of the final exponentiations are sequences of
+steps that update a few elements carried from one step to the next (e.g., the Miller output `f` and the points `T`).
+Every step can reduce the carried elements modulo `q` or leave them unreduced, and the elements are only required to
+stay below `modulo_threshold` bits. Where to reduce is decided by default by local estimates of the sizes of the
+elements, which are conservative.
+
+The `ModuloPlanner` decides instead by propagating the exact worst-case bit lengths of the carried elements through
+the scripts of the steps (see `StackSimulator`), and by choosing, by dynamic programming over the steps, the
+reductions that minimise the size of the script (or the estimated cost of its execution, see `ExecutionCostModel`)
+under the constraint that no carried element exceeds `modulo_threshold` bits. The elements supplied in the unlocking
+script are assumed to be reduced, as in the default estimates. If the branches of a conditional leave stacks of
+different depths (e.g., the optional doubling and addition of the double-and-add loops), the branch executing the
+operations is simulated.
+
+Planning is disabled by default, as it changes the scripts generated: it is enabled by `modulo_planner.enable()` or,
+within a block, by `with modulo_planner.active(): ...`.
+
+Example:
+    >>> with modulo_planner.active(objective="size"):
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600)
+    >>> with modulo_planner.active(objective=ExecutionCostModel()):
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600)
+"""
+
+from collections.abc import Callable, Hashable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Literal, Self
+
+from tx_engine import Script
+
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.stack_simulator import StackSimulator
+
+Objective = Literal["size", "execution"] | ExecutionCostModel
+Option = tuple[bool, ...]
+
+
+@dataclass(frozen=True)
+class ReductionStep:
+    """A step of an iterated computation.
+
+    Attributes:
+        key (Hashable): Steps with the same key must generate scripts with the same length and the same effect on the
+            bit lengths of the carried elements for the same option, so that they are simulated only once.
+        options (tuple[Option, ...]): The admissible choices of reductions for the step, e.g., `(True, False)` to
+            reduce the Miller output but not the points `T`. The option reducing everything must be admissible.
+        generate (Callable[[Option], Script | bytes]): The function generating the script of the step for an option.
+        n_carried (int): The number of elements at the top of the stack after the step that are carried to the next
+            step (the elements at the top of the stack before the next step).
+    """
+
+    key: Hashable
+    options: tuple[Option, ...]
+    generate: Callable[[Option], Script | bytes]
+    n_carried: int
+
+
+class ModuloPlanner:
+    """Planner of the modular reductions of iterated computations.
+
+    Attributes:
+        is_enabled (bool): Whether the generators consume the plans of the planner instead of their default
+            estimates.
+        objective (Objective): What the plans minimise: `"size"` for the number of bytes of the script,
+            `"execution"` for the schoolbook cost of its multiplications and modular reductions (see
+            `StackSimulation.arithmetic_cost`), or an `ExecutionCostModel` for the time taken to execute the script
+            estimated by the model.
+    """
+
+    def __init__(self):
+        """Initialise the planner, disabled, with the objective `"size"`."""
+        self.is_enabled = False
+        self.objective = "size"
+        self.__scripts = {}
+        self.__simulations = {}
+        self.__plans = {}
+
+    def enable(self, objective: Objective = "size"):
+        """Enable planning with the given `objective`."""
+        self.__check_objective(objective)
+        self.is_enabled = True
+        self.objective = objective
+
+    def disable(self):
+        """Disable planning. The computed plans are kept, see `ModuloPlanner.clear`."""
+        self.is_enabled = False
+
+    def clear(self):
+        """Remove the computed plans and simulations."""
+        self.__scripts = {}
+        self.__simulations = {}
+        self.__plans = {}
+
+    @contextmanager
+    def active(self, objective: Objective = "size") -> Iterator[Self]:
+        """Enable planning with the given `objective` within a `with` block, then restore the previous state."""
+        self.__check_objective(objective)
+        state = (self.is_enabled, self.objective)
+        self.is_enabled, self.objective = True, objective
+        try:
+            yield self
+        finally:
+            self.is_enabled, self.objective = state
+
+    def plan(
+        self,
+        steps: Sequence[ReductionStep],
+        modulus_bits: int,
+        modulo_threshold: int,
+        n_inputs: int,
+        key: Hashable = None,
+    ) -> list[Option]:
+        """Choose the reductions performed by every step.
+
+        Args:
+            steps (Sequence[ReductionStep]): The steps of the computation, in the order in which they are executed.
+            modulus_bits (int): The bit length of the modulus `q`. The inputs of the computation, and the elements on
+                the stack that are not carried, are assumed to be smaller than `q` in absolute value.
+            modulo_threshold (int): The maximum bit length of the carried elements.
+            n_inputs (int): The number of elements at the top of the stack before the first step that are carried to
+                it.
+            key (Hashable): If not `None`, the plan is stored under `(key, modulus_bits, modulo_threshold,
+                objective)` and reused by later calls with the same key. Defaults to `None`.
+
+        Returns:
+            The list of the options chosen for the steps, in the same order.
+
+        Raises:
+            ValueError: If the objective is not `"size"`, `"execution"` or an `ExecutionCostModel`, or if a step does
+                not admit the option reducing everything.
+        """
+        self.__check_objective(self.objective)
+        cache_key = None if key is None else (key, modulus_bits, modulo_threshold, self.objective)
+        if cache_key in self.__plans:
+            return list(self.__plans[cache_key])
+
+        # Every state maps the bit lengths of the carried elements to the pair (cost, options chosen so far)
+        states = {(modulus_bits,) * n_inputs: (0, ())}
+        for step in steps:
+            reduce_all = (True,) * len(step.options[0])
+            if reduce_all not in step.options:
+                msg = f"The step {step.key} does not admit the option reducing every carried element"
+                raise ValueError(msg)
+            new_states = {}
+            for bits, (cost, chosen) in states.items():
+                for option in step.options:
+                    out_bits, step_cost = self.__simulate(step, option, bits, modulus_bits)
+                    if option != reduce_all and max(out_bits, default=0) > modulo_threshold:
+                        continue
+                    candidate = (cost + step_cost, (*chosen, option))
+                    if out_bits not in new_states or candidate[0] < new_states[out_bits][0]:
+                        new_states[out_bits] = candidate
+            states = _pareto_front(new_states)
+
+        _, chosen = min(states.values(), key=lambda state: state[0])
+        if cache_key is not None:
+            self.__plans[cache_key] = chosen
+        return list(chosen)
+
+    def __simulate(
+        self, step: ReductionStep, option: Option, bits: tuple[int, ...], modulus_bits: int
+    ) -> tuple[tuple[int, ...], int]:
+        """Return the bit lengths of the elements carried after `step` and the cost of `step`."""
+        script = self.__scripts.get((step.key, option))
+        if script is None:
+            generated = step.generate(option)
+            script = generated if isinstance(generated, bytes) else bytes(generated.raw_serialize())
+            self.__scripts[(step.key, option)] = script
+
+        cost_model = self.objective if isinstance(self.objective, ExecutionCostModel) else None
+        simulation_key = (step.key, option, bits, modulus_bits, cost_model)
+        if simulation_key not in self.__simulations:
+            input_bits = bits[::-1]
+            simulation = StackSimulator(
+                strict_branches=False,
+                input_bits=input_bits,
+                default_bits=modulus_bits,
+                opcode_cost=None if cost_model is None else cost_model.opcode_cost,
+            ).simulate(script)
+            carried = [item.bits for item in simulation.stack[max(len(simulation.stack) - step.n_carried, 0) :]]
+            # The elements carried below the inputs of the script are left untouched
+            n_untouched = step.n_carried - len(carried)
+            untouched = input_bits[simulation.n_inputs : simulation.n_inputs + n_untouched]
+            carried = [*untouched[::-1], *carried]
+            if len(carried) < step.n_carried or None in carried:
+                msg = f"The bit lengths of the elements carried by the step {step.key} cannot be computed"
+                raise ValueError(msg)
+            cost = simulation.arithmetic_cost if cost_model is None else simulation.execution_cost
+            self.__simulations[simulation_key] = (tuple(carried), cost)
+
+        out_bits, cost = self.__simulations[simulation_key]
+        return out_bits, len(script) if self.objective == "size" else cost
+
+    @staticmethod
+    def __check_objective(objective: Objective):
+        if not isinstance(objective, ExecutionCostModel) and objective not in {"size", "execution"}:
+            msg = f"The objective must be 'size', 'execution' or an ExecutionCostModel, got {objective!r}"
+            raise ValueError(msg)
+
+
+def worst_case(values: object, modulus: int) -> object:
+    """Replace the integers in `values` (nested lists or tuples) by `modulus - 1`, the largest reduced value.
+
+    The constants injected in the scripts of the steps (e.g., precomputed gradients) are replaced by their worst case
+    when planning, so that the plan does not depend on their values.
+    """
+    if isinstance(values, int) and not isinstance(values, bool):
+        return modulus - 1
+    if isinstance(values, list | tuple):
+        return type(values)(worst_case(value, modulus) for value in values)
+    return values
+
+
+def _pareto_front(states: dict[tuple[int, ...], tuple[int, tuple]]) -> dict[tuple[int, ...], tuple[int, tuple]]:
+    """Remove the states whose carried elements are not smaller and whose cost is not lower than another state."""
+    ordered = sorted(states.items(), key=lambda state: state[1][0])
+    front = {}
+    for bits, value in ordered:
+        if not any(all(x <= y for x, y in zip(other, bits, strict=True)) for other in front):
+            front[bits] = value
+    return front
+
+
+modulo_planner = ModuloPlanner()
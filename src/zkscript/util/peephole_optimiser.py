@@ -0,0 +1,181 @@
+"""Peephole optimisation of Bitcoin scripts.
+
+The optimiser works directly on the raw bytes of a script: the script is split into tokens (an opcode, or a pushdata
+opcode together with its data), and the tokens are fed one by one to a stack. Every time a token is pushed, the top
+of the stack is matched against the patterns of the rule table with a trie built on the reversed patterns, so that
+each token costs at most as many comparisons as the length of the longest pattern. When a pattern matches, it is
+replaced and the replacement is fed back to the stack, so that the rewrites cascade and the output contains no
+occurrence of any pattern.
+"""
+
+from dataclasses import dataclass
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import OP_PUSHDATA1, OP_PUSHDATA2, OP_PUSHDATA4
+
+from src.zkscript.util.script_builder import MAX_PUSHDATA_DIRECT, bytes_to_script, encode_opcodes
+
+
+@dataclass(frozen=True)
+class PeepholeRule:
+    """A peephole rewriting rule.
+
+    Attributes:
+        name (str): The name of the rule, used to report the bytes saved by it.
+        pattern (str): The sequence of opcodes to match, in the format accepted by `Script.parse_string`.
+        replacement (str): The sequence of opcodes substituted to `pattern`. It must encode to fewer bytes than
+            `pattern`.
+    """
+
+    name: str
+    pattern: str
+    replacement: str = ""
+
+
+DEFAULT_PEEPHOLE_RULES = (
+    PeepholeRule(name="toaltstack_fromaltstack", pattern="OP_TOALTSTACK OP_FROMALTSTACK"),
+    PeepholeRule(name="fromaltstack_toaltstack", pattern="OP_FROMALTSTACK OP_TOALTSTACK"),
+    PeepholeRule(name="triple_rot", pattern="OP_ROT OP_ROT OP_ROT"),
+    PeepholeRule(name="swap_add", pattern="OP_SWAP OP_ADD", replacement="OP_ADD"),
+    PeepholeRule(name="swap_mul", pattern="OP_SWAP OP_MUL", replacement="OP_MUL"),
+    PeepholeRule(name="swap_sub_negate", pattern="OP_SWAP OP_SUB OP_NEGATE", replacement="OP_SUB"),
+    PeepholeRule(name="zero_equal_not", pattern="OP_0 OP_EQUAL OP_NOT", replacement="OP_0NOTEQUAL"),
+    PeepholeRule(name="swap_tuck", pattern="OP_SWAP OP_TUCK", replacement="OP_OVER"),
+)
+
+
+def tokenise(raw: bytes) -> list[bytes]:
+    """Split the raw serialisation of a script into tokens.
+
+    Args:
+        raw (bytes): The raw serialisation of a script.
+
+    Returns:
+        The list of tokens: each token is either a single opcode or a pushdata opcode followed by its data.
+    """
+    tokens = []
+    i, length = 0, len(raw)
+    while i < length:
+        op = raw[i]
+        if op == 0 or op > OP_PUSHDATA4:
+            end = i + 1
+        elif op <= MAX_PUSHDATA_DIRECT:
+            end = i + 1 + op
+        elif op == OP_PUSHDATA1:
+            end = i + 2 + raw[i + 1]
+        elif op == OP_PUSHDATA2:
+            end = i + 3 + int.from_bytes(raw[i + 1 : i + 3], "little")
+        else:
+            end = i + 5 + int.from_bytes(raw[i + 1 : i + 5], "little")
+        tokens.append(raw[i:end])
+        i = end
+    return tokens
+
+
+class _TrieNode:
+    """Node of the trie of reversed patterns."""
+
+    __slots__ = ("children", "rule_index")
+
+    def __init__(self):
+        self.children = {}
+        self.rule_index = None
+
+
+class PeepholeOptimiser:
+    """Apply a table of peephole rules to Bitcoin scripts in a single pass.
+
+    If several patterns match the top of the stack, the rule that comes first in the table is applied.
+
+    Attributes:
+        rules (tuple[PeepholeRule, ...]): The rule table.
+    """
+
+    def __init__(self, rules: tuple[PeepholeRule, ...] = DEFAULT_PEEPHOLE_RULES):
+        """Initialise the optimiser and build the trie of the reversed patterns.
+
+        Args:
+            rules (tuple[PeepholeRule, ...]): The rule table. Defaults to `DEFAULT_PEEPHOLE_RULES`.
+
+        Raises:
+            ValueError: If a pattern is empty, or if a replacement is not shorter than its pattern.
+        """
+        self.rules = tuple(rules)
+        self.__patterns = []
+        self.__replacements = []
+        self.__savings = []
+        self.__root = _TrieNode()
+
+        for rule_index, rule in enumerate(self.rules):
+            pattern = tokenise(encode_opcodes(rule.pattern))
+            replacement = tokenise(encode_opcodes(rule.replacement))
+            saving = sum(len(token) for token in pattern) - sum(len(token) for token in replacement)
+            if len(pattern) == 0 or saving <= 0:
+                msg = f"The rule {rule.name} must have a non-empty pattern longer than its replacement"
+                raise ValueError(msg)
+            self.__patterns.append(pattern)
+            self.__replacements.append(replacement)
+            self.__savings.append(saving)
+
+            node = self.__root
+            for token in reversed(pattern):
+                node = node.children.setdefault(token, _TrieNode())
+            if node.rule_index is None:
+                node.rule_index = rule_index
+
+    def optimise_with_report(self, script: Script) -> tuple[Script, dict[str, int]]:
+        """Optimise `script` and report the bytes saved by each rule.
+
+        Args:
+            script (Script): The script to be optimised.
+
+        Returns:
+            The optimised script, and a dictionary mapping the name of each rule to the number of bytes it saved.
+        """
+        root_children = self.__root.children
+        applications = [0] * len(self.rules)
+        stack = []
+
+        pending = tokenise(bytes(script.raw_serialize()))
+        pending.reverse()
+        while pending:
+            token = pending.pop()
+            stack.append(token)
+            node = root_children.get(token)
+            if node is None:
+                continue
+
+            matched_rule = node.rule_index
+            depth = len(stack) - 2
+            while node.children and depth >= 0:
+                node = node.children.get(stack[depth])
+                if node is None:
+                    break
+                if node.rule_index is not None and (matched_rule is None or node.rule_index < matched_rule):
+                    matched_rule = node.rule_index
+                depth -= 1
+
+            if matched_rule is not None:
+                del stack[-len(self.__patterns[matched_rule]) :]
+                pending.extend(reversed(self.__replacements[matched_rule]))
+                applications[matched_rule] += 1
+
+        report = {}
+        for rule, n_applications, saving in zip(self.rules, applications, self.__savings, strict=True):
+            report[rule.name] = report.get(rule.name, 0) + n_applications * saving
+
+        return bytes_to_script(b"".join(stack)), report
+
+    def optimise(self, script: Script) -> Script:
+        """Optimise `script`.
+
+        Args:
+            script (Script): The script to be optimised.
+
+        Returns:
+            The optimised script.
+        """
+        return self.optimise_with_report(script)[0]
+
+
+default_peephole_optimiser = PeepholeOptimiser()
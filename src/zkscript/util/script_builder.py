@@ -0,0 +1,356 @@
+"""Byte-level construction of Bitcoin scripts.
+
+Generators that build their output with `out += Script.parse_string("...")` re-tokenise the opcode string at every
+call and copy the growing script at every concatenation. The `ScriptBuilder` class defined in this module appends
+pre-encoded opcodes to a single growable `bytearray`, and converts the result to a `Script` only once, at the end.
+"""
+
+from functools import cache
+from typing import Self, Union
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1NEGATE,
+    OP_1SUB,
+    OP_2,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3,
+    OP_3DUP,
+    OP_4,
+    OP_5,
+    OP_6,
+    OP_7,
+    OP_8,
+    OP_9,
+    OP_10,
+    OP_11,
+    OP_12,
+    OP_13,
+    OP_14,
+    OP_15,
+    OP_16,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DUP,
+    OP_MOD,
+    OP_OVER,
+    OP_PICK,
+    OP_PUSHDATA1,
+    OP_PUSHDATA2,
+    OP_PUSHDATA4,
+    OP_ROLL,
+    OP_ROT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TUCK,
+)
+
+patterns_to_pick = {
+    (0, 1): [OP_DUP],
+    (1, 1): [OP_OVER],
+    (1, 2): [OP_2DUP],
+    (2, 3): [OP_3DUP],
+    (3, 2): [OP_2OVER],
+    (3, 4): [OP_2OVER, OP_2OVER],
+}
+patterns_to_roll = {
+    (1, 1): [OP_SWAP],
+    (2, 1): [OP_ROT],
+    (2, 2): [OP_ROT, OP_ROT],
+    (3, 2): [OP_2SWAP],
+    (3, 3): [OP_3, OP_ROLL, OP_2SWAP],
+    (5, 2): [OP_2ROT],
+    (5, 3): [OP_2ROT, OP_5, OP_ROLL],
+    (5, 4): [OP_2ROT, OP_2ROT],
+}
+op_range = range(-1, 17)
+op_range_to_opcode = {
+    -1: OP_1NEGATE,
+    0: OP_0,
+    1: OP_1,
+    2: OP_2,
+    3: OP_3,
+    4: OP_4,
+    5: OP_5,
+    6: OP_6,
+    7: OP_7,
+    8: OP_8,
+    9: OP_9,
+    10: OP_10,
+    11: OP_11,
+    12: OP_12,
+    13: OP_13,
+    14: OP_14,
+    15: OP_15,
+    16: OP_16,
+}
+
+MAX_PUSHDATA_DIRECT = 0x4B
+MAX_PUSHDATA1 = 0xFF
+MAX_PUSHDATA2 = 0xFFFF
+
+
+@cache
+def encode_opcodes(opcodes: str) -> bytes:
+    """Encode a string of opcodes and hex pushes (e.g., "OP_DUP OP_MUL 0x00") into raw script bytes.
+
+    The encoding is cached, so each distinct string is tokenised only once per process.
+
+    Args:
+        opcodes (str): The space-separated opcodes, in the format accepted by `Script.parse_string`.
+
+    Returns:
+        The raw serialisation of the opcodes.
+    """
+    return bytes(Script.parse_string(opcodes).raw_serialize())
+
+
+def encode_pushdata(data: bytes) -> bytes:
+    """Encode the push of `data` onto the stack, as done by `Script.append_pushdata`.
+
+    Args:
+        data (bytes): The data to push.
+
+    Returns:
+        The raw serialisation of the push: the length prefix (with `OP_PUSHDATA1/2/4` if needed) followed by `data`.
+    """
+    length = len(data)
+    if length <= MAX_PUSHDATA_DIRECT:
+        prefix = bytes([length])
+    elif length <= MAX_PUSHDATA1:
+        prefix = bytes([OP_PUSHDATA1, length])
+    elif length <= MAX_PUSHDATA2:
+        prefix = bytes([OP_PUSHDATA2]) + length.to_bytes(2, "little")
+    else:
+        prefix = bytes([OP_PUSHDATA4]) + length.to_bytes(4, "little")
+    return prefix + data
+
+
+def encode_num(n: int) -> bytes:
+    """Encode `n` as a script number, as done by `tx_engine.encode_num`.
+
+    Script numbers are little-endian sign-magnitude integers, encoded on the minimal number of bytes. The encoding is
+    computed with `int.to_bytes` rather than byte by byte, as it is performed for every number pushed in a script.
+
+    Args:
+        n (int): The number to encode.
+
+    Returns:
+        The minimal encoding of `n`: `b""` if `n == 0`.
+    """
+    if n == 0:
+        return b""
+    magnitude = abs(n)
+    # One more byte than the magnitude needs if its most significant bit is set, to store the sign
+    out = magnitude.to_bytes((magnitude.bit_length() + 8) // 8, "little")
+    return out if n > 0 else out[:-1] + bytes([out[-1] | 0x80])
+
+
+def encode_num_push(n: int) -> bytes:
+    """Encode the push of the number `n` onto the stack, as done by `nums_to_script([n])`.
+
+    Args:
+        n (int): The number to push.
+
+    Returns:
+        The raw serialisation of the push: a single opcode if `n` is in `[-1, 16]`, else a pushdata.
+    """
+    if n in op_range:
+        return bytes([op_range_to_opcode[n]])
+    return encode_pushdata(encode_num(n))
+
+
+def _var_int(n: int) -> bytes:
+    """Encode `n` as a Bitcoin variable-length integer."""
+    if n < 0xFD:  # noqa: PLR2004
+        return bytes([n])
+    if n <= MAX_PUSHDATA2:
+        return b"\xfd" + n.to_bytes(2, "little")
+    if n <= 0xFFFFFFFF:  # noqa: PLR2004
+        return b"\xfe" + n.to_bytes(4, "little")
+    return b"\xff" + n.to_bytes(8, "little")
+
+
+def bytes_to_script(raw: bytes | bytearray) -> Script:
+    """Convert raw script bytes into a `Script`.
+
+    Args:
+        raw (bytes | bytearray): The raw serialisation of the script.
+
+    Returns:
+        The `Script` whose raw serialisation is `raw`.
+    """
+    return Script.parse(_var_int(len(raw)) + bytes(raw))
+
+
+class ScriptBuilder:
+    """Accumulate the raw bytes of a Bitcoin script, and convert them to a `Script` once.
+
+    Every `append_*` method, as well as `pick`, `roll`, `mod` and `nums`, returns the builder itself, so that calls
+    can be chained. The builder also supports `+=` with a `Script`, another `ScriptBuilder`, or raw bytes.
+
+    Attributes:
+        buffer (bytearray): The raw bytes of the script built so far.
+
+    Example:
+        >>> ScriptBuilder().pick(position=8, n_elements=1).append_opcodes("OP_MUL").nums([17]).to_script()
+        OP_8 OP_PICK OP_MUL 0x11
+    """
+
+    def __init__(self, script: Union[Script, "ScriptBuilder", bytes, bytearray, None] = None):
+        """Initialise the builder, optionally starting from the content of `script`.
+
+        Args:
+            script (Script | ScriptBuilder | bytes | bytearray | None): The initial content of the builder.
+                Defaults to `None`, i.e., the builder starts empty.
+        """
+        self.buffer = bytearray()
+        if script is not None:
+            self += script
+
+    def __len__(self) -> int:
+        """Return the number of bytes appended so far."""
+        return len(self.buffer)
+
+    def __iadd__(self, other: Union[Script, "ScriptBuilder", bytes, bytearray]) -> Self:
+        """Append `other` to the builder."""
+        if isinstance(other, ScriptBuilder):
+            self.buffer += other.to_bytes()
+        elif isinstance(other, (bytes, bytearray)):
+            self.buffer += other
+        elif isinstance(other, Script):
+            self.buffer += other.raw_serialize()
+        else:
+            msg = f"Cannot append object of type {type(other)} to a ScriptBuilder"
+            raise TypeError(msg)
+        return self
+
+    def append_script(self, script: Script) -> Self:
+        """Append the content of `script`."""
+        self.buffer += script.raw_serialize()
+        return self
+
+    def append_raw(self, raw: bytes | bytearray) -> Self:
+        """Append already-encoded script bytes."""
+        self.buffer += raw
+        return self
+
+    def append_opcodes(self, opcodes: str | list[int]) -> Self:
+        """Append opcodes.
+
+        Args:
+            opcodes (str | list[int]): Either a space-separated string of opcodes in the format accepted by
+                `Script.parse_string`, or a list of opcodes as integers.
+        """
+        self.buffer += encode_opcodes(opcodes) if isinstance(opcodes, str) else bytes(opcodes)
+        return self
+
+    def append_pushdata(self, data: bytes) -> Self:
+        """Append the push of `data` onto the stack."""
+        self.buffer += encode_pushdata(data)
+        return self
+
+    def nums(self, nums: list[int]) -> Self:
+        """Append the push of a list of numbers onto the stack, see `utility_scripts.nums_to_script`."""
+        for n in nums:
+            self.buffer += encode_num_push(n)
+        return self
+
+    def pick(self, position: int, n_elements: int) -> Self:
+        """Append the script to pick the elements x_{position}, ..., x_{position-n_elements}.
+
+        See `utility_scripts.pick` for the meaning of the arguments.
+        """
+        if position >= 0 and position < n_elements - 1:
+            msg = "When positive, position must be at least equal to n_elements - 1: "
+            msg += f"position: {position}, n_elements: {n_elements}"
+            raise ValueError(msg)
+
+        if (position, n_elements) in patterns_to_pick:
+            self.buffer += bytes(patterns_to_pick[(position, n_elements)])
+        elif position in op_range[1:]:
+            self.buffer += bytes([op_range_to_opcode[position], OP_PICK] * n_elements)
+        elif position < 0:
+            ix_to_pick = position
+            for _ in range(n_elements):
+                self.buffer.append(OP_DEPTH)
+                if ix_to_pick == -1:
+                    self.buffer.append(OP_1SUB)
+                else:
+                    self.nums([-ix_to_pick])
+                    self.buffer.append(OP_SUB)
+                self.buffer.append(OP_PICK)
+                ix_to_pick -= 1
+        else:
+            self.buffer += (encode_pushdata(encode_num(position)) + bytes([OP_PICK])) * n_elements
+
+        return self
+
+    def roll(self, position: int, n_elements: int) -> Self:
+        """Append the script to roll the elements x_{position}, ..., x_{position-n_elements}.
+
+        See `utility_scripts.roll` for the meaning of the arguments.
+        """
+        if position >= 0 and position < n_elements - 1:
+            msg = "When positive, position must be at least equal to n_elements - 1: "
+            msg += f"position: {position}, n_elements: {n_elements}"
+            raise ValueError(msg)
+
+        if position == n_elements - 1:
+            return self
+
+        if (position, n_elements) in patterns_to_roll:
+            self.buffer += bytes(patterns_to_roll[(position, n_elements)])
+        elif position in op_range[2:]:
+            self.buffer += bytes([op_range_to_opcode[position], OP_ROLL] * n_elements)
+        elif position < 0:
+            for _ in range(n_elements):
+                self.buffer.append(OP_DEPTH)
+                if position == -1:
+                    self.buffer.append(OP_1SUB)
+                else:
+                    self.nums([-position])
+                    self.buffer.append(OP_SUB)
+                self.buffer.append(OP_ROLL)
+        else:
+            self.buffer += (encode_pushdata(encode_num(position)) + bytes([OP_ROLL])) * n_elements
+
+        return self
+
+    def mod(
+        self,
+        stack_preparation: str = "OP_FROMALTSTACK OP_ROT",
+        is_mod_on_top: bool = True,
+        is_positive: bool = True,
+        is_constant_reused: bool = True,
+    ) -> Self:
+        """Append the script to perform a modulo operation.
+
+        See `utility_scripts.mod` for the meaning of the arguments.
+        """
+        self.buffer += encode_opcodes(stack_preparation)
+
+        pick_modulo = OP_TUCK if is_mod_on_top else OP_OVER
+
+        if is_positive:
+            reuse_modulo = OP_OVER if is_constant_reused else OP_SWAP
+            self.buffer += bytes([pick_modulo, OP_MOD, OP_OVER, OP_ADD, reuse_modulo, OP_MOD])
+        elif is_constant_reused:
+            self.buffer += bytes([pick_modulo, OP_MOD])
+        else:
+            self.buffer += bytes([OP_MOD]) if is_mod_on_top else bytes([OP_SWAP, OP_MOD])
+
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Return the raw bytes of the script built so far."""
+        return bytes(self.buffer)
+
+    def to_script(self) -> Script:
+        """Convert the content of the builder into a `Script`."""
+        return bytes_to_script(self.buffer)
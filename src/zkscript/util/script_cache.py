@@ -0,0 +1,181 @@
+"""Persistent on-disk cache of generated scripts.
+
+Script generation is deterministic: the same generator called with the same arguments always returns the same
+script. The `ScriptCache` class defined in this module stores the raw serialisation of generated scripts in a local
+directory, indexed by a hash of the arguments used to generate them (and of the source code of zkscript, so that
+entries generated by a different version of the library are never returned).
+
+The total size of the cache is bounded: when it is exceeded, the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from dataclasses import fields, is_dataclass
+from functools import cache
+from pathlib import Path
+
+from tx_engine import Script
+
+from src.zkscript.util.script_builder import bytes_to_script
+
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_SUFFIX = ".script"
+
+
+@cache
+def source_fingerprint() -> str:
+    """Return a hash of the source code of zkscript.
+
+    The fingerprint is computed once per process, and it is part of every cache key.
+    """
+    root = Path(__file__).resolve().parents[1]
+    digest = hashlib.sha256()
+    for path in sorted(root.rglob("*.py")):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _to_canonical(obj: object) -> object:
+    """Convert `obj` to a JSON-serialisable object that uniquely identifies it."""
+    if obj is None or isinstance(obj, bool | int | float | str):
+        return obj
+    if isinstance(obj, bytes):
+        return {"bytes": obj.hex()}
+    if isinstance(obj, list | tuple):
+        return [_to_canonical(el) for el in obj]
+    if isinstance(obj, dict):
+        return {"dict": [[_to_canonical(key), _to_canonical(value)] for key, value in obj.items()]}
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return {type(obj).__name__: {field.name: _to_canonical(getattr(obj, field.name)) for field in fields(obj)}}
+    msg = f"Cannot compute the cache key of an object of type {type(obj)}"
+    raise TypeError(msg)
+
+
+class ScriptCache:
+    """Content-addressed, size-bounded cache of scripts stored on disk.
+
+    Attributes:
+        directory (Path): The directory where the cached scripts are stored.
+        max_size (int): The maximum total size (in bytes) of the cached scripts.
+
+    Example:
+        >>> cache = ScriptCache(directory="~/.cache/zkscript")
+        >>> lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600, cache=cache)  # Generated and stored
+        >>> lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600, cache=cache)  # Read from disk
+    """
+
+    def __init__(self, directory: str | Path, max_size: int = 2**30):
+        """Initialise the cache, creating `directory` if it does not exist.
+
+        Args:
+            directory (str | Path): The directory where the cached scripts are stored.
+            max_size (int): The maximum total size (in bytes) of the cached scripts. Defaults to 1 GiB.
+
+        Raises:
+            ValueError: If `max_size` is not positive.
+        """
+        if max_size <= 0:
+            msg = f"The maximum size of the cache must be positive: {max_size}"
+            raise ValueError(msg)
+        self.directory = Path(directory).expanduser()
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: object) -> str:
+        """Compute the cache key of the generation described by `parts`.
+
+        Args:
+            *parts (object): The objects identifying the generation, e.g., the name of the generator and its
+                arguments. Supported types are `None`, `bool`, `int`, `float`, `str`, `bytes`, lists, tuples,
+                dictionaries and dataclasses thereof.
+
+        Returns:
+            The hex digest identifying the generation.
+        """
+        payload = json.dumps(
+            [CACHE_FORMAT_VERSION, source_fingerprint(), _to_canonical(parts)], separators=(",", ":")
+        ).encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str) -> Script | None:
+        """Return the script stored under `key`, or `None` if there is no such script."""
+        path = self.__path(key)
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Mark the entry as recently used
+        path.touch()
+        return bytes_to_script(raw)
+
+    def put(self, key: str, script: Script):
+        """Store `script` under `key`, evicting the least recently used entries if the cache is too large.
+
+        Scripts larger than `self.max_size` are not stored.
+        """
+        raw = bytes(script.raw_serialize())
+        if len(raw) > self.max_size:
+            return
+
+        # Write to a temporary file first, so that concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            Path(tmp_path).replace(self.__path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.__evict(keep=self.__path(key))
+
+    def __evict(self, keep: Path):
+        entries = []
+        for path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def get_or_generate(self, key: str, generator: Callable[[], Script]) -> Script:
+        """Return the script stored under `key`, generating and storing it if it is not in the cache.
+
+        Args:
+            key (str): The cache key, see `ScriptCache.key`.
+            generator (Callable[[], Script]): The function generating the script on a cache miss.
+
+        Returns:
+            The script stored under `key`.
+        """
+        script = self.get(key)
+        if script is None:
+            script = generator()
+            self.put(key, script)
+        return script
+
+    def size(self) -> int:
+        """Return the total size (in bytes) of the cached scripts."""
+        return sum(path.stat().st_size for path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}"))
+
+    def clear(self):
+        """Remove all the cached scripts."""
+        for path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,92 @@
+"""Generation of scripts as sequences of independently generated fragments.
+
+A `ScriptFragments` is a `ScriptBuilder` to which one can also append the output of a call `generator(**kwargs)`
+with `submit`. If an `Executor` is supplied, the call is submitted to it, and the builder carries on with the next
+fragments. The fragments are concatenated in the order in which they were appended, so that the resulting script is
+byte-identical to the one obtained by calling the generators one after another.
+
+With a `ProcessPoolExecutor`, `generator` and `kwargs` must be picklable: bound methods of the script models of this
+package (e.g., `PairingModel`, `EllipticCurveFq`) are. Calls are generated inline while the script profiler is enabled,
+so that they are attributed in the call tree (see `script_profiler`). If `modulo_planner` is enabled, it is also
+enabled with the same objective while the fragments are generated.
+
+Example:
+    >>> with ProcessPoolExecutor() as executor:
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600, executor=executor)
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Executor, Future
+from typing import Self
+
+from tx_engine import Script
+
+from src.zkscript.util.modulo_planner import Objective, modulo_planner
+from src.zkscript.util.script_builder import ScriptBuilder, bytes_to_script
+from src.zkscript.util.script_profiler import script_profiler
+
+
+def _generate(
+    generator: Callable[..., Script | ScriptBuilder], kwargs: dict, planner_objective: Objective | None = None
+) -> bytes:
+    """Return the raw bytes of `generator(**kwargs)`, with `modulo_planner` enabled if `planner_objective` is set."""
+    if planner_objective is None:
+        script = generator(**kwargs)
+    else:
+        with modulo_planner.active(planner_objective):
+            script = generator(**kwargs)
+    return script.to_bytes() if isinstance(script, ScriptBuilder) else bytes(script.raw_serialize())
+
+
+class ScriptFragments(ScriptBuilder):
+    """Script builder whose fragments can be generated by an executor.
+
+    Attributes:
+        executor (Executor | None): The executor to which the generators are submitted. If `None`, the generators are
+            called when they are submitted.
+        buffer (bytearray): The raw bytes appended since the last call to `submit`.
+    """
+
+    def __init__(
+        self, executor: Executor | None = None, script: Script | ScriptBuilder | bytes | bytearray | None = None
+    ):
+        """Initialise the builder, optionally starting from the content of `script`.
+
+        Args:
+            executor (Executor | None): The executor to which the generators are submitted. Defaults to `None`.
+            script (Script | ScriptBuilder | bytes | bytearray | None): The initial content of the builder.
+                Defaults to `None`, i.e., the builder starts empty.
+        """
+        self.executor = executor
+        self.__fragments: list[bytes | Future] = []
+        super().__init__(script)
+
+    def __len__(self) -> int:
+        """Return the number of bytes appended so far, waiting for the fragments that are still being generated."""
+        return len(self.to_bytes())
+
+    def submit(self, generator: Callable[..., Script | ScriptBuilder], /, **kwargs) -> Self:
+        """Append the output of `generator(**kwargs)`.
+
+        Args:
+            generator (Callable[..., Script | ScriptBuilder]): The function generating the fragment.
+            **kwargs: The keyword arguments passed to `generator`.
+        """
+        if self.buffer:
+            self.__fragments.append(bytes(self.buffer))
+            self.buffer = bytearray()
+        if self.executor is None or script_profiler.is_enabled:
+            self.__fragments.append(_generate(generator, kwargs))
+        else:
+            planner_objective = modulo_planner.objective if modulo_planner.is_enabled else None
+            self.__fragments.append(self.executor.submit(_generate, generator, kwargs, planner_objective))
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Return the raw bytes of the script, waiting for the fragments that are still being generated."""
+        fragments = [fragment.result() if isinstance(fragment, Future) else fragment for fragment in self.__fragments]
+        return b"".join([*fragments, self.buffer])
+
+    def to_script(self) -> Script:
+        """Convert the content of the builder into a `Script`."""
+        return bytes_to_script(self.to_bytes())
@@ -0,0 +1,131 @@
+"""Opt-in memoisation of script generators.
+
+Field and curve primitives (e.g., `Fq2.mul`, `Fq12.square`, `EllipticCurveFq2.point_algebraic_doubling`) are pure:
+they return the same script every time they are called on the same object with the same arguments. The Miller loops
+call them hundreds of times with a handful of distinct arguments. The decorator `memoise_script` stores a copy of the
+scripts returned by a method, keyed by the object and the arguments (including the positions of the stack elements
+passed as arguments), so that they are generated only once. Every hit returns a new copy of the stored script, as
+scripts are mutable: copying it is about three times faster than parsing its raw bytes.
+
+Memoisation is disabled by default, and it is enabled by `script_memo.enable()` or, within a block, by
+`with script_memo.active(): ...`. The number of hits and misses of every memoised method is available through
+`script_memo.stats()`.
+"""
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import is_dataclass
+from functools import wraps
+from typing import Self
+from weakref import WeakKeyDictionary
+
+from tx_engine import Script
+
+
+class _UnhashableArgumentError(Exception):
+    """Raised when the arguments of a memoised method cannot be turned into a key."""
+
+
+_SCALAR_TYPES = frozenset({type(None), bool, int, str, bytes})
+
+
+def _to_key(obj: object) -> object:
+    """Convert `obj` to a hashable object that uniquely identifies it."""
+    obj_type = type(obj)
+    if obj_type in _SCALAR_TYPES or isinstance(obj, bool | int | str | bytes):
+        return obj
+    if obj_type is list or obj_type is tuple or isinstance(obj, list | tuple):
+        return (obj_type.__name__, *map(_to_key, obj))
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return (obj_type.__name__, *map(_to_key, vars(obj).values()))
+    raise _UnhashableArgumentError
+
+
+class ScriptMemo:
+    """Registry of the memoised scripts.
+
+    Attributes:
+        is_enabled (bool): Whether memoisation is enabled.
+        hits (Counter[str]): The number of hits for every memoised method, indexed by its qualified name.
+        misses (Counter[str]): The number of misses for every memoised method, indexed by its qualified name.
+    """
+
+    def __init__(self):
+        """Initialise the registry, with memoisation disabled."""
+        self.is_enabled = False
+        self.hits = Counter()
+        self.misses = Counter()
+        self.__tables = WeakKeyDictionary()
+
+    def enable(self):
+        """Enable memoisation."""
+        self.is_enabled = True
+
+    def disable(self):
+        """Disable memoisation. The memoised scripts are kept, see `ScriptMemo.clear`."""
+        self.is_enabled = False
+
+    def clear(self):
+        """Remove the memoised scripts and reset the counters."""
+        self.__tables = WeakKeyDictionary()
+        self.hits.clear()
+        self.misses.clear()
+
+    @contextmanager
+    def active(self) -> Iterator[Self]:
+        """Enable memoisation within a `with` block, then restore the previous state."""
+        was_enabled = self.is_enabled
+        self.is_enabled = True
+        try:
+            yield self
+        finally:
+            self.is_enabled = was_enabled
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """Return the number of hits and misses of every memoised method that has been called.
+
+        Returns:
+            A dictionary mapping the qualified name of every memoised method to the pair `(hits, misses)`.
+        """
+        return {name: (self.hits[name], self.misses[name]) for name in sorted(self.hits.keys() | self.misses.keys())}
+
+    def memoise(self, method: Callable[..., Script]) -> Callable[..., Script]:
+        """Decorate a method returning a `Script` so that its output is memoised when memoisation is enabled.
+
+        The method must be pure: its output must only depend on the attributes of the object it is called on, which
+        must not change, and on its arguments. Calls whose arguments are not `None`, `bool`, `int`, `str`, `bytes`,
+        lists, tuples or dataclasses thereof are not memoised.
+        """
+        name = method.__qualname__
+        memo = self
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs) -> Script:
+            if not memo.is_enabled:
+                return method(self, *args, **kwargs)
+
+            try:
+                key = (name, _to_key(args), _to_key(sorted(kwargs.items())))
+            except _UnhashableArgumentError:
+                return method(self, *args, **kwargs)
+
+            table = memo.__tables.get(self)
+            if table is None:
+                table = memo.__tables[self] = {}
+
+            memoised = table.get(key)
+            if memoised is None:
+                memo.misses[name] += 1
+                script = method(self, *args, **kwargs)
+                table[key] = script + Script()
+                return script
+
+            memo.hits[name] += 1
+            return memoised + Script()
+
+        return wrapper
+
+
+script_memo = ScriptMemo()
+memoise_script = script_memo.memoise
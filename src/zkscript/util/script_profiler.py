@@ -0,0 +1,204 @@
+"""Attribution of the size of generated scripts to the generators that emitted them.
+
+The decorator `profile_script` records, when profiling is enabled, the number of calls, the size in bytes and the
+number of opcodes of the scripts returned by a generator. Calls are recorded in a tree that mirrors the nesting of
+the generators: e.g., the node `Groth16.groth16_verifier;MillerLoop.miller_loop;LineFunctions.line_evaluation`
+aggregates all the line evaluations generated by the Miller loop of the Groth16 verifier.
+
+The tree can be exported as JSON, or in the folded-stacks format read by flamegraph tools (one line per node, with the
+semicolon-separated path to the node followed by the bytes emitted by the node itself, excluding its children).
+
+Example:
+    >>> with script_profiler.active():
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600)
+    >>> script_profiler.write_folded("groth16.folded")
+"""
+
+import json
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Self
+
+from tx_engine import Script
+
+from src.zkscript.util.peephole_optimiser import tokenise
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_memo import script_memo
+
+
+@dataclass
+class ProfileNode:
+    """Node of the call tree of the profiled generators.
+
+    Attributes:
+        name (str): The qualified name of the generator.
+        calls (int): The number of calls to the generator at this position of the tree.
+        size (int): The total size (in bytes) of the scripts returned by these calls, children included.
+        n_opcodes (int): The total number of opcodes (pushdata included) of the scripts returned by these calls,
+            children included.
+        children (dict[str, ProfileNode]): The nodes of the generators called by this one, indexed by name.
+    """
+
+    name: str
+    calls: int = 0
+    size: int = 0
+    n_opcodes: int = 0
+    children: dict[str, "ProfileNode"] = field(default_factory=dict)
+
+    @property
+    def self_size(self) -> int:
+        """The size (in bytes) emitted by the generator itself, excluding the scripts returned by its children."""
+        return self.size - sum(child.size for child in self.children.values())
+
+    @property
+    def self_n_opcodes(self) -> int:
+        """The number of opcodes emitted by the generator itself, excluding the scripts returned by its children."""
+        return self.n_opcodes - sum(child.n_opcodes for child in self.children.values())
+
+    def to_dict(self) -> dict:
+        """Return the subtree rooted at this node as a JSON-serialisable dictionary."""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "size": self.size,
+            "self_size": self.self_size,
+            "n_opcodes": self.n_opcodes,
+            "self_n_opcodes": self.self_n_opcodes,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+    def folded_stacks(self, metric: str = "size", prefix: str = "") -> list[str]:
+        """Return the subtree rooted at this node in the folded-stacks format.
+
+        Args:
+            metric (str): Either `size` or `n_opcodes`. Defaults to `size`.
+            prefix (str): The path to the parent of this node. Defaults to `""`.
+
+        Returns:
+            The lines `path;to;node value`, where `value` is the metric of the node excluding its children. Nodes
+            whose value is not positive are omitted.
+        """
+        path = f"{prefix};{self.name}" if prefix else self.name
+        value = getattr(self, f"self_{metric}")
+        lines = [f"{path} {value}"] if value > 0 else []
+        for child in self.children.values():
+            lines.extend(child.folded_stacks(metric, path))
+        return lines
+
+
+class ScriptProfiler:
+    """Registry of the profiled generator calls.
+
+    Attributes:
+        is_enabled (bool): Whether profiling is enabled.
+        root (ProfileNode): The root of the call tree. Its children are the outermost profiled calls.
+    """
+
+    ROOT_NAME = "all"
+
+    def __init__(self):
+        """Initialise the registry, with profiling disabled."""
+        self.is_enabled = False
+        self.root = ProfileNode(self.ROOT_NAME)
+        self.__stack = [self.root]
+
+    def enable(self):
+        """Enable profiling."""
+        self.is_enabled = True
+
+    def disable(self):
+        """Disable profiling. The recorded calls are kept, see `ScriptProfiler.clear`."""
+        self.is_enabled = False
+
+    def clear(self):
+        """Remove the recorded calls."""
+        self.root = ProfileNode(self.ROOT_NAME)
+        self.__stack = [self.root]
+
+    @contextmanager
+    def active(self) -> Iterator[Self]:
+        """Enable profiling within a `with` block, then restore the previous state.
+
+        Memoisation (see `script_memo`) is disabled within the block, so that the generators called by memoised
+        generators are attributed at every call.
+        """
+        was_enabled, was_memo_enabled = self.is_enabled, script_memo.is_enabled
+        self.is_enabled, script_memo.is_enabled = True, False
+        try:
+            yield self
+        finally:
+            self.is_enabled, script_memo.is_enabled = was_enabled, was_memo_enabled
+
+    @contextmanager
+    def suspended(self) -> Iterator[Self]:
+        """Disable profiling within a `with` block, then restore the previous state.
+
+        The scripts generated within the block are not recorded. Generators use it for the scripts they only measure
+        (e.g., to choose among several candidates), which are not part of the script they return. The state of
+        `script_memo` is left unchanged.
+        """
+        was_enabled = self.is_enabled
+        self.is_enabled = False
+        try:
+            yield self
+        finally:
+            self.is_enabled = was_enabled
+
+    def to_json(self, indent: int | None = 2) -> str:
+        """Return the call tree as a JSON string."""
+        self.root.calls = sum(child.calls for child in self.root.children.values())
+        self.root.size = sum(child.size for child in self.root.children.values())
+        self.root.n_opcodes = sum(child.n_opcodes for child in self.root.children.values())
+        return json.dumps(self.root.to_dict(), indent=indent)
+
+    def to_folded(self, metric: str = "size") -> str:
+        """Return the call tree in the folded-stacks format, see `ProfileNode.folded_stacks`."""
+        if metric not in {"size", "n_opcodes"}:
+            msg = f"The metric must be either size or n_opcodes: metric: {metric}"
+            raise ValueError(msg)
+        return "\n".join(line for child in self.root.children.values() for line in child.folded_stacks(metric))
+
+    def write_json(self, path: str | Path):
+        """Write the call tree to `path` as JSON."""
+        Path(path).write_text(self.to_json())
+
+    def write_folded(self, path: str | Path, metric: str = "size"):
+        """Write the call tree to `path` in the folded-stacks format."""
+        Path(path).write_text(self.to_folded(metric) + "\n")
+
+    def profile(self, method: Callable[..., Script]) -> Callable[..., Script]:
+        """Decorate a function returning a `Script` so that its calls are recorded when profiling is enabled."""
+        name = method.__qualname__
+        profiler = self
+
+        @wraps(method)
+        def wrapper(*args, **kwargs) -> Script:
+            if not profiler.is_enabled:
+                return method(*args, **kwargs)
+
+            stack = profiler.__stack
+            parent = stack[-1]
+            node = parent.children.get(name)
+            if node is None:
+                node = parent.children[name] = ProfileNode(name)
+
+            stack.append(node)
+            try:
+                script = method(*args, **kwargs)
+            finally:
+                stack.pop()
+
+            raw = script.to_bytes() if isinstance(script, ScriptBuilder) else bytes(script.raw_serialize())
+            node.calls += 1
+            node.size += len(raw)
+            node.n_opcodes += len(tokenise(raw))
+            return script
+
+        return wrapper
+
+
+script_profiler = ScriptProfiler()
+profile_script = script_profiler.profile
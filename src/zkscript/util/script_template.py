@@ -0,0 +1,130 @@
+"""Scripts with patchable constants.
+
+Many scripts only depend on some constants through the instructions that push them onto the stack: e.g., the Groth16
+verifier for a fixed curve is the same for every verifying key, except for the pushes of the elements of the key. A
+`ScriptTemplate` is built from a script generated with sentinel values for these constants: the script is split at
+the pushes of the sentinels, and new scripts are obtained by splicing the pushes of other values in their place. As
+numbers are pushed with minimal encodings, the length of the pushes depends on the values, so the template stores
+the segments of the script between the pushes rather than byte offsets.
+
+Example:
+    >>> template = ScriptTemplate(nums_to_script([sentinel]) + Script.parse_string("OP_ADD"), {"x": sentinel})
+    >>> template.instantiate({"x": 5}).to_string()
+    'OP_5 OP_ADD'
+"""
+
+from collections.abc import Mapping
+
+from tx_engine import Script
+
+from src.zkscript.util.peephole_optimiser import tokenise
+from src.zkscript.util.script_builder import (
+    ScriptBuilder,
+    bytes_to_script,
+    encode_num_push,
+    encode_opcodes,
+    encode_pushdata,
+)
+
+# If a constant is followed by these opcodes and it is zero, `optimise_script` would rewrite its push (see
+# `peephole_optimiser.DEFAULT_PEEPHOLE_RULES`), so splicing it in the template would not give the optimised script.
+UNPATCHABLE_SUFFIX = encode_opcodes("OP_EQUAL OP_NOT")
+
+
+def encode_constant(value: int | bytes) -> bytes:
+    """Encode the push of `value`: a number if `value` is an `int`, raw data if it is `bytes`."""
+    return encode_num_push(value) if isinstance(value, int) else encode_pushdata(value)
+
+
+class ScriptTemplate:
+    """Script split at the pushes of some constants.
+
+    Attributes:
+        segments (list[bytes]): The raw bytes of the script between the pushes of the constants.
+            `len(segments) == len(slots) + 1`.
+        slots (list[str]): The names of the constants pushed between consecutive segments. A constant may be pushed
+            more than once.
+    """
+
+    def __init__(self, script: Script | ScriptBuilder | bytes, sentinels: Mapping[str, int | bytes]):
+        """Build the template of `script`.
+
+        Args:
+            script (Script | ScriptBuilder | bytes): The script generated with the values `sentinels` for the
+                constants. Its structure must not depend on the values of the constants.
+            sentinels (Mapping[str, int | bytes]): The values of the constants used to generate `script`, indexed
+                by their names. The push of each sentinel must occur in `script`, and it must not be the push of
+                anything else.
+
+        Raises:
+            ValueError: If two sentinels have the same encoding, if a sentinel is not pushed in `script`, or if it
+                is pushed right before `OP_EQUAL OP_NOT`.
+        """
+        raw = ScriptBuilder(script).to_bytes() if not isinstance(script, bytes) else script
+        names = {}
+        for name, value in sentinels.items():
+            token = encode_constant(value)
+            if token in names:
+                msg = f"The sentinels of {names[token]} and {name} have the same encoding"
+                raise ValueError(msg)
+            names[token] = name
+
+        self.segments = []
+        self.slots = []
+        segment = bytearray()
+        for token in tokenise(raw):
+            if token in names:
+                self.segments.append(bytes(segment))
+                self.slots.append(names[token])
+                segment = bytearray()
+            else:
+                segment += token
+        self.segments.append(bytes(segment))
+
+        missing = sentinels.keys() - set(self.slots)
+        if missing:
+            msg = f"The constants {sorted(missing)} are not pushed in the script"
+            raise ValueError(msg)
+        for name, segment in zip(self.slots, self.segments[1:], strict=True):
+            if segment.startswith(UNPATCHABLE_SUFFIX):
+                msg = f"The constant {name} is followed by OP_EQUAL OP_NOT and cannot be patched"
+                raise ValueError(msg)
+
+    def __len__(self) -> int:
+        """Return the number of bytes of the template, excluding the pushes of the constants."""
+        return sum(len(segment) for segment in self.segments)
+
+    def to_bytes(self, values: Mapping[str, int | bytes]) -> bytes:
+        """Return the raw bytes of the script obtained by pushing `values` in place of the sentinels.
+
+        Args:
+            values (Mapping[str, int | bytes]): The values of the constants, indexed by their names. The names must
+                be the same as those of the sentinels used to build the template.
+
+        Raises:
+            ValueError: If the names of `values` are not those of the template.
+        """
+        if values.keys() != set(self.slots):
+            msg = (
+                f"The constants do not match the template: missing {sorted(set(self.slots) - values.keys())}, "
+                f"unexpected {sorted(values.keys() - set(self.slots))}"
+            )
+            raise ValueError(msg)
+        pushes = {name: encode_constant(value) for name, value in values.items()}
+        out = bytearray(self.segments[0])
+        for name, segment in zip(self.slots, self.segments[1:], strict=True):
+            out += pushes[name]
+            out += segment
+        return bytes(out)
+
+    def instantiate(self, values: Mapping[str, int | bytes]) -> Script:
+        """Return the script obtained by pushing `values` in place of the sentinels.
+
+        Args:
+            values (Mapping[str, int | bytes]): The values of the constants, indexed by their names. The names must
+                be the same as those of the sentinels used to build the template.
+
+        Raises:
+            ValueError: If the names of `values` are not those of the template.
+        """
+        return bytes_to_script(self.to_bytes(values))
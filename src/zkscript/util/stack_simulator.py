@@ -0,0 +1,892 @@
+"""Symbolic simulation of the stack effect of Bitcoin scripts.
+
+Evaluating a pairing-sized script with `tx_engine.Context(...).evaluate()` performs all the big-integer arithmetic of
+the script. The `StackSimulator` class defined in this module only tracks where every element of the main stack and
+of the altstack comes from: it computes the number of elements a script consumes from the stack, the number of
+elements it leaves, the maximum depths reached, and the provenance of every element, without evaluating any
+arithmetic opcode.
+
+If the bit lengths of the inputs are supplied, the simulator also propagates worst-case bit lengths through the
+arithmetic opcodes (e.g., `|a * b| < 2^(m + n)` if `|a| < 2^m` and `|b| < 2^n`), which gives the size of every element
+produced by the script (see `modulo_planner`), and the size in bytes of the stacks. If a function giving the cost of
+every opcode is supplied as well, the simulator adds up the costs of the opcodes executed (see `execution_cost`).
+
+The arguments of `OP_ROLL` must be known statically: they must be computed from constants pushed by the script and
+from `OP_DEPTH` with `OP_ADD`, `OP_SUB`, `OP_1ADD`, `OP_1SUB` and `OP_NEGATE`. The argument of `OP_PICK` can depend on
+the data (e.g., to select a point of a table), in which case the element picked is unknown. Both branches of every
+`OP_IF`/`OP_NOTIF` are simulated, and they must leave the stacks with the same depths. `OP_IFDUP` must be applied to a
+value known statically, or be followed by `OP_IF`/`OP_NOTIF`, whose branches then start with and without the copy.
+
+The decorator `check_stack_effect` simulates, when the checks are enabled (see `stack_checks`), every script returned
+by a generator, so that the generators can be run in an assertion mode, e.g., in tests:
+    >>> with stack_checks.active():
+    ...     lock = bls12_381.groth16_verifier(locking_key, modulo_threshold=1600)
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Self
+
+from tx_engine import Script, decode_num
+from tx_engine.engine import op_codes
+from tx_engine.engine.op_codes import (
+    OP_1,
+    OP_1ADD,
+    OP_1NEGATE,
+    OP_1SUB,
+    OP_2DROP,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3DUP,
+    OP_16,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DROP,
+    OP_DUP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_FROMALTSTACK,
+    OP_IF,
+    OP_IFDUP,
+    OP_NEGATE,
+    OP_NIP,
+    OP_NOTIF,
+    OP_OVER,
+    OP_PICK,
+    OP_PUSHDATA1,
+    OP_PUSHDATA2,
+    OP_PUSHDATA4,
+    OP_ROLL,
+    OP_ROT,
+    OP_SIZE,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.util.peephole_optimiser import tokenise
+from src.zkscript.util.script_builder import ScriptBuilder
+
+# Number of elements popped and pushed by the opcodes whose effect does not depend on the stack content
+_FIXED_EFFECTS_BY_NAME = {
+    **dict.fromkeys(
+        [
+            "OP_NOP",
+            "OP_NOP1",
+            "OP_CHECKLOCKTIMEVERIFY",
+            "OP_CHECKSEQUENCEVERIFY",
+            "OP_NOP4",
+            "OP_NOP5",
+            "OP_NOP6",
+            "OP_NOP7",
+            "OP_NOP8",
+            "OP_NOP9",
+            "OP_NOP10",
+            "OP_CODESEPARATOR",
+        ],
+        (0, 0),
+    ),
+    **dict.fromkeys(["OP_VERIFY"], (1, 0)),
+    **dict.fromkeys(
+        [
+            "OP_ABS",
+            "OP_NOT",
+            "OP_0NOTEQUAL",
+            "OP_INVERT",
+            "OP_2MUL",
+            "OP_2DIV",
+            "OP_BIN2NUM",
+            "OP_RIPEMD160",
+            "OP_SHA1",
+            "OP_SHA256",
+            "OP_HASH160",
+            "OP_HASH256",
+        ],
+        (1, 1),
+    ),
+    **dict.fromkeys(["OP_EQUALVERIFY", "OP_NUMEQUALVERIFY", "OP_CHECKSIGVERIFY"], (2, 0)),
+    **dict.fromkeys(
+        [
+            "OP_MUL",
+            "OP_DIV",
+            "OP_MOD",
+            "OP_LSHIFT",
+            "OP_RSHIFT",
+            "OP_BOOLAND",
+            "OP_BOOLOR",
+            "OP_NUMEQUAL",
+            "OP_NUMNOTEQUAL",
+            "OP_LESSTHAN",
+            "OP_GREATERTHAN",
+            "OP_LESSTHANOREQUAL",
+            "OP_GREATERTHANOREQUAL",
+            "OP_MIN",
+            "OP_MAX",
+            "OP_AND",
+            "OP_OR",
+            "OP_XOR",
+            "OP_EQUAL",
+            "OP_CAT",
+            "OP_NUM2BIN",
+            "OP_CHECKSIG",
+        ],
+        (2, 1),
+    ),
+    **dict.fromkeys(["OP_SPLIT"], (2, 2)),
+    **dict.fromkeys(["OP_WITHIN"], (3, 1)),
+}
+_FIXED_EFFECTS = {
+    getattr(op_codes, name): effect for name, effect in _FIXED_EFFECTS_BY_NAME.items() if hasattr(op_codes, name)
+}
+
+# Rearrangements of the top of the stack: (number of elements involved, indices of the elements after the opcode)
+_SHUFFLES = {
+    OP_DUP: (1, (0, 0)),
+    OP_2DUP: (2, (0, 1, 0, 1)),
+    OP_3DUP: (3, (0, 1, 2, 0, 1, 2)),
+    OP_OVER: (2, (0, 1, 0)),
+    OP_2OVER: (4, (0, 1, 2, 3, 0, 1)),
+    OP_SWAP: (2, (1, 0)),
+    OP_2SWAP: (4, (2, 3, 0, 1)),
+    OP_ROT: (3, (1, 2, 0)),
+    OP_2ROT: (6, (2, 3, 4, 5, 0, 1)),
+    OP_TUCK: (2, (1, 0, 1)),
+    OP_NIP: (2, (1,)),
+    OP_DROP: (1, ()),
+    OP_2DROP: (2, ()),
+}
+
+_PUSHDATA_HEADER_LENGTHS = {OP_PUSHDATA1: 2, OP_PUSHDATA2: 3, OP_PUSHDATA4: 5}
+
+# Worst-case bit length of the output of the opcodes with fixed effects, as a function of the bit lengths of the inputs
+_BITS_BY_NAME = {
+    **dict.fromkeys(["OP_ABS", "OP_NEGATE", "OP_2DIV", "OP_DIV"], lambda a, *_: a),
+    **dict.fromkeys(["OP_2MUL"], lambda a: a + 1),
+    **dict.fromkeys(["OP_MUL"], lambda a, b: a + b),
+    **dict.fromkeys(["OP_MOD"], min),
+    **dict.fromkeys(["OP_MIN", "OP_MAX"], max),
+    **dict.fromkeys(
+        [
+            "OP_NOT",
+            "OP_0NOTEQUAL",
+            "OP_BOOLAND",
+            "OP_BOOLOR",
+            "OP_NUMEQUAL",
+            "OP_NUMNOTEQUAL",
+            "OP_LESSTHAN",
+            "OP_GREATERTHAN",
+            "OP_LESSTHANOREQUAL",
+            "OP_GREATERTHANOREQUAL",
+            "OP_EQUAL",
+            "OP_WITHIN",
+            "OP_CHECKSIG",
+        ],
+        lambda *_: 1,
+    ),
+    **dict.fromkeys(["OP_SHA256", "OP_HASH256"], lambda _: 256),
+    **dict.fromkeys(["OP_RIPEMD160", "OP_SHA1", "OP_HASH160"], lambda _: 160),
+}
+_BITS = {getattr(op_codes, name): rule for name, rule in _BITS_BY_NAME.items() if hasattr(op_codes, name)}
+# Worst-case bit length of the output of the arithmetic opcodes tracked by `_linear_combination`
+_LINEAR_BITS = {
+    OP_1ADD: lambda a: a + 1,
+    OP_1SUB: lambda a: a + 1,
+    OP_NEGATE: lambda a: a,
+    OP_ADD: lambda a, b: max(a, b) + 1,
+    OP_SUB: lambda a, b: max(a, b) + 1,
+}
+# Schoolbook cost of the multiplications and divisions, as a function of the bit lengths of the operands
+_COSTS = {
+    op_codes.OP_MUL: lambda a, b: a * b,
+    op_codes.OP_DIV: lambda a, b: b * max(a - b + 1, 1),
+    op_codes.OP_MOD: lambda a, b: b * max(a - b + 1, 1),
+}
+
+_OPCODE_NAMES = {getattr(op_codes, name): name for name in dir(op_codes) if name.startswith("OP_")}
+
+# Cost of an opcode as a function of the opcode, of the bit lengths of the elements it reads and of the elements it
+# pushes, and of the position of the element it accesses (for `OP_PICK` and `OP_ROLL`)
+OpcodeCost = Callable[[int, tuple[int | None, ...], tuple[int | None, ...], int], float]
+
+
+@dataclass(frozen=True, eq=False)
+class StackItem:
+    """An element of the stack during the simulation.
+
+    Two items are the same element (e.g., after `OP_DUP`) if and only if they are the same object.
+
+    Attributes:
+        origin (str): The provenance of the element: `input[i]` for the i-th element from the top of the stack before
+            the script, `altinput[i]` for the i-th element from the top of the altstack before the script,
+            `bottom[i]` for the i-th element from the bottom of the stack (accessed through `OP_DEPTH`), and
+            `<opcode>@<offset>` for an element produced by the opcode at byte `offset` of the script.
+        value (int | None): The value of the element, if it is a number known statically.
+        is_depth_relative (bool): If `True`, the value of the element is `depth + value`, where `depth` is the
+            depth of the stack before the script.
+        bits (int | None): An upper bound on the bit length of the absolute value of the element, if it is known.
+    """
+
+    origin: str
+    value: int | None = None
+    is_depth_relative: bool = False
+    bits: int | None = None
+
+    def __repr__(self) -> str:
+        """Represent the item by its provenance."""
+        return self.origin
+
+
+@dataclass
+class StackSimulation:
+    """The result of the simulation of a script.
+
+    Attributes:
+        n_inputs (int): The number of elements at the top of the stack before the script that are read or consumed
+            by the script.
+        stack (list[StackItem]): The elements above the untouched part of the stack after the script, from bottom
+            to top. The first `n_inputs` elements of the stack before the script are replaced by these.
+        altstack (list[StackItem]): The altstack after the script, from bottom to top.
+        max_depth (int): The maximum depth of the stack during the script, counting the `n_inputs` elements but not
+            the elements below them.
+        max_altstack_depth (int): The maximum depth of the altstack during the script.
+        bottom_elements (frozenset[int]): The positions (from the bottom) of the elements of the stack accessed
+            through `OP_DEPTH`, such as the modulus `q` in the field arithmetic scripts.
+        removed_bottom_elements (frozenset[int]): The positions (from the bottom) of the elements of the stack moved
+            to the top through `OP_DEPTH` and `OP_ROLL`.
+        unbalanced_conditionals (tuple[int, ...]): The offsets of the conditionals whose branches leave the stacks
+            with different depths, if the simulation is not strict (see `StackSimulator`).
+        max_bits (int | None): The maximum bit length of the elements produced by the arithmetic opcodes of the
+            script, if the bit lengths of the inputs are known (see `StackSimulator`).
+        arithmetic_cost (int): The schoolbook cost of the multiplications, divisions and modular reductions of the
+            script, in products of bits (`m * n` for a multiplication of an m-bit and an n-bit number, `n * (m - n + 1)`
+            for the division of an m-bit number by an n-bit number). It estimates the cost of executing the script, and
+            it only counts the operations whose operands have known bit lengths.
+        max_memory (int): The maximum size in bytes of the elements on the stack and on the altstack during the
+            script, counting the elements with known bit lengths only. The elements of the stack before the script are
+            counted if they are read by the script.
+        execution_cost (float): The sum of the costs of the opcodes executed, if a cost function is supplied (see
+            `StackSimulator`). The cost of a conditional is the one of its most expensive branch.
+    """
+
+    n_inputs: int
+    stack: list[StackItem]
+    altstack: list[StackItem]
+    max_depth: int
+    max_altstack_depth: int
+    bottom_elements: frozenset[int] = field(default_factory=frozenset)
+    removed_bottom_elements: frozenset[int] = field(default_factory=frozenset)
+    unbalanced_conditionals: tuple[int, ...] = ()
+    max_bits: int | None = None
+    arithmetic_cost: int = 0
+    max_memory: int = 0
+    execution_cost: float = 0
+
+    @property
+    def n_outputs(self) -> int:
+        """The number of elements left on the stack by the script in place of its `n_inputs` inputs."""
+        return len(self.stack)
+
+
+def _origin(op: int, offset: int) -> str:
+    """Return the provenance of an element produced by the opcode `op` at byte `offset` of a script."""
+    return f"{_OPCODE_NAMES.get(op, f'0x{op:02x}')}@{offset}"
+
+
+def _linear_combination(op: int, operands: list[StackItem], origin: str) -> StackItem:
+    """Compute the result of the arithmetic opcode `op` if its operands are known statically.
+
+    The values are tracked as `coefficient * depth + constant`, and only coefficients 0 and 1 are supported.
+    """
+    bits = None if any(x.bits is None for x in operands) else _LINEAR_BITS[op](*(x.bits for x in operands))
+    if any(x.value is None for x in operands):
+        return StackItem(origin, bits=bits)
+    terms = [(int(x.is_depth_relative), x.value) for x in operands]
+    if op == OP_1ADD:
+        coefficient, constant = terms[0][0], terms[0][1] + 1
+    elif op == OP_1SUB:
+        coefficient, constant = terms[0][0], terms[0][1] - 1
+    elif op == OP_NEGATE:
+        coefficient, constant = -terms[0][0], -terms[0][1]
+    elif op == OP_ADD:
+        coefficient, constant = terms[0][0] + terms[1][0], terms[0][1] + terms[1][1]
+    else:
+        coefficient, constant = terms[0][0] - terms[1][0], terms[0][1] - terms[1][1]
+    if coefficient not in {0, 1}:
+        return StackItem(origin, bits=bits)
+    return StackItem(origin, constant, coefficient == 1, _bit_length(constant) if coefficient == 0 else bits)
+
+
+def _bit_length(value: int) -> int:
+    """Return the bit length of the absolute value of `value`."""
+    return abs(value).bit_length()
+
+
+def n_bytes(bits: int | None) -> int:
+    """Return the size in bytes of the encoding of a number of `bits` bits, sign bit included (`0` if unknown)."""
+    return 0 if not bits else (bits + 8) // 8
+
+
+def _memory(items: list[StackItem]) -> int:
+    """Return the size in bytes of `items`."""
+    return sum(n_bytes(item.bits) for item in items)
+
+
+class _State:
+    """The state of the simulation along one branch of the script."""
+
+    __slots__ = (
+        "altstack",
+        "cost",
+        "max_altstack_depth",
+        "max_height",
+        "max_memory",
+        "memory",
+        "n_inputs",
+        "removed_bottom_elements",
+        "stack",
+    )
+
+    def __init__(self, stack: list, altstack: list, n_inputs: int):
+        self.stack = stack
+        self.altstack = altstack
+        self.n_inputs = n_inputs
+        # The positions (from the bottom of the stack before the script) of the bottom elements moved by `OP_ROLL`
+        self.removed_bottom_elements = []
+        # The maximum of `len(stack) - n_inputs`, i.e., the maximum height above the stack before the script
+        self.max_height = len(stack) - n_inputs
+        self.max_altstack_depth = len(altstack)
+        # The size in bytes of the elements on the stacks, its maximum, and the cost of the opcodes executed
+        self.memory = _memory(stack) + _memory(altstack)
+        self.max_memory = self.memory
+        self.cost = 0
+
+    def height(self) -> int:
+        """Return the difference between the current depth of the stack and its depth before the script."""
+        return len(self.stack) - self.n_inputs - len(self.removed_bottom_elements)
+
+    def copy(self) -> "_State":
+        state = _State(self.stack.copy(), self.altstack.copy(), self.n_inputs)
+        state.removed_bottom_elements = self.removed_bottom_elements.copy()
+        state.max_height = self.max_height
+        state.max_altstack_depth = self.max_altstack_depth
+        state.memory = self.memory
+        state.max_memory = self.max_memory
+        state.cost = self.cost
+        return state
+
+
+class StackSimulator:
+    """Simulate the stack effect of Bitcoin scripts without evaluating them.
+
+    Attributes:
+        n_inputs (int | None): The depth of the stack before the script. If `None`, the depth is unknown: the
+            simulator assumes that the stack holds as many elements as the script needs.
+        altstack_inputs (int): The depth of the altstack before the script.
+        strict_branches (bool): If `True`, the branches of every conditional must leave the stacks with the same
+            depths. If `False`, the simulation continues along the branch executed when the condition is true, and
+            the offsets of the unbalanced conditionals are reported.
+        input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the elements at the top of the stack before
+            the script, from the top: `input_bits[i]` bounds `input[i]`.
+        default_bits (int | None): Upper bound on the bit lengths of the other elements of the stack and of the
+            altstack before the script (e.g., the modulus `q` at the bottom of the stack), if it is known.
+        opcode_cost (OpcodeCost | None): If not `None`, the function giving the cost of every opcode, which is called
+            with the opcode, the bit lengths of the elements it reads and of the elements it pushes, and the position
+            of the element accessed by `OP_PICK` and `OP_ROLL` (`0` for the other opcodes). Only the branch of a
+            conditional with the highest cost is counted.
+
+    Example:
+        >>> from src.zkscript.fields.fq2 import Fq2
+        >>> simulation = StackSimulator().simulate(Fq2(q=19, non_residue=-1).mul(take_modulo=True))
+        >>> simulation.n_inputs, simulation.n_outputs, simulation.bottom_elements
+        (4, 2, frozenset({0}))
+    """
+
+    def __init__(
+        self,
+        n_inputs: int | None = None,
+        altstack_inputs: int = 0,
+        strict_branches: bool = True,
+        input_bits: tuple[int, ...] = (),
+        default_bits: int | None = None,
+        *,
+        opcode_cost: OpcodeCost | None = None,
+    ):
+        """Initialise the simulator.
+
+        Args:
+            n_inputs (int | None): The depth of the stack before the script. Defaults to `None`, i.e., unknown.
+            altstack_inputs (int): The depth of the altstack before the script. Defaults to 0.
+            strict_branches (bool): Whether the branches of every conditional must leave the stacks with the same
+                depths. Defaults to `True`.
+            input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the inputs, from the top of the stack.
+                Defaults to `()`.
+            default_bits (int | None): Upper bound on the bit lengths of the other elements before the script.
+                Defaults to `None`, i.e., unknown.
+            opcode_cost (OpcodeCost | None): The cost of every opcode. Defaults to `None`, i.e., no cost is computed.
+        """
+        self.n_inputs = n_inputs
+        self.altstack_inputs = altstack_inputs
+        self.strict_branches = strict_branches
+        self.input_bits = tuple(input_bits)
+        self.default_bits = default_bits
+        self.opcode_cost = opcode_cost
+
+    def simulate(self, script: Script | bytes) -> StackSimulation:
+        """Simulate `script`.
+
+        Args:
+            script (Script | bytes): The script to simulate, or its raw serialisation.
+
+        Returns:
+            The result of the simulation.
+
+        Raises:
+            ValueError: If the script accesses elements that are not on the (alt)stack, if the argument of an
+                `OP_ROLL` is not known statically, if the stack effect of an `OP_IFDUP` depends on the data, if the
+                branches of a conditional leave stacks of different depths and `self.strict_branches` is `True`, or if
+                the script contains unsupported opcodes.
+        """
+        raw = script if isinstance(script, bytes | bytearray) else bytes(script.raw_serialize())
+
+        self.__inputs = []
+        self.__bottom_elements = set()
+        self.__unbalanced_conditionals = []
+        self.__max_bits = None
+        self.__arithmetic_cost = 0
+        state = _State(
+            [] if self.n_inputs is None else self.__input_items(0, self.n_inputs),
+            [StackItem(f"altinput[{i}]", bits=self.default_bits) for i in range(self.altstack_inputs)][::-1],
+            self.n_inputs or 0,
+        )
+        # Every open conditional is [offset, state before the branches, state at the end of the first branch]
+        conditionals = []
+
+        # The operand of an `OP_IFDUP` whose copy depends on its value, and the offset of the `OP_IFDUP`
+        ifdup = None
+
+        offset = 0
+        for token in tokenise(raw):
+            op = token[0]
+            if ifdup is not None and op not in {OP_IF, OP_NOTIF}:
+                msg = f"The stack effect of OP_IFDUP at offset {ifdup[1]} depends on the data"
+                raise ValueError(msg)
+            if op in {OP_IF, OP_NOTIF}:
+                if ifdup is None:
+                    self.__charge(state, op, self.__pop(state, 1, offset), ())
+                    conditionals.append([offset, state.copy(), None])
+                else:
+                    # The condition is the copy made by `OP_IFDUP`: the element is on the stack if it is true
+                    item, ifdup = ifdup[0], None
+                    self.__charge(state, op, [item], ())
+                    without_copy = state.copy()
+                    self.__push(state, item)
+                    first_branch, second_branch = (state, without_copy) if op == OP_IF else (without_copy, state)
+                    conditionals.append([offset, second_branch, None])
+                    state = first_branch
+            elif op == OP_IFDUP:
+                operands = self.__pop(state, 1, offset)
+                item = operands[0]
+                if item.value is None or item.is_depth_relative:
+                    ifdup = (item, offset)
+                    self.__charge(state, op, operands, [item])
+                else:
+                    results = [item, item] if item.value != 0 else [item]
+                    self.__push(state, *results)
+                    self.__charge(state, op, operands, results)
+            elif op == OP_ELSE:
+                if not conditionals or conditionals[-1][2] is not None:
+                    msg = f"Unbalanced OP_ELSE at offset {offset}"
+                    raise ValueError(msg)
+                conditionals[-1][2] = state
+                state = conditionals[-1][1].copy()
+            elif op == OP_ENDIF:
+                if not conditionals:
+                    msg = f"Unbalanced OP_ENDIF at offset {offset}"
+                    raise ValueError(msg)
+                if_offset, before, first_branch = conditionals.pop()
+                if first_branch is None:
+                    state = self.__merge(true_branch=state, false_branch=before, offset=if_offset)
+                else:
+                    state = self.__merge(true_branch=first_branch, false_branch=state, offset=if_offset)
+            else:
+                self.__step(state, op, token, offset)
+            offset += len(token)
+
+        if ifdup is not None:
+            msg = f"The stack effect of OP_IFDUP at offset {ifdup[1]} depends on the data"
+            raise ValueError(msg)
+        if conditionals:
+            msg = f"Unbalanced OP_IF at offset {conditionals[-1][0]}"
+            raise ValueError(msg)
+
+        return StackSimulation(
+            n_inputs=state.n_inputs,
+            stack=state.stack,
+            altstack=state.altstack,
+            max_depth=state.n_inputs + state.max_height,
+            max_altstack_depth=state.max_altstack_depth,
+            bottom_elements=frozenset(self.__bottom_elements),
+            removed_bottom_elements=frozenset(state.removed_bottom_elements),
+            unbalanced_conditionals=tuple(self.__unbalanced_conditionals),
+            max_bits=self.__max_bits,
+            arithmetic_cost=self.__arithmetic_cost,
+            max_memory=state.max_memory,
+            execution_cost=state.cost,
+        )
+
+    def __reach(self, state: _State, n: int, offset: int):
+        """Make sure that the top `n` elements of the stack are materialised."""
+        missing = n - len(state.stack)
+        if missing <= 0:
+            return
+        if self.n_inputs is not None:
+            msg = f"Stack underflow at offset {offset}: {n} elements needed, {len(state.stack)} available"
+            raise ValueError(msg)
+        materialised = self.__input_items(state.n_inputs, state.n_inputs + missing)
+        state.stack[:0] = materialised
+        state.n_inputs += missing
+        # The inputs were on the stack since the beginning of the script
+        state.memory += _memory(materialised)
+        state.max_memory += _memory(materialised)
+
+    def __input_items(self, start: int, end: int) -> list[StackItem]:
+        """Return the items `input[end - 1], ..., input[start]`, from bottom to top."""
+        self.__inputs.extend(
+            StackItem(f"input[{i}]", bits=self.input_bits[i] if i < len(self.input_bits) else self.default_bits)
+            for i in range(len(self.__inputs), end)
+        )
+        return self.__inputs[start:end][::-1]
+
+    def __pop(self, state: _State, n: int, offset: int) -> list[StackItem]:
+        self.__reach(state, n, offset)
+        popped = state.stack[-n:] if n > 0 else []
+        del state.stack[len(state.stack) - n :]
+        state.memory -= _memory(popped)
+        return popped
+
+    def __push(self, state: _State, *items: StackItem):
+        state.stack.extend(items)
+        state.max_height = max(state.max_height, len(state.stack) - state.n_inputs)
+        state.memory += _memory(items)
+        state.max_memory = max(state.max_memory, state.memory)
+
+    def __charge(self, state: _State, op: int, operands: list[StackItem], results: list[StackItem], position: int = 0):
+        """Add the cost of the opcode `op` to the cost of `state`, if a cost function is supplied."""
+        if self.opcode_cost is not None:
+            state.cost += self.opcode_cost(
+                op, tuple(x.bits for x in operands), tuple(x.bits for x in results), position
+            )
+
+    def __compute(self, op: int, operands: list[StackItem], offset: int) -> StackItem:
+        """Return the element produced by the arithmetic opcode `op`, and account for its bit length and cost."""
+        if op in _LINEAR_BITS:
+            item = _linear_combination(op, operands, _origin(op, offset))
+        else:
+            bits = [x.bits for x in operands]
+            known = None not in bits
+            item = StackItem(_origin(op, offset), bits=_BITS[op](*bits) if known and op in _BITS else None)
+            if known and op in _COSTS:
+                self.__arithmetic_cost += _COSTS[op](*bits)
+        if item.bits is not None and item.value is None:
+            self.__max_bits = item.bits if self.__max_bits is None else max(self.__max_bits, item.bits)
+        return item
+
+    def __index(self, state: _State, item: StackItem, op: int, offset: int) -> int | None:
+        """Return the position from the top of the stack referred to by `item`, the argument of `OP_PICK`/`OP_ROLL`.
+
+        A negative return value `-1 - i` refers to the i-th element from the bottom of the stack, and `None` an
+        argument of `OP_PICK` that is not known statically.
+        """
+        if item.value is None and op == OP_PICK:
+            return None
+        if item.value is None:
+            msg = f"The argument of {_OPCODE_NAMES[op]} at offset {offset} is not known statically"
+            raise ValueError(msg)
+        if not item.is_depth_relative:
+            if item.value < 0:
+                msg = f"Negative argument of {_OPCODE_NAMES[op]} at offset {offset}"
+                raise ValueError(msg)
+            return item.value
+        if self.n_inputs is not None:
+            return len(state.stack) + item.value
+        # The argument is `depth + value`, and the stack holds `depth + height` elements
+        position = state.height() - 1 - item.value
+        if position < 0:
+            msg = f"The argument of {_OPCODE_NAMES[op]} at offset {offset} is larger than the depth of the stack"
+            raise ValueError(msg)
+        for removed in sorted(state.removed_bottom_elements):
+            if removed <= position:
+                position += 1
+        return -1 - position
+
+    def __step(self, state: _State, op: int, token: bytes, offset: int):
+        operands, results, position = [], [], 0
+        if op <= OP_PUSHDATA4:
+            data = token[_PUSHDATA_HEADER_LENGTHS.get(op, 1) :]
+            value = decode_num(data)
+            small = len(data) <= 8  # noqa: PLR2004
+            results = [StackItem(f"push@{offset}", value if small else None, bits=_bit_length(value))]
+            self.__push(state, *results)
+        elif op == OP_1NEGATE or OP_1 <= op <= OP_16:
+            value = -1 if op == OP_1NEGATE else op - OP_1 + 1
+            results = [StackItem(f"push@{offset}", value, bits=_bit_length(value))]
+            self.__push(state, *results)
+        elif op in _SHUFFLES:
+            n, indices = _SHUFFLES[op]
+            operands = self.__pop(state, n, offset)
+            results = [operands[i] for i in indices]
+            self.__push(state, *results)
+        elif op in _FIXED_EFFECTS:
+            n_pop, n_push = _FIXED_EFFECTS[op]
+            operands = self.__pop(state, n_pop, offset)
+            if n_push == 1:
+                results = [self.__compute(op, operands, offset)]
+            else:
+                results = [StackItem(_origin(op, offset)) for _ in range(n_push)]
+            self.__push(state, *results)
+        elif op in {OP_PICK, OP_ROLL}:
+            operands = self.__pop(state, 1, offset)
+            position = self.__index(state, operands[0], op, offset)
+            if position is None:
+                # Any element of the stack can be picked, including the ones below the inputs of the script
+                bits = [x.bits for x in state.stack]
+                if self.n_inputs is None:
+                    bits.append(self.default_bits)
+                item = StackItem(_origin(op, offset), bits=None if None in bits else max(bits, default=None))
+                position = 0
+            elif position >= 0:
+                self.__reach(state, position + 1, offset)
+                item = state.stack[-1 - position]
+                if op == OP_ROLL:
+                    del state.stack[-1 - position]
+                    state.memory -= n_bytes(item.bits)
+            else:
+                self.__bottom_elements.add(-1 - position)
+                if op == OP_ROLL:
+                    state.removed_bottom_elements.append(-1 - position)
+                item = StackItem(f"bottom[{-1 - position}]", bits=self.default_bits)
+                # The elements of the stack below the inputs of the script are not known
+                position = len(state.stack)
+            results = [item]
+            self.__push(state, item)
+        elif op == OP_TOALTSTACK:
+            operands = self.__pop(state, 1, offset)
+            state.altstack.extend(operands)
+            state.memory += _memory(operands)
+            state.max_altstack_depth = max(state.max_altstack_depth, len(state.altstack))
+        elif op == OP_FROMALTSTACK:
+            if not state.altstack:
+                msg = f"Altstack underflow at offset {offset}"
+                raise ValueError(msg)
+            item = state.altstack.pop()
+            state.memory -= n_bytes(item.bits)
+            self.__push(state, item)
+        elif op == OP_DEPTH:
+            if self.n_inputs is None:
+                self.__push(state, StackItem(_origin(op, offset), state.height(), is_depth_relative=True))
+            else:
+                self.__push(state, StackItem(_origin(op, offset), len(state.stack)))
+        elif op == OP_SIZE:
+            self.__reach(state, 1, offset)
+            self.__push(state, StackItem(_origin(op, offset)))
+        elif op in {OP_1ADD, OP_1SUB, OP_NEGATE, OP_ADD, OP_SUB}:
+            operands = self.__pop(state, 2 if op in {OP_ADD, OP_SUB} else 1, offset)
+            results = [self.__compute(op, operands, offset)]
+            self.__push(state, *results)
+        else:
+            msg = f"Unsupported opcode {_origin(op, offset)}"
+            raise ValueError(msg)
+        self.__charge(state, op, operands, results, position)
+
+    def __merge(self, true_branch: _State, false_branch: _State, offset: int) -> _State:
+        """Merge the states at the end of the two branches of the conditional at `offset`."""
+        for short, long in [(true_branch, false_branch), (false_branch, true_branch)]:
+            missing = long.n_inputs - short.n_inputs
+            if missing > 0:
+                materialised = self.__input_items(short.n_inputs, long.n_inputs)
+                short.stack[:0] = materialised
+                short.n_inputs += missing
+                short.memory += _memory(materialised)
+                short.max_memory += _memory(materialised)
+
+        if (
+            len(true_branch.stack) != len(false_branch.stack)
+            or len(true_branch.altstack) != len(false_branch.altstack)
+            or sorted(true_branch.removed_bottom_elements) != sorted(false_branch.removed_bottom_elements)
+        ):
+            if not self.strict_branches:
+                self.__unbalanced_conditionals.append(offset)
+                return true_branch
+            msg = f"The branches of the conditional at offset {offset} leave stacks of different depths: "
+            msg += f"({len(true_branch.stack)}, {len(true_branch.altstack)}) and "
+            msg += f"({len(false_branch.stack)}, {len(false_branch.altstack)})"
+            raise ValueError(msg)
+
+        origin = f"{_OPCODE_NAMES[OP_IF]}@{offset}"
+        for stack, other_stack in [
+            (true_branch.stack, false_branch.stack),
+            (true_branch.altstack, false_branch.altstack),
+        ]:
+            for i, (x, y) in enumerate(zip(stack, other_stack, strict=True)):
+                if x is not y:
+                    same_value = x.value == y.value and x.is_depth_relative == y.is_depth_relative
+                    bits = None if x.bits is None or y.bits is None else max(x.bits, y.bits)
+                    stack[i] = StackItem(
+                        origin, *((x.value, x.is_depth_relative) if same_value else (None, False)), bits=bits
+                    )
+
+        true_branch.max_height = max(true_branch.max_height, false_branch.max_height)
+        true_branch.max_altstack_depth = max(true_branch.max_altstack_depth, false_branch.max_altstack_depth)
+        true_branch.memory = _memory(true_branch.stack) + _memory(true_branch.altstack)
+        true_branch.max_memory = max(true_branch.max_memory, false_branch.max_memory, true_branch.memory)
+        true_branch.cost = max(true_branch.cost, false_branch.cost)
+        return true_branch
+
+
+def simulate(
+    script: Script | bytes,
+    n_inputs: int | None = None,
+    altstack_inputs: int = 0,
+    strict_branches: bool = True,
+    input_bits: tuple[int, ...] = (),
+    default_bits: int | None = None,
+    opcode_cost: OpcodeCost | None = None,
+) -> StackSimulation:
+    """Simulate the stack effect of `script`, see `StackSimulator`."""
+    return StackSimulator(
+        n_inputs, altstack_inputs, strict_branches, input_bits, default_bits, opcode_cost=opcode_cost
+    ).simulate(script)
+
+
+def output_bits(script: Script | bytes, input_bits: tuple[int, ...], n_outputs: int, default_bits: int) -> int:
+    """Return an upper bound on the bit lengths of the elements left at the top of the stack by `script`.
+
+    Args:
+        script (Script | bytes): The script to simulate.
+        input_bits (tuple[int, ...]): Upper bounds on the bit lengths of the inputs, from the top of the stack.
+        n_outputs (int): The number of elements at the top of the stack after the script whose bound is returned.
+        default_bits (int): Upper bound on the bit lengths of the other elements before the script.
+
+    Returns:
+        The maximum bit length of the `n_outputs` elements at the top of the stack after `script`.
+
+    Raises:
+        ValueError: If the script leaves fewer than `n_outputs` elements, or if their bit lengths cannot be computed.
+    """
+    simulation = simulate(script, input_bits=input_bits, default_bits=default_bits)
+    bits = [item.bits for item in simulation.stack[max(len(simulation.stack) - n_outputs, 0) :]]
+    if len(bits) < n_outputs or None in bits:
+        msg = f"The bit lengths of the {n_outputs} elements left by the script cannot be computed"
+        raise ValueError(msg)
+    return max(bits)
+
+
+def assert_stack_effect(
+    script: Script | bytes,
+    n_inputs: int,
+    n_outputs: int,
+    altstack_inputs: int = 0,
+    altstack_outputs: int = 0,
+) -> StackSimulation:
+    """Check that `script` replaces the top `n_inputs` elements of the stack with `n_outputs` elements.
+
+    This is meant as a fast pre-check of the "Stack input / Stack output" contracts of the script generators. The
+    elements accessed through `OP_DEPTH` (e.g., the modulus `q` at the bottom of the stack) are not counted as
+    inputs.
+
+    Args:
+        script (Script | bytes): The script to check.
+        n_inputs (int): The expected number of inputs on the stack.
+        n_outputs (int): The expected number of outputs on the stack.
+        altstack_inputs (int): The expected number of inputs on the altstack. Defaults to 0.
+        altstack_outputs (int): The expected number of outputs on the altstack. Defaults to 0.
+
+    Returns:
+        The result of the simulation.
+
+    Raises:
+        AssertionError: If the stack effect of the script is not the expected one.
+    """
+    simulation = simulate(script, altstack_inputs=altstack_inputs)
+    actual = (simulation.n_inputs, simulation.n_outputs, len(simulation.altstack))
+    expected = (n_inputs, n_outputs, altstack_outputs)
+    assert actual == expected, f"Expected (inputs, outputs, altstack outputs) {expected}, got {actual}"
+    return simulation
+
+
+class StackChecks:
+    """Registry of the checks of the scripts returned by the generators decorated with `check_stack_effect`.
+
+    When the checks are enabled, every script returned by a decorated generator is simulated (see `StackSimulator`),
+    and must leave the altstack empty, as documented by the "Stack output" of the generators. The conditionals whose
+    branches leave stacks of different depths by design (e.g., the optional additions of the double-and-add loops,
+    or the doubling in `point_addition_with_unknown_points`) are followed along their first branch. The checks only
+    use the script, so they run without the data of the unlocking script, but they do not replace its evaluation:
+    they catch malformed conditionals, elements accessed on an empty (alt)stack and elements left on the altstack,
+    not arithmetic errors.
+
+    Attributes:
+        is_enabled (bool): Whether the scripts returned by the decorated generators are checked.
+        n_checked (dict[str, int]): The number of scripts checked for every generator, indexed by its qualified name.
+    """
+
+    def __init__(self):
+        """Initialise the registry, with the checks disabled."""
+        self.is_enabled = False
+        self.n_checked = {}
+
+    def enable(self):
+        """Enable the checks."""
+        self.is_enabled = True
+
+    def disable(self):
+        """Disable the checks. The counts are kept, see `StackChecks.clear`."""
+        self.is_enabled = False
+
+    def clear(self):
+        """Reset the counts of the scripts checked."""
+        self.n_checked = {}
+
+    @contextmanager
+    def active(self) -> Iterator[Self]:
+        """Enable the checks within a `with` block, then restore the previous state."""
+        was_enabled = self.is_enabled
+        self.is_enabled = True
+        try:
+            yield self
+        finally:
+            self.is_enabled = was_enabled
+
+    def check(self, method: Callable[..., Script]) -> Callable[..., Script]:
+        """Decorate a function returning a `Script` so that its scripts are checked when the checks are enabled."""
+        name = method.__qualname__
+        checks = self
+
+        @wraps(method)
+        def wrapper(*args, **kwargs) -> Script:
+            script = method(*args, **kwargs)
+            if not checks.is_enabled:
+                return script
+
+            raw = script.to_bytes() if isinstance(script, ScriptBuilder) else bytes(script.raw_serialize())
+            try:
+                simulation = simulate(raw, strict_branches=False)
+            except ValueError as error:
+                msg = f"The script returned by {name} cannot be simulated: {error}"
+                raise AssertionError(msg) from error
+            if simulation.altstack:
+                msg = f"The script returned by {name} leaves {len(simulation.altstack)} elements on the altstack"
+                raise AssertionError(msg)
+            checks.n_checked[name] = checks.n_checked.get(name, 0) + 1
+            return script
+
+        return wrapper
+
+
+stack_checks = StackChecks()
+check_stack_effect = stack_checks.check
@@ -5,78 +5,27 @@ from typing import Union
 from tx_engine import Script
 
 from src.zkscript.script_types.stack_elements import StackElements
+from src.zkscript.util.peephole_optimiser import PeepholeOptimiser, PeepholeRule, default_peephole_optimiser
 
 
-def optimise_script(script: Script) -> Script:
+def optimise_script(script: Script, rules: tuple[PeepholeRule, ...] | None = None) -> Script:
     """Optimise a script by simplifying certain operations.
 
     This function simplifies certain operations, such as `OP_TOALTSTACK OP_FROMALTSTACK` and
     `OP_FROMALTSTACK OP_TOALTSTACK`, which cancel each other out and are therefore removed.
-    The function iterates over the script until no further operations can be simplified.
+    The script is scanned once, and the simplifications cascade, so that no further operation can be simplified in
+    the returned script. See `peephole_optimiser.PeepholeOptimiser`.
 
     Args:
         script (Script): The script to be optimised.
+        rules (tuple[PeepholeRule, ...] | None): The rules to apply. Defaults to `None`, meaning that
+            `DEFAULT_PEEPHOLE_RULES` are applied.
 
     Returns:
         The optimised script with redundant operations removed.
     """
-    patterns = {
-        (
-            "OP_TOALTSTACK",
-            "OP_FROMALTSTACK",
-        ): [],
-        (
-            "OP_FROMALTSTACK",
-            "OP_TOALTSTACK",
-        ): [],
-        (
-            "OP_ROT",
-            "OP_ROT",
-            "OP_ROT",
-        ): [],
-        (
-            "OP_SWAP",
-            "OP_ADD",
-        ): ["OP_ADD"],
-        (
-            "OP_SWAP",
-            "OP_MUL",
-        ): ["OP_MUL"],
-        (
-            "OP_SWAP",
-            "OP_SUB",
-            "OP_NEGATE",
-        ): ["OP_SUB"],
-        (
-            "OP_0",
-            "OP_EQUAL",
-            "OP_NOT",
-        ): ["OP_0NOTEQUAL"],
-        (
-            "OP_SWAP",
-            "OP_TUCK",
-        ): ["OP_OVER"],
-    }
-
-    script_list = script.to_string().split()
-    stack = []
-
-    for op in script_list:
-        stack.append(op)
-
-        for pattern, replacement in patterns.items():
-            pattern_length = len(pattern)
-
-            if len(stack) >= pattern_length:
-                last_elements = tuple(stack[-pattern_length:])
-
-                if last_elements == pattern:
-                    for _ in range(pattern_length):
-                        stack.pop()
-                    stack.extend(replacement)
-                    break
-
-    return Script.parse_string(" ".join(stack))
+    optimiser = default_peephole_optimiser if rules is None else PeepholeOptimiser(rules)
+    return optimiser.optimise(script)
 
 
 def check_order(stack_elements: list[StackElements]) -> ValueError | None:
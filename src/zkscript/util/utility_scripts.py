@@ -2,45 +2,16 @@
 
 from typing import Union
 
-from tx_engine import Script, encode_num, hash256d
+from tx_engine import Script, hash256d
 from tx_engine.engine.op_codes import (
-    OP_0,
-    OP_1,
-    OP_1NEGATE,
     OP_2,
-    OP_2DUP,
-    OP_2OVER,
-    OP_2ROT,
-    OP_2SWAP,
-    OP_3,
-    OP_3DUP,
-    OP_4,
-    OP_5,
-    OP_6,
-    OP_7,
-    OP_8,
-    OP_9,
-    OP_10,
-    OP_11,
-    OP_12,
-    OP_13,
-    OP_14,
-    OP_15,
-    OP_16,
     OP_ADD,
     OP_CAT,
-    OP_DUP,
     OP_EQUAL,
     OP_EQUALVERIFY,
     OP_HASH256,
     OP_MOD,
     OP_MUL,
-    OP_OVER,
-    OP_PICK,
-    OP_ROLL,
-    OP_ROT,
-    OP_SWAP,
-    OP_TUCK,
 )
 
 from src.zkscript.script_types.stack_elements import (
@@ -51,48 +22,15 @@ from src.zkscript.script_types.stack_elements import (
     StackFiniteFieldElement,
     StackNumber,
 )
+from src.zkscript.util.script_builder import (  # noqa: F401
+    ScriptBuilder,
+    op_range,
+    op_range_to_opcode,
+    patterns_to_pick,
+    patterns_to_roll,
+)
 from src.zkscript.util.utility_functions import bitmask_to_boolean_list, check_order
 
-patterns_to_pick = {
-    (0, 1): [OP_DUP],
-    (1, 1): [OP_OVER],
-    (1, 2): [OP_2DUP],
-    (2, 3): [OP_3DUP],
-    (3, 2): [OP_2OVER],
-    (3, 4): [OP_2OVER, OP_2OVER],
-}
-patterns_to_roll = {
-    (1, 1): [OP_SWAP],
-    (2, 1): [OP_ROT],
-    (2, 2): [OP_ROT, OP_ROT],
-    (3, 2): [OP_2SWAP],
-    (3, 3): [OP_3, OP_ROLL, OP_2SWAP],
-    (5, 2): [OP_2ROT],
-    (5, 3): [OP_2ROT, OP_5, OP_ROLL],
-    (5, 4): [OP_2ROT, OP_2ROT],
-}
-op_range = range(-1, 17)
-op_range_to_opcode = {
-    -1: OP_1NEGATE,
-    0: OP_0,
-    1: OP_1,
-    2: OP_2,
-    3: OP_3,
-    4: OP_4,
-    5: OP_5,
-    6: OP_6,
-    7: OP_7,
-    8: OP_8,
-    9: OP_9,
-    10: OP_10,
-    11: OP_11,
-    12: OP_12,
-    13: OP_13,
-    14: OP_14,
-    15: OP_15,
-    16: OP_16,
-}
-
 
 def pick(position: int, n_elements: int) -> Script:
     """Pick the elements x_{position}, ..., x_{position-n_elements}.
@@ -118,35 +56,7 @@ def pick(position: int, n_elements: int) -> Script:
         >>> pick(-1, 1)
         OP_DEPTH OP_1SUB OP_PICK
     """
-    if position >= 0 and position < n_elements - 1:
-        msg = "When positive, position must be at least equal to n_elements - 1: "
-        msg += f"position: {position}, n_elements: {n_elements}"
-        raise ValueError(msg)
-
-    out = Script()
-
-    if (position, n_elements) in patterns_to_pick:
-        out += Script(patterns_to_pick[(position, n_elements)])
-    elif position in op_range[1:]:
-        out += Script([op_range_to_opcode[position], OP_PICK] * n_elements)
-    elif position < 0:
-        ix_to_pick = position
-        for _ in range(n_elements):
-            out += Script.parse_string("OP_DEPTH")
-            out += (
-                Script.parse_string("OP_1SUB")
-                if ix_to_pick == -1
-                else nums_to_script([-ix_to_pick]) + Script.parse_string("OP_SUB")
-            )
-            out += Script.parse_string("OP_PICK")
-            ix_to_pick -= 1
-    else:
-        num_encoded = encode_num(position)
-        for _ in range(n_elements):
-            out.append_pushdata(num_encoded)
-            out += Script([OP_PICK])
-
-    return out
+    return ScriptBuilder().pick(position=position, n_elements=n_elements).to_script()
 
 
 def roll(position: int, n_elements: int) -> Script:
@@ -173,36 +83,7 @@ def roll(position: int, n_elements: int) -> Script:
         >>> roll(-1, 1)
         OP_DEPTH OP_1SUB OP_ROLL
     """
-    if position >= 0 and position < n_elements - 1:
-        msg = "When positive, position must be at least equal to n_elements - 1: "
-        msg += f"position: {position}, n_elements: {n_elements}"
-        raise ValueError(msg)
-
-    if position == n_elements - 1:
-        return Script()
-
-    out = Script()
-
-    if (position, n_elements) in patterns_to_roll:
-        out += Script(patterns_to_roll[(position, n_elements)])
-    elif position in op_range[2:]:
-        out += Script([op_range_to_opcode[position], OP_ROLL] * n_elements)
-    elif position < 0:
-        for _ in range(n_elements):
-            out += Script.parse_string("OP_DEPTH")
-            out += (
-                Script.parse_string("OP_1SUB")
-                if position == -1
-                else nums_to_script([-position]) + Script.parse_string("OP_SUB")
-            )
-            out += Script.parse_string("OP_ROLL")
-    else:
-        num_encoded = encode_num(position)
-        for _ in range(n_elements):
-            out.append_pushdata(num_encoded)
-            out += Script([OP_ROLL])
-
-    return out
+    return ScriptBuilder().roll(position=position, n_elements=n_elements).to_script()
 
 
 def nums_to_script(nums: list[int]) -> Script:
@@ -218,14 +99,7 @@ def nums_to_script(nums: list[int]) -> Script:
         >>> nums_to_script([-2, -1, 0, 1, 2, 16, 17, 64, 128])
         0x82 OP_1NEGATE OP_0 OP_1 OP_2 OP_16 0x11 0x40 0x8000
     """
-    out = Script()
-    for n in nums:
-        if n in op_range:
-            out += Script([op_range_to_opcode[n]])
-        else:
-            out.append_pushdata(encode_num(n))
-
-    return out
+    return ScriptBuilder().nums(nums).to_script()
 
 
 def mod(
@@ -273,19 +147,16 @@ def mod(
             Let `stack_in = [1, 2], alt_stack_in = [3]`, after `OP_FROMALTSTACK OP_ROT`, we get:
             `stack_out = [2, 3, 1], alt_stack_out = []`.
     """
-    out = Script.parse_string(stack_preparation)
-
-    pick_modulo = OP_TUCK if is_mod_on_top else OP_OVER
-
-    if is_positive:
-        reuse_modulo = OP_OVER if is_constant_reused else OP_SWAP
-        out += Script([pick_modulo, OP_MOD, OP_OVER, OP_ADD, reuse_modulo, OP_MOD])
-    elif is_constant_reused:
-        out += Script([pick_modulo, OP_MOD])
-    else:
-        out += Script([OP_MOD]) if is_mod_on_top else Script([OP_SWAP, OP_MOD])
-
-    return out
+    return (
+        ScriptBuilder()
+        .mod(
+            stack_preparation=stack_preparation,
+            is_mod_on_top=is_mod_on_top,
+            is_positive=is_positive,
+            is_constant_reused=is_constant_reused,
+        )
+        .to_script()
+    )
 
 
 def verify_bottom_constant(n: int) -> Script:
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 
 import pytest
 from elliptic_curves.fields.cubic_extension import CubicExtension
+from elliptic_curves.fields.prime_field import PrimeField
 from elliptic_curves.fields.quadratic_extension import QuadraticExtension
 from elliptic_curves.instantiations.bls12_381.bls12_381 import BLS12_381
 from elliptic_curves.instantiations.bls12_381.bls12_381 import NON_RESIDUE_FQ2 as NON_RESIDUE_FQ2_BLS12_381
@@ -18,9 +19,11 @@ from elliptic_curves.instantiations.mnt4_753.mnt4_753 import Fq as Fq_mnt4_753
 from elliptic_curves.instantiations.mnt4_753.mnt4_753 import Fq2 as Fq2_mnt4_753
 from elliptic_curves.instantiations.mnt4_753.mnt4_753 import Fq4 as Fq4_mnt4_753
 from elliptic_curves.instantiations.mnt4_753.mnt4_753 import q as q_mnt4_753
+from elliptic_curves.models.ec import ShortWeierstrassEllipticCurve
 from tx_engine import Context, Script
 
 from src.zkscript.bilinear_pairings.bls12_381.bls12_381 import bls12_381
+from src.zkscript.bilinear_pairings.bls12_381.fields import fq12_script as fq12_script_bls12_381
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq12cubic_script as fq12cubic_script_bls12_381
 from src.zkscript.bilinear_pairings.bls12_381.final_exponentiation import (
     final_exponentiation as final_exponentiation_bls12_381,
@@ -29,6 +32,19 @@ from src.zkscript.bilinear_pairings.bls12_381.line_functions import line_functio
 from src.zkscript.bilinear_pairings.bls12_381.miller_output_operations import (
     miller_output_ops as miller_output_ops_bls12_381,
 )
+from src.zkscript.bilinear_pairings.bn254.bn254 import bn254
+from src.zkscript.bilinear_pairings.bn254.fields import fq12_script as fq12_script_bn254
+from src.zkscript.bilinear_pairings.bn254.fields import fq12cubic_script as fq12cubic_script_bn254
+from src.zkscript.bilinear_pairings.bn254.final_exponentiation import final_exponentiation as final_exponentiation_bn254
+from src.zkscript.bilinear_pairings.bn254.line_functions import line_functions as line_functions_bn254
+from src.zkscript.bilinear_pairings.bn254.miller_output_operations import miller_output_ops as miller_output_ops_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import NON_RESIDUE_FQ as NON_RESIDUE_FQ_BN254
+from src.zkscript.bilinear_pairings.bn254.parameters import NON_RESIDUE_FQ2 as NON_RESIDUE_FQ2_BN254
+from src.zkscript.bilinear_pairings.bn254.parameters import a as a_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import b as b_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import q as q_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import twisted_a as twisted_a_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import twisted_b as twisted_b_bn254
 from src.zkscript.bilinear_pairings.mnt4_753.final_exponentiation import (
     final_exponentiation as final_exponentiation_mnt4_753,
 )
@@ -43,12 +59,20 @@ from src.zkscript.script_types.stack_elements import (
     StackFiniteFieldElement,
 )
 from src.zkscript.script_types.unlocking_keys.miller_loops import (
+    HybridMillerLoopUnlockingKey,
     MillerLoopUnlockingKey,
+    MultiMillerLoopProjUnlockingKey,
     TripleMillerLoopProjUnlockingKey,
     TripleMillerLoopUnlockingKey,
 )
-from src.zkscript.script_types.unlocking_keys.pairings import SinglePairingUnlockingKey, TriplePairingUnlockingKey
-from src.zkscript.util.utility_scripts import bitmask_to_boolean_list, nums_to_script
+from src.zkscript.script_types.unlocking_keys.pairings import (
+    MultiPairingUnlockingKey,
+    SinglePairingUnlockingKey,
+    TriplePairingUnlockingKey,
+)
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.modulo_planner import modulo_planner
+from src.zkscript.util.utility_scripts import bitmask_to_boolean_list, nums_to_script, roll
 from tests.bilinear_pairings.util import (
     check_constant,
     generate_unlock,
@@ -78,6 +102,7 @@ class Bls12381:
     test_script_final_exponentiation = final_exponentiation_bls12_381
     test_script_pairing = bls12_381
     test_script_cubic_to_quadratic = fq12cubic_script_bls12_381
+    test_script_fq12 = fq12_script_bls12_381
     # Indices of elements to select from sparse multiplications/line evaluations
     ix_line_evaluation = [0, 1, 2, 8, 9]
     ix_line_eval_times_eval = [0, 1, 2, 3, 6, 7, 8, 9, 10, 11]
@@ -1467,6 +1492,118 @@ class Bls12381:
                 ),
             }
         ],
+        "test_cyclotomic_square": [
+            {
+                "x": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(
+                                2346938073710250597215129448135319768030955831631036091917381721011441605329148386305775177428620138442380020446348
+                            ),
+                            Fq(
+                                1289751830592817767498509773936054323039521660800091940633187323627548110081837705272233385295580662476378723544049
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                3389410244399974171162160084753972305214209664847925167874000101338022071254158451502897437091160109070430544640438
+                            ),
+                            Fq(
+                                3807401851574621550906304726508249821352569660299467308708278074024468269186303640080359366417841037695662017493817
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                3106049007963088477141659444998635732102191528643299250198172502086729638997905488964378471332087327559120006609968
+                            ),
+                            Fq(
+                                943091985468508880264828868006128582247818185896188260418091117434050891058029293579014252326053158021397854843990
+                            ),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(
+                                2368566103472575499922273706002055966284981307687882785679280745335974152654516603415001732444665076940120119545253
+                            ),
+                            Fq(
+                                2312123306448066421601458965503871112978663403037183540012387856716895852391251757113908328187824630185333501587562
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                1617536387112952640263500135158654180480383471363348805784172085864553054558427768567764668348888984368414706814709
+                            ),
+                            Fq(
+                                1761323438503831930973574585658420011433845829382637061131052865223051204021442679514185722826185648218544187380723
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                1052941394727798309192951701081721929334327135901585732487741853050726852497116015687472585756827650359984808735313
+                            ),
+                            Fq(
+                                1566269216510578769073257912017638699685666950740897517838272607921501518223134049480772834502515537195645748735766
+                            ),
+                        ),
+                    ),
+                ),
+                "expected": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(
+                                3502031929620247358716575924796074354594701274697015683986474342521489927852558079763322478948119753996017075087743
+                            ),
+                            Fq(
+                                1089234964094621001196912080932066568364113825578192816877775075623538761531910513518359365733050895661284095389217
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                2747248284140815745209216899424170610122142394936043089439588312813239151636462519727219255929551291078201785907297
+                            ),
+                            Fq(
+                                2505013948544509605677505979097457188481040379948674201581482349352862545209876670489664223766950074994434448475808
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                736525415337243086297603178483555809938462378659716751520672368034607228207372146679254636917871807657023451247368
+                            ),
+                            Fq(
+                                585728365828396420037439705877313911073584664806965233434288102709464840910681865506239913200465267903905254138339
+                            ),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(
+                                1071291384096567056510504123007689491930355444759816959652909963713805030151946244496567610988151082690595911927947
+                            ),
+                            Fq(
+                                2451400555046565449363253406345189963956743870358652499169917044596387385176584520776407362291113727221470475102571
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                398439104943996481015524852529783757195684208914071031935819008899061652211294186606813084447450299539557274339755
+                            ),
+                            Fq(
+                                3802353142158091610583568372833795799600342242113097460904549570675768965294897517315908597107202295772378930493870
+                            ),
+                        ),
+                        Fq2(
+                            Fq(
+                                1825208870908674443518732561852608096698573670595602076334290222036778308279614534721064061128897425373287591915334
+                            ),
+                            Fq(
+                                3573338873734921153866723002320461195810267118379135901470769203505367762677833571143187762654887116114211584073604
+                            ),
+                        ),
+                    ),
+                ),
+            }
+        ],
         "test_hard_exponentiation": [
             {
                 "f": Fq12(
@@ -3121,152 +3258,599 @@ class Mnt4753:
     }
 
 
-def generate_test_cases(test_name):
-    configurations = [
-        Bls12381,
-        Mnt4753,
-    ]
-
-    out = []
-    for config in configurations:
-        if test_name in config.test_data:
-            for test_data in config.test_data[test_name]:
-                match test_name:
-                    case "test_cubic_to_quadratic":
-                        out.append((config, test_data["x"], test_data["expected"]))
-                    case "test_line_evaluation":
-                        out.append(
-                            (
-                                config,
-                                test_data["point_p"],
-                                test_data["point_q"],
-                                test_data["lam"],
-                                test_data["expected"],
-                            )
-                        )
-                    case "test_line_evaluation_proj":
-                        out.append(
-                            (
-                                config,
-                                test_data["point_p"],
-                                test_data["point_q"],
-                                test_data["point_t"],
-                                test_data["expected"],
-                            )
-                        )
-                    case "test_line_eval_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_line_eval_times_eval_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_line_eval_times_eval_times_eval_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_line_eval_times_eval_times_eval_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_line_eval_times_eval_times_eval_times_eval_times_eval_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_miller_output_times_eval":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_line_eval_times_eval_times_miller_output":
-                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
-                    case "test_easy_exponentiation_with_inverse_check":
-                        out.append((config, test_data["f"], test_data["f_inverse"], test_data["expected"]))
-                    case "test_hard_exponentiation":
-                        out.append((config, test_data["f"], test_data["expected"]))
-                    case "test_miller_loop":
-                        out.append(
-                            (
-                                config,
-                                test_data["point_p"],
-                                test_data["point_q"],
-                                test_data["q_times_val_miller_loop"],
-                                test_data["expected"],
-                            )
-                        )
-                    case "test_single_pairing":
-                        out.append(
-                            (
-                                config,
-                                test_data["point_p"],
-                                test_data["point_q"],
-                                test_data["miller_loop_inverse"],
-                                test_data["expected"],
-                            )
-                        )
-                    case "test_triple_miller_loop":
-                        out.append((config, test_data["point_p"], test_data["point_q"], test_data["expected"]))
-                    case "test_triple_pairing":
-                        out.append(
-                            (
-                                config,
-                                test_data["point_p"],
-                                test_data["point_q"],
-                                test_data["miller_loop_inverse"],
-                                test_data["expected"],
-                            )
-                        )
-                    case _:
-                        raise ValueError
-    return out
-
-
-def verify_script(lock, unlock, clean_constant):
-    context = Context(script=unlock + lock)
-
-    assert context.evaluate()
-
-    assert context.get_altstack().size() == 0
-    if clean_constant:
-        assert context.get_stack().size() == 1
-    else:
-        assert context.get_stack().size() == 2
-
-
-@pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_cubic_to_quadratic"))
-def test_cubic_to_quadratic(config, x, expected, save_to_json_folder):
-    unlock = generate_unlock(x)
-
-    # Check correct evaluation
-    lock = config.test_script_cubic_to_quadratic.to_quadratic()
-    lock += generate_verify(expected)
-
-    verify_script(lock, unlock, True)
-
-    if save_to_json_folder:
-        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "cubic_to_quadratic")
-
-
-@pytest.mark.parametrize("clean_constant", [True, False])
-@pytest.mark.parametrize("is_constant_reused", [True, False])
-@pytest.mark.parametrize("positive_modulo", [True, False])
-@pytest.mark.parametrize("is_gradient_before", [True, False])
-@pytest.mark.parametrize(
-    ("config", "point_p", "point_q", "lam", "expected"), generate_test_cases("test_line_evaluation")
-)
-def test_line_evaluation(
-    config,
-    positive_modulo,
-    point_p,
-    point_q,
-    lam,
-    expected,
-    clean_constant,
-    is_constant_reused,
-    is_gradient_before,
-    save_to_json_folder,
-):
-    unlock = nums_to_script([config.q])
-    if is_gradient_before:
-        unlock += generate_unlock(lam)
-    unlock += generate_unlock(point_p)
-    unlock += generate_unlock(point_q)
-    if not is_gradient_before:
-        unlock += generate_unlock(lam)
+@dataclass
+class Bn254:
+    # Define Fq, Fq2, Fq4, Fq6, Fq12 and Fq12Cubic
+    q = q_bn254
+    Fq = PrimeField(q)
+    Fq2 = QuadraticExtension(base_field=Fq, non_residue=Fq(NON_RESIDUE_FQ_BN254))
+    Fq4 = QuadraticExtension(
+        base_field=Fq2, non_residue=Fq2(Fq(NON_RESIDUE_FQ2_BN254[0]), Fq(NON_RESIDUE_FQ2_BN254[1]))
+    )
+    non_residue_fq = NON_RESIDUE_FQ_BN254
+    Fq6 = CubicExtension(base_field=Fq2, non_residue=Fq2(Fq(NON_RESIDUE_FQ2_BN254[0]), Fq(NON_RESIDUE_FQ2_BN254[1])))
+    Fq12 = QuadraticExtension(base_field=Fq6, non_residue=Fq6(Fq2.zero(), Fq2.identity(), Fq2.zero()))
+    Fq12Cubic = CubicExtension(base_field=Fq4, non_residue=Fq4(Fq2.zero(), Fq2.identity()))
+    # G1 & G2, G2 is the M-type sextic twist of `src.zkscript.bilinear_pairings.bn254.parameters`
+    g1_curve = ShortWeierstrassEllipticCurve(a=Fq(a_bn254), b=Fq(b_bn254))
+    g2_curve = ShortWeierstrassEllipticCurve(
+        a=Fq2(Fq(twisted_a_bn254[0]), Fq(twisted_a_bn254[1])), b=Fq2(Fq(twisted_b_bn254[0]), Fq(twisted_b_bn254[1]))
+    )
+    # Define scripts run in tests
+    test_script_line_functions = line_functions_bn254
+    test_script_miller_output_ops = miller_output_ops_bn254
+    test_script_final_exponentiation = final_exponentiation_bn254
+    test_script_pairing = bn254
+    test_script_cubic_to_quadratic = fq12cubic_script_bn254
+    test_script_fq12 = fq12_script_bn254
+    # Indices of elements to select from sparse multiplications/line evaluations
+    ix_line_evaluation = [0, 1, 2, 8, 9]
+    ix_line_eval_times_eval = [0, 1, 2, 3, 6, 7, 8, 9, 10, 11]
+    ix_line_eval_times_eval_times_eval = list(range(12))
+    ix_line_eval_times_eval_times_eval_times_eval = list(range(12))
+    ix_miller_output = list(range(12))
+    # Parameters of the curve
+    exp_miller_loop = bn254.exp_miller_loop
+    # Define filename for saving scripts
+    filename = "bn254"
 
-    # Check correct evaluation, if positive_modulo is negative, we do not clean the modulo constant q
-    if is_gradient_before:
-        lock = config.test_script_line_functions.line_evaluation(
-            take_modulo=True,
-            positive_modulo=positive_modulo,
+    test_data = {
+        "test_line_eval_times_eval": [
+            {
+                "x": Fq12Cubic(
+                    Fq4(
+                        Fq2(
+                            Fq(20944324373648590553844562407950636667674219581787334041447048882045050150278),
+                            Fq(18415221761631568444397125149905478529200992522087641405271465756907412361431),
+                        ),
+                        Fq2(Fq(21065126499043050389446466705889362148867791665409621875144482618281805113862), Fq(0)),
+                    ),
+                    Fq4(Fq2(Fq(0), Fq(0)), Fq2(Fq(0), Fq(0))),
+                    Fq4(
+                        Fq2(
+                            Fq(17821888131109878192931086991021853928158270258267954559167012223833614932345),
+                            Fq(2161609877210285454156552630660943859284257796789393716307035747607140337520),
+                        ),
+                        Fq2(Fq(0), Fq(0)),
+                    ),
+                ),
+                "y": Fq12Cubic(
+                    Fq4(
+                        Fq2(
+                            Fq(15389007996834688545555487223363199424101481155267242530410963809217906068208),
+                            Fq(18198786180281259521734472395844210635002819298131387257368228245872856378816),
+                        ),
+                        Fq2(Fq(5919611995370232230220325354305241315806820461289122305466690864101774795625), Fq(0)),
+                    ),
+                    Fq4(Fq2(Fq(0), Fq(0)), Fq2(Fq(0), Fq(0))),
+                    Fq4(
+                        Fq2(
+                            Fq(9469400122118218973944399427171516440045946370402577927548656975198187446240),
+                            Fq(11995594511357816822101951321337295004541443837734361642015127115182706989226),
+                        ),
+                        Fq2(Fq(0), Fq(0)),
+                    ),
+                ),
+                "expected": Fq12Cubic(
+                    Fq4(
+                        Fq2(
+                            Fq(19416552919081283398981623708579891218888705256344186569983680856278297652395),
+                            Fq(12607252770353508220544153697360732817965019695215028575322094858523775599219),
+                        ),
+                        Fq2(
+                            Fq(3363166799613055724331838686149268767076911027852907393507022733152089731593),
+                            Fq(14006806191269000466036614325163175666037572293533120938833968080628302450245),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(Fq(0), Fq(0)),
+                        Fq2(
+                            Fq(15034304522347501337036932608058248736900420700792426765936898937895268635737),
+                            Fq(200887239207107915975792885956370537727043479384327627626876416687775347661),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(
+                            Fq(15140195947136267650371683008923705523070504096326069199686541292961899374470),
+                            Fq(20599542740156723321681795146625977411317121851498705305351459389011237016372),
+                        ),
+                        Fq2(
+                            Fq(9249449965649097869064079264947869682982249216400138970633453144676653711169),
+                            Fq(9348534606167950447926441282724551974963300652336681194531275326904990567559),
+                        ),
+                    ),
+                ),
+            }
+        ],
+        "test_hard_exponentiation": [
+            {
+                "f": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(12280986288702745683170217120447590163198449044554234393550291158775276537465),
+                            Fq(986131441231402586663168232784192679967988841378480729969522808944582411736),
+                        ),
+                        Fq2(
+                            Fq(14370324894352247161027215557530385409588970821024703903253390271883958719151),
+                            Fq(7070911983373573836855312851207293754042911941636998748295066983918168604911),
+                        ),
+                        Fq2(
+                            Fq(8667688327535155356214157440195720943374279135961505689590293139032217653023),
+                            Fq(16195372417658865051875882585191303867281642862904147451931472093125265907659),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(17198384414124304671837580253137587740190994604924441731007632523743838996630),
+                            Fq(19565318362744184793959068139814921596855651187517013106041763459156892114093),
+                        ),
+                        Fq2(
+                            Fq(18925264377976532616190913315751086875337405402194997863506667262229956256070),
+                            Fq(16781141124542675786220439686294098391152882907597275681922367348750936367411),
+                        ),
+                        Fq2(
+                            Fq(3581055639314695720175024264012655597035508424173895666714374680956536046804),
+                            Fq(11223173967226531251011336296727236813636998591476070704525089138384066835320),
+                        ),
+                    ),
+                ),
+                "expected": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(3894230881298831123700972106918755497901548479999646214065800084916821565042),
+                            Fq(15935999415352480577008101092509736800893042112088191102493779847957199205744),
+                        ),
+                        Fq2(
+                            Fq(18351571246028948828223017476473188468525000232195047240721397288151863848540),
+                            Fq(8441034601557250816672048662168089995066195127340414210380068371495878170275),
+                        ),
+                        Fq2(
+                            Fq(5277244867547079220140116078649289143974748175233967478633587001637496574976),
+                            Fq(21531060187139078652052717632930923624562157865068897065591957788351098051897),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(6046348193017810124681231251947713221348162049750165224716262398969720983306),
+                            Fq(14644384440040452878505126683422779892007749719158891767334387805486886130052),
+                        ),
+                        Fq2(
+                            Fq(15356264073448908243050387346172044056182646569318242292980695878461715632847),
+                            Fq(726712588197317840354861305261580953825664853259825823402361464331642825752),
+                        ),
+                        Fq2(
+                            Fq(3144512690785092194079852854590965702704910574388186096603375702518780085997),
+                            Fq(18908741103552387655083785360121712170185916889570084149092667309532343389927),
+                        ),
+                    ),
+                ),
+            }
+        ],
+        "test_miller_loop": [
+            {
+                "point_p": g1_curve(
+                    Fq(3382127563159911819391766586411397982616211296720576556371069522746641195437),
+                    Fq(15204690972444113059040377537500094172590447792957356635341844920309693243721),
+                    infinity=False,
+                ),
+                "point_q": g2_curve(
+                    Fq2(
+                        Fq(5737538973327798234205624404459894218602148965103947025159620628604385837100),
+                        Fq(17886654262864378983272590750829246041563797300492261381596931843261187118438),
+                    ),
+                    Fq2(
+                        Fq(16738401643853827145915000004125361855964736384423681288471156249983124700941),
+                        Fq(21402617467940363743540221004580771886657973667072627321681305796375199892666),
+                    ),
+                    infinity=False,
+                ),
+                "q_times_val_miller_loop": g2_curve(
+                    Fq2(
+                        Fq(13590180755799079751963952034891714620489825805814121102751558335260777806279),
+                        Fq(8322823098913771489073487308063699150357560306166582000251620381376255753683),
+                    ),
+                    Fq2(
+                        Fq(6830478603480362591631463102447343314890663494323282290337449253805209982650),
+                        Fq(17956133712396585550813356446769779806101372089274426459967950033124778349128),
+                    ),
+                    infinity=False,
+                ),
+                "expected": Fq12Cubic(
+                    Fq4(
+                        Fq2(
+                            Fq(6794833230958610790782368349133220900390451829475182837757106121765081655407),
+                            Fq(14297876886919733249877620613086653430241010086337060926721148932430987830480),
+                        ),
+                        Fq2(
+                            Fq(2456663480558530752933385087762166760703339193967576918372611056616123670470),
+                            Fq(19030339685747820362004726796551246622539663158334629452977101238199231971078),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(
+                            Fq(95914626846233394226784213705389086673275546868651283693630969925777558865),
+                            Fq(16987200324949770186766199104180150998160695274569935009467311621641603289370),
+                        ),
+                        Fq2(
+                            Fq(4378948232831802910362877646474738266456456708822457707488726219504656409315),
+                            Fq(21806152199083568845832203019731114604846028621710086194452714316169620323066),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(
+                            Fq(11309086412241209156003740023317182940239661058525860744363987363092848780942),
+                            Fq(1530647825128554822799462554620863198932957662648506549116620540363273144978),
+                        ),
+                        Fq2(
+                            Fq(555062266160503193985461475013726055644998496906999264899088948683689864709),
+                            Fq(2369100719245025701355438640430405519368031408359653766762967845113462677934),
+                        ),
+                    ),
+                ),
+            }
+        ],
+        "test_triple_miller_loop": [
+            {
+                "point_p": [
+                    g1_curve(
+                        Fq(7718688751048090395887860122346882937933997028553449101930560931383453803466),
+                        Fq(13805263781064364525529507115074186875385038580220942845764248145205870034775),
+                        infinity=False,
+                    ),
+                    g1_curve(
+                        Fq(1722952151406474363410652153797144939765685149199239709849434271027661142477),
+                        Fq(19315552587903869543666090179612804149168338574978008821064492094895333401624),
+                        infinity=False,
+                    ),
+                    g1_curve(
+                        Fq(6749545578788834310461625255051179762049848543979330666513058789456801586112),
+                        Fq(7326457419361611996429853312079925791927256606307527632023654306427358248738),
+                        infinity=False,
+                    ),
+                ],
+                "point_q": [
+                    g2_curve(
+                        Fq2(
+                            Fq(12634869690260672811553889017591591819350991850398666529323868457295483557388),
+                            Fq(6182495704972421917916474550459729617133298192321580124292715985881150831206),
+                        ),
+                        Fq2(
+                            Fq(21214906628548393745005014957585794177022853336046024973290389051613188857298),
+                            Fq(16601497004108616718265834705482405081897237939760580596092542836217723602697),
+                        ),
+                        infinity=False,
+                    ),
+                    g2_curve(
+                        Fq2(
+                            Fq(2771359686529693741260951278309786426132124432038967996406780288005575325695),
+                            Fq(20924815845664000743254018180911576978153387270494001083390326293110708605467),
+                        ),
+                        Fq2(
+                            Fq(13656504246121639901657881863727596319057832127838292219554294430597910282062),
+                            Fq(6234143695850489453693070789339271248026980179885319041759593312047740791348),
+                        ),
+                        infinity=False,
+                    ),
+                    g2_curve(
+                        Fq2(
+                            Fq(14088634523909447648597465668437987680892663802467137826029301190755854388102),
+                            Fq(419575431547886075622492034023589789149858612742456766951274523991779422028),
+                        ),
+                        Fq2(
+                            Fq(16172935970093272304597729054731341000458233190056925370390159634845654596085),
+                            Fq(2186989994181410058071163059141033846164948605440435802043110640659021606367),
+                        ),
+                        infinity=False,
+                    ),
+                ],
+                "expected": Fq12Cubic(
+                    Fq4(
+                        Fq2(
+                            Fq(10896068704222248337105531346053016293721511628050308922044824079532093167633),
+                            Fq(16019072522079700307836896084288860305163043121290094485289127842041887025625),
+                        ),
+                        Fq2(
+                            Fq(12194702637379291471328961172428524029841489790476408306305794914676563378326),
+                            Fq(10972472158986303915734347501310989523201845284787761860743087661329519146736),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(
+                            Fq(16475368898254344471035546191409017127299856357280927706124587743348666996897),
+                            Fq(11239482710864089177472312547669251898561708053300189053652300747017080516124),
+                        ),
+                        Fq2(
+                            Fq(20159203529292742095590636909043003468364123786487802599575599052027739274721),
+                            Fq(11380433032098886997006928723438724732124088351959019704648979419027102269181),
+                        ),
+                    ),
+                    Fq4(
+                        Fq2(
+                            Fq(6730626746715802063386515232489368356425649412593911580379056437811035017803),
+                            Fq(20159707768544563177613378573264787950583942688599342746879045531728275051827),
+                        ),
+                        Fq2(
+                            Fq(10668341165871857453506620438158380480570913289572963666761450859357338365775),
+                            Fq(3050398431921233220957843059926391662207670798981988563841601153391452029699),
+                        ),
+                    ),
+                ),
+            }
+        ],
+        "test_triple_pairing": [
+            {
+                "point_p": [
+                    g1_curve(
+                        Fq(2008824788490474798123433558532674192782227510634175640474440038237928568162),
+                        Fq(1225153725431912922687011081835059874989718126305516989516896818343643820846),
+                        infinity=False,
+                    ),
+                    g1_curve(
+                        Fq(20398844977422277303600742283939375001980470777181797524005210928550132997963),
+                        Fq(17985629720999097606517798788919975932947619415344677629974764005949140230199),
+                        infinity=False,
+                    ),
+                    g1_curve(
+                        Fq(21007834639973862818787495634617423133396847170960272538363017214583944499336),
+                        Fq(7319924841065753502918015936031100882292968582096944980746133052099842988885),
+                        infinity=False,
+                    ),
+                ],
+                "point_q": [
+                    g2_curve(
+                        Fq2(
+                            Fq(20182428342232498685461995308862814531496171017641906040350171942426953338366),
+                            Fq(8699181427446082282669231442099943781566721112146685801254328071330981789321),
+                        ),
+                        Fq2(
+                            Fq(14293941407647156074524763124538640466083355058425409010517056251859384340258),
+                            Fq(16659668747376590546943821554931546672884748440565303405982385174714589190351),
+                        ),
+                        infinity=False,
+                    ),
+                    g2_curve(
+                        Fq2(
+                            Fq(13869698206980534434978614369173286040481342076078338635674706096333268074807),
+                            Fq(12480435692804738689682285510065591281035103031893319382316849682571821295774),
+                        ),
+                        Fq2(
+                            Fq(17741534419322196944402283794392594869168565762295235452235856902061930344607),
+                            Fq(15972003159606168356328964989240191972872776038115713018132513425492632535355),
+                        ),
+                        infinity=False,
+                    ),
+                    g2_curve(
+                        Fq2(
+                            Fq(3234498887065522413104069544740010833662187535725997049038725236923347878652),
+                            Fq(21207038346624464954726534169144504222333979947029140821562051336636301853709),
+                        ),
+                        Fq2(
+                            Fq(19513843232347225474354552762166535876403995076894474502224949275938465825156),
+                            Fq(7348579196900692541195092931179284174723366580589271181897482967714867907754),
+                        ),
+                        infinity=False,
+                    ),
+                ],
+                "miller_loop_inverse": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(2628624352963320443560291511954074056254344541487364497574566028955266561054),
+                            Fq(4164366115067719379697719167622393143504383104080987200976497723336315620919),
+                        ),
+                        Fq2(
+                            Fq(6017161513947507986094932540363622762942735375279529702187191570502086215616),
+                            Fq(19676338568546605220451008858620705416187442331071833335280259964197598526340),
+                        ),
+                        Fq2(
+                            Fq(10321646108884900426767564790958861772426668021986106813674885344493065971070),
+                            Fq(7397157236250262892720870271329281535288740199024686806252895371663819660983),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(15515711448143065110737236054018872125199859591910392762741773771425993818943),
+                            Fq(11167229119025046458138024968298874434436227428686300426297738925324772492529),
+                        ),
+                        Fq2(
+                            Fq(7544818901262706205682180446223283498753486183479012723766540337760739433066),
+                            Fq(5107049859846036475317189878661307693966776557489953462635153180828089666811),
+                        ),
+                        Fq2(
+                            Fq(5260531249447098807618842552599360203645593270471986333304347184759754570469),
+                            Fq(2157883545415184402762801823556812572735358231632970218416355513132833187294),
+                        ),
+                    ),
+                ),
+                "expected": Fq12(
+                    Fq6(
+                        Fq2(
+                            Fq(982727798773584174318762071232593976072514217455708549566740135869334648908),
+                            Fq(1363205979149260728928580348970334172757884980310106038300534759322325148397),
+                        ),
+                        Fq2(
+                            Fq(10512537398410186287264014898092237808741898573595934041434536725309259120691),
+                            Fq(18092796947806444112037422009120694321874145431517539224710030644086803314862),
+                        ),
+                        Fq2(
+                            Fq(595459437965029099387534928971789307668482578628654135757718800482078091455),
+                            Fq(18265147164764114136576684213796401046875459370207552329055674948636368876555),
+                        ),
+                    ),
+                    Fq6(
+                        Fq2(
+                            Fq(5999124400183339179474181905076375309032989091775550990162788799363382574581),
+                            Fq(846901272479414401709521531908350647930966460111220882495275017439768201831),
+                        ),
+                        Fq2(
+                            Fq(4663333693154182767703222095587490917635320906745096376681543101927796842567),
+                            Fq(16893874576167757377907265849640141343131591631848640587488961230746250329957),
+                        ),
+                        Fq2(
+                            Fq(10121642838221351339421774197831711688227972721578673487017218309126875361530),
+                            Fq(3284598225719269604400250570980941591738667134227411827455975600450911664603),
+                        ),
+                    ),
+                ),
+            }
+        ],
+    }
+
+
+def generate_test_cases(test_name):
+    configurations = [
+        Bls12381,
+        Mnt4753,
+        Bn254,
+    ]
+
+    out = []
+    for config in configurations:
+        if test_name in config.test_data:
+            for test_data in config.test_data[test_name]:
+                match test_name:
+                    case "test_cubic_to_quadratic":
+                        out.append((config, test_data["x"], test_data["expected"]))
+                    case "test_line_evaluation":
+                        out.append(
+                            (
+                                config,
+                                test_data["point_p"],
+                                test_data["point_q"],
+                                test_data["lam"],
+                                test_data["expected"],
+                            )
+                        )
+                    case "test_line_evaluation_proj":
+                        out.append(
+                            (
+                                config,
+                                test_data["point_p"],
+                                test_data["point_q"],
+                                test_data["point_t"],
+                                test_data["expected"],
+                            )
+                        )
+                    case "test_line_eval_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_line_eval_times_eval_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_line_eval_times_eval_times_eval_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_line_eval_times_eval_times_eval_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_line_eval_times_eval_times_eval_times_eval_times_eval_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_miller_output_times_eval":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_line_eval_times_eval_times_miller_output":
+                        out.append((config, test_data["x"], test_data["y"], test_data["expected"]))
+                    case "test_easy_exponentiation_with_inverse_check":
+                        out.append((config, test_data["f"], test_data["f_inverse"], test_data["expected"]))
+                    case "test_cyclotomic_square":
+                        out.append((config, test_data["x"], test_data["expected"]))
+                    case "test_hard_exponentiation":
+                        out.append((config, test_data["f"], test_data["expected"]))
+                    case "test_miller_loop":
+                        out.append(
+                            (
+                                config,
+                                test_data["point_p"],
+                                test_data["point_q"],
+                                test_data["q_times_val_miller_loop"],
+                                test_data["expected"],
+                            )
+                        )
+                    case "test_single_pairing":
+                        out.append(
+                            (
+                                config,
+                                test_data["point_p"],
+                                test_data["point_q"],
+                                test_data["miller_loop_inverse"],
+                                test_data["expected"],
+                            )
+                        )
+                    case "test_triple_miller_loop":
+                        out.append((config, test_data["point_p"], test_data["point_q"], test_data["expected"]))
+                    case "test_triple_pairing":
+                        out.append(
+                            (
+                                config,
+                                test_data["point_p"],
+                                test_data["point_q"],
+                                test_data["miller_loop_inverse"],
+                                test_data["expected"],
+                            )
+                        )
+                    case _:
+                        raise ValueError
+    return out
+
+
+def miller_loop_gradients(config, point_q):
+    """Return the gradients of the Miller loop of `point_q`, followed by the ones of the lines through its Frobenius."""
+    gradients = [[s.to_list() for s in el] for el in point_q.gradients(config.exp_miller_loop)]
+    return gradients + config.test_script_pairing.frobenius_gradients(point_q.to_list(), gradients)
+
+
+def verify_script(lock, unlock, clean_constant):
+    context = Context(script=unlock + lock)
+
+    assert context.evaluate()
+
+    assert context.get_altstack().size() == 0
+    if clean_constant:
+        assert context.get_stack().size() == 1
+    else:
+        assert context.get_stack().size() == 2
+
+
+@pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_cubic_to_quadratic"))
+def test_cubic_to_quadratic(config, x, expected, save_to_json_folder):
+    unlock = generate_unlock(x)
+
+    # Check correct evaluation
+    lock = config.test_script_cubic_to_quadratic.to_quadratic()
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, True)
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "cubic_to_quadratic")
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize("positive_modulo", [True, False])
+@pytest.mark.parametrize("is_gradient_before", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "lam", "expected"), generate_test_cases("test_line_evaluation")
+)
+def test_line_evaluation(
+    config,
+    positive_modulo,
+    point_p,
+    point_q,
+    lam,
+    expected,
+    clean_constant,
+    is_constant_reused,
+    is_gradient_before,
+    save_to_json_folder,
+):
+    unlock = nums_to_script([config.q])
+    if is_gradient_before:
+        unlock += generate_unlock(lam)
+    unlock += generate_unlock(point_p)
+    unlock += generate_unlock(point_q)
+    if not is_gradient_before:
+        unlock += generate_unlock(lam)
+
+    # Check correct evaluation, if positive_modulo is negative, we do not clean the modulo constant q
+    if is_gradient_before:
+        lock = config.test_script_line_functions.line_evaluation(
+            take_modulo=True,
+            positive_modulo=positive_modulo,
             check_constant=True,
             clean_constant=clean_constant and positive_modulo,
             is_constant_reused=is_constant_reused,
@@ -3541,10 +4125,11 @@ def test_easy_exponentiation_with_inverse_check(
         )
 
 
+@pytest.mark.parametrize("lazy_modulo", [False, True])
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("positive_modulo", [True, False])
 @pytest.mark.parametrize(("config", "f", "expected"), generate_test_cases("test_hard_exponentiation"))
-def test_hard_exponentiation(config, positive_modulo, f, expected, clean_constant, save_to_json_folder):
+def test_hard_exponentiation(config, positive_modulo, f, expected, clean_constant, lazy_modulo, save_to_json_folder):
     unlock = nums_to_script([config.q])
     unlock += generate_unlock(f, config.ix_miller_output)
 
@@ -3555,22 +4140,72 @@ def test_hard_exponentiation(config, positive_modulo, f, expected, clean_constan
         modulo_threshold=1,
         check_constant=True,
         clean_constant=clean_constant and positive_modulo,
+        lazy_modulo=lazy_modulo,
     )
     verification = generate_verify(expected, config.ix_miller_output)
     lock += verification if positive_modulo else modify_verify_modulo_check(verification, clean_constant)
 
     verify_script(lock, unlock, clean_constant)
 
-    if save_to_json_folder and clean_constant:
+    if save_to_json_folder and clean_constant and not lazy_modulo:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_hard_exponentiation")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize("positive_modulo", [True, False])
+@pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_cyclotomic_square"))
+def test_cyclotomic_square(
+    config, positive_modulo, x, expected, clean_constant, is_constant_reused, save_to_json_folder
+):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x, config.ix_miller_output)
+
+    # Check correct evaluation, if positive_modulo is negative, we do not clean the modulo constant q
+    lock = config.test_script_fq12.cyclotomic_square(
+        take_modulo=True,
+        positive_modulo=positive_modulo,
+        check_constant=True,
+        clean_constant=clean_constant and positive_modulo,
+        is_constant_reused=is_constant_reused,
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    verification = generate_verify(expected, config.ix_miller_output)
+    lock += verification if positive_modulo else modify_verify_modulo_check(verification, clean_constant)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and not is_constant_reused:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_cyclotomic_square")
+
+
+@pytest.mark.parametrize("objective", ["size", "execution", ExecutionCostModel()])
+@pytest.mark.parametrize("modulo_threshold", [1600, 2400])
+@pytest.mark.parametrize(("config", "f", "expected"), generate_test_cases("test_hard_exponentiation"))
+def test_hard_exponentiation_with_modulo_planner(config, f, expected, modulo_threshold, objective):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(f, config.ix_miller_output)
+
+    with modulo_planner.active(objective=objective):
+        lock = config.test_script_final_exponentiation.hard_exponentiation(
+            take_modulo=True,
+            positive_modulo=True,
+            modulo_threshold=modulo_threshold,
+            check_constant=True,
+            clean_constant=True,
+        )
+    lock += generate_verify(expected, config.ix_miller_output)
+
+    verify_script(lock, unlock, True)
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize(
     ("config", "point_p", "point_q", "q_times_val_miller_loop", "expected"), generate_test_cases("test_miller_loop")
 )
 def test_miller_loop(config, point_p, point_q, q_times_val_miller_loop, expected, clean_constant, save_to_json_folder):
-    gradients = [[s.to_list() for s in el] for el in point_q.gradients(config.exp_miller_loop)]
+    gradients = miller_loop_gradients(config, point_q)
 
     unlocking_key = MillerLoopUnlockingKey(point_p.to_list(), point_q.to_list(), gradients)
 
@@ -3598,7 +4233,7 @@ def test_single_pairing(config, point_p, point_q, miller_output_inverse, expecte
         gradients = []
         point_q = None
     else:
-        gradients = [[s.to_list() for s in el] for el in point_q.gradients(config.exp_miller_loop)]
+        gradients = miller_loop_gradients(config, point_q)
         point_q = point_q.to_list()
 
     point_p = None if point_p.is_infinity() else point_p.to_list()
@@ -3623,7 +4258,7 @@ def test_single_pairing(config, point_p, point_q, miller_output_inverse, expecte
 def test_triple_miller_loop(
     config, point_p, point_q, expected, clean_constant, is_precomputed_gradients_in_unlock, save_to_json_folder
 ):
-    gradients = [[[s.to_list() for s in el] for el in point_q[i].gradients(config.exp_miller_loop)] for i in range(3)]
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
 
     unlocking_key = TripleMillerLoopUnlockingKey(
         [point_p[0].to_list(), point_p[1].to_list(), point_p[2].to_list()],
@@ -3667,7 +4302,7 @@ def test_triple_pairing(
     is_miller_loop_proj,
     save_to_json_folder,
 ):
-    gradients = [[[s.to_list() for s in el] for el in point_q[i].gradients(config.exp_miller_loop)] for i in range(3)]
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
 
     unlocking_key = TriplePairingUnlockingKey(
         [point_p[i].to_list() for i in range(3)],
@@ -3696,6 +4331,118 @@ def test_triple_pairing(
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_pairing")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("modulo_threshold", [1, 1600])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "expected"),
+    [case for case in generate_test_cases("test_triple_miller_loop") if case[0] is not Bn254],
+)
+def test_triple_miller_loop_fixed_arguments(
+    config, point_p, point_q, expected, modulo_threshold, clean_constant, save_to_json_folder
+):
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    unlocking_key = TripleMillerLoopUnlockingKey(
+        [point_p[i].to_list() for i in range(3)],
+        [point_q[i].to_list() for i in range(3)],
+        gradients,
+        has_precomputed_gradients=False,
+        has_fixed_arguments=True,
+    )
+
+    unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+    lock = config.test_script_pairing.triple_miller_loop(
+        modulo_threshold=modulo_threshold,
+        check_constant=True,
+        clean_constant=False,
+        is_precomputed_gradients_on_stack=False,
+        precomputed_gradients=gradients[1:],
+        fixed_arguments=[point_q[1].to_list(), point_q[2].to_list()],
+    )
+
+    lock += modify_verify_modulo_check(generate_verify(expected), clean_constant)
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and modulo_threshold == 1:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_miller_loop_fixed_arguments"
+        )
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "miller_output_inverse", "expected"),
+    [case for case in generate_test_cases("test_triple_pairing") if case[0] is not Bn254],
+)
+def test_triple_pairing_fixed_arguments(
+    config, point_p, point_q, miller_output_inverse, expected, clean_constant, save_to_json_folder
+):
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    unlocking_key = TriplePairingUnlockingKey(
+        [point_p[i].to_list() for i in range(3)],
+        [point_q[i].to_list() for i in range(3)],
+        gradients,
+        miller_output_inverse.to_list(),
+        has_precomputed_gradients=False,
+        has_fixed_arguments=True,
+    )
+
+    unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+    lock = config.test_script_pairing.triple_pairing(
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=False,
+        is_precomputed_gradients_on_stack=False,
+        precomputed_gradients=gradients[1:],
+        fixed_arguments=[point_q[1].to_list(), point_q[2].to_list()],
+    )
+    lock += modify_verify_modulo_check(generate_verify(expected), clean_constant)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_pairing_fixed_arguments"
+        )
+
+
+@pytest.mark.parametrize("config", [Bn254])
+def test_fixed_arguments_are_not_supported(config):
+    point_q = config.test_data["test_triple_miller_loop"][0]["point_q"]
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    with pytest.raises(ValueError, match="The fixed arguments are not supported by this pairing model"):
+        config.test_script_pairing.triple_miller_loop(
+            modulo_threshold=1,
+            is_precomputed_gradients_on_stack=False,
+            precomputed_gradients=gradients[1:],
+            fixed_arguments=[point_q[1].to_list(), point_q[2].to_list()],
+        )
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_fixed_arguments_require_injected_gradients(config):
+    point_q = config.test_data["test_triple_miller_loop"][0]["point_q"]
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+    fixed_arguments = [point_q[1].to_list(), point_q[2].to_list()]
+
+    with pytest.raises(ValueError, match="The fixed arguments require the precomputed gradients"):
+        config.test_script_pairing.triple_miller_loop(
+            modulo_threshold=1, is_precomputed_gradients_on_stack=True, fixed_arguments=fixed_arguments
+        )
+    with pytest.raises(ValueError, match="The fixed arguments are not supported by the projective Miller loop"):
+        config.test_script_pairing.triple_pairing(
+            modulo_threshold=1,
+            is_precomputed_gradients_on_stack=False,
+            precomputed_gradients=gradients[1:],
+            fixed_arguments=fixed_arguments,
+            is_miller_loop_proj=True,
+        )
+
+
 def line_evaluation_proj(
     config,
     positive_modulo,
@@ -3936,3 +4683,256 @@ def test_triple_miller_loop_proj(config, clean_constant):
         lock += generate_verify(expected)
 
         verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize("clean_constant", [True, False])
+def test_multi_miller_loop_proj_is_triple_miller_loop_proj(config, clean_constant):
+    assert config.test_script_pairing.multi_miller_loop_proj(
+        n_pairs=3, modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    ) == config.test_script_pairing.triple_miller_loop_proj(
+        modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    )
+    assert config.test_script_pairing.multi_pairing(
+        n_pairs=3, modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    ) == config.test_script_pairing.triple_pairing(
+        modulo_threshold=1, check_constant=True, clean_constant=clean_constant, is_miller_loop_proj=True
+    )
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize("clean_constant", [True, False])
+def test_multi_miller_loop_proj(config, clean_constant):
+    for test in config.test_data["test_triple_miller_loop"]:
+        # The product of the Miller loops of the three pairs, twice
+        unlocking_key = MultiMillerLoopProjUnlockingKey(
+            [point.to_list() for point in test["point_p"]] * 2,
+            [point.to_list() for point in test["point_q"]] * 2,
+        )
+        unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+        lock = config.test_script_pairing.multi_miller_loop_proj(
+            n_pairs=6,
+            modulo_threshold=1,
+            check_constant=True,
+            clean_constant=clean_constant,
+        )
+        lock += generate_verify(test["expected"] * test["expected"])
+
+        verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize(("n_pairs", "split"), [(4, 2), (5, 3), (7, 4)])
+def test_multi_miller_loop_proj_split(config, n_pairs, split):
+    """Check that multi_miller_loop_proj(P, Q) = multi_miller_loop_proj(P[:split], Q[:split]) * multi_miller_loop_proj(
+    P[split:], Q[split:])."""
+    test = config.test_data["test_triple_miller_loop"][0]
+    points_p = [test["point_p"][i % 3].to_list() for i in range(n_pairs)]
+    points_q = [test["point_q"][i % 3].to_list() for i in range(n_pairs)]
+    pairing_model = config.test_script_pairing
+    n_elements = pairing_model.N_ELEMENTS_MILLER_OUTPUT
+
+    def miller_loop(start, end):
+        out = nums_to_script([x for point in points_p[start:end] for x in point])
+        out += nums_to_script([x for point in points_q[start:end] for x in point])
+        out += pairing_model.multi_miller_loop_proj(
+            n_pairs=end - start, modulo_threshold=1, check_constant=False, clean_constant=False
+        )
+        return out
+
+    unlock = nums_to_script([config.q])
+
+    lock = miller_loop(0, split)
+    lock += miller_loop(split, n_pairs)
+    lock += pairing_model.miller_loop_output_mul(
+        take_modulo=True, positive_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
+    )
+    lock += miller_loop(0, n_pairs)
+    for i in range(n_elements, 0, -1):
+        lock += roll(position=i, n_elements=1)
+        lock += Script.parse_string("OP_EQUALVERIFY")
+    lock += Script.parse_string("OP_1")
+
+    verify_script(lock, unlock, clean_constant=False)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize("clean_constant", [True, False])
+def test_multi_pairing(config, clean_constant):
+    for test in config.test_data["test_triple_pairing"]:
+        # The product of the pairings of the three pairs, twice
+        unlocking_key = MultiPairingUnlockingKey(
+            [point.to_list() for point in test["point_p"]] * 2,
+            [point.to_list() for point in test["point_q"]] * 2,
+            (test["miller_loop_inverse"] * test["miller_loop_inverse"]).to_list(),
+        )
+        unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+        lock = config.test_script_pairing.multi_pairing(
+            n_pairs=6,
+            modulo_threshold=1,
+            check_constant=True,
+            clean_constant=False,
+        )
+        lock += modify_verify_modulo_check(generate_verify(test["expected"] * test["expected"]), clean_constant)
+
+        verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_multi_miller_loop_proj_invalid_number_of_pairs(config):
+    with pytest.raises(ValueError, match="at least 2"):
+        config.test_script_pairing.multi_miller_loop_proj(n_pairs=1, modulo_threshold=1)
+    with pytest.raises(ValueError, match="at least 2"):
+        config.test_script_pairing.multi_pairing(n_pairs=1, modulo_threshold=1, clean_constant=False)
+
+
+def resolve_affine_steps(config, affine_steps):
+    """Replace the `None` entries of `affine_steps` with the number of steps of the Miller loop."""
+    return [len(config.exp_miller_loop) - 1 if n_steps is None else n_steps for n_steps in affine_steps]
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize("clean_constant", [True, False])
+def test_hybrid_miller_loop_is_multi_miller_loop_proj(config, clean_constant):
+    assert config.test_script_pairing.hybrid_miller_loop(
+        affine_steps=[0] * 4, modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    ) == config.test_script_pairing.multi_miller_loop_proj(
+        n_pairs=4, modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    )
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(
+    ("affine_steps", "has_precomputed_gradients"),
+    [
+        ([None, None, None], [False, False, False]),
+        ([None, None, None], [False, True, True]),
+        ([None, 5, 0], [False, True, False]),
+        ([1, None, 2], [True, False, True]),
+    ],
+)
+@pytest.mark.parametrize(("config", "point_p", "point_q", "expected"), generate_test_cases("test_triple_miller_loop"))
+def test_hybrid_miller_loop(
+    config, point_p, point_q, expected, affine_steps, has_precomputed_gradients, clean_constant
+):
+    affine_steps = resolve_affine_steps(config, affine_steps)
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    unlocking_key = HybridMillerLoopUnlockingKey(
+        [point.to_list() for point in point_p],
+        [point.to_list() for point in point_q],
+        gradients,
+        affine_steps,
+        has_precomputed_gradients,
+    )
+    unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+    lock = config.test_script_pairing.hybrid_miller_loop(
+        affine_steps=affine_steps,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=clean_constant,
+        precomputed_gradients=[
+            gradients[j] if has_precomputed_gradients[j] else None for j in range(len(affine_steps))
+        ],
+    )
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "miller_output_inverse", "expected"), generate_test_cases("test_triple_pairing")
+)
+def test_multi_pairing_with_affine_steps(config, point_p, point_q, miller_output_inverse, expected, clean_constant):
+    affine_steps = resolve_affine_steps(config, [None, 3, 0])
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    unlocking_key = MultiPairingUnlockingKey(
+        [point.to_list() for point in point_p],
+        [point.to_list() for point in point_q],
+        miller_output_inverse.to_list(),
+        gradients=gradients,
+        affine_steps=affine_steps,
+        has_precomputed_gradients=[False, True, False],
+    )
+    unlock = unlocking_key.to_unlocking_script(config.test_script_pairing)
+
+    lock = config.test_script_pairing.multi_pairing(
+        n_pairs=3,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=False,
+        affine_steps=affine_steps,
+        precomputed_gradients=[None, gradients[1], None],
+    )
+    lock += modify_verify_modulo_check(generate_verify(expected), clean_constant)
+
+    verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+@pytest.mark.parametrize("objective", ["size", "lock_size", "execution", ExecutionCostModel()])
+@pytest.mark.parametrize("is_precomputed", [[False, False], [False, True]])
+def test_miller_loop_schedule(config, objective, is_precomputed):
+    pairing_model = config.test_script_pairing
+    n_steps = len(config.exp_miller_loop) - 1
+    cost_model = objective if isinstance(objective, ExecutionCostModel) else None
+    schedule = pairing_model.miller_loop_schedule(n_pairs=2, objective=objective, is_precomputed=is_precomputed)
+
+    assert (schedule.validation_time > 0) == (cost_model is not None)
+    assert schedule == pairing_model.evaluate_miller_loop_schedule(
+        list(schedule.affine_steps), is_precomputed, cost_model
+    )
+    for affine_steps in [[0, 0], [n_steps, n_steps], [n_steps, 0], [0, n_steps], [1, n_steps - 1], [5, 2]]:
+        alternative = pairing_model.evaluate_miller_loop_schedule(affine_steps, is_precomputed, cost_model)
+        assert schedule.value(objective) <= alternative.value(objective)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_scheduled_miller_loop(config):
+    test = config.test_data["test_triple_miller_loop"][0]
+    point_q = test["point_q"]
+    gradients = [miller_loop_gradients(config, point_q[i]) for i in range(3)]
+
+    schedule, lock = config.test_script_pairing.scheduled_miller_loop(
+        n_pairs=3,
+        modulo_threshold=1,
+        objective="lock_size",
+        check_constant=True,
+        clean_constant=True,
+        precomputed_gradients=[None, gradients[1], gradients[2]],
+    )
+    assert schedule == config.test_script_pairing.miller_loop_schedule(
+        n_pairs=3, objective="lock_size", is_precomputed=[False, True, True]
+    )
+
+    unlocking_key = HybridMillerLoopUnlockingKey(
+        [point.to_list() for point in test["point_p"]],
+        [point.to_list() for point in point_q],
+        gradients,
+        list(schedule.affine_steps),
+        [False, True, True],
+    )
+    lock += generate_verify(test["expected"])
+
+    verify_script(lock, unlocking_key.to_unlocking_script(config.test_script_pairing), clean_constant=True)
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_hybrid_miller_loop_errors(config):
+    pairing_model = config.test_script_pairing
+    n_steps = len(config.exp_miller_loop) - 1
+    with pytest.raises(ValueError, match="at least 2"):
+        pairing_model.hybrid_miller_loop(affine_steps=[0], modulo_threshold=1)
+    with pytest.raises(ValueError, match="between 0 and"):
+        pairing_model.hybrid_miller_loop(affine_steps=[0, n_steps + 1], modulo_threshold=1)
+    with pytest.raises(ValueError, match="for 2 pairs"):
+        pairing_model.hybrid_miller_loop(affine_steps=[0, 0], modulo_threshold=1, precomputed_gradients=[None])
+    with pytest.raises(ValueError, match="for 3 pairs"):
+        pairing_model.multi_pairing(n_pairs=3, modulo_threshold=1, affine_steps=[0, 0])
+    with pytest.raises(ValueError, match="objective"):
+        pairing_model.miller_loop_schedule(n_pairs=2, objective="time")
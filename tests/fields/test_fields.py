@@ -4,7 +4,7 @@ import pytest
 from elliptic_curves.fields.cubic_extension import CubicExtension
 from elliptic_curves.fields.prime_field import PrimeField
 from elliptic_curves.fields.quadratic_extension import QuadraticExtension
-from tx_engine import Context, Script
+from tx_engine import Context, Script, decode_num
 
 from src.zkscript.fields.fq import Fq as FqScript
 from src.zkscript.fields.fq2 import Fq2 as Fq2Script
@@ -80,6 +80,10 @@ class Fq2ResidueMinusOne:
             {"x": [5, -10], "expected": [15, 14], "positive_modulo": True},
             {"x": [5, -10], "expected": [-4, -5], "positive_modulo": False},
         ],
+        "test_mul_by_thirteen_plus_u": [
+            {"x": [5, -10], "expected": [18, 8], "positive_modulo": True},
+            {"x": [5, -10], "expected": [18, -11], "positive_modulo": False},
+        ],
         "test_norm": [
             {"x": [3, 1], "expected": [10], "positive_modulo": True},
             {"x": [10, 12], "expected": [10 * 10 - 18 * 12 * 12], "positive_modulo": False},
@@ -148,6 +152,10 @@ class Fq2ResidueNotMinusOne:
             {"x": [5, -10], "expected": [13, 14], "positive_modulo": True},
             {"x": [5, -10], "expected": [-6, -5], "positive_modulo": False},
         ],
+        "test_mul_by_thirteen_plus_u": [
+            {"x": [5, -10], "expected": [16, 8], "positive_modulo": True},
+            {"x": [5, -10], "expected": [16, -11], "positive_modulo": False},
+        ],
         "test_norm": [
             {"x": [2, 2], "expected": [11], "positive_modulo": True},
             {"x": [2, 2], "expected": [-8], "positive_modulo": False},
@@ -884,6 +892,43 @@ def test_square(config, positive_modulo, x, expected, clean_constant, is_constan
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "square")
 
 
+@pytest.mark.parametrize(
+    "config",
+    [
+        Fq2ResidueMinusOne,
+        Fq2ResidueNotMinusOne,
+        Fq3,
+        Fq4,
+        Fq2Over2ResidueEqualU,
+        Fq6ThreeOverTwo,
+        Fq12TwoOverThreeOverTwo,
+        Fq12ThreeOverTwoOverTwo,
+    ],
+)
+@pytest.mark.parametrize(("operation", "n_operands"), [("mul", 2), ("square", 1)])
+@pytest.mark.parametrize("input_bits", [5, 12])
+def test_output_bits(config, operation, n_operands, input_bits):
+    x = -(2**input_bits - 1)
+    bits = config.test_script.output_bits(operation, (input_bits,) * n_operands)
+
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock([x] * config.test_script.extension_degree * n_operands)
+    lock = getattr(config.test_script, operation)(take_modulo=False, check_constant=True, clean_constant=False)
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate_core()
+    stack = context.get_stack()
+    assert stack.size() == config.test_script.extension_degree + 1
+    assert max(abs(decode_num(stack[i])).bit_length() for i in range(1, stack.size())) <= bits
+
+    # The result is only reduced if its bound exceeds the threshold
+    assert config.test_script.lazy_modulo(operation, (input_bits,) * n_operands, bits) == (False, bits)
+    assert config.test_script.lazy_modulo(operation, (input_bits,) * n_operands, bits - 1) == (
+        True,
+        config.q.bit_length(),
+    )
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("is_constant_reused", [True, False])
 @pytest.mark.parametrize("scalar", [1, -1, 6, -6, 9, -9, 2, -2, 18, 17])
@@ -1051,6 +1096,34 @@ def test_mul_by_one_plus_u(
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "multiplication by one plus u")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(
+    ("config", "positive_modulo", "x", "expected"), generate_test_cases("test_mul_by_thirteen_plus_u")
+)
+def test_mul_by_thirteen_plus_u(
+    config, positive_modulo, x, expected, clean_constant, is_constant_reused, save_to_json_folder
+):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x)
+
+    lock = config.test_script.mul_by_thirteen_plus_u(
+        take_modulo=True,
+        positive_modulo=positive_modulo,
+        check_constant=True,
+        clean_constant=clean_constant,
+        is_constant_reused=is_constant_reused,
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and not is_constant_reused:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "multiplication by thirteen plus u")
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("is_constant_reused", [True, False])
 @pytest.mark.parametrize(
@@ -1230,3 +1303,28 @@ def fq_inverse(save_to_json_folder, q, x, mod_frequency, positive_modulo, negate
 
     if save_to_json_folder:
         save_scripts(str(lock), str(unlock), save_to_json_folder, "fq", "inverse")
+
+
+@pytest.mark.parametrize("q", [19, 2**127 - 1])
+@pytest.mark.parametrize("x", [1, 2, -2, 7])
+@pytest.mark.parametrize("positive_modulo", [True, False])
+@pytest.mark.parametrize("negate", [True, False])
+def test_fq_supplied_inverse(q, x, positive_modulo, negate):
+    test_script = FqScript(q=q)
+    x_inverse = pow((-1 if negate else 1) * x, -1, q)
+
+    lock = test_script.inverse(
+        take_modulo=True,
+        positive_modulo=positive_modulo,
+        check_constant=check_constant,
+        clean_constant=True,
+        is_constant_reused=False,
+        x=StackFiniteFieldElement(0, negate, 1),
+        x_inverse=StackFiniteFieldElement(1, False, 1),
+    )
+    lock += nums_to_script([x_inverse])
+    lock += Script.parse_string("OP_EQUALVERIFY OP_1")
+
+    verify_script(lock, nums_to_script([q, x_inverse, x]), True)
+    # A wrong inverse is rejected
+    assert not Context(script=nums_to_script([q, x_inverse + 1, x]) + lock).evaluate()
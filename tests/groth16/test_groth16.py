@@ -1,26 +1,49 @@
 import json
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from random import randint, seed
 
 import pytest
+from elliptic_curves.fields.cubic_extension import CubicExtension
+from elliptic_curves.fields.prime_field import PrimeField
+from elliptic_curves.fields.quadratic_extension import QuadraticExtension
 from elliptic_curves.instantiations.bls12_381.bls12_381 import BLS12_381, ProofBls12381, VerifyingKeyBls12381
+from elliptic_curves.instantiations.bls12_381.bls12_381 import Fq12 as Fq12_bls12_381
 from elliptic_curves.instantiations.mnt4_753.mnt4_753 import MNT4_753, ProofMnt4753, VerifyingKeyMnt4753
-from tx_engine import Context
-
+from elliptic_curves.instantiations.mnt4_753.mnt4_753 import Fq4 as Fq4_mnt4_753
+from elliptic_curves.models.ec import ShortWeierstrassEllipticCurve
+from tx_engine import Context, decode_num
+
+from src.zkscript.bilinear_pairings.bn254.parameters import NON_RESIDUE_FQ as NON_RESIDUE_FQ_BN254
+from src.zkscript.bilinear_pairings.bn254.parameters import NON_RESIDUE_FQ2 as NON_RESIDUE_FQ2_BN254
+from src.zkscript.bilinear_pairings.bn254.parameters import a as a_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import b as b_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import q as q_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import r as r_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import twisted_a as twisted_a_bn254
+from src.zkscript.bilinear_pairings.bn254.parameters import twisted_b as twisted_b_bn254
 from src.zkscript.groth16.bls12_381.bls12_381 import bls12_381
+from src.zkscript.groth16.bn254.bn254 import bn254
 from src.zkscript.groth16.mnt4_753.mnt4_753 import mnt4_753
 from src.zkscript.script_types.locking_keys.groth16 import Groth16LockingKey, Groth16LockingKeyWithPrecomputedMsm
 from src.zkscript.script_types.locking_keys.groth16_proj import (
     Groth16ProjLockingKey,
     Groth16ProjLockingKeyWithPrecomputedMsm,
 )
-from src.zkscript.script_types.unlocking_keys.groth16 import Groth16UnlockingKey, Groth16UnlockingKeyWithPrecomputedMsm
+from src.zkscript.script_types.unlocking_keys.groth16 import (
+    Groth16UnlockingKey,
+    Groth16UnlockingKeyWithPrecomputedMsm,
+    groth16_unlocking_scripts,
+)
 from src.zkscript.script_types.unlocking_keys.groth16_proj import (
+    Groth16ProjBatchUnlockingKey,
     Groth16ProjUnlockingKey,
     Groth16ProjUnlockingKeyWithPrecomputedMsm,
 )
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.modulo_planner import modulo_planner
+from src.zkscript.util.utility_scripts import nums_to_script
 
 
 @dataclass
@@ -129,6 +152,7 @@ class Bls12381:
     ]
 
     test_script = bls12_381
+    miller_output_field = Fq12_bls12_381
 
     filename = "bls12_381"
 
@@ -238,10 +262,230 @@ class Mnt4753:
     ]
 
     test_script = mnt4_753
+    miller_output_field = Fq4_mnt4_753
 
     filename = "mnt4_753"
 
 
+@dataclass
+class PreparedVerifyingKeyBn254:
+    minus_gamma: list[int]
+    minus_delta: list[int]
+    gamma_abc: list[list[int]]
+    gradients_minus_gamma: list[list[list[int]]]
+    gradients_minus_delta: list[list[list[int]]]
+
+
+@dataclass
+class PreparedProofBn254:
+    a: list[int]
+    b: list[int]
+    c: list[int]
+    public_statements: list[int]
+    gradients_b: list[list[list[int]]]
+    gradients_minus_gamma: list[list[list[int]]]
+    gradients_minus_delta: list[list[list[int]]]
+    inverse_miller_loop: list[int]
+
+
+def miller_loop_gradients(groth16, point_q):
+    """Return the gradients of the Miller loop of `point_q`, followed by the ones of the lines through its Frobenius."""
+    pairing_model = groth16.pairing_model
+    gradients = [[s.to_list() for s in el] for el in point_q.gradients(pairing_model.exp_miller_loop)]
+    return gradients + pairing_model.frobenius_gradients(point_q.to_list(), gradients)
+
+
+@dataclass
+class Bn254:
+    # elliptic_curves has no instantiation of BN254: the fields and the curves are defined here, and the values of the
+    # pairing are hard-coded
+    q = q_bn254
+    r = r_bn254
+    Fq = PrimeField(q)
+    Fq2 = QuadraticExtension(base_field=Fq, non_residue=Fq(NON_RESIDUE_FQ_BN254))
+    Fq6 = CubicExtension(base_field=Fq2, non_residue=Fq2(Fq(NON_RESIDUE_FQ2_BN254[0]), Fq(NON_RESIDUE_FQ2_BN254[1])))
+    Fq12 = QuadraticExtension(base_field=Fq6, non_residue=Fq6(Fq2.zero(), Fq2.identity(), Fq2.zero()))
+    # G2 is the M-type sextic twist of `src.zkscript.bilinear_pairings.bn254.parameters`
+    g1_curve = ShortWeierstrassEllipticCurve(a=Fq(a_bn254), b=Fq(b_bn254))
+    g2_curve = ShortWeierstrassEllipticCurve(
+        a=Fq2(Fq(twisted_a_bn254[0]), Fq(twisted_a_bn254[1])), b=Fq2(Fq(twisted_b_bn254[0]), Fq(twisted_b_bn254[1]))
+    )
+
+    # Dummy CRS and ZKP: A = a * G1, B = b * G2, C = c * G1 with a, b random and c such that
+    # e(A, B) = e(alpha, beta) * e(sum_gamma_abc, gamma) * e(C, delta)
+    A = g1_curve(
+        Fq(7563826619400935080402644932248107824806252608660926742538925709541927482212),
+        Fq(12743528101936386069751317576106145563084220220831400795999092863382323095730),
+        infinity=False,
+    )
+    B = g2_curve(
+        Fq2(
+            Fq(8799765423875854253359988465109877714305187788254966921333944547627126972262),
+            Fq(8131477584721719063362420718954664699767472859789698709640927193588628483757),
+        ),
+        Fq2(
+            Fq(12897893931567690932778588344103579004886506727091433489528071714258637241695),
+            Fq(18705521483158237582811768907512687818319886200064489558821491013464094531749),
+        ),
+        infinity=False,
+    )
+    C = g1_curve(
+        Fq(20520550051112020057638172279270916210064234424229594993377347180655061502979),
+        Fq(12695977504767442315537890347665963661577743662983899255471383057276868881489),
+        infinity=False,
+    )
+
+    minus_gamma = g2_curve(
+        Fq2(
+            Fq(20857947333629194957678755193586454079273389256176111349586494292744576838984),
+            Fq(10949500193445078462260246152814018700548144784146792715267013660425431469445),
+        ),
+        Fq2(
+            Fq(18695034687848910922608005863598085217018359468370523536878794620702774525313),
+            Fq(6967639347335438102575769577961718990369719206899503388968196576935489069068),
+        ),
+        infinity=False,
+    )
+    minus_delta = g2_curve(
+        Fq2(
+            Fq(982952243622266935153242175619700488054076001456338436290949448540997639863),
+            Fq(1748020422380638032337891991895109071565212090137590201410786713306005015139),
+        ),
+        Fq2(
+            Fq(11368215867305270741823908500559374919048989037067288533352236846772588753588),
+            Fq(6568456250887763772814905472483185498189781266267100867495402211830373896195),
+        ),
+        infinity=False,
+    )
+
+    gamma_abc = [
+        g1_curve(
+            Fq(20074886251482098765224326125660291740978938612200774270860604956559507718313),
+            Fq(5591776137533919986136035309969798306066101853647172900136233943410387751898),
+            infinity=False,
+        ),
+        g1_curve(
+            Fq(1462808359324666589446821107723773492887714951556774020336931655612369134316),
+            Fq(15630753492025156940471796637163262003100161121988349795234903824640194597922),
+            infinity=False,
+        ),
+        g1_curve(
+            Fq(6756932852556600449068850986150271717623111036431199084895086600813211824687),
+            Fq(707244843279056994237599874451530185612723140947937315373761231326163011760),
+            infinity=False,
+        ),
+    ]
+
+    # First is fixed, next two are random
+    pub_statements = [
+        [
+            1,
+            5919611995370232230220325354305241315806820461289122305466690864101774795625,
+            7494019732871866670341981518221729444616021706350437545418461582262408141822,
+        ]
+    ]
+
+    max_multipliers = [None]
+
+    sum_gamma_abc = [
+        g1_curve(
+            Fq(19372968470952660733663015334728925455102180473404487488863091771548642832566),
+            Fq(8570619535980031617063486363515381677257862146217801946474047823496323987833),
+            infinity=False,
+        )
+    ]
+
+    # e(alpha, beta), with the final exponentiation `(q^12 - 1)/r`
+    alpha_beta = [
+        Fq12(
+            Fq6(
+                Fq2(
+                    Fq(6136753655571368604792754008468345000076063762334388543209543350798358810382),
+                    Fq(16928120497591905367057155273474101120951134359844076043543028464332958137760),
+                ),
+                Fq2(
+                    Fq(18847263162090763907053729393291820548926147016590183798141238518536835175637),
+                    Fq(19068232129436333352537973744988804941005639320982572432927754270936325627077),
+                ),
+                Fq2(
+                    Fq(18831370313057955438596765094431198497522966680973925356549580750567143709298),
+                    Fq(11733952670781527039291939014971919813569765276234969933038642020229522113163),
+                ),
+            ),
+            Fq6(
+                Fq2(
+                    Fq(8456966436113862789578453925463463008674543233456144435596209768272139989074),
+                    Fq(15113351678629483309159040995251518929568592913176699527744688930077265420797),
+                ),
+                Fq2(
+                    Fq(2556905145977752524520385862742714195173058080151053245046551938777242471552),
+                    Fq(15925009100767357803701714350838873272821865672802979646984549887610157387659),
+                ),
+                Fq2(
+                    Fq(19904787037752442649950627145484558408123625790461675925934589886655638230409),
+                    Fq(9395426754678176993987100107506211002548223262456235637459118253665760892566),
+                ),
+            ),
+        )
+    ]
+
+    # Inverse of miller(A, B) * miller(sum_gamma_abc, -gamma) * miller(C, -delta)
+    inverse_miller_loop = Fq12(
+        Fq6(
+            Fq2(
+                Fq(21287238903255802022384339136896608587812625353832961265316942070204357442213),
+                Fq(14639265954219387984880054207651702455603374137748509107170950277161979518523),
+            ),
+            Fq2(
+                Fq(3974667992725944508329728191217483394682829823900782729810048608692706392832),
+                Fq(12917546123659036851461643069045101657562423786865447284172862437521224963530),
+            ),
+            Fq2(
+                Fq(2585883011139945781080728675698462609281640376266718567425030952967475853104),
+                Fq(9388662607332795010650782721042460227333276559050323523462712667715417321270),
+            ),
+        ),
+        Fq6(
+            Fq2(
+                Fq(5705565391035836274788917300775618366807629883596303377110092695405753244664),
+                Fq(8350948866021001245001708530119556053804014222867301230440733376499199964658),
+            ),
+            Fq2(
+                Fq(16380902914167647509157102460879539417585494271375731814650447851073614608339),
+                Fq(2151005452814363409949746987059928942735865161774258500970044561474678531611),
+            ),
+            Fq2(
+                Fq(13375028184614763696342312374651844498063141290403558490334740305600021868246),
+                Fq(17949223938516269802915224432403227440499175971264799292732663168443066999259),
+            ),
+        ),
+    )
+
+    test_script = bn254
+
+    prepared_vk = PreparedVerifyingKeyBn254(
+        minus_gamma=minus_gamma.to_list(),
+        minus_delta=minus_delta.to_list(),
+        gamma_abc=[point.to_list() for point in gamma_abc],
+        gradients_minus_gamma=miller_loop_gradients(test_script, minus_gamma),
+        gradients_minus_delta=miller_loop_gradients(test_script, minus_delta),
+    )
+    prepared_proofs = [
+        PreparedProofBn254(
+            a=A.to_list(),
+            b=B.to_list(),
+            c=C.to_list(),
+            public_statements=pub_statements[0][1:],
+            gradients_b=miller_loop_gradients(test_script, B),
+            gradients_minus_gamma=prepared_vk.gradients_minus_gamma,
+            gradients_minus_delta=prepared_vk.gradients_minus_delta,
+            inverse_miller_loop=inverse_miller_loop.to_list(),
+        )
+    ]
+
+    filename = "bn254"
+
+
 def generate_random_tests(curve, verifying_key_type, proof_type, groth16, filename, is_minimal_example):
     A = curve.pairing_curve.g1_curve.generate_random_point()
     B = curve.pairing_curve.g2_curve.generate_random_point()
@@ -457,6 +701,14 @@ def test_groth16(
             Mnt4753.prepared_proofs[1],
             Mnt4753.filename,
         ),
+        (
+            Bn254.test_script,
+            Bn254.prepared_vk,
+            Bn254.alpha_beta[0],
+            Bn254.sum_gamma_abc[0],
+            Bn254.prepared_proofs[0],
+            Bn254.filename,
+        ),
     ],
 )
 def test_groth16_with_precomputed_msm(
@@ -512,6 +764,263 @@ def test_groth16_with_precomputed_msm(
         save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16")
 
 
+@pytest.mark.parametrize(
+    ("test_script", "prepared_vk", "alpha_beta", "prepared_proof", "max_multipliers", "filename"),
+    [
+        (
+            Bls12381.test_script,
+            Bls12381.prepared_vk,
+            Bls12381.alpha_beta[0],
+            Bls12381.prepared_proofs[0],
+            Bls12381.max_multipliers[0],
+            Bls12381.filename,
+        ),
+        (
+            Mnt4753.test_script,
+            Mnt4753.prepared_vk,
+            Mnt4753.alpha_beta[0],
+            Mnt4753.prepared_proofs[0],
+            Mnt4753.max_multipliers[0],
+            Mnt4753.filename,
+        ),
+    ],
+)
+def test_groth16_fixed_lines(
+    test_script, prepared_vk, alpha_beta, prepared_proof, max_multipliers, filename, save_to_json_folder
+):
+    unlocking_key = Groth16UnlockingKey.from_data(
+        groth16_model=test_script,
+        pub=prepared_proof.public_statements,
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        gradients_pairings=[
+            prepared_proof.gradients_b,
+            prepared_proof.gradients_minus_gamma,
+            prepared_proof.gradients_minus_delta,
+        ],
+        gradients_multiplications=prepared_proof.gradients_multiplications,
+        max_multipliers=max_multipliers,
+        gradients_additions=prepared_proof.gradients_additions,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gradient_gamma_abc_zero=prepared_proof.gradient_gamma_abc_zero,
+        has_precomputed_gradients=False,
+    )
+    unlock = unlocking_key.to_unlocking_script(test_script, True, 0)
+
+    locking_key = Groth16LockingKey(
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=True,
+    )
+    lock = test_script.groth16_verifier(
+        locking_key,
+        modulo_threshold=1,
+        max_multipliers=max_multipliers,
+        check_constant=True,
+        clean_constant=True,
+        fixed_lines=True,
+    )
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+    assert context.get_altstack().size() == 0
+
+    with pytest.raises(ValueError, match="The fixed lines require the precomputed gradients"):
+        test_script.groth16_verifier_with_precomputed_msm(
+            replace(locking_key, has_precomputed_gradients=False), modulo_threshold=1, fixed_lines=True
+        )
+    with pytest.raises(ValueError, match="The verifiers with fixed lines cannot be compiled to a template"):
+        test_script.groth16_verifier_template(
+            test_script.groth16_verifier, locking_key, modulo_threshold=1, fixed_lines=True
+        )
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16_fixed_lines")
+
+
+def test_groth16_fixed_lines_are_not_supported():
+    locking_key = Groth16LockingKey(
+        alpha_beta=Bn254.alpha_beta[0].to_list(),
+        minus_gamma=Bn254.prepared_vk.minus_gamma,
+        minus_delta=Bn254.prepared_vk.minus_delta,
+        gamma_abc=Bn254.prepared_vk.gamma_abc,
+        gradients_pairings=[
+            Bn254.prepared_vk.gradients_minus_gamma,
+            Bn254.prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=True,
+    )
+    with pytest.raises(ValueError, match="The fixed lines are not supported by this pairing model"):
+        Bn254.test_script.groth16_verifier_with_precomputed_msm(locking_key, modulo_threshold=1, fixed_lines=True)
+
+
+@pytest.mark.parametrize(
+    ("test_script", "prepared_vk", "alpha_beta", "prepared_proof", "max_multipliers"),
+    [
+        (
+            Bls12381.test_script,
+            Bls12381.prepared_vk,
+            Bls12381.alpha_beta[0],
+            Bls12381.prepared_proofs[0],
+            Bls12381.max_multipliers[0],
+        ),
+        (
+            Mnt4753.test_script,
+            Mnt4753.prepared_vk,
+            Mnt4753.alpha_beta[0],
+            Mnt4753.prepared_proofs[0],
+            Mnt4753.max_multipliers[0],
+        ),
+    ],
+)
+def test_groth16_with_execution_cost_objective(test_script, prepared_vk, alpha_beta, prepared_proof, max_multipliers):
+    unlocking_key = Groth16UnlockingKey.from_data(
+        groth16_model=test_script,
+        pub=prepared_proof.public_statements,
+        A=prepared_proof.a,
+        B=prepared_proof.b,
+        C=prepared_proof.c,
+        gradients_pairings=[
+            prepared_proof.gradients_b,
+            prepared_proof.gradients_minus_gamma,
+            prepared_proof.gradients_minus_delta,
+        ],
+        gradients_multiplications=prepared_proof.gradients_multiplications,
+        max_multipliers=max_multipliers,
+        gradients_additions=prepared_proof.gradients_additions,
+        inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gradient_gamma_abc_zero=prepared_proof.gradient_gamma_abc_zero,
+        has_precomputed_gradients=False,
+    )
+    unlock = unlocking_key.to_unlocking_script(test_script, True, 0)
+
+    locking_key = Groth16LockingKey(
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=True,
+    )
+    cost_model = ExecutionCostModel()
+    lock = test_script.groth16_verifier(
+        locking_key,
+        modulo_threshold=200 * 8,
+        max_multipliers=max_multipliers,
+        check_constant=True,
+        clean_constant=True,
+        objective=cost_model,
+    )
+    assert not modulo_planner.is_enabled
+    with modulo_planner.active(objective=cost_model):
+        assert (
+            lock.raw_serialize()
+            == test_script.groth16_verifier(
+                locking_key,
+                modulo_threshold=200 * 8,
+                max_multipliers=max_multipliers,
+                check_constant=True,
+                clean_constant=True,
+            ).raw_serialize()
+        )
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+    assert context.get_altstack().size() == 0
+
+    cost = cost_model.estimate(unlock + lock)
+    assert cost.validation_time > 0
+    assert cost.peak_stack_memory > 0
+
+
+@pytest.mark.parametrize("precomputed_gradients_in_unlocking", [True, False])
+@pytest.mark.parametrize(
+    ("test_script", "prepared_vk", "alpha_beta"),
+    [
+        (Bls12381.test_script, Bls12381.prepared_vk, Bls12381.alpha_beta[0]),
+        (Mnt4753.test_script, Mnt4753.prepared_vk, Mnt4753.alpha_beta[0]),
+    ],
+)
+def test_groth16_template(test_script, prepared_vk, alpha_beta, precomputed_gradients_in_unlocking):
+    locking_key = Groth16LockingKeyWithPrecomputedMsm(
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gradients_pairings=[
+            prepared_vk.gradients_minus_gamma,
+            prepared_vk.gradients_minus_delta,
+        ],
+        has_precomputed_gradients=not precomputed_gradients_in_unlocking,
+    )
+    template = test_script.groth16_verifier_template(
+        test_script.groth16_verifier_with_precomputed_msm,
+        locking_key,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+    )
+
+    lock = test_script.groth16_verifier_with_precomputed_msm(
+        locking_key,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+    )
+    assert template.instantiate(locking_key).raw_serialize() == lock.raw_serialize()
+
+    with pytest.raises(ValueError, match="do not match the template"):
+        template.instantiate(replace(locking_key, has_precomputed_gradients=precomputed_gradients_in_unlocking))
+
+
+@pytest.mark.parametrize("extractable_inputs", [1, 0])
+@pytest.mark.parametrize(
+    ("test_script", "prepared_proofs", "max_multipliers"),
+    [
+        (Bls12381.test_script, Bls12381.prepared_proofs, Bls12381.max_multipliers),
+        (Mnt4753.test_script, Mnt4753.prepared_proofs, Mnt4753.max_multipliers),
+    ],
+)
+def test_groth16_unlocking_scripts(test_script, prepared_proofs, max_multipliers, extractable_inputs):
+    unlocking_keys = [
+        Groth16UnlockingKey.from_data(
+            groth16_model=test_script,
+            pub=prepared_proof.public_statements,
+            A=prepared_proof.a,
+            B=prepared_proof.b,
+            C=prepared_proof.c,
+            gradients_pairings=[
+                prepared_proof.gradients_b,
+                prepared_proof.gradients_minus_gamma,
+                prepared_proof.gradients_minus_delta,
+            ],
+            gradients_multiplications=prepared_proof.gradients_multiplications,
+            max_multipliers=multipliers,
+            gradients_additions=prepared_proof.gradients_additions,
+            inverse_miller_output=prepared_proof.inverse_miller_loop,
+            gradient_gamma_abc_zero=prepared_proof.gradient_gamma_abc_zero,
+            has_precomputed_gradients=has_precomputed_gradients,
+        )
+        for prepared_proof, multipliers in zip(prepared_proofs, max_multipliers, strict=True)
+        for has_precomputed_gradients in (True, False)
+    ]
+
+    unlocks = groth16_unlocking_scripts(test_script, iter(unlocking_keys), True, extractable_inputs)
+
+    for unlocking_key, unlock in zip(unlocking_keys, unlocks, strict=True):
+        expected = unlocking_key.to_unlocking_script(test_script, True, extractable_inputs)
+        assert unlock.raw_serialize() == expected.raw_serialize()
+
+
 @pytest.mark.slow
 @pytest.mark.parametrize("precomputed_gradients_in_unlocking", [True, False])
 @pytest.mark.parametrize("extractable_inputs", [1, 0])
@@ -596,6 +1105,7 @@ def test_groth16_slow(
 
 
 @pytest.mark.parametrize("extractable_inputs", [1])
+@pytest.mark.parametrize("is_affine_msm_supplied", [False, True])
 @pytest.mark.parametrize(
     ("test_script", "prepared_vk", "alpha_beta", "prepared_proof", "max_multipliers", "filename"),
     [
@@ -631,6 +1141,14 @@ def test_groth16_slow(
             Mnt4753.max_multipliers[1],
             Mnt4753.filename,
         ),
+        (
+            Bn254.test_script,
+            Bn254.prepared_vk,
+            Bn254.alpha_beta[0],
+            Bn254.prepared_proofs[0],
+            Bn254.max_multipliers[0],
+            Bn254.filename,
+        ),
     ],
 )
 def test_groth16_proj(
@@ -642,6 +1160,7 @@ def test_groth16_proj(
     extractable_inputs,
     filename,
     save_to_json_folder,
+    is_affine_msm_supplied,
 ):
     unlocking_key = Groth16ProjUnlockingKey.from_data(
         groth16_model=test_script,
@@ -651,6 +1170,7 @@ def test_groth16_proj(
         C=prepared_proof.c,
         max_multipliers=max_multipliers,
         inverse_miller_output=prepared_proof.inverse_miller_loop,
+        gamma_abc=prepared_vk.gamma_abc if is_affine_msm_supplied else None,
     )
     unlock = unlocking_key.to_unlocking_script(test_script, True, extractable_inputs)
 
@@ -667,6 +1187,7 @@ def test_groth16_proj(
         extractable_inputs=extractable_inputs,
         check_constant=True,
         clean_constant=True,
+        is_affine_msm_supplied=is_affine_msm_supplied,
     )
     context = Context(script=unlock + lock)
 
@@ -713,6 +1234,14 @@ def test_groth16_proj(
             Mnt4753.prepared_proofs[1],
             Mnt4753.filename,
         ),
+        (
+            Bn254.test_script,
+            Bn254.prepared_vk,
+            Bn254.alpha_beta[0],
+            Bn254.sum_gamma_abc[0],
+            Bn254.prepared_proofs[0],
+            Bn254.filename,
+        ),
     ],
 )
 def test_groth16_proj_with_precomputed_msm(
@@ -823,3 +1352,89 @@ def test_groth16_proj_slow(
 
     if save_to_json_folder:
         save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16")
+
+
+def batch_proofs(config, n_proofs):
+    """Return `n_proofs` proofs of the second statement of `config`, re-randomised as `(s * A, s^-1 * B, C)`."""
+    scalars = [pow(3, i, config.r) for i in range(1, n_proofs + 1)]
+    A = [config.A.multiply(s).to_list() for s in scalars]
+    B = [config.B.multiply(pow(s, -1, config.r)).to_list() for s in scalars]
+    C = [config.C.to_list()] * n_proofs
+    pub = [config.pub_statements[1][1:]] * n_proofs
+    return pub, A, B, C
+
+
+def batch_miller_output_inverse(config, points_p, points_q):
+    """Return the inverse of the product of the Miller loops of the pairs `(points_p[i], points_q[i])`."""
+    pairing_model = config.test_script.pairing_model
+    script = nums_to_script([config.q, *[x for point in points_p + points_q for x in point]])
+    script += pairing_model.multi_miller_loop_proj(
+        n_pairs=len(points_p), modulo_threshold=1, check_constant=True, clean_constant=True
+    )
+    context = Context(script=script)
+    assert context.evaluate()
+    stack = context.get_stack()
+    miller_output = [decode_num(stack[i]) for i in range(stack.size())]
+    return config.miller_output_field.from_list(miller_output).invert().to_list()
+
+
+@pytest.mark.parametrize("n_proofs", [2, 3])
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_groth16_batch_proj(config, n_proofs, save_to_json_folder):
+    test_script = config.test_script
+    prepared_vk = config.prepared_vk
+    pub, A, B, C = batch_proofs(config, n_proofs)
+
+    weights, scalars = Groth16ProjBatchUnlockingKey.batch_scalars(test_script, pub, A, B, C)
+    assert sum(weights) == 1
+    assert scalars == [statement % config.r for statement in pub[0]]
+
+    points_p = Groth16ProjBatchUnlockingKey.batch_points(test_script, pub, A, B, C, prepared_vk.gamma_abc)
+    points_q = [*B, prepared_vk.minus_delta, prepared_vk.minus_gamma]
+    unlocking_key = Groth16ProjBatchUnlockingKey.from_data(
+        groth16_model=test_script,
+        pub=pub,
+        A=A,
+        B=B,
+        C=C,
+        inverse_miller_output=batch_miller_output_inverse(config, points_p, points_q),
+        gamma_abc=prepared_vk.gamma_abc,
+    )
+    unlock = unlocking_key.to_unlocking_script(test_script)
+
+    locking_key = Groth16ProjLockingKey(
+        alpha_beta=config.alpha_beta[1].to_list(),
+        minus_gamma=prepared_vk.minus_gamma,
+        minus_delta=prepared_vk.minus_delta,
+        gamma_abc=prepared_vk.gamma_abc,
+    )
+    lock = test_script.groth16_batch_verifier_proj(
+        locking_key, n_proofs=n_proofs, modulo_threshold=1, check_constant=True, clean_constant=True
+    )
+    context = Context(script=unlock + lock)
+
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+    assert context.get_altstack().size() == 0
+
+    # The multiplications by the randomisers are checked against the ones derived from the proofs
+    unlocking_key.randomiser_keys[0] = replace(
+        unlocking_key.randomiser_keys[0], a=unlocking_key.randomiser_keys[0].a + 1
+    )
+    context = Context(script=unlocking_key.to_unlocking_script(test_script) + lock)
+    assert not context.evaluate()
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, f"groth16_batch_{n_proofs}")
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_groth16_batch_proj_invalid_number_of_proofs(config):
+    locking_key = Groth16ProjLockingKey(
+        alpha_beta=config.alpha_beta[1].to_list(),
+        minus_gamma=config.prepared_vk.minus_gamma,
+        minus_delta=config.prepared_vk.minus_delta,
+        gamma_abc=config.prepared_vk.gamma_abc,
+    )
+    with pytest.raises(ValueError, match="at least 2"):
+        config.test_script.groth16_batch_verifier_proj(locking_key, n_proofs=1, modulo_threshold=1)
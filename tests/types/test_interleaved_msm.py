@@ -0,0 +1,329 @@
+import pytest
+from tx_engine import Context, Script, decode_num
+
+from src.zkscript.bilinear_pairings.bls12_381.parameters import GLV_BETA, GLV_LAMBDA
+from src.zkscript.bilinear_pairings.bls12_381.parameters import q as bls12_381_q
+from src.zkscript.bilinear_pairings.bls12_381.parameters import r as bls12_381_r
+from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
+from src.zkscript.elliptic_curves.util import (
+    glv_bases,
+    glv_max_multipliers,
+    glv_scalars,
+    gradient,
+    interleaved_groups,
+    interleaved_rows,
+    interleaved_table,
+    point_addition,
+)
+from src.zkscript.script_types.unlocking_keys.interleaved_msm_with_fixed_bases import (
+    InterleavedMsmWithFixedBasesUnlockingKey,
+)
+from src.zkscript.util.stack_simulator import stack_checks
+from src.zkscript.util.utility_scripts import nums_to_script
+
+# Data for Secp256k1
+modulus = 115792089237316195423570985008687907853269984665640564039457584007908834671663
+order = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+generator = [
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+]
+test_script = EllipticCurveFq(q=modulus, curve_a=0, curve_b=7)
+
+
+def multiply(scalar, point, q=modulus):
+    out = None
+    for bit in f"{scalar:b}":
+        out = point_addition(out, out, q, 0)
+        if bit == "1":
+            out = point_addition(out, point, q, 0)
+    return out
+
+
+bases = [
+    multiply(k, generator)
+    for k in [
+        0x3E1E0B6F2BB2E2A0D1F5A6E40F2C5D8A9B7C6D5E4F30211223344556677889900,
+        0x1B0A99887766554433221100FFEEDDCCBBAA99887766554433221100FFEEDDCC,
+        0x5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A5A,
+        0x123456789ABCDEF0123456789ABCDEF0123456789ABCDEF0123456789ABCDEF,
+        0x0F1E2D3C4B5A69788796A5B4C3D2E1F00F1E2D3C4B5A69788796A5B4C3D2E1F0,
+    ]
+]
+
+test_data = [
+    ([3, 5], [8, 8]),
+    ([0, 0, 0], [16, 16, 16]),
+    ([1, 0, 7], [8, 16, 8]),
+    ([2**128 - 1, 12345, 2**200], [2**128, 2**128, order]),
+    (
+        [
+            89179908133058966563943425115874784614382846700656822879827803812293592024531,
+            99918161303508978633620523839997829444876269911501350624465443203877613350,
+            245130299858301666475531021987374198395,
+            1,
+            0,
+        ],
+        [order, 2**250, 2**128, 1, order],
+    ),
+]
+
+
+def expected_msm(scalars):
+    out = None
+    for scalar, base in zip(scalars, bases[: len(scalars)], strict=True):
+        out = point_addition(out, multiply(scalar, base), modulus, 0)
+    return out
+
+
+@pytest.mark.parametrize("positive_modulo", [True, False])
+@pytest.mark.parametrize("window", [1, 2, 3, 4])
+@pytest.mark.parametrize(("scalars", "max_multipliers"), test_data)
+def test_interleaved_msm_with_fixed_bases(scalars, max_multipliers, window, positive_modulo):
+    n = len(scalars)
+    unlocking_key = InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+        ec_over_fq=test_script,
+        scalars=scalars,
+        bases=bases[:n],
+        max_multipliers=max_multipliers,
+        window=window,
+    )
+    lock = test_script.interleaved_msm_with_fixed_bases(
+        bases=bases[:n],
+        max_multipliers=max_multipliers,
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=True,
+        positive_modulo=positive_modulo,
+        window=window,
+    )
+
+    context = Context(script=unlocking_key.to_unlocking_script(test_script) + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 2
+    assert context.get_altstack().size() == 0
+
+    stack = context.get_stack()
+    result = [decode_num(stack[i]) for i in range(2)]
+    expected = expected_msm(scalars)
+    if expected is None:
+        assert result == [0, 0]
+    else:
+        assert [element % modulus for element in result] == expected
+        if positive_modulo:
+            assert result == expected
+
+
+@pytest.mark.parametrize("window", [1, 2, 3])
+@pytest.mark.parametrize(("scalars", "max_multipliers"), test_data)
+def test_extract_scalar(scalars, max_multipliers, window):
+    n = len(scalars)
+    unlocking_key = InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+        ec_over_fq=test_script,
+        scalars=scalars,
+        bases=bases[:n],
+        max_multipliers=max_multipliers,
+        window=window,
+    )
+    lock = Script()
+    for index in range(n):
+        lock += InterleavedMsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned(
+            max_multipliers=max_multipliers, index=index, window=window
+        )
+        lock += nums_to_script([scalars[index]]) + Script.parse_string("OP_EQUALVERIFY")
+    # The extraction leaves the data untouched
+    lock += test_script.interleaved_msm_with_fixed_bases(
+        bases=bases[:n],
+        max_multipliers=max_multipliers,
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=True,
+        window=window,
+    )
+    lock += Script.parse_string("OP_2DROP OP_1")
+
+    context = Context(script=unlocking_key.to_unlocking_script(test_script) + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+    assert context.get_altstack().size() == 0
+
+
+def test_selector_out_of_range_is_rejected():
+    scalars, max_multipliers = [8, 8], [8, 8]
+    unlocking_key = InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+        ec_over_fq=test_script, scalars=scalars, bases=bases[:2], max_multipliers=max_multipliers, window=2
+    )
+    lock = test_script.interleaved_msm_with_fixed_bases(
+        bases=bases[:2], max_multipliers=max_multipliers, take_modulo=True, check_constant=True, clean_constant=True
+    )
+
+    # The selector of the first step is pushed last: replace it with 4, which is not the index of a sum of the table
+    unlocking_script = unlocking_key.to_unlocking_script(test_script)
+    elements = unlocking_script.to_string().split()
+    assert elements[-1] == "OP_3"
+    tampered = Script.parse_string(" ".join([*elements[:-1], "OP_4"]))
+
+    assert Context(script=unlocking_script + lock).evaluate()
+    assert not Context(script=tampered + lock).evaluate()
+
+
+@pytest.mark.parametrize("window", [1, 3])
+def test_stack_checks(window):
+    # The selectors of the table are data-dependent picks, and the optional additions are guarded by `OP_IFDUP`
+    stack_checks.clear()
+    with stack_checks.active():
+        test_script.interleaved_msm_with_fixed_bases(
+            bases=bases[:3], max_multipliers=[8, 16, 8], take_modulo=True, window=window
+        )
+    assert stack_checks.n_checked["EllipticCurveFq.interleaved_msm_with_fixed_bases"] == 1
+    stack_checks.clear()
+
+
+def test_interleaved_rows_and_table():
+    assert interleaved_groups(5, 2) == [range(2), range(2, 4), range(4, 5)]
+    # The groups take part in the steps of the bits that their largest scalar can have
+    assert interleaved_rows([1, 7, 3, 3, 15], 2) == [[2], [0, 2], [0, 1, 2], [0, 1, 2]]
+
+    table = interleaved_table(bases[:3], 2, modulus, 0)
+    assert table == [[bases[0], bases[1], point_addition(bases[0], bases[1], modulus, 0)], [bases[2]]]
+
+
+def test_invalid_data():
+    with pytest.raises(ValueError, match="The window must be at least 1"):
+        test_script.interleaved_msm_with_fixed_bases(
+            bases=bases[:2], max_multipliers=[8, 8], take_modulo=True, window=0
+        )
+    with pytest.raises(ValueError, match="The number of bases"):
+        test_script.interleaved_msm_with_fixed_bases(bases=bases[:2], max_multipliers=[8], take_modulo=True)
+    with pytest.raises(ValueError, match="The scalar 1 must be between 0 and 8"):
+        InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+            ec_over_fq=test_script, scalars=[3, 9], bases=bases[:2], max_multipliers=[8, 8]
+        )
+    with pytest.raises(ValueError, match="is the point at infinity"):
+        interleaved_table([bases[0], [bases[0][0], modulus - bases[0][1]]], 2, modulus, 0)
+
+
+# Data for BLS12-381 G1
+bls12_381_script = EllipticCurveFq(q=bls12_381_q, curve_a=0, curve_b=4)
+bls12_381_generator = [
+    0x17F1D3A73197D7942695638C4FA9AC0FC3688C4F9774B905A14E3A3F171BAC586C55E83FF97A1AEFFB3AF00ADB22C6BB,
+    0x08B3F481E3AAA0F1A09E30ED741D8AE4FCF5E095D5D00AF600DB18CB2C04B3EDD03CC744A2888AE40CAA232946C5E7E1,
+]
+glv = (GLV_BETA, GLV_LAMBDA)
+bls12_381_bases = [multiply(k, bls12_381_generator, bls12_381_q) for k in [0x1234567, 0xABCDEF0123, 0x5A5A5A5A5A5A]]
+
+
+def test_glv_endomorphism():
+    # phi(P) = lambda * P
+    _, endomorphism = glv_bases([bls12_381_generator], glv, bls12_381_q)
+    assert endomorphism == multiply(GLV_LAMBDA, bls12_381_generator, bls12_381_q)
+
+    scalar = bls12_381_r - 1
+    k, k_prime = glv_scalars([scalar], glv)
+    assert scalar == k + GLV_LAMBDA * k_prime
+    assert k.bit_length() <= 128
+    assert k_prime.bit_length() <= 128
+
+
+@pytest.mark.parametrize("window", [1, 2, 4])
+@pytest.mark.parametrize(
+    ("scalars", "max_multipliers"),
+    [
+        ([bls12_381_r - 1, 0x73EDA753299D7D483339D80809A1D80553BDA402FFFE5BFEFFFFFFFF00000000], [bls12_381_r] * 2),
+        ([GLV_LAMBDA, 0, 2**128 - 1], [bls12_381_r, bls12_381_r, 2**128]),
+        ([5, 3, 1], [8, 8, 8]),
+    ],
+)
+def test_glv_msm_with_fixed_bases(scalars, max_multipliers, window):
+    n = len(scalars)
+    unlocking_key = InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+        ec_over_fq=bls12_381_script,
+        scalars=scalars,
+        bases=bls12_381_bases[:n],
+        max_multipliers=max_multipliers,
+        window=window,
+        glv=glv,
+    )
+    lock = Script()
+    for index in range(n):
+        lock += InterleavedMsmWithFixedBasesUnlockingKey.extract_scalar_as_unsigned(
+            max_multipliers=max_multipliers, index=index, window=window, glv=glv
+        )
+        lock += nums_to_script([scalars[index]]) + Script.parse_string("OP_EQUALVERIFY")
+    lock += bls12_381_script.interleaved_msm_with_fixed_bases(
+        bases=bls12_381_bases[:n],
+        max_multipliers=max_multipliers,
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=True,
+        window=window,
+        glv=glv,
+    )
+    expected = None
+    for scalar, base in zip(scalars, bls12_381_bases[:n], strict=True):
+        expected = point_addition(expected, multiply(scalar, base, bls12_381_q), bls12_381_q, 0)
+    lock += nums_to_script(expected) + Script.parse_string("OP_ROT OP_EQUALVERIFY OP_EQUAL")
+
+    context = Context(script=unlocking_key.to_unlocking_script(bls12_381_script) + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+    assert context.get_altstack().size() == 0
+
+
+def test_glv_forged_gradient_is_rejected():
+    # With a = k + 2 * lambda, T = 2^127 * P + k_126 * P = lambda * P = phi(P) at the step 126, where k_126 is the
+    # partial scalar of k, so that the chord through T and phi(P) is not defined
+    k = ((GLV_LAMBDA - 1 - 2**127) // 2 << 2) | 2
+    scalars, max_multipliers = [k + 2 * GLV_LAMBDA], [bls12_381_r]
+    assert glv_scalars(scalars, glv) == [k, 2]
+    with pytest.raises(ValueError, match="The step 126 of the loop adds T or -T to T"):
+        InterleavedMsmWithFixedBasesUnlockingKey.from_data(
+            ec_over_fq=bls12_381_script,
+            scalars=scalars,
+            bases=[bls12_381_generator],
+            max_multipliers=max_multipliers,
+            window=1,
+            glv=glv,
+        )
+
+    def add(T, P, gradient):
+        x = (gradient * gradient - T[0] - P[0]) % bls12_381_q
+        return [x, (gradient * (T[0] - x) - T[1]) % bls12_381_q]
+
+    # Compute the data of the loop, with a forged gradient for the addition of phi(P) to T = phi(P)
+    table = interleaved_table(glv_bases([bls12_381_generator], glv, bls12_381_q), 1, bls12_381_q, 0)
+    rows = interleaved_rows(glv_max_multipliers(max_multipliers, glv), 1)
+    gradients = []
+    T = point_addition(bls12_381_generator, bls12_381_generator, bls12_381_q, 0)
+    for j, row in enumerate(rows):
+        if j > 0:
+            gradients.append([gradient(T, T, bls12_381_q, 0)])
+            T = add(T, T, gradients[-1][0])
+        for g in row:
+            if glv_scalars(scalars, glv)[g] >> (len(rows) - 1 - j) & 1:
+                gradients.append([1 if table[g][0] == T else gradient(T, table[g][0], bls12_381_q, 0)])
+                T = add(T, table[g][0], gradients[-1][0])
+            else:
+                gradients.append([])
+    offset = multiply(2 ** len(rows), bls12_381_generator, bls12_381_q)
+    offset = [offset[0], -offset[1] % bls12_381_q]
+    forged_key = InterleavedMsmWithFixedBasesUnlockingKey(
+        scalars=scalars,
+        max_multipliers=max_multipliers,
+        window=1,
+        gradients=gradients,
+        gradient_offset=[gradient(T, offset, bls12_381_q, 0)],
+        glv=glv,
+    )
+
+    lock = bls12_381_script.interleaved_msm_with_fixed_bases(
+        bases=[bls12_381_generator],
+        max_multipliers=max_multipliers,
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=True,
+        window=1,
+        glv=glv,
+    )
+    lock += Script.parse_string("OP_2DROP OP_1")
+    assert not Context(script=forged_key.to_unlocking_script(bls12_381_script) + lock).evaluate()
@@ -0,0 +1,110 @@
+import pytest
+from tx_engine import Context, Script
+
+from src.zkscript.bilinear_pairings.bls12_381.parameters import q as bls12_381_q
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import q as mnt4_753_q
+from src.zkscript.elliptic_curves.secp256k1.secp256k1 import Secp256k1
+from src.zkscript.fields.fq import Fq
+from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.addition_chain import AdditionChains, candidate_chains
+from src.zkscript.util.exponent_recoding import sliding_window, to_integer
+from src.zkscript.util.modulo_planner import modulo_planner
+from src.zkscript.util.utility_scripts import nums_to_script
+
+MODULI = [bls12_381_q, mnt4_753_q, Secp256k1.MODULUS]
+
+
+@pytest.mark.parametrize("e", [2, 3, 5, 0b1011101110001, 2**64 - 1, *[q - 2 for q in MODULI]])
+def test_candidate_chains(e):
+    candidates = candidate_chains(e)
+    assert candidates["binary"] == [int(bit) for bit in f"{e:b}"[::-1]]
+    for digits in candidates.values():
+        assert to_integer(digits) == e
+        assert len(digits) > 1
+        assert all(digit >= 0 and (digit == 0 or digit % 2 == 1) for digit in digits)
+    assert len({tuple(digits) for digits in candidates.values()}) == len(candidates)
+
+
+def test_invalid_exponent():
+    with pytest.raises(ValueError, match="The exponent must be at least 2"):
+        candidate_chains(1)
+
+
+def test_shortest_chain_is_cached():
+    e = 0b1011101110001011101110001
+    calls = []
+
+    def size(digits):
+        calls.append(digits)
+        return sum(digit != 0 for digit in digits) + max(digits)
+
+    chains = AdditionChains()
+    best = chains.shortest("test", e, size)
+    sizes = {name: size(digits) for name, digits in candidate_chains(e).items()}
+    assert size(best) == min(sizes.values())
+
+    # The chain is read from memory
+    n_calls = len(calls)
+    assert chains.shortest("test", e, size) == best
+    assert len(calls) == n_calls
+
+    # The chain is searched again after clearing the cache
+    chains.clear()
+    assert chains.shortest("test", e, size) == best
+    assert len(calls) > n_calls
+
+
+@pytest.mark.parametrize("q", MODULI)
+@pytest.mark.parametrize("mod_frequency", [1, 4])
+@pytest.mark.parametrize("positive_modulo", [True, False])
+def test_inverse_with_addition_chain(q, mod_frequency, positive_modulo):
+    fq = Fq(q)
+    assert to_integer(fq.inverse_chain()) == q - 2
+    assert max(fq.inverse_chain()) > 1
+
+    for x, x_inverse in [(0, 0), (1, 1), (123456789, pow(123456789, -1, q)), (q - 1, q - 1)]:
+        lock = fq.inverse(
+            take_modulo=True,
+            positive_modulo=positive_modulo,
+            check_constant=True,
+            clean_constant=True,
+            x=StackFiniteFieldElement(1, False, 1),
+            mod_frequency=mod_frequency,
+            addition_chain=True,
+        )
+        lock += Script.parse_string("OP_NIP")
+        if positive_modulo:
+            lock += nums_to_script([x_inverse]) + Script.parse_string("OP_EQUAL")
+        else:
+            lock += nums_to_script([q]) + Script.parse_string("OP_ADD")
+            lock += nums_to_script([q]) + Script.parse_string("OP_MOD")
+            lock += nums_to_script([x_inverse]) + Script.parse_string("OP_EQUAL")
+
+        context = Context(script=nums_to_script([q, x, 7]) + lock)
+        assert context.evaluate()
+        assert context.get_stack().size() == 1
+        assert context.get_altstack().size() == 0
+
+
+@pytest.mark.parametrize("q", MODULI)
+def test_inverse_with_planned_addition_chain(q):
+    fq = Fq(q)
+    x = 987654321
+    with modulo_planner.active():
+        lock = fq.inverse(
+            take_modulo=True, check_constant=True, clean_constant=True, modulo_threshold=1600, addition_chain=True
+        )
+    lock += nums_to_script([pow(x, -1, q)]) + Script.parse_string("OP_EQUAL")
+
+    context = Context(script=nums_to_script([q, x]) + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+
+
+@pytest.mark.parametrize("q", MODULI)
+def test_addition_chain_is_shorter(q):
+    fq = Fq(q)
+    binary = fq.inverse(take_modulo=True, addition_chain=False)
+    chained = fq.inverse(take_modulo=True, addition_chain=True)
+    assert len(chained.raw_serialize()) < len(binary.raw_serialize())
+    assert fq.inverse_chain() != sliding_window(q - 2, width=1)
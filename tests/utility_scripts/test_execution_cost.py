@@ -0,0 +1,72 @@
+import pytest
+from tx_engine import Script
+from tx_engine.engine import op_codes
+
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.utility_scripts import nums_to_script
+
+# A model charging one unit for every coefficient
+UNIT = ExecutionCostModel(
+    opcode=1.0,
+    numeric=1.0,
+    numeric_per_byte=1.0,
+    mul_per_word_product=1.0,
+    div_per_word_product=1.0,
+    hash=1.0,
+    hash_per_block=1.0,
+    copy_per_byte=1.0,
+    roll_per_position=1.0,
+)
+
+
+@pytest.mark.parametrize(
+    ("op", "operands", "results", "position", "expected"),
+    [
+        # 48 + 48 + 96 bytes, 6 * 6 word products
+        ("OP_MUL", (381, 381), (762,), 0, 1 + 1 + 192 + 36),
+        # 96 + 48 + 48 bytes, 6 * (12 - 6 + 1) word products
+        ("OP_MOD", (762, 381), (381,), 0, 1 + 1 + 192 + 42),
+        ("OP_ADD", (381, 381), (382,), 0, 1 + 1 + 144),
+        # The bit lengths of the operands are unknown: only the known sizes are charged
+        ("OP_MUL", (None, 381), (None,), 0, 1 + 1 + 48),
+        # 55 bytes fit in one block with the padding, 56 bytes do not
+        ("OP_SHA256", (439,), (256,), 0, 1 + 1 + 1),
+        ("OP_SHA256", (447,), (256,), 0, 1 + 1 + 2),
+        # The second pass hashes the 32-byte digest
+        ("OP_HASH256", (447,), (256,), 0, 1 + (1 + 2) + (1 + 1)),
+        ("OP_DUP", (381,), (381, 381), 0, 1 + 48),
+        ("OP_SWAP", (381, 255), (255, 381), 0, 1),
+        ("OP_PICK", (4,), (381,), 10, 1 + 48 - 1),
+        ("OP_ROLL", (4,), (381,), 10, 1 + 10),
+    ],
+)
+def test_opcode_cost(op, operands, results, position, expected):
+    assert UNIT.opcode_cost(getattr(op_codes, op), operands, results, position) == expected
+
+
+def test_estimate():
+    x = 2**100 - 1
+    script = nums_to_script([x]) + Script.parse_string("OP_DUP OP_MUL")
+    cost = UNIT.estimate(script)
+
+    # Push and copy of 13 bytes, multiplication of 13-byte numbers into 26 bytes, with 2 * 2 word products
+    assert cost.validation_time == pytest.approx(((1 + 13) + (1 + 13) + (1 + 1 + 52 + 4)) * 1e-9)
+    assert cost.peak_stack_memory == 26
+
+
+def test_reductions_are_charged():
+    q = 2**127 - 1
+    fq2 = Fq2(q=q, non_residue=-1)
+    costs = [
+        ExecutionCostModel().estimate(
+            fq2.mul(take_modulo=take_modulo, check_constant=False, clean_constant=False),
+            n_inputs=None,
+            input_bits=(q.bit_length(),) * 4,
+            default_bits=q.bit_length(),
+        )
+        for take_modulo in [True, False]
+    ]
+
+    assert costs[0].validation_time > costs[1].validation_time
+    assert costs[0].peak_stack_memory >= costs[1].peak_stack_memory
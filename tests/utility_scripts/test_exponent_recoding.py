@@ -0,0 +1,171 @@
+from itertools import pairwise, product
+
+import pytest
+from tx_engine import Context, Script
+
+from src.zkscript.bilinear_pairings.bls12_381 import parameters as bls12_381_parameters
+from src.zkscript.bilinear_pairings.mnt4_753 import parameters as mnt4_753_parameters
+from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import CyclotomicExponentiation
+from src.zkscript.fields.fq import Fq
+from src.zkscript.util.exponent_recoding import (
+    naf,
+    recodings,
+    shortest_signed_binary,
+    sliding_window,
+    to_integer,
+    width_naf,
+)
+from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, roll
+
+Q = 2**127 - 1
+
+EXPONENTS = [1, 2, 7, 11, 255, 0b1011101110001, 2**64 - 1, 0xD201000000010000, -0xD201000000010000]
+
+
+def multiplication(opcodes: str):
+    def operation(take_modulo, positive_modulo=True, check_constant=None, clean_constant=None, is_constant_reused=None):  # noqa: ARG001
+        out = Script.parse_string(opcodes)
+        if take_modulo:
+            out += roll(position=-1, n_elements=1) if clean_constant else pick(position=-1, n_elements=1)
+            out += mod(stack_preparation="", is_positive=positive_modulo, is_constant_reused=is_constant_reused)
+        return out
+
+    return operation
+
+
+# Exponentiation in F_q^*, whose elements are all in the "cyclotomic subgroup"
+prime_field_exponentiation = CyclotomicExponentiation(
+    q=Q,
+    cyclotomic_inverse=Fq(Q).inverse,
+    square=multiplication("OP_DUP OP_MUL"),
+    mul=multiplication("OP_MUL"),
+    extension_degree=1,
+)
+
+
+@pytest.mark.parametrize("e", EXPONENTS)
+def test_encodings_represent_the_exponent(e):
+    for width in range(2, 7):
+        assert to_integer(width_naf(e, width)) == e
+    for width in range(1, 7):
+        assert to_integer(sliding_window(e, width)) == e
+    assert to_integer(naf(e)) == e
+
+
+@pytest.mark.parametrize("e", EXPONENTS)
+@pytest.mark.parametrize("width", [2, 3, 4, 5])
+def test_width_naf(e, width):
+    digits = width_naf(e, width)
+    assert digits[-1] != 0
+    non_zero = [i for i, digit in enumerate(digits) if digit != 0]
+    assert all(digits[i] % 2 == 1 and abs(digits[i]) < 2 ** (width - 1) for i in non_zero)
+    assert all(j - i >= width for i, j in pairwise(non_zero))
+
+
+@pytest.mark.parametrize("e", EXPONENTS)
+@pytest.mark.parametrize("width", [1, 2, 3, 4, 5])
+def test_sliding_window(e, width):
+    digits = sliding_window(e, width)
+    assert digits[-1] != 0
+    assert all(digit % 2 == 1 and 0 < digit * (1 if e > 0 else -1) < 2**width for digit in digits if digit != 0)
+
+
+@pytest.mark.parametrize(
+    ("e", "expected"),
+    [
+        (7, [-1, 0, 0, 1]),
+        (-7, [1, 0, 0, -1]),
+        (0b1011, [-1, 0, -1, 0, 1]),
+    ],
+)
+def test_naf(e, expected):
+    assert naf(e) == expected
+
+
+def signed_binary_cost(digits: list[int]) -> tuple[int, int]:
+    """The number of addition and doubling steps of a Miller loop with the expansion `digits`."""
+    return sum(digit != 0 for digit in digits) - 1, len(digits) - 1
+
+
+@pytest.mark.parametrize("e", EXPONENTS)
+def test_shortest_signed_binary(e):
+    digits = shortest_signed_binary(e)
+    assert to_integer(digits) == e
+    assert digits[-1] != 0
+    assert all(digit in {-1, 0, 1} for digit in digits)
+    assert signed_binary_cost(digits) <= signed_binary_cost(naf(e))
+    assert signed_binary_cost(digits) <= signed_binary_cost([int(bit) for bit in f"{abs(e):b}"[::-1]])
+
+
+def test_shortest_signed_binary_is_optimal():
+    best = {}
+    for length in range(1, 10):
+        for digits in product([-1, 0, 1], repeat=length):
+            if digits[-1] != 0:
+                e = to_integer(list(digits))
+                best[e] = min(best.get(e, (length, length)), signed_binary_cost(list(digits)))
+    for e in range(-(2**7), 2**7):
+        if e != 0:
+            assert signed_binary_cost(shortest_signed_binary(e)) == best[e]
+    assert shortest_signed_binary(13) == [1, 0, 1, 1]
+    assert shortest_signed_binary(0) == []
+
+
+@pytest.mark.parametrize("parameters", [bls12_381_parameters, mnt4_753_parameters])
+def test_miller_loop_expansions_are_shortest(parameters):
+    exp_miller_loop = parameters.exp_miller_loop
+    assert signed_binary_cost(exp_miller_loop) == signed_binary_cost(
+        shortest_signed_binary(to_integer(exp_miller_loop))
+    )
+
+
+def test_invalid_width():
+    with pytest.raises(ValueError, match="The width must be at least 2"):
+        width_naf(7, width=1)
+    with pytest.raises(ValueError, match="The width must be at least 1"):
+        sliding_window(7, width=0)
+
+
+def test_recodings_are_distinct():
+    candidates = recodings([1, 1, 1])
+    assert candidates["given"] == [1, 1, 1]
+    assert candidates["naf"] == [-1, 0, 0, 1]
+    # width_naf(7, 3) is equal to naf(7), and sliding_window(7, 3) = [7] has a single digit
+    assert "wnaf-3" not in candidates
+    assert candidates["sliding-2"] == [1, 3]
+    assert "sliding-3" not in candidates
+    assert len({tuple(digits) for digits in candidates.values()}) == len(candidates)
+
+
+@pytest.mark.parametrize("e", EXPONENTS[1:])
+@pytest.mark.parametrize("modulo_threshold", [1, 1000])
+def test_exponentiation_with_recodings(e, modulo_threshold):
+    x = 123456789
+    for digits in recodings(naf(e)).values():
+        lock = prime_field_exponentiation.cyclotomic_exponentiation(
+            exp_e=digits,
+            take_modulo=True,
+            modulo_threshold=modulo_threshold,
+            check_constant=True,
+            clean_constant=True,
+        )
+        lock += nums_to_script([pow(x, e, Q)]) + Script.parse_string("OP_EQUAL")
+
+        context = Context(script=nums_to_script([Q, x]) + lock)
+        assert context.evaluate()
+        assert context.get_stack().size() == 1
+        assert context.get_altstack().size() == 0
+
+
+def test_best_recoding():
+    exp_e = naf(0b1011101110001011101110001)
+    candidates = recodings(exp_e)
+    sizes = prime_field_exponentiation.recoding_sizes(exp_e, take_modulo=True, modulo_threshold=1000)
+    assert set(sizes) == set(candidates)
+
+    best = prime_field_exponentiation.best_recoding(exp_e, take_modulo=True, modulo_threshold=1000)
+    assert best in candidates.values()
+    assert sizes[next(name for name, digits in candidates.items() if digits == best)] == min(sizes.values())
+    assert prime_field_exponentiation.cyclotomic_exponentiation(
+        exp_e, take_modulo=True, modulo_threshold=1000, recode=True
+    ) == prime_field_exponentiation.cyclotomic_exponentiation(best, take_modulo=True, modulo_threshold=1000)
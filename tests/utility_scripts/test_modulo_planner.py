@@ -0,0 +1,148 @@
+import pytest
+from tx_engine import Context, Script
+
+from src.zkscript.fields.fq import Fq
+from src.zkscript.util.execution_cost import ExecutionCostModel
+from src.zkscript.util.modulo_planner import ModuloPlanner, ReductionStep, modulo_planner, worst_case
+from src.zkscript.util.stack_simulator import simulate
+from src.zkscript.util.utility_scripts import nums_to_script
+
+Q = 2**127 - 1
+
+
+def squaring(option: tuple[bool]) -> Script:
+    out = Script.parse_string("OP_DUP OP_MUL")
+    if option[0]:
+        out += nums_to_script([Q]) + Script.parse_string("OP_MOD")
+    return out
+
+
+def squaring_steps(n_steps: int) -> list[ReductionStep]:
+    return [ReductionStep(key="squaring", options=((True,), (False,)), generate=squaring, n_carried=1)] * n_steps
+
+
+@pytest.fixture(autouse=True)
+def clean_planner():
+    modulo_planner.disable()
+    modulo_planner.clear()
+    yield
+    modulo_planner.disable()
+    modulo_planner.clear()
+
+
+@pytest.mark.parametrize(
+    ("n_steps", "modulo_threshold", "objective", "expected"),
+    [
+        # Squaring twice a reduced element exceeds the threshold: reduce every other step
+        (4, 400, "size", [(False,), (True,), (False,), (True,)]),
+        # Squaring twice fits: reduce every third step
+        (5, 600, "size", [(False,), (False,), (True,), (False,), (False,)]),
+        # Multiplying reduced elements is cheaper: reduce at every step but the last
+        (4, 600, "execution", [(True,), (True,), (True,), (False,)]),
+        # The encoding of the operands is charged too: reduce once, before the two last squarings
+        (4, 600, ExecutionCostModel(), [(False,), (True,), (False,), (False,)]),
+    ],
+)
+def test_plan(n_steps, modulo_threshold, objective, expected):
+    planner = ModuloPlanner()
+    planner.enable(objective)
+    plan = planner.plan(squaring_steps(n_steps), modulus_bits=127, modulo_threshold=modulo_threshold, n_inputs=1)
+    assert plan == expected
+
+    # The carried element never exceeds the threshold
+    script = Script()
+    for option in plan:
+        script += squaring(option)
+        assert simulate(script, input_bits=(127,)).stack[-1].bits <= modulo_threshold
+
+
+def test_untouched_elements_are_carried():
+    # The squarings only touch the top of the stack, the element below is carried untouched
+    steps = [ReductionStep(key="squaring", options=((True,), (False,)), generate=squaring, n_carried=2)] * 4
+    plan = ModuloPlanner().plan(steps, modulus_bits=127, modulo_threshold=400, n_inputs=2)
+    assert plan == [(False,), (True,), (False,), (True,)]
+
+
+@pytest.mark.parametrize("modulo_threshold", [400, 800, 1600])
+def test_planned_inverse(modulo_threshold):
+    x = 123456789
+    field = Fq(Q)
+
+    with modulo_planner.active():
+        planned = field.inverse(
+            take_modulo=True, check_constant=True, clean_constant=True, modulo_threshold=modulo_threshold
+        )
+    default = field.inverse(
+        take_modulo=True, check_constant=True, clean_constant=True, mod_frequency=modulo_threshold // (127 * 3 + 3)
+    )
+
+    assert len(planned.raw_serialize()) <= len(default.raw_serialize())
+
+    lock = planned + nums_to_script([pow(x, -1, Q)]) + Script.parse_string("OP_EQUAL")
+    context = Context(script=nums_to_script([Q, x]) + lock)
+    assert context.evaluate()
+    assert context.get_stack().size() == 1
+
+
+def test_planned_inverse_is_default_when_disabled():
+    field = Fq(Q)
+    assert field.inverse(take_modulo=True, modulo_threshold=400) == field.inverse(take_modulo=True)
+
+
+def test_plans_are_cached():
+    calls = []
+
+    def generate(option):
+        calls.append(option)
+        return squaring(option)
+
+    steps = [ReductionStep(key="cached", options=((True,), (False,)), generate=generate, n_carried=1)] * 10
+    planner = ModuloPlanner()
+    first = planner.plan(steps, modulus_bits=127, modulo_threshold=400, n_inputs=1, key="squarings")
+    # Every option is generated once for all the steps with the same key
+    assert sorted(calls) == [(False,), (True,)]
+
+    calls.clear()
+    assert planner.plan(steps, modulus_bits=127, modulo_threshold=400, n_inputs=1, key="squarings") == first
+    assert calls == []
+
+    planner.clear()
+    planner.plan(steps, modulus_bits=127, modulo_threshold=400, n_inputs=1, key="squarings")
+    assert sorted(calls) == [(False,), (True,)]
+
+
+def test_plans_depend_on_the_cost_model():
+    planner = ModuloPlanner()
+    plans = []
+    for cost_model in [ExecutionCostModel(), ExecutionCostModel(div_per_word_product=1000.0)]:
+        planner.enable(cost_model)
+        plans.append(planner.plan(squaring_steps(4), modulus_bits=127, modulo_threshold=1600, n_inputs=1, key="key"))
+    # Reductions are expensive for the second model: the smallest element is reduced
+    assert plans == [[(False,), (True,), (False,), (False,)], [(True,), (False,), (False,), (False,)]]
+
+
+def test_active_restores_state():
+    assert not modulo_planner.is_enabled
+    with modulo_planner.active(objective="execution") as planner:
+        assert planner is modulo_planner
+        assert modulo_planner.is_enabled
+        assert modulo_planner.objective == "execution"
+    assert not modulo_planner.is_enabled
+    assert modulo_planner.objective == "size"
+
+
+def test_invalid_objective():
+    with pytest.raises(ValueError, match="The objective must be"):
+        modulo_planner.enable(objective="speed")
+    with pytest.raises(ValueError, match="The objective must be"), modulo_planner.active(objective="speed"):
+        pass
+
+
+def test_missing_reduce_all_option():
+    steps = [ReductionStep(key="unreduced", options=((False,),), generate=squaring, n_carried=1)]
+    with pytest.raises(ValueError, match="does not admit the option reducing every carried element"):
+        ModuloPlanner().plan(steps, modulus_bits=127, modulo_threshold=400, n_inputs=1)
+
+
+def test_worst_case():
+    assert worst_case([[1, 2], (3, True), None], 7) == [[6, 6], (6, True), None]
@@ -0,0 +1,83 @@
+import pytest
+from tx_engine import Script
+
+from src.zkscript.util.peephole_optimiser import PeepholeOptimiser, PeepholeRule, tokenise
+from src.zkscript.util.utility_functions import optimise_script
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        ("OP_1 0x00 OP_DUP", [1, 2, 1]),
+        ("0x" + "ab" * 76 + " OP_ADD", [78, 1]),
+        ("0x" + "ab" * 256 + " OP_0", [259, 1]),
+        ("0x" + "ab" * 65536, [65541]),
+        ("", []),
+    ],
+)
+def test_tokenise(script, expected):
+    raw = bytes(Script.parse_string(script).raw_serialize())
+    tokens = tokenise(raw)
+
+    assert [len(token) for token in tokens] == expected
+    assert b"".join(tokens) == raw
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        # Rewrites cascade: the replacement is matched against what precedes it
+        ("OP_SWAP OP_SWAP OP_ADD", ["OP_ADD"]),
+        ("OP_TOALTSTACK OP_SWAP OP_ADD OP_FROMALTSTACK", ["OP_TOALTSTACK", "OP_ADD", "OP_FROMALTSTACK"]),
+        ("OP_TOALTSTACK OP_ROT OP_ROT OP_ROT OP_FROMALTSTACK OP_1", ["OP_1"]),
+        # Pushes are never confused with opcodes
+        ("0x7c OP_ADD", ["0x7c", "OP_ADD"]),
+        ("0x00 OP_EQUAL OP_NOT", ["0x00", "OP_EQUAL", "OP_NOT"]),
+    ],
+)
+def test_optimise_script_cascade(script, expected):
+    assert optimise_script(Script.parse_string(script)).to_string().split() == expected
+
+
+def test_rule_selection_and_report():
+    rules = (
+        PeepholeRule(name="swap_add", pattern="OP_SWAP OP_ADD", replacement="OP_ADD"),
+        PeepholeRule(name="dup_drop", pattern="OP_DUP OP_DROP"),
+    )
+    script = Script.parse_string("OP_SWAP OP_ADD OP_DUP OP_DROP OP_ROT OP_ROT OP_ROT OP_DUP OP_DROP")
+
+    optimised, report = PeepholeOptimiser(rules).optimise_with_report(script)
+
+    assert optimised.to_string().split() == ["OP_ADD", "OP_ROT", "OP_ROT", "OP_ROT"]
+    assert report == {"swap_add": 1, "dup_drop": 4}
+    assert optimise_script(script, rules=rules[1:]).to_string().split() == [
+        "OP_SWAP",
+        "OP_ADD",
+        "OP_ROT",
+        "OP_ROT",
+        "OP_ROT",
+    ]
+
+
+def test_first_rule_wins():
+    rules = (
+        PeepholeRule(name="long", pattern="OP_1 OP_1 OP_ADD", replacement="OP_2"),
+        PeepholeRule(name="short", pattern="OP_1 OP_ADD", replacement="OP_1ADD"),
+    )
+    optimised, report = PeepholeOptimiser(rules).optimise_with_report(Script.parse_string("OP_1 OP_1 OP_ADD"))
+
+    assert optimised.to_string() == "OP_2"
+    assert report == {"long": 2, "short": 0}
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        PeepholeRule(name="empty", pattern=""),
+        PeepholeRule(name="growing", pattern="OP_DUP", replacement="OP_DUP OP_DUP"),
+        PeepholeRule(name="same_length", pattern="OP_SWAP OP_TUCK", replacement="OP_OVER OP_NOP"),
+    ],
+)
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError, match=f"The rule {rule.name} must have a non-empty pattern"):
+        PeepholeOptimiser((rule,))
@@ -0,0 +1,92 @@
+import pytest
+from tx_engine import Context, Script
+from tx_engine import encode_num as tx_engine_encode_num
+
+from src.zkscript.util.script_builder import ScriptBuilder, bytes_to_script, encode_num, encode_pushdata
+from src.zkscript.util.utility_scripts import nums_to_script
+
+
+@pytest.mark.parametrize("length", [0, 1, 75, 76, 255, 256, 65535, 65536])
+def test_encode_pushdata(length):
+    data = bytes([i % 256 for i in range(length)])
+    expected = Script()
+    expected.append_pushdata(data)
+
+    assert encode_pushdata(data) == bytes(expected.raw_serialize())
+
+
+@pytest.mark.parametrize("length", [0, 1, 252, 253, 65535, 65536])
+def test_bytes_to_script(length):
+    raw = bytes([0x76] * length)
+
+    assert bytes(bytes_to_script(raw).raw_serialize()) == raw
+
+
+@pytest.mark.parametrize(
+    "nums",
+    [
+        [],
+        [-2, -1, 0, 1, 2, 16, 17, 64, 128],
+        [2**255 - 19, -(2**381)],
+    ],
+)
+def test_nums(nums):
+    assert ScriptBuilder().nums(nums).to_script().to_string() == nums_to_script(nums).to_string()
+
+
+@pytest.mark.parametrize(
+    ("builder", "expected"),
+    [
+        (
+            ScriptBuilder().pick(position=8, n_elements=1).append_opcodes("OP_MUL").nums([17]),
+            "OP_8 OP_PICK OP_MUL 0x11",
+        ),
+        (ScriptBuilder().pick(position=1, n_elements=2), "OP_2DUP"),
+        (ScriptBuilder().pick(position=-1, n_elements=1), "OP_DEPTH OP_1SUB OP_PICK"),
+        (ScriptBuilder().pick(position=-2, n_elements=2), "OP_DEPTH OP_2 OP_SUB OP_PICK OP_DEPTH OP_3 OP_SUB OP_PICK"),
+        (ScriptBuilder().pick(position=17, n_elements=2), "0x11 OP_PICK 0x11 OP_PICK"),
+        (ScriptBuilder().roll(position=2, n_elements=2), "OP_ROT OP_ROT"),
+        (ScriptBuilder().roll(position=3, n_elements=4), ""),
+        (ScriptBuilder().roll(position=-1, n_elements=2), "OP_DEPTH OP_1SUB OP_ROLL OP_DEPTH OP_1SUB OP_ROLL"),
+        (ScriptBuilder().roll(position=300, n_elements=1), "0x2c01 OP_ROLL"),
+        (ScriptBuilder().mod(stack_preparation="", is_positive=False), "OP_TUCK OP_MOD"),
+        (
+            ScriptBuilder().mod(is_mod_on_top=False, is_constant_reused=False),
+            "OP_FROMALTSTACK OP_ROT OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD",
+        ),
+        (ScriptBuilder(Script.parse_string("OP_DUP")).append_opcodes([0x95]), "OP_DUP OP_MUL"),
+    ],
+)
+def test_builder_output(builder, expected):
+    assert builder.to_script().to_string() == expected
+
+
+def test_iadd():
+    out = ScriptBuilder()
+    out += Script.parse_string("OP_1 OP_2")
+    out += ScriptBuilder().append_opcodes("OP_ADD")
+    out += bytes([0x53])
+    out.append_opcodes("OP_EQUAL")
+
+    assert len(out) == 5
+    assert Context(script=out.to_script()).evaluate()
+
+    with pytest.raises(TypeError, match="Cannot append object of type"):
+        out += "OP_1"
+
+
+@pytest.mark.parametrize(("position", "n_elements"), [(1, 3), (10, 12)])
+@pytest.mark.parametrize("method", ["pick", "roll"])
+def test_errors_pick_and_roll(position, n_elements, method):
+    msg = r"When positive, position must be at least equal to n_elements - 1: "
+    msg += r"position: \d+, n_elements: \d+"
+    with pytest.raises(ValueError, match=msg):
+        getattr(ScriptBuilder(), method)(position, n_elements)
+
+
+@pytest.mark.parametrize(
+    "n",
+    [0, 1, -1, 127, 128, -128, 255, 256, -32768, 2**31, -(2**63) + 1, 2**255 - 19, -(2**381) + 5, 2**753 - 1],
+)
+def test_encode_num(n):
+    assert encode_num(n) == bytes(tx_engine_encode_num(n))
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from tx_engine import Script
+
+from src.zkscript.script_types.locking_keys.groth16 import Groth16LockingKey
+from src.zkscript.util.script_cache import ScriptCache
+
+
+def dummy_locking_key(alpha_beta_0: int = 0, has_precomputed_gradients: bool = False) -> Groth16LockingKey:
+    return Groth16LockingKey(
+        alpha_beta=[alpha_beta_0, 1],
+        minus_gamma=[2, 3],
+        minus_delta=[4, 5],
+        gamma_abc=[[6, 7]],
+        gradients_pairings=[[[[8]]], [[[9]]]],
+        has_precomputed_gradients=has_precomputed_gradients,
+    )
+
+
+@pytest.mark.parametrize(
+    ("parts", "other_parts"),
+    [
+        (("groth16_verifier", {"modulo_threshold": 1600}), ("groth16_verifier", {"modulo_threshold": 1601})),
+        (("groth16_verifier", 2**400), ("groth16_verifier", 2**400 + 1)),
+        ((dummy_locking_key(),), (dummy_locking_key(alpha_beta_0=1),)),
+        ((dummy_locking_key(),), (dummy_locking_key(has_precomputed_gradients=True),)),
+        (([1, 2],), ([[1, 2]],)),
+        ((None,), (False,)),
+        ((b"\x01",), ("01",)),
+    ],
+)
+def test_key(parts, other_parts):
+    assert ScriptCache.key(*parts) == ScriptCache.key(*parts)
+    assert ScriptCache.key(*parts) != ScriptCache.key(*other_parts)
+
+
+def test_key_unsupported_type():
+    with pytest.raises(TypeError, match="Cannot compute the cache key of an object of type"):
+        ScriptCache.key(object())
+
+
+@pytest.mark.parametrize("max_size", [0, -1])
+def test_invalid_max_size(tmp_path, max_size):
+    with pytest.raises(ValueError, match="The maximum size of the cache must be positive"):
+        ScriptCache(tmp_path, max_size=max_size)
+
+
+def test_get_or_generate(tmp_path):
+    cache = ScriptCache(tmp_path)
+    calls = []
+
+    def generator():
+        calls.append(1)
+        return Script.parse_string("OP_1 0x" + "ab" * 300 + " OP_DROP")
+
+    key = ScriptCache.key("generator")
+    assert cache.get(key) is None
+
+    first = cache.get_or_generate(key, generator)
+    second = cache.get_or_generate(key, generator)
+    assert len(calls) == 1
+    assert first.raw_serialize() == second.raw_serialize() == generator().raw_serialize()
+
+    # A new cache over the same directory sees the stored scripts
+    assert ScriptCache(tmp_path).get(key).raw_serialize() == first.raw_serialize()
+
+
+def test_lru_eviction(tmp_path):
+    cache = ScriptCache(tmp_path, max_size=160)
+    scripts = {name: Script.parse_string("0x" + "ab" * 74) for name in ["a", "b", "c"]}
+
+    for i, name in enumerate(["a", "b"]):
+        cache.put(ScriptCache.key(name), scripts[name])
+        os.utime(tmp_path / f"{ScriptCache.key(name)}.script", ns=(i, i))
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get(ScriptCache.key("a")) is not None
+    cache.put(ScriptCache.key("c"), scripts["c"])
+
+    assert cache.get(ScriptCache.key("b")) is None
+    assert cache.get(ScriptCache.key("a")) is not None
+    assert cache.get(ScriptCache.key("c")) is not None
+    assert cache.size() == 150
+
+    # Scripts larger than the cache are not stored
+    cache.put(ScriptCache.key("d"), Script.parse_string("0x" + "ab" * 300))
+    assert cache.get(ScriptCache.key("d")) is None
+
+    cache.clear()
+    assert cache.size() == 0
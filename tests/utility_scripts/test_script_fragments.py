@@ -0,0 +1,70 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from tx_engine import Script
+
+from src.zkscript.bilinear_pairings.bls12_381.bls12_381 import bls12_381
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_fragments import ScriptFragments
+from src.zkscript.util.script_profiler import script_profiler
+
+
+def build(out: ScriptFragments) -> bytes:
+    fq2 = Fq2(q=19, non_residue=-1)
+    out.nums([19])
+    out.submit(fq2.mul, take_modulo=True, check_constant=True, clean_constant=True)
+    out.append_opcodes("OP_ROT")
+    out += Script.parse_string("OP_DUP")
+    out.submit(fq2.square, take_modulo=False)
+    out.submit(fq2.conjugate, take_modulo=False)
+    return out.to_bytes()
+
+
+def expected() -> bytes:
+    fq2 = Fq2(q=19, non_residue=-1)
+    out = ScriptBuilder()
+    out.nums([19])
+    out += fq2.mul(take_modulo=True, check_constant=True, clean_constant=True)
+    out.append_opcodes("OP_ROT")
+    out += Script.parse_string("OP_DUP")
+    out += fq2.square(take_modulo=False)
+    out += fq2.conjugate(take_modulo=False)
+    return out.to_bytes()
+
+
+@pytest.mark.parametrize("executor_class", [None, ThreadPoolExecutor, ProcessPoolExecutor])
+def test_fragments_are_stitched_in_order(executor_class):
+    if executor_class is None:
+        out = build(ScriptFragments())
+    else:
+        with executor_class(max_workers=2) as executor:
+            out = build(ScriptFragments(executor))
+
+    assert out == expected()
+
+
+def test_fragments_with_initial_script_and_profiler():
+    with ThreadPoolExecutor(max_workers=1) as executor, script_profiler.active():
+        fragments = ScriptFragments(executor, Script.parse_string("OP_1"))
+        fragments.submit(Fq2(q=19, non_residue=-1).mul, take_modulo=False)
+
+    # Fragments are generated inline while profiling, so that they are attributed in the call tree
+    assert script_profiler.root.children["Fq2.mul"].calls == 1
+    script_profiler.clear()
+    assert fragments.to_bytes()[:1] == bytes(Script.parse_string("OP_1").raw_serialize())
+    assert len(ScriptBuilder(fragments)) == len(fragments)
+
+
+def test_pairing_model_is_picklable():
+    model = pickle.loads(pickle.dumps(bls12_381))  # noqa: S301
+
+    assert model.pad_eval_times_eval_to_miller_output.raw_serialize() == (
+        bls12_381.pad_eval_times_eval_to_miller_output.raw_serialize()
+    )
+    assert model.miller_loop_output_square(
+        take_modulo=True, check_constant=True, clean_constant=True
+    ).raw_serialize() == (
+        bls12_381.miller_loop_output_square(take_modulo=True, check_constant=True, clean_constant=True).raw_serialize()
+    )
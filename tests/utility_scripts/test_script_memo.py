@@ -0,0 +1,116 @@
+import pytest
+from tx_engine import Script
+
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.script_types.stack_elements import StackFiniteFieldElement
+from src.zkscript.util.script_memo import ScriptMemo, script_memo
+
+memo = ScriptMemo()
+
+
+class Generator:
+    def __init__(self):
+        self.calls = 0
+
+    @memo.memoise
+    def generate(self, n: int, element: StackFiniteFieldElement | None = None, extra: object = None) -> Script:  # noqa: ARG002
+        self.calls += 1
+        position = 0 if element is None else element.position
+        return Script.parse_string(f"OP_{n} OP_{position} OP_ADD")
+
+
+@pytest.fixture(autouse=True)
+def clean_memo():
+    memo.disable()
+    memo.clear()
+    yield
+    memo.disable()
+    memo.clear()
+
+
+def test_disabled_by_default():
+    assert not script_memo.is_enabled
+
+    generator = Generator()
+    generator.generate(1)
+    generator.generate(1)
+
+    assert generator.calls == 2
+    assert memo.stats() == {}
+
+
+def test_hits_and_misses():
+    generator = Generator()
+    with memo.active():
+        first = generator.generate(1, StackFiniteFieldElement(3, False, 2))
+        second = generator.generate(1, StackFiniteFieldElement(3, False, 2))
+        generator.generate(1, StackFiniteFieldElement(4, False, 2))
+        generator.generate(1, StackFiniteFieldElement(3, True, 2))
+        generator.generate(n=1)
+        generator.generate(n=1)
+    assert not memo.is_enabled
+
+    assert generator.calls == 4
+    assert first.raw_serialize() == second.raw_serialize()
+    assert memo.stats() == {"Generator.generate": (2, 4)}
+
+    # Distinct objects have distinct tables
+    with memo.active():
+        Generator().generate(1)
+    assert memo.stats() == {"Generator.generate": (2, 5)}
+
+
+def test_memoised_scripts_are_copied():
+    generator = Generator()
+    with memo.active():
+        first = generator.generate(1)
+        first += Script.parse_string("OP_DROP")
+        second = generator.generate(1)
+        second += Script.parse_string("OP_DUP")
+        third = generator.generate(1)
+
+    assert generator.calls == 1
+    assert third.raw_serialize() == Script.parse_string("OP_1 OP_0 OP_ADD").raw_serialize()
+
+
+def test_unhashable_arguments_are_not_memoised():
+    generator = Generator()
+    with memo.active():
+        generator.generate(1, extra=object())
+        generator.generate(1, extra=object())
+
+    assert generator.calls == 2
+    assert memo.stats() == {}
+
+
+def test_clear():
+    generator = Generator()
+    with memo.active():
+        generator.generate(1)
+        memo.clear()
+        generator.generate(1)
+
+    assert generator.calls == 2
+    assert memo.stats() == {"Generator.generate": (0, 1)}
+
+
+@pytest.mark.parametrize("take_modulo", [True, False])
+def test_field_methods(take_modulo):
+    script_memo.clear()
+    fq2 = Fq2(q=19, non_residue=-1)
+    expected = fq2.mul(take_modulo=take_modulo, check_constant=True, clean_constant=False)
+
+    with script_memo.active():
+        for _ in range(2):
+            assert (
+                fq2.mul(take_modulo=take_modulo, check_constant=True, clean_constant=False).raw_serialize()
+                == expected.raw_serialize()
+            )
+            # Unbound methods called with `self` as a keyword, as done when towering
+            assert (
+                Fq2.mul(self=fq2, take_modulo=take_modulo, check_constant=True, clean_constant=False).raw_serialize()
+                == expected.raw_serialize()
+            )
+
+    assert script_memo.stats()["Fq2.mul"] == (3, 1)
+    script_memo.clear()
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+from tx_engine import Script
+
+from src.zkscript.bilinear_pairings.mnt4_753.final_exponentiation import final_exponentiation
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.util.script_memo import script_memo
+from src.zkscript.util.script_profiler import ScriptProfiler, script_profiler
+
+profiler = ScriptProfiler()
+
+
+class Generator:
+    @profiler.profile
+    def leaf(self, n: int) -> Script:
+        return Script.parse_string(" ".join(["OP_DUP"] * n))
+
+    @profiler.profile
+    def node(self) -> Script:
+        out = self.leaf(2)
+        out += self.leaf(3)
+        out += Script.parse_string("OP_ADD 0x" + "ab" * 10)
+        return out
+
+    @profiler.profile
+    def shortest(self) -> Script:
+        with profiler.suspended():
+            sizes = {n: len(self.leaf(n).raw_serialize()) for n in [3, 2]}
+        return self.leaf(min(sizes, key=sizes.get))
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    profiler.disable()
+    profiler.clear()
+    yield
+    profiler.disable()
+    profiler.clear()
+
+
+def test_disabled_by_default():
+    assert not script_profiler.is_enabled
+
+    Generator().node()
+    assert profiler.root.children == {}
+
+
+def test_call_tree():
+    generator = Generator()
+    with profiler.active():
+        generator.node()
+        generator.node()
+        generator.leaf(1)
+    assert not profiler.is_enabled
+
+    node = profiler.root.children["Generator.node"]
+    leaf = node.children["Generator.leaf"]
+    assert (node.calls, node.size, node.n_opcodes) == (2, 2 * 17, 2 * 7)
+    assert (node.self_size, node.self_n_opcodes) == (2 * 12, 2 * 2)
+    assert (leaf.calls, leaf.size, leaf.n_opcodes) == (4, 10, 10)
+    assert profiler.root.children["Generator.leaf"].calls == 1
+
+    assert profiler.to_folded().split("\n") == [
+        "Generator.node 24",
+        "Generator.node;Generator.leaf 10",
+        "Generator.leaf 1",
+    ]
+    assert profiler.to_folded(metric="n_opcodes").split("\n")[0] == "Generator.node 4"
+
+    exported = json.loads(profiler.to_json())
+    assert (exported["name"], exported["size"], exported["n_opcodes"]) == ("all", 35, 15)
+    assert exported["children"][0]["children"][0] == {
+        "name": "Generator.leaf",
+        "calls": 4,
+        "size": 10,
+        "self_size": 10,
+        "n_opcodes": 10,
+        "self_n_opcodes": 10,
+        "children": [],
+    }
+
+
+def test_write(tmp_path):
+    with profiler.active():
+        Generator().node()
+    profiler.write_json(tmp_path / "profile.json")
+    profiler.write_folded(tmp_path / "profile.folded")
+
+    assert json.loads((tmp_path / "profile.json").read_text())["size"] == 17
+    assert (tmp_path / "profile.folded").read_text() == "Generator.node 12\nGenerator.node;Generator.leaf 5\n"
+
+    with pytest.raises(ValueError, match="The metric must be either size or n_opcodes"):
+        profiler.to_folded(metric="time")
+
+
+def test_memoisation_is_disabled_while_profiling():
+    fq2 = Fq2(q=19, non_residue=-1)
+    with script_memo.active(), script_profiler.active():
+        assert not script_memo.is_enabled
+        for _ in range(2):
+            fq2.mul(take_modulo=True, check_constant=True, clean_constant=False)
+    assert not script_memo.is_enabled
+
+    assert script_profiler.root.children["Fq2.mul"].calls == 2
+    script_profiler.clear()
+
+
+def test_suspended():
+    generator = Generator()
+    with profiler.active():
+        generator.shortest()
+        assert profiler.is_enabled
+    with profiler.suspended():
+        generator.node()
+    assert not profiler.is_enabled
+
+    node = profiler.root.children["Generator.shortest"]
+    assert (node.calls, node.size, node.self_size) == (1, 2, 0)
+    assert node.children["Generator.leaf"].calls == 1
+    assert list(profiler.root.children) == ["Generator.shortest"]
+
+
+def test_recoding_candidates_are_not_profiled():
+    with script_profiler.active():
+        final_exponentiation.cyclotomic_exponentiation(
+            exp_e=[1, 1, 1, 0, 1, 1, 1], take_modulo=True, modulo_threshold=1, clean_constant=False, recode=True
+        )
+
+    def check(node):
+        assert node.self_size >= 0
+        assert node.self_n_opcodes >= 0
+        for child in node.children.values():
+            check(child)
+
+    root = script_profiler.root.children["CyclotomicExponentiation.cyclotomic_exponentiation"]
+    assert root.calls == 1
+    check(root)
+    script_profiler.clear()
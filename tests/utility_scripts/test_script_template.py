@@ -0,0 +1,63 @@
+import pytest
+from tx_engine import Script
+
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_template import ScriptTemplate
+
+SENTINEL_X = 2**200 + 1
+SENTINEL_Y = 2**300 + 3
+SENTINEL_HASH = bytes(range(32))
+
+
+def generate(x: int, y: int, digest: bytes) -> bytes:
+    out = ScriptBuilder()
+    out.nums([x, 19]).append_opcodes("OP_ADD")
+    out.nums([y]).append_opcodes("OP_MUL OP_HASH256")
+    out.append_pushdata(digest).append_opcodes("OP_EQUALVERIFY")
+    out.nums([x]).append_opcodes("OP_EQUAL")
+    return out.to_bytes()
+
+
+@pytest.mark.parametrize(
+    ("x", "y", "digest"),
+    [
+        (0, 1, bytes(32)),
+        (16, 17, b"\xff" * 32),
+        (2**381 - 1, 2**64, bytes(20)),
+        (-1, -(2**100), b""),
+    ],
+)
+def test_instantiate(x, y, digest):
+    template = ScriptTemplate(
+        generate(SENTINEL_X, SENTINEL_Y, SENTINEL_HASH), {"x": SENTINEL_X, "y": SENTINEL_Y, "h": SENTINEL_HASH}
+    )
+
+    assert template.slots == ["x", "y", "h", "x"]
+    assert template.to_bytes({"x": x, "y": y, "h": digest}) == generate(x, y, digest)
+    assert template.instantiate({"x": x, "y": y, "h": digest}).raw_serialize() == generate(x, y, digest)
+
+
+@pytest.mark.parametrize(
+    ("script", "sentinels", "message"),
+    [
+        (generate(SENTINEL_X, SENTINEL_Y, SENTINEL_HASH), {"x": SENTINEL_X, "y": SENTINEL_X}, "same encoding"),
+        (generate(SENTINEL_X, SENTINEL_Y, SENTINEL_HASH), {"x": SENTINEL_X, "z": 2**100}, "not pushed"),
+        (
+            ScriptBuilder().nums([SENTINEL_X]).append_opcodes("OP_EQUAL OP_NOT").to_bytes(),
+            {"x": SENTINEL_X},
+            "cannot be patched",
+        ),
+    ],
+)
+def test_invalid_template(script, sentinels, message):
+    with pytest.raises(ValueError, match=message):
+        ScriptTemplate(script, sentinels)
+
+
+def test_invalid_constants():
+    template = ScriptTemplate(
+        Script.parse_string("OP_DUP") + ScriptBuilder().nums([SENTINEL_X]).to_script(), {"x": SENTINEL_X}
+    )
+
+    with pytest.raises(ValueError, match="do not match the template"):
+        template.instantiate({"y": 1})
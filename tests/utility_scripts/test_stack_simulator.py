@@ -0,0 +1,240 @@
+import pytest
+from tx_engine import Context, Script
+from tx_engine.engine import op_codes
+
+from src.zkscript.fields.fq2 import Fq2
+from src.zkscript.util.stack_simulator import (
+    StackChecks,
+    StackSimulator,
+    assert_stack_effect,
+    simulate,
+    stack_checks,
+)
+from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+
+
+def input_values(simulation, stack):
+    """Map the items `input[i]` of the simulation to the values of `stack`."""
+    return [stack[-1 - int(item.origin[len("input[") : -1])] for item in simulation.stack]
+
+
+@pytest.mark.parametrize(
+    ("position", "n_elements"),
+    [(0, 1), (1, 1), (2, 2), (3, 2), (3, 4), (8, 3), (-1, 1), (-1, 2), (-2, 2)],
+)
+@pytest.mark.parametrize("function", [pick, roll])
+def test_pick_and_roll(position, n_elements, function):
+    stack = list(range(10))
+    script = function(position, n_elements)
+
+    context = Context(script=nums_to_script(stack) + script)
+    assert context.evaluate()
+    expected = context.get_stack().decode_stack()
+
+    # With a known depth, every element is an input
+    simulation = StackSimulator(n_inputs=len(stack)).simulate(script)
+    assert input_values(simulation, stack) == expected
+
+    # With an unknown depth, elements accessed through OP_DEPTH are bottom elements
+    simulation = simulate(script)
+    if position >= 0:
+        assert simulation.n_inputs <= position + 1
+        assert stack[: len(stack) - simulation.n_inputs] + input_values(simulation, stack) == expected
+    else:
+        assert simulation.bottom_elements == frozenset(range(-position - 1, -position - 1 + n_elements))
+
+
+def test_provenance():
+    simulation = simulate(Script.parse_string("OP_2SWAP OP_TOALTSTACK OP_ADD OP_DUP OP_2 OP_FROMALTSTACK"))
+
+    assert simulation.n_inputs == 4
+    assert [item.origin for item in simulation.stack] == ["input[1]", "OP_ADD@2", "OP_ADD@2", "push@4", "input[2]"]
+    assert simulation.stack[1] is simulation.stack[2]
+    assert simulation.stack[3].value == 2
+    assert simulation.max_depth == 5
+    assert simulation.max_altstack_depth == 1
+
+
+def test_conditionals():
+    # The branches consume the same number of elements
+    simulation = simulate(Script.parse_string("OP_IF OP_ADD OP_ELSE OP_DROP OP_ENDIF"))
+    assert (simulation.n_inputs, simulation.n_outputs) == (3, 1)
+    assert simulation.stack[0].origin == "OP_IF@0"
+
+    # The branches leave stacks of different depths
+    script = Script.parse_string("OP_IF OP_DROP OP_ENDIF")
+    with pytest.raises(ValueError, match="The branches of the conditional at offset 0 leave stacks of different"):
+        simulate(script)
+    simulation = simulate(script, strict_branches=False)
+    assert (simulation.n_inputs, simulation.n_outputs, simulation.unbalanced_conditionals) == (2, 0, (0,))
+
+
+def test_data_dependent_picks():
+    simulation = simulate(Script.parse_string("OP_ADD OP_PICK OP_DUP"), n_inputs=4, input_bits=(8, 8, 16, 32))
+    assert [item.origin for item in simulation.stack] == ["input[3]", "input[2]", "OP_PICK@1", "OP_PICK@1"]
+    assert simulation.stack[-1] is simulation.stack[-2]
+    assert simulation.stack[-1].bits == 32
+
+    # The element picked is unknown, so that its size is only bounded with a known depth
+    assert simulate(Script.parse_string("OP_PICK")).stack[-1].bits is None
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        # The copy is consumed by the branch run when the value is non-zero
+        ("OP_IFDUP OP_IF OP_ADD OP_ENDIF", (2, 1)),
+        ("OP_IFDUP OP_IF OP_ADD OP_ELSE OP_1ADD OP_ENDIF", (2, 1)),
+        ("OP_IFDUP OP_NOTIF OP_1ADD OP_ELSE OP_ADD OP_ENDIF", (2, 1)),
+        # The value is known statically
+        ("OP_0 OP_IFDUP", (0, 1)),
+        ("OP_2 OP_IFDUP OP_ADD", (0, 1)),
+    ],
+)
+def test_ifdup(script, expected):
+    simulation = simulate(Script.parse_string(script))
+    assert (simulation.n_inputs, simulation.n_outputs) == expected
+
+
+@pytest.mark.parametrize(
+    ("script", "n_inputs", "altstack_inputs", "message"),
+    [
+        ("OP_ADD OP_ROLL", None, 0, "The argument of OP_ROLL at offset 1 is not known statically"),
+        ("OP_IFDUP OP_ADD", None, 0, "The stack effect of OP_IFDUP at offset 0 depends on the data"),
+        ("OP_IFDUP", None, 0, "The stack effect of OP_IFDUP at offset 0 depends on the data"),
+        ("OP_FROMALTSTACK", None, 0, "Altstack underflow at offset 0"),
+        ("OP_2 OP_ROLL", 2, 0, "Stack underflow at offset 1"),
+        ("OP_DEPTH OP_PICK", None, 0, "The argument of OP_PICK at offset 1 is larger than the depth of the stack"),
+        ("OP_IF OP_ELSE OP_ELSE OP_ENDIF", None, 0, "Unbalanced OP_ELSE at offset 2"),
+        ("OP_IF", None, 0, "Unbalanced OP_IF at offset 0"),
+        ("OP_CHECKMULTISIG", None, 0, "Unsupported opcode OP_CHECKMULTISIG@0"),
+    ],
+)
+def test_errors(script, n_inputs, altstack_inputs, message):
+    with pytest.raises(ValueError, match=message):
+        StackSimulator(n_inputs, altstack_inputs).simulate(Script.parse_string(script))
+
+
+@pytest.mark.parametrize("check_constant", [True, False])
+@pytest.mark.parametrize("clean_constant", [True, False])
+def test_field_scripts(check_constant, clean_constant):
+    fq2 = Fq2(q=19, non_residue=-1)
+
+    simulation = assert_stack_effect(
+        fq2.mul(take_modulo=True, check_constant=check_constant, clean_constant=clean_constant), n_inputs=4, n_outputs=2
+    )
+    assert simulation.bottom_elements == frozenset({0})
+    assert simulation.removed_bottom_elements == (frozenset({0}) if clean_constant else frozenset())
+
+    with pytest.raises(
+        AssertionError, match=r"Expected \(inputs, outputs, altstack outputs\) \(2, 1, 0\), got \(2, 2, 0\)"
+    ):
+        assert_stack_effect(fq2.square(take_modulo=False), n_inputs=2, n_outputs=1)
+
+
+@pytest.mark.parametrize(
+    ("script", "input_bits", "expected_bits", "arithmetic_cost"),
+    [
+        ("OP_MUL OP_ADD", (10, 20, 30), [31], 200),
+        ("OP_2DUP OP_MUL OP_ROT OP_ROT OP_MOD", (64, 32), [96, 32], 64 * 32 + 64),
+        ("OP_IF OP_DUP OP_MUL OP_ELSE OP_1ADD OP_ENDIF", (1, 40), [80], 1600),
+        ("OP_16 OP_NEGATE OP_SUB OP_ABS", (3,), [6], 0),
+    ],
+)
+def test_bit_lengths(script, input_bits, expected_bits, arithmetic_cost):
+    simulation = simulate(Script.parse_string(script), input_bits=input_bits)
+
+    assert [item.bits for item in simulation.stack] == expected_bits
+    assert simulation.arithmetic_cost == arithmetic_cost
+
+
+@pytest.mark.parametrize("take_modulo", [True, False])
+def test_bit_lengths_are_upper_bounds(take_modulo):
+    q = 2**127 - 1
+    fq2 = Fq2(q=q, non_residue=-1)
+    script = fq2.mul(take_modulo=take_modulo, positive_modulo=False, check_constant=False, clean_constant=False)
+    stack = [q, q - 1, -(q - 1), q - 2, q - 1]
+    simulation = simulate(script, input_bits=(q.bit_length(),) * 4, default_bits=q.bit_length())
+    assert simulation.max_bits == 2 * q.bit_length() + 1
+
+    # Check that |output| < 2^bits for every output, from the top of the stack
+    bounds = Script()
+    for item in simulation.stack[::-1]:
+        bounds += Script.parse_string("OP_ABS") + nums_to_script([2**item.bits])
+        bounds += Script.parse_string("OP_LESSTHAN OP_VERIFY")
+    context = Context(script=nums_to_script(stack) + script + bounds + Script.parse_string("OP_DROP OP_1"))
+    assert context.evaluate()
+
+
+def test_memory():
+    x = 2**100 - 1
+    # The stack holds 13, 26, 39, 13 + 26 and 38 bytes
+    simulation = simulate(nums_to_script([x]) + Script.parse_string("OP_DUP OP_DUP OP_MUL OP_MUL"), n_inputs=0)
+    assert simulation.max_memory == 39
+
+    # The elements moved to the altstack are counted
+    simulation = simulate(Script.parse_string("OP_TOALTSTACK OP_DUP"), input_bits=(100, 100))
+    assert simulation.max_memory == 39
+
+    # The inputs read by the script are counted from the beginning of the script
+    simulation = simulate(Script.parse_string("OP_DROP OP_DROP"), input_bits=(100, 100))
+    assert simulation.max_memory == 26
+
+
+@pytest.mark.parametrize(
+    ("script", "input_bits", "expected"),
+    [
+        ("OP_MUL OP_ADD", (10, 20, 30), [("OP_MUL", (20, 10), (30,), 0), ("OP_ADD", (30, 30), (31,), 0)]),
+        ("OP_3 OP_ROLL", (1, 2, 3, 4), [("OP_3", (), (2,), 0), ("OP_ROLL", (2,), (4,), 3)]),
+        # Only the most expensive branch is counted
+        (
+            "OP_IF OP_DUP OP_MUL OP_ELSE OP_1ADD OP_ENDIF",
+            (1, 40),
+            [("OP_IF", (1,), (), 0), ("OP_DUP", (40,), (40, 40), 0), ("OP_MUL", (40, 40), (80,), 0)],
+        ),
+    ],
+)
+def test_opcode_costs(script, input_bits, expected):
+    charged = []
+
+    def opcode_cost(op, operands, results, position):
+        charged.append((op, operands, results, position))
+        return len(charged)
+
+    simulation = simulate(Script.parse_string(script), input_bits=input_bits, opcode_cost=opcode_cost)
+    assert charged[: len(expected)] == [(getattr(op_codes, name), *rest) for name, *rest in expected]
+    assert simulation.execution_cost == sum(range(1, len(expected) + 1))
+
+
+def test_stack_checks():
+    checks = StackChecks()
+
+    @checks.check
+    def generate(script: str) -> Script:
+        return Script.parse_string(script)
+
+    assert not checks.is_enabled
+    generate("OP_TOALTSTACK")
+    assert checks.n_checked == {}
+
+    with checks.active():
+        generate("OP_IF OP_DROP OP_ENDIF OP_ADD")
+        with pytest.raises(AssertionError, match="leaves 1 elements on the altstack"):
+            generate("OP_TOALTSTACK")
+        with pytest.raises(AssertionError, match="cannot be simulated: Unbalanced OP_IF at offset 0"):
+            generate("OP_IF")
+    assert not checks.is_enabled
+    assert checks.n_checked == {"test_stack_checks.<locals>.generate": 1}
+
+    checks.clear()
+    assert checks.n_checked == {}
+
+
+@pytest.mark.parametrize("take_modulo", [True, False])
+def test_stack_checks_of_field_methods(take_modulo):
+    fq2 = Fq2(q=19, non_residue=-1)
+    stack_checks.clear()
+    with stack_checks.active():
+        fq2.mul(take_modulo=take_modulo, check_constant=True, clean_constant=True)
+    assert stack_checks.n_checked == {"Fq2.mul": 1}
+    stack_checks.clear()